@@ -3,38 +3,51 @@ from datetime import datetime, timezone
 
 from flask import Blueprint
 
+from app.cache_service import cached
+from app.cache_warmer import get_cache_warmer
 from app.core.ml_engine.secure_inference import SecureMLInferenceEngine
-from app.utils.response import build_success_response, success_response
+from app.utils.response import build_success_response, error_response, success_response
 
 bp = Blueprint("health", __name__)
 
 
-@bp.get("/status")
-def status():
-    # DTO data
+@cached("ml_status", ttl=30, warm=True)
+def get_ml_status():
+    """ML engine status and metrics (creating the engine and checking it is slow)."""
     engine = SecureMLInferenceEngine()
     ml_health = engine.health_check()
-    data = {
-        "message": "OK",
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "ml": {
-            "status": ml_health.get("status"),
-            "metrics": ml_health.get("metrics", {}),
-        },
+    return {
+        "status": ml_health.get("status"),
+        "metrics": ml_health.get("metrics", {}),
     }
+
+
+@bp.get("/status")
+def status():
     # Merge compatibility fields into the response
     response_data = {
         "status": "healthy",  # Compatibility field
         "message": "OK",
         "timestamp": datetime.now(timezone.utc).isoformat(),
-        "ml": {
-            "status": ml_health.get("status"),
-            "metrics": ml_health.get("metrics", {}),
-        },
+        "ml": get_ml_status(),
     }
     return success_response(data=response_data)
 
 
+@bp.get("/ready")
+def ready():
+    """Readiness probe: 503 until the cache warm-up has finished."""
+    warmer = get_cache_warmer()
+    if warmer.is_ready():
+        return success_response(data=warmer.status(), message="Ready")
+    return error_response(
+        message="Cache warm-up in progress",
+        error_code="NOT_READY",
+        status_code=503,
+        details=warmer.status(),
+    )
+
+
 @bp.get("/")
 def home():
     # Legacy home response expected by tests/clients
@@ -3,6 +3,7 @@ from typing import Any, Dict
 from flask import Blueprint, request
 from prometheus_client import Counter, REGISTRY
 
+from app.cache_service import cached
 from app.core.ml_engine.secure_inference import (
     SecureMLInferenceEngine,
     get_secure_inference_engine,
@@ -55,13 +56,18 @@ def ml_predict():
     return success_response(data=result)
 
 
-@bp.get("/ml/metrics")
-def ml_metrics():
+@cached("ml_metrics", ttl=30, stale_ttl=30, warm=True)
+def get_ml_metrics() -> Dict[str, Any]:
+    """Engine status, metrics and model info (the engine health check is slow)."""
     engine = get_secure_inference_engine()
     health = engine.health_check()
-    data = {
+    return {
         "status": health.get("status"),
         "metrics": health.get("metrics", {}),
         "model_info": health.get("model_info", {}),
     }
-    return success_response(data=data)
+
+
+@bp.get("/ml/metrics")
+def ml_metrics():
+    return success_response(data=get_ml_metrics())
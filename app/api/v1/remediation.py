@@ -14,37 +14,48 @@ from typing import Any, Dict, List, Optional
 from flask import Blueprint, jsonify, request
 
 from app.cache_service import cache_invalidate, cache_service, cached
+from app.cache_warmer import register_warmup
 from app.database_integration import db_service
-from app.services.remediation_service import (RemediationAction,
-                                              RemediationRule,
-                                              remediation_engine)
+from app.services.remediation_service import (
+    RemediationAction,
+    RemediationRule,
+    remediation_engine,
+)
 
 logger = logging.getLogger(__name__)
 bp = Blueprint("remediation", __name__, url_prefix="/api/v1/remediation")
 
+# Actions returned by /actions without a ``limit``
+DEFAULT_ACTION_LIMIT = 50
+
+
+@cached("remediation_status", ttl=30, warm=True)
+def build_remediation_status() -> Dict[str, Any]:
+    """Engine status with database metrics and cache health."""
+    status = remediation_engine.get_status()
+
+    # Add database metrics
+    db_metrics = (
+        db_service.get_performance_summary() if db_service.is_available() else {}
+    )
+
+    # Enhance status with additional information
+    return {
+        **status,
+        "database_metrics": db_metrics,
+        "cache_status": cache_service.health_check(),
+        "last_updated": datetime.now(timezone.utc).isoformat(),
+    }
+
 
 @bp.route("/status", methods=["GET"])
-@cached("remediation_status", ttl=30)
 def get_remediation_status():
     """Get the current status of the auto-remediation engine."""
     try:
-        status = remediation_engine.get_status()
-
-        # Add database metrics
-        db_metrics = (
-            db_service.get_performance_summary() if db_service.is_available() else {}
-        )
-
-        # Enhance status with additional information
-        enhanced_status = {
-            **status,
-            "database_metrics": db_metrics,
-            "cache_status": cache_service.health_check(),
-            "last_updated": datetime.now(timezone.utc).isoformat(),
-        }
+        enhanced_status = build_remediation_status()
 
         logger.info(
-            f"Remediation status requested - Engine: {status.get('enabled', False)}"
+            f"Remediation status requested - Engine: {enhanced_status.get('enabled', False)}"
         )
 
         return jsonify(
@@ -188,38 +199,45 @@ def set_manual_override():
         )
 
 
-@bp.route("/rules", methods=["GET"])
 @cached("remediation_rules", ttl=60)
+def build_remediation_rules() -> Dict[str, Any]:
+    """Configured remediation rules with totals."""
+    rules = []
+    for rule in remediation_engine.rules:
+        rules.append(
+            {
+                "name": rule.name,
+                "enabled": rule.enabled,
+                "priority": rule.priority,
+                "cooldown_minutes": rule.cooldown_minutes,
+                "trigger_count": rule.trigger_count,
+                "last_triggered": (
+                    rule.last_triggered.isoformat() if rule.last_triggered else None
+                ),
+                "conditions": rule.conditions,
+                "actions": [action.value for action in rule.actions],
+            }
+        )
+
+    return {
+        "rules": rules,
+        "total_rules": len(rules),
+        "enabled_rules": len([r for r in rules if r["enabled"]]),
+    }
+
+
+@bp.route("/rules", methods=["GET"])
 def get_rules():
     """Get all remediation rules."""
     try:
-        rules = []
-        for rule in remediation_engine.rules:
-            rules.append(
-                {
-                    "name": rule.name,
-                    "enabled": rule.enabled,
-                    "priority": rule.priority,
-                    "cooldown_minutes": rule.cooldown_minutes,
-                    "trigger_count": rule.trigger_count,
-                    "last_triggered": (
-                        rule.last_triggered.isoformat() if rule.last_triggered else None
-                    ),
-                    "conditions": rule.conditions,
-                    "actions": [action.value for action in rule.actions],
-                }
-            )
+        rules = build_remediation_rules()
 
-        logger.info(f"Retrieved {len(rules)} remediation rules")
+        logger.info(f"Retrieved {rules['total_rules']} remediation rules")
 
         return jsonify(
             {
                 "status": "success",
-                "data": {
-                    "rules": rules,
-                    "total_rules": len(rules),
-                    "enabled_rules": len([r for r in rules if r["enabled"]]),
-                },
+                "data": rules,
                 "timestamp": datetime.now(timezone.utc).isoformat(),
             }
         )
@@ -435,12 +453,29 @@ def remove_rule(rule_name):
         )
 
 
-@bp.route("/actions", methods=["GET"])
 @cached("remediation_actions", ttl=30)
+def get_recent_actions(limit: int) -> Dict[str, Any]:
+    """The ``limit`` most recent remediation actions and totals."""
+    actions = (
+        remediation_engine.action_history[-limit:]
+        if remediation_engine.action_history
+        else []
+    )
+    return {
+        "actions": actions,
+        "total_actions": len(remediation_engine.action_history),
+        "recent_actions": len(actions),
+    }
+
+
+register_warmup(get_recent_actions, args=(DEFAULT_ACTION_LIMIT,))
+
+
+@bp.route("/actions", methods=["GET"])
 def get_action_history():
     """Get the history of remediation actions."""
     try:
-        limit = request.args.get("limit", 50, type=int)
+        limit = request.args.get("limit", DEFAULT_ACTION_LIMIT, type=int)
 
         # Validate limit
         if limit < 1 or limit > 1000:
@@ -455,22 +490,14 @@ def get_action_history():
                 400,
             )
 
-        actions = (
-            remediation_engine.action_history[-limit:]
-            if remediation_engine.action_history
-            else []
-        )
+        history = get_recent_actions(limit)
 
-        logger.info(f"Retrieved {len(actions)} remediation actions")
+        logger.info(f"Retrieved {history['recent_actions']} remediation actions")
 
         return jsonify(
             {
                 "status": "success",
-                "data": {
-                    "actions": actions,
-                    "total_actions": len(remediation_engine.action_history),
-                    "recent_actions": len(actions),
-                },
+                "data": history,
                 "timestamp": datetime.now(timezone.utc).isoformat(),
             }
         )
@@ -606,56 +633,62 @@ def test_remediation():
         )
 
 
+@cached("remediation_metrics", ttl=60, stale_ttl=60, warm=True)
+def build_remediation_metrics() -> Dict[str, Any]:
+    """Engine, rule and action summaries with database metrics."""
+    status = remediation_engine.get_status()
+
+    # Calculate additional metrics
+    total_rules = status["total_rules"]
+    enabled_rules = status["enabled_rules"]
+    total_actions = status["total_actions"]
+
+    # Calculate success rate from recent actions
+    recent_actions = status["recent_actions"]
+    successful_actions = sum(
+        1 for action in recent_actions if action.get("success", False)
+    )
+    success_rate = (
+        (successful_actions / len(recent_actions) * 100) if recent_actions else 0
+    )
+
+    # Get database metrics if available
+    db_metrics = {}
+    if db_service.is_available():
+        db_metrics = db_service.get_performance_summary()
+
+    return {
+        "engine_status": {
+            "enabled": status["enabled"],
+            "manual_override": status["manual_override"],
+        },
+        "rules_summary": {
+            "total_rules": total_rules,
+            "enabled_rules": enabled_rules,
+            "disabled_rules": total_rules - enabled_rules,
+        },
+        "actions_summary": {
+            "total_actions": total_actions,
+            "recent_actions": len(recent_actions),
+            "success_rate_percent": round(success_rate, 2),
+        },
+        "performance": {
+            "uptime_percent": 100 if status["enabled"] else 0,
+            "response_time_ms": 50,  # Placeholder
+            "last_action_timestamp": (
+                recent_actions[-1]["timestamp"] if recent_actions else None
+            ),
+        },
+        "database_metrics": db_metrics,
+    }
+
+
 @bp.route("/metrics", methods=["GET"])
-@cached("remediation_metrics", ttl=60)
 def get_remediation_metrics():
     """Get metrics about the auto-remediation engine performance."""
     try:
-        status = remediation_engine.get_status()
-
-        # Calculate additional metrics
-        total_rules = status["total_rules"]
-        enabled_rules = status["enabled_rules"]
-        total_actions = status["total_actions"]
-
-        # Calculate success rate from recent actions
-        recent_actions = status["recent_actions"]
-        successful_actions = sum(
-            1 for action in recent_actions if action.get("success", False)
-        )
-        success_rate = (
-            (successful_actions / len(recent_actions) * 100) if recent_actions else 0
-        )
-
-        # Get database metrics if available
-        db_metrics = {}
-        if db_service.is_available():
-            db_metrics = db_service.get_performance_summary()
-
-        metrics = {
-            "engine_status": {
-                "enabled": status["enabled"],
-                "manual_override": status["manual_override"],
-            },
-            "rules_summary": {
-                "total_rules": total_rules,
-                "enabled_rules": enabled_rules,
-                "disabled_rules": total_rules - enabled_rules,
-            },
-            "actions_summary": {
-                "total_actions": total_actions,
-                "recent_actions": len(recent_actions),
-                "success_rate_percent": round(success_rate, 2),
-            },
-            "performance": {
-                "uptime_percent": 100 if status["enabled"] else 0,
-                "response_time_ms": 50,  # Placeholder
-                "last_action_timestamp": (
-                    recent_actions[-1]["timestamp"] if recent_actions else None
-                ),
-            },
-            "database_metrics": db_metrics,
-        }
+        metrics = build_remediation_metrics()
+        success_rate = metrics["actions_summary"]["success_rate_percent"]
 
         logger.info(
             f"Retrieved remediation metrics - Success rate: {success_rate:.2f}%"
@@ -21,6 +21,11 @@ from typing import Dict, List, Optional, Set, Tuple
 
 from flask import g, jsonify, request, current_app
 
+try:
+    from app.gcra_limiter import create_rate_limiter, per_minute_and_hour
+except ImportError:
+    from gcra_limiter import create_rate_limiter, per_minute_and_hour
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -72,7 +77,7 @@ class SecureAPIKeyAuth:
     def __init__(self, app=None):
         self.app = app
         self.api_keys: Dict[str, APIKeyInfo] = {}
-        self.rate_limits = defaultdict(list)
+        self.rate_limiter = create_rate_limiter("apikey")
         self.auth_attempts: List[AuthAttempt] = []
         self.blocked_ips = defaultdict(list)
         self.active_sessions = {}
@@ -302,9 +307,6 @@ class SecureAPIKeyAuth:
                 key_info.last_used = datetime.now(timezone.utc)
                 session_id = self._create_session(key_info)
 
-                # Record rate limit usage
-                self._record_request(key_hash)
-
                 # Log successful authentication
                 self._log_auth_attempt(
                     api_key, client_ip, user_agent, endpoint, required_permission, True
@@ -365,40 +367,11 @@ class SecureAPIKeyAuth:
         self.blocked_ips[ip_address].append(datetime.now(timezone.utc))
 
     def _is_rate_limited(self, key_hash: str, key_info: APIKeyInfo) -> bool:
-        """Check if API key has exceeded rate limits"""
-        current_time = datetime.now(timezone.utc)
-
-        # Clean old rate limit entries
-        hour_cutoff = current_time - timedelta(hours=1)
-        minute_cutoff = current_time - timedelta(minutes=1)
-
-        self.rate_limits[key_hash] = [
-            timestamp
-            for timestamp in self.rate_limits[key_hash]
-            if timestamp > hour_cutoff
-        ]
-
-        # Check hourly limit
-        hourly_requests = len(self.rate_limits[key_hash])
-        if hourly_requests >= key_info.rate_limit_per_hour:
-            return True
-
-        # Check per-minute limit
-        minute_requests = len(
-            [
-                timestamp
-                for timestamp in self.rate_limits[key_hash]
-                if timestamp > minute_cutoff
-            ]
+        """Take a request from the API key's per-minute and per-hour limits"""
+        limits = per_minute_and_hour(
+            key_info.rate_limit_per_minute, key_info.rate_limit_per_hour
         )
-        if minute_requests >= key_info.rate_limit_per_minute:
-            return True
-
-        return False
-
-    def _record_request(self, key_hash: str):
-        """Record request for rate limiting"""
-        self.rate_limits[key_hash].append(datetime.now(timezone.utc))
+        return not self.rate_limiter.check(key_hash, limits).allowed
 
     def _create_session(self, key_info: APIKeyInfo) -> str:
         """Create secure session for tracking"""
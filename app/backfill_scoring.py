@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Historical Backfill Scorer
+============================================
+
+Re-scores stored ``metrics`` rows with the currently deployed model after a
+promotion, so ``anomaly_score`` / ``is_anomaly`` (and the rollups and
+dashboards built on them) are consistent across history.
+
+- rows are streamed in keyset order (``id > :last_id ORDER BY id``)
+- each chunk is scored with one vectorized model call
+- scores are written back in one statement per chunk (``unnest`` arrays on
+  PostgreSQL, ``executemany`` elsewhere)
+- the rollups' anomaly counts are adjusted by each chunk's flag changes, so
+  rollup history is never rebuilt (and buckets whose raw rows retention
+  already dropped keep their counts)
+- throughput is capped (rows/s and a duty cycle) so live ingest keeps the
+  database
+- progress is checkpointed in ``backfill_checkpoints`` in the same
+  transaction as each chunk's scores; a rerun resumes after the last chunk
+- with SQLite shards (``DB_PARTITIONING``) the shard files are re-scored
+  after the main table, oldest first
+
+The job is keyed by the model's identity (its version plus a hash of the
+model file, or its training date): promoting another model starts a new
+backfill even when the version string is unchanged, rerunning the same
+one resumes it.
+"""
+
+import hashlib
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import pandas as pd
+    from sqlalchemy import inspect, text
+
+    DEPENDENCIES_AVAILABLE = True
+except ImportError:
+    DEPENDENCIES_AVAILABLE = False
+    pd = None
+    inspect = text = None
+
+try:
+    from app.metrics_rollups import MetricsRollupManager, rollup_table
+except ImportError:
+    from metrics_rollups import MetricsRollupManager, rollup_table
+
+logger = logging.getLogger(__name__)
+
+# Shard files are named by the start of their period
+SHARD_KEY_FORMAT = "%Y%m%d"
+
+SOURCE_COLUMNS = (
+    "cpu_usage",
+    "memory_usage",
+    "disk_usage",
+    "network_rx",
+    "network_tx",
+    "load_1m",
+    "load_5m",
+    "load_15m",
+    "response_time",
+)
+
+
+CHECKPOINT_TABLE = "backfill_checkpoints"
+
+# Model file hashed into the job key (see SecureMLInferenceEngine._save_model)
+MODEL_FILE = "anomaly_detection_model.pkl"
+
+
+def model_key(model) -> str:
+    """
+    Identity of a deployed model, for keying its backfill.
+
+    The version alone is not enough: retrained models are saved with the
+    same version string. A hash of the model file (or else the training
+    date) tells them apart.
+    """
+    metadata = getattr(model, "model_metadata", None) or {}
+    version = str(metadata.get("model_version", "unknown"))
+
+    model_path = getattr(model, "model_path", None)
+    model_file = Path(model_path) / MODEL_FILE if model_path else None
+    if model_file is not None and model_file.is_file():
+        digest = hashlib.sha256()
+        with open(model_file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return f"{version}:{digest.hexdigest()[:16]}"
+
+    trained = metadata.get("training_date")
+    return f"{version}:{trained}" if trained else version
+
+
+class BackfillScorer:
+    """Re-scores historical metrics with a model, resumably and throttled."""
+
+    def __init__(
+        self,
+        engine,
+        model,
+        chunk_size: Optional[int] = None,
+        max_rows_per_second: Optional[float] = None,
+        duty_cycle: Optional[float] = None,
+        on_chunk: Optional[Callable[[int], None]] = None,
+        executor=None,
+        shards=None,
+    ):
+        """
+        Initialize the backfill scorer.
+
+        Args:
+            engine: SQLAlchemy engine of the metrics database
+            model: Inference engine with ``score_frame`` and ``model_metadata``
+            chunk_size: Rows per chunk (BACKFILL_CHUNK_SIZE, default 5000)
+            max_rows_per_second: Throughput cap (BACKFILL_MAX_ROWS_PER_SEC,
+                default 20000; 0 disables)
+            duty_cycle: Max fraction of wall time spent working
+                (BACKFILL_DUTY_CYCLE, default 0.5)
+            on_chunk: Called with the chunk's row count after each commit
+            executor: Optional ``SQLiteWriter`` that performs the writes
+                (embedded SQLite's single writer thread)
+            shards: ``SQLiteShardManager`` of a sharded database; its files
+                are re-scored after the main table
+        """
+        self.engine = engine
+        self.model = model
+        self.chunk_size = chunk_size or int(os.getenv("BACKFILL_CHUNK_SIZE", "5000"))
+        self.max_rows_per_second = (
+            max_rows_per_second
+            if max_rows_per_second is not None
+            else float(os.getenv("BACKFILL_MAX_ROWS_PER_SEC", "20000"))
+        )
+        self.duty_cycle = min(
+            1.0, duty_cycle or float(os.getenv("BACKFILL_DUTY_CYCLE", "0.5"))
+        )
+        self.on_chunk = on_chunk
+        self.executor = executor
+        self.shards = shards
+        self.rollups = None
+        self.model_version = str(model.model_metadata.get("model_version", "unknown"))
+        self.job_key = f"rescore:{model_key(model)}"
+
+    def _ensure_checkpoint_table(self):
+        """Create the checkpoint table if it does not exist."""
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"""
+                CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                    job_key VARCHAR(200) PRIMARY KEY,
+                    model_version VARCHAR(50),
+                    shard VARCHAR(20) NOT NULL DEFAULT '',
+                    last_id BIGINT NOT NULL DEFAULT 0,
+                    rows_scored BIGINT NOT NULL DEFAULT 0,
+                    anomalies BIGINT NOT NULL DEFAULT 0,
+                    completed BOOLEAN NOT NULL DEFAULT FALSE,
+                    updated_at VARCHAR(40)
+                )
+            """
+                )
+            )
+
+    def load_checkpoint(self) -> Dict[str, Any]:
+        """Saved progress, or a fresh state."""
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                text(
+                    "SELECT model_version, shard, last_id, rows_scored, anomalies, "
+                    f"completed, updated_at FROM {CHECKPOINT_TABLE} "
+                    "WHERE job_key = :job_key"
+                ),
+                {"job_key": self.job_key},
+            ).fetchone()
+        if row is not None:
+            state = dict(row._mapping)
+            state["completed"] = bool(state["completed"])
+            return state
+        return {
+            "model_version": self.model_version,
+            "shard": "",
+            "last_id": 0,
+            "rows_scored": 0,
+            "anomalies": 0,
+            "completed": False,
+        }
+
+    def _save_checkpoint(self, state: Dict[str, Any], conn=None):
+        """Upsert the checkpoint, in ``conn``'s transaction when given."""
+        if conn is None:
+            with self.engine.begin() as own_conn:
+                return self._save_checkpoint(state, own_conn)
+
+        state["updated_at"] = datetime.now(timezone.utc).isoformat()
+        params = {"job_key": self.job_key, **state}
+        updated = conn.execute(
+            text(
+                f"UPDATE {CHECKPOINT_TABLE} SET model_version = :model_version, "
+                "shard = :shard, last_id = :last_id, rows_scored = :rows_scored, "
+                "anomalies = :anomalies, completed = :completed, "
+                "updated_at = :updated_at WHERE job_key = :job_key"
+            ),
+            params,
+        )
+        if updated.rowcount == 0:
+            conn.execute(
+                text(
+                    f"INSERT INTO {CHECKPOINT_TABLE} (job_key, model_version, shard, "
+                    "last_id, rows_scored, anomalies, completed, updated_at) VALUES "
+                    "(:job_key, :model_version, :shard, :last_id, :rows_scored, "
+                    ":anomalies, :completed, :updated_at)"
+                ),
+                params,
+            )
+
+    def _reset_checkpoint(self):
+        """Forget the saved progress of this job."""
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(f"DELETE FROM {CHECKPOINT_TABLE} WHERE job_key = :job_key"),
+                {"job_key": self.job_key},
+            )
+
+    def _sources(self) -> List[str]:
+        """Tables to re-score in order: the main table, then shards by age."""
+        sources = [""] if inspect(self.engine).has_table("metrics") else []
+        if self.shards is not None:
+            sources += [f"{s:{SHARD_KEY_FORMAT}}" for s in self.shards.shards()]
+        return sources
+
+    def _source_engine(self, shard: str):
+        """Engine holding the ``metrics`` rows of a source."""
+        if not shard:
+            return self.engine
+        return self.shards.engine(datetime.strptime(shard, SHARD_KEY_FORMAT))
+
+    def _fetch_chunk(self, shard: str, last_id: int) -> "pd.DataFrame":
+        """Next chunk of rows of a source after ``last_id`` in id order."""
+        with self._source_engine(shard).connect() as conn:
+            result = conn.execute(
+                text(
+                    "SELECT id, timestamp, source, is_anomaly, "
+                    f"{', '.join(SOURCE_COLUMNS)} FROM metrics "
+                    "WHERE id > :last_id ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "limit": self.chunk_size},
+            )
+            frame = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+        # The models are trained on total network traffic
+        frame["network_io"] = frame["network_rx"].fillna(0) + frame[
+            "network_tx"
+        ].fillna(0)
+        return frame
+
+    def _update_rows(
+        self, conn, ids: List[int], scores: List[float], flags: List[bool]
+    ):
+        """Write one chunk of scores to the ``metrics`` table behind ``conn``."""
+        if conn.dialect.name == "postgresql":
+            conn.execute(
+                text(
+                    "UPDATE metrics AS m SET anomaly_score = v.score, is_anomaly = v.flag "
+                    "FROM unnest(CAST(:ids AS bigint[]), CAST(:scores AS double precision[]), "
+                    "CAST(:flags AS boolean[])) AS v(id, score, flag) WHERE m.id = v.id"
+                ),
+                {"ids": ids, "scores": scores, "flags": flags},
+            )
+        else:
+            conn.execute(
+                text(
+                    "UPDATE metrics SET anomaly_score = :score, is_anomaly = :flag "
+                    "WHERE id = :id"
+                ),
+                [
+                    {"id": i, "score": s, "flag": int(f)}
+                    for i, s, f in zip(ids, scores, flags)
+                ],
+            )
+
+    def _write_scores(
+        self,
+        shard: str,
+        ids: List[int],
+        scores: List[float],
+        flags: List[bool],
+        changes: List[Tuple[Any, Optional[str], int]],
+        state: Dict[str, Any],
+    ):
+        """
+        Write one chunk of scores, its rollup adjustment and its checkpoint.
+
+        Rows of the main table share one transaction with the rollups and the
+        checkpoint. A shard is a separate file, so its scores are committed
+        first; a crash in between leaves that chunk's anomaly counts out of
+        the rollups, while the rerun skips the chunk.
+        """
+        if shard:
+            with self._source_engine(shard).begin() as conn:
+                self._update_rows(conn, ids, scores, flags)
+
+        with self.engine.begin() as conn:
+            if not shard:
+                self._update_rows(conn, ids, scores, flags)
+            if self.rollups is not None and changes:
+                self.rollups.adjust_anomalies(conn, changes)
+            self._save_checkpoint(state, conn)
+
+    def _write(self, fn, *args):
+        """Run a write on the executor's thread when there is one."""
+        if self.executor is not None:
+            # Background job: wait behind live writes as long as it takes
+            return self.executor.call(fn, *args, timeout=None)
+        return fn(*args)
+
+    def _throttle(self, rows: int, elapsed: float):
+        """Sleep long enough to respect the rate cap and the duty cycle."""
+        pause = elapsed * (1 - self.duty_cycle) / self.duty_cycle
+        if self.max_rows_per_second:
+            pause = max(pause, rows / self.max_rows_per_second - elapsed)
+        if pause > 0:
+            time.sleep(pause)
+
+    def run(
+        self, max_chunks: Optional[int] = None, reset: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Re-score metrics from the checkpoint onwards.
+
+        Args:
+            max_chunks: Stop after this many chunks (the job stays resumable)
+            reset: Ignore the saved checkpoint and start from the first row
+
+        Returns:
+            Checkpoint state after the run
+        """
+        self._write(self._ensure_checkpoint_table)
+        if reset:
+            self._write(self._reset_checkpoint)
+        state = self.load_checkpoint()
+        if state["completed"]:
+            logger.info(f"Backfill for model {self.model_version} already completed")
+            return state
+
+        if inspect(self.engine).has_table(rollup_table("1m")):
+            self.rollups = MetricsRollupManager(self.engine)
+        # Shards created from now on are scored by this model at ingest
+        sources = self._sources()
+
+        chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            started = time.monotonic()
+            frame = (
+                self._fetch_chunk(state["shard"], state["last_id"])
+                if state["shard"] in sources
+                else pd.DataFrame()
+            )
+            if frame.empty:
+                following = [s for s in sources if s > state["shard"]]
+                if following:
+                    state["shard"], state["last_id"] = following[0], 0
+                    self._write(self._save_checkpoint, state)
+                    continue
+
+                state["completed"] = True
+                self._write(self._save_checkpoint, state)
+                logger.info(
+                    f"✅ Backfill for model {self.model_version} completed: "
+                    f"{state['rows_scored']} rows, {state['anomalies']} anomalies"
+                )
+                break
+
+            flags, scores = self.model.score_frame(frame)
+            ids = [int(i) for i in frame["id"]]
+            previous = frame["is_anomaly"].fillna(0).astype(int)
+            changes = [
+                (ts, source, int(new) - int(old))
+                for ts, source, old, new in zip(
+                    frame["timestamp"], frame["source"], previous, flags
+                )
+                if int(new) != int(old)
+            ]
+            state["last_id"] = ids[-1]
+            state["rows_scored"] += len(ids)
+            state["anomalies"] += int(flags.sum())
+            self._write(
+                self._write_scores,
+                state["shard"],
+                ids,
+                [float(s) for s in scores],
+                [bool(f) for f in flags],
+                changes,
+                state,
+            )
+            chunks += 1
+            if self.on_chunk:
+                self.on_chunk(len(ids))
+
+            self._throttle(len(ids), time.monotonic() - started)
+
+        return state
+
+
+__all__ = ["BackfillScorer"]
@@ -17,7 +17,11 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from cache_service import cache_service
+try:
+    from app.cache_service import cache_service
+except ImportError:
+    from cache_service import cache_service
+
 from core.ml_engine.secure_inference import SecureMLInferenceEngine
 from utils.response import build_error_response, build_success_response
 
@@ -34,9 +38,10 @@ except ImportError:
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from cache_service import cache_service
+from backfill_scoring import BackfillScorer
 from config import config
 from database_integration import db_service
+from metrics_archive import MetricsArchiver
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +65,7 @@ if CELERY_AVAILABLE:
         worker_max_tasks_per_child=1000,
         task_routes={
             "app.background_tasks.train_ml_model": {"queue": "ml_training"},
+            "app.background_tasks.backfill_anomaly_scores": {"queue": "ml_training"},
             "app.background_tasks.process_metrics_data": {"queue": "data_processing"},
             "app.background_tasks.system_maintenance": {"queue": "maintenance"},
             "app.background_tasks.send_notifications": {"queue": "notifications"},
@@ -157,8 +163,7 @@ def train_ml_model(
 
         # Import ML engine here to avoid circular imports
         try:
-            from app.core.ml_engine.secure_inference import \
-                SecureMLInferenceEngine
+            from app.core.ml_engine.secure_inference import SecureMLInferenceEngine
 
             ml_engine = SecureMLInferenceEngine()
         except ImportError:
@@ -216,6 +221,45 @@ def train_ml_model(
         raise self.retry(countdown=60, exc=exc)
 
 
+def backfill_anomaly_scores(
+    max_chunks: Optional[int] = None, reset: bool = False
+) -> Dict[str, Any]:
+    """
+    Re-score stored metrics with the deployed model after a promotion.
+
+    The backfill is throttled and checkpointed; running the task again
+    resumes it until the whole history carries the new model's scores.
+
+    Args:
+        max_chunks: Stop after this many chunks (default: run to completion)
+        reset: Start over instead of resuming
+
+    Returns:
+        Backfill progress
+    """
+    if not db_service.engine:
+        return {"status": "error", "message": "Database not available"}
+
+    try:
+        scorer = BackfillScorer(
+            db_service.engine,
+            SecureMLInferenceEngine(),
+            on_chunk=lambda rows: db_service._invalidate("metrics"),
+            executor=db_service.sqlite_writer,
+            shards=db_service.shards,
+        )
+        state = scorer.run(max_chunks=max_chunks, reset=reset)
+        db_service._invalidate("metrics")
+        return {
+            "status": "success",
+            "data": state,
+            "message": f"Re-scored {state['rows_scored']} metrics with model {scorer.model_version}",
+        }
+    except Exception as e:
+        logger.error(f"Anomaly score backfill failed: {e}")
+        return {"status": "error", "message": str(e)}
+
+
 def process_metrics_data(
     metrics_data: List[Dict[str, Any]], operation: str = "analyze"
 ) -> Dict[str, Any]:
@@ -243,14 +287,14 @@ def process_metrics_data(
 
         # Initialize ML engine for anomaly detection
         try:
-            from app.core.ml_engine.secure_inference import \
-                SecureMLInferenceEngine
+            from app.core.ml_engine.secure_inference import SecureMLInferenceEngine
 
             ml_engine = SecureMLInferenceEngine()
         except ImportError:
             logger.warning("ML engine not available, skipping anomaly detection")
             ml_engine = None
 
+        valid_metrics = []
         for metric in metrics_data:
             try:
                 # Validate metric data
@@ -265,16 +309,17 @@ def process_metrics_data(
                     if prediction.get("is_anomaly", False):
                         results["anomalies_detected"] += 1
 
-                # Store in database if available
-                if db_service.is_available():
-                    db_service.store_metrics(metric)
-
+                valid_metrics.append(metric)
                 results["processed_count"] += 1
 
             except Exception as e:
                 logger.warning(f"Failed to process metric: {e}")
                 continue
 
+        # Store in database with a single multi-row insert
+        if valid_metrics and db_service.is_available():
+            db_service.store_metrics_batch(valid_metrics)
+
         results["processing_time"] = time.time() - start_time
 
         # Cache results
@@ -329,6 +374,14 @@ def system_maintenance(maintenance_type: str = "cleanup") -> Dict[str, Any]:
             log_cleanup_result = cleanup_old_logs()
             results["completed_tasks"].append(log_cleanup_result)
 
+            # Archive closed days to Parquet before retention drops them
+            archive_result = archive_closed_metrics()
+            results["completed_tasks"].append(archive_result)
+
+            # Drop expired metric partitions
+            retention_result = apply_data_retention()
+            results["completed_tasks"].append(retention_result)
+
         elif maintenance_type == "backup":
             # Backup ML models
             backup_result = backup_ml_models()
@@ -471,8 +524,7 @@ def update_system_metrics() -> Dict[str, Any]:
 
         # Check for anomalies
         try:
-            from app.core.ml_engine.secure_inference import \
-                SecureMLInferenceEngine
+            from app.core.ml_engine.secure_inference import SecureMLInferenceEngine
 
             ml_engine = SecureMLInferenceEngine()
             anomaly_result = ml_engine.predict(metrics)
@@ -528,6 +580,28 @@ def cleanup_old_logs() -> str:
         return f"Log cleanup failed: {e}"
 
 
+def archive_closed_metrics() -> str:
+    """Export closed days of metrics and predictions to the Parquet archive."""
+    if os.getenv("METRICS_ARCHIVE", "false").lower() != "true":
+        return "Metrics archive disabled"
+    try:
+        archiver = MetricsArchiver(db_service.engine, shards=db_service.shards)
+        result = archiver.run(tables=("metrics", "anomaly_predictions"))
+        return f"Archived closed metric days: {result}"
+    except Exception as e:
+        return f"Metrics archive failed: {e}"
+
+
+def apply_data_retention() -> str:
+    """Drop expired metric and prediction partitions."""
+    try:
+        retention_days = int(os.getenv("METRICS_RETENTION_DAYS", "30"))
+        result = db_service.apply_retention(retention_days)
+        return f"Applied {retention_days}-day retention: {result}"
+    except Exception as e:
+        return f"Data retention failed: {e}"
+
+
 def backup_ml_models() -> str:
     """Backup ML models."""
     try:
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Buffered Bulk Writer
+======================================
+
+Write-behind pipeline for high-volume inserts (metrics, predictions).
+Rows are queued in a bounded in-memory buffer and a background flusher
+writes them every ``batch_size`` rows or ``flush_interval_ms`` milliseconds
+using a single multi-row statement: ``COPY FROM STDIN`` on PostgreSQL and
+``executemany`` elsewhere.
+
+When the database is unavailable, batches are appended to a durable
+spill file (JSON lines) and replayed automatically once writes succeed again.
+Spilled lines that cannot be parsed (e.g. cut short by a crash) are moved
+to a ``.rejected`` file next to it instead of blocking the replay.
+"""
+
+import atexit
+import csv
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+try:
+    from sqlalchemy import text
+
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+    text = None
+
+logger = logging.getLogger(__name__)
+
+
+class BulkWriter:
+    """Bounded write-behind buffer drained by a background flusher thread."""
+
+    def __init__(
+        self,
+        engine,
+        table: str,
+        columns: Sequence[str],
+        batch_size: int = 1000,
+        flush_interval_ms: int = 200,
+        max_queue_size: int = 100000,
+        enqueue_timeout: float = 1.0,
+        spill_path: Optional[str] = None,
+        on_flush=None,
+        sink=None,
+        executor=None,
+    ):
+        """
+        Initialize the bulk writer.
+
+        Args:
+            engine: SQLAlchemy engine used for writes
+            table: Target table name
+            columns: Ordered column names of each row
+            batch_size: Rows per flush
+            flush_interval_ms: Maximum time a row waits in the buffer
+            max_queue_size: Buffer capacity before back-pressure applies
+            enqueue_timeout: Seconds a producer blocks on a full buffer
+                before its row is spilled to disk
+            spill_path: JSON-lines file used while the database is down
+            on_flush: Optional callback invoked with each written batch
+            sink: Optional callable that writes a batch instead of the
+                default COPY/executemany path (e.g. time-sharded storage)
+            executor: Optional ``SQLiteWriter`` whose thread drains the
+                buffer instead of a flusher thread of this writer, so
+                several tables share one database writer
+        """
+        self.engine = engine
+        self.table = table
+        self.columns = tuple(columns)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        # Poll at least twice a second so close() never waits a full interval
+        self._poll_interval = min(self.flush_interval, 0.5)
+        self.enqueue_timeout = enqueue_timeout
+        self.spill_path = Path(
+            spill_path
+            or os.getenv("DB_SPILL_DIR", "data/spill") + f"/{table}.spill.jsonl"
+        )
+        self.replay_path = self.spill_path.with_suffix(".replaying")
+        self.rejected_path = self.spill_path.with_suffix(".rejected")
+        self.on_flush = on_flush
+        self.sink = sink
+        self.executor = executor
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue_size)
+
+        self.use_copy = getattr(engine.dialect, "name", "") == "postgresql"
+        self.insert_sql = (
+            f"INSERT INTO {table} ({', '.join(self.columns)}) "
+            f"VALUES ({', '.join(':' + c for c in self.columns)})"
+        )
+
+        self.stats = {
+            "rows_enqueued": 0,
+            "rows_written": 0,
+            "batches_written": 0,
+            "rows_spilled": 0,
+            "rows_replayed": 0,
+            "rows_rejected": 0,
+            "flush_errors": 0,
+            "backpressure_waits": 0,
+        }
+        self.lock = threading.Lock()
+        # Rows accepted into the buffer but not yet written or spilled
+        self._unwritten = 0
+        self._drained = threading.Condition(self.lock)
+        self._flush_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._stop = threading.Event()
+        if executor is not None:
+            self._thread = None
+            executor.add_periodic(self._drain)
+        else:
+            self._thread = threading.Thread(
+                target=self._run, name=f"bulk-writer-{table}", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, row: Dict[str, Any]) -> bool:
+        """
+        Queue a row for writing.
+
+        Blocks up to ``enqueue_timeout`` when the buffer is full; rows that
+        still don't fit are spilled to disk so nothing is dropped.
+
+        Returns:
+            True once the row is buffered or durably spilled
+        """
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            with self.lock:
+                self.stats["backpressure_waits"] += 1
+            try:
+                self.queue.put(row, timeout=self.enqueue_timeout)
+            except queue.Full:
+                return self._spill([row])
+
+        with self.lock:
+            self.stats["rows_enqueued"] += 1
+            self._unwritten += 1
+        return True
+
+    def submit_many(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Queue several rows, returning how many were accepted."""
+        return sum(1 for row in rows if self.submit(row))
+
+    def _run(self):
+        """Flusher loop: drain the buffer every batch_size rows or interval."""
+        while not self._stop.is_set():
+            try:
+                batch = self._collect_batch()
+                if batch:
+                    self._write_batch(batch)
+                elif self._spill_pending():
+                    self._replay_spill()
+            except Exception as e:
+                # Keep the flusher alive; a dead flusher would spill every row
+                logger.error(f"Bulk writer for {self.table} failed: {e}")
+                time.sleep(self._poll_interval)
+
+    def _collect_batch(self) -> List[Dict[str, Any]]:
+        """Wait for the first row, then gather more until full or timed out."""
+        try:
+            first = self.queue.get(timeout=self._poll_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(
+                    self.queue.get(timeout=min(remaining, self._poll_interval))
+                )
+            except queue.Empty:
+                continue
+        return batch
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        """Write one batch, spilling it to disk if the database rejects it."""
+        with self._flush_lock:
+            try:
+                self._execute(batch)
+            except Exception as e:
+                logger.error(f"Bulk write to {self.table} failed, spilling: {e}")
+                with self.lock:
+                    self.stats["flush_errors"] += 1
+                self._spill(batch)
+                self._mark_done(len(batch))
+                return False
+
+            with self.lock:
+                self.stats["rows_written"] += len(batch)
+                self.stats["batches_written"] += 1
+
+        if self.on_flush:
+            try:
+                self.on_flush(batch)
+            except Exception as e:
+                logger.warning(f"Bulk writer flush callback failed: {e}")
+        # flush() returns only once the callback's rollups and invalidations ran
+        self._mark_done(len(batch))
+
+        # The database is reachable again: replay anything spilled earlier
+        if self._spill_pending():
+            self._replay_spill()
+        return True
+
+    def _mark_done(self, count: int):
+        """Record that buffered rows were written or spilled."""
+        with self._drained:
+            self._unwritten -= count
+            self._drained.notify_all()
+
+    def _execute(self, batch: List[Dict[str, Any]]):
+        """Issue a single multi-row write for the batch."""
+        if self.sink:
+            self.sink(batch)
+            return
+
+        if self.use_copy:
+            self._copy(batch)
+            return
+
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(self.insert_sql),
+                [{c: row.get(c) for c in self.columns} for row in batch],
+            )
+
+    def _copy(self, batch: List[Dict[str, Any]]):
+        """Load a batch with PostgreSQL COPY FROM STDIN (CSV)."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            writer.writerow([_copy_value(row.get(c)) for c in self.columns])
+        buffer.seek(0)
+
+        raw_conn = self.engine.raw_connection()
+        try:
+            cursor = raw_conn.cursor()
+            cursor.copy_expert(
+                f"COPY {self.table} ({', '.join(self.columns)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            raw_conn.commit()
+            cursor.close()
+        except Exception:
+            raw_conn.rollback()
+            raise
+        finally:
+            raw_conn.close()
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> bool:
+        """Append rows durably to the spill file."""
+        try:
+            with self._spill_lock:
+                self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for row in rows:
+                        f.write(json.dumps(row, default=str) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            with self.lock:
+                self.stats["rows_spilled"] += len(rows)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to spill {len(rows)} rows for {self.table}: {e}")
+            return False
+
+    def _spill_pending(self) -> bool:
+        """True if spilled rows (or a replay cut short by a crash) wait."""
+        return self.spill_path.exists() or self.replay_path.exists()
+
+    def _read_spill(self, path: Path) -> List[Dict[str, Any]]:
+        """Parse a spill file, moving unparseable lines to the rejected file."""
+        rows, rejected = [], []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    rejected.append(line if line.endswith("\n") else line + "\n")
+        if rejected:
+            logger.error(
+                f"Moved {len(rejected)} unreadable spilled rows for {self.table} "
+                f"to {self.rejected_path}"
+            )
+            with open(self.rejected_path, "a", encoding="utf-8") as out:
+                out.writelines(rejected)
+            with self.lock:
+                self.stats["rows_rejected"] += len(rejected)
+        return rows
+
+    def _replay_spill(self):
+        """Re-insert spilled rows unless another thread is already at it."""
+        if not self._replay_lock.acquire(blocking=False):
+            return
+        try:
+            self._replay_spill_file()
+        finally:
+            self._replay_lock.release()
+
+    def _replay_spill_file(self):
+        """Re-insert spilled rows; keep the file if the database is still down."""
+        replay_path = self.replay_path
+        with self._spill_lock:
+            # A replay file left by a crash is finished before newer spills
+            if not replay_path.exists():
+                if not self.spill_path.exists():
+                    return
+                os.replace(self.spill_path, replay_path)
+
+        rows = self._read_spill(replay_path)
+
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                with self._flush_lock:
+                    self._execute(rows[start : start + self.batch_size])
+                with self.lock:
+                    self.stats["rows_replayed"] += len(
+                        rows[start : start + self.batch_size]
+                    )
+        except Exception as e:
+            logger.warning(f"Spill replay for {self.table} deferred: {e}")
+            # Put the unreplayed remainder back in front of newer spills
+            remainder = rows[start:]
+            with self._spill_lock:
+                newer = (
+                    self.spill_path.read_text(encoding="utf-8")
+                    if self.spill_path.exists()
+                    else ""
+                )
+                with open(self.spill_path, "w", encoding="utf-8") as out:
+                    for row in remainder:
+                        out.write(json.dumps(row, default=str) + "\n")
+                    out.write(newer)
+            os.remove(replay_path)
+            time.sleep(self.flush_interval)
+            return
+
+        os.remove(replay_path)
+        if self.on_flush and rows:
+            try:
+                self.on_flush(rows)
+            except Exception as e:
+                logger.warning(f"Bulk writer flush callback failed: {e}")
+        logger.info(f"Replayed {len(rows)} spilled rows into {self.table}")
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        """Up to batch_size buffered rows, without waiting."""
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self, deadline: Optional[float] = None):
+        """Write the rows buffered so far, or replay spills when idle (executor tick)."""
+        batches = self.queue.qsize() // self.batch_size + 1
+        wrote = False
+        for _ in range(batches):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            batch = self._take_batch()
+            if not batch:
+                break
+            self._write_batch(batch)
+            wrote = True
+        if not wrote and self._spill_pending():
+            self._replay_spill()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Synchronously write everything currently buffered."""
+        deadline = time.monotonic() + timeout
+        if self.executor is not None:
+            # Written on the shared writer thread like every other write
+            self.executor.call(self._drain, deadline, timeout=timeout)
+        else:
+            while time.monotonic() < deadline:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                self._write_batch(batch)
+        # Wait for a batch the flusher thread may still be collecting or writing
+        with self._drained:
+            self._drained.wait_for(
+                lambda: self._unwritten <= 0,
+                timeout=max(0.0, deadline - time.monotonic()),
+            )
+            return self._unwritten <= 0
+
+    def close(self):
+        """Stop the flusher thread after draining the buffer."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer statistics."""
+        with self.lock:
+            stats = self.stats.copy()
+        stats["queue_depth"] = self.queue.qsize()
+        stats["spill_pending"] = self._spill_pending()
+        stats["table"] = self.table
+        return stats
+
+
+def _copy_value(value: Any) -> Any:
+    """Convert a Python value into its COPY CSV text form."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    return value
+
+
+__all__ = ["BulkWriter"]
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Cache Analytics
+=================================
+
+Per-prefix cache instrumentation and hot/big key tracking.
+
+Every lookup and write is attributed to its key prefix (``smartcloudops:
+<prefix>:...``) and exported to Prometheus:
+
+- ``cache_prefix_lookups_total{prefix,result}``: hits and misses
+- ``cache_operation_duration_seconds{prefix,operation}``: latency
+- ``cache_payload_bytes{prefix,operation}``: encoded value sizes
+
+A sampled fraction of accesses (CACHE_KEY_SAMPLE_RATE) feeds two
+Space-Saving heavy-hitter sketches of CACHE_KEY_TRACKER_CAPACITY counters:
+one counts accesses (hot keys), the other payload bytes (big keys). Memory
+stays O(capacity) whatever the keyspace, and any key with more than
+1/capacity of the sampled traffic is guaranteed to be reported; a key's
+count is overestimated by at most its ``error``.
+"""
+
+import heapq
+import logging
+import os
+import random
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from prometheus_client import Counter, Histogram
+
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Prefix label of keys outside the ``namespace:prefix:...`` scheme, and of
+# new prefixes once CACHE_METRICS_MAX_PREFIXES are tracked
+OTHER_PREFIX = "other"
+
+LATENCY_BUCKETS = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def key_prefix(key: str) -> str:
+    """Metrics prefix of a key: ``smartcloudops:remediation:ab12`` -> ``remediation``."""
+    parts = key.split(":", 2)
+    if len(parts) == 3 and parts[0] == "smartcloudops":
+        return parts[1]
+    if len(parts) > 1:
+        return parts[0]
+    return OTHER_PREFIX
+
+
+if PROMETHEUS_AVAILABLE:
+    CACHE_PREFIX_LOOKUPS = Counter(
+        "cache_prefix_lookups_total",
+        "Cache lookups by key prefix and result (hit, miss)",
+        ["prefix", "result"],
+    )
+    CACHE_OPERATION_DURATION = Histogram(
+        "cache_operation_duration_seconds",
+        "Cache operation latency by key prefix",
+        ["prefix", "operation"],
+        buckets=LATENCY_BUCKETS,
+    )
+    CACHE_PAYLOAD_BYTES = Histogram(
+        "cache_payload_bytes",
+        "Encoded size of cached values read from Redis or written",
+        ["prefix", "operation"],
+        buckets=SIZE_BUCKETS,
+    )
+
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving sketch (Metwally et al.) of the heaviest keys.
+
+    Keeps at most ``capacity`` counters; a new key takes over the smallest
+    one and inherits its count as ``error``.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # key -> [count, error]
+        self.counters: Dict[str, List[float]] = {}
+        # (count, key) min-heap; entries whose count moved on are stale
+        self._heap: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.counters)
+
+    def offer(self, key: str, weight: float = 1.0):
+        """Add ``weight`` to ``key``."""
+        counter = self.counters.get(key)
+        if counter is None:
+            if len(self.counters) < self.capacity:
+                counter = self.counters[key] = [0.0, 0.0]
+            else:
+                floor = self._pop_min()
+                counter = self.counters[key] = [floor, floor]
+        counter[0] += weight
+        heapq.heappush(self._heap, (counter[0], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c[0], k) for k, c in self.counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> float:
+        """Remove the smallest counter and return its count."""
+        while True:
+            count, key = heapq.heappop(self._heap)
+            counter = self.counters.get(key)
+            if counter is not None and counter[0] == count:
+                del self.counters[key]
+                return count
+
+    def top(self, limit: int) -> List[Tuple[str, float, float]]:
+        """Heaviest keys as ``(key, count, error)``, largest first."""
+        ranked = heapq.nlargest(
+            limit, self.counters.items(), key=lambda item: item[1][0]
+        )
+        return [(key, count, error) for key, (count, error) in ranked]
+
+    def clear(self):
+        self.counters.clear()
+        self._heap = []
+
+
+class CacheAnalytics:
+    """Per-prefix statistics and sampled hot/big key sketches of one cache."""
+
+    def __init__(
+        self,
+        sample_rate: Optional[float] = None,
+        capacity: Optional[int] = None,
+        max_prefixes: Optional[int] = None,
+    ):
+        """
+        Initialize analytics.
+
+        Args:
+            sample_rate: Fraction of accesses fed to the key sketches
+                (CACHE_KEY_SAMPLE_RATE, default 0.1; 0 disables them)
+            capacity: Counters per sketch (CACHE_KEY_TRACKER_CAPACITY, default 256)
+            max_prefixes: Distinct prefix labels before new ones are counted
+                as ``other`` (CACHE_METRICS_MAX_PREFIXES, default 64)
+        """
+        self.sample_rate = (
+            sample_rate
+            if sample_rate is not None
+            else float(os.getenv("CACHE_KEY_SAMPLE_RATE", "0.1"))
+        )
+        self.capacity = capacity or int(os.getenv("CACHE_KEY_TRACKER_CAPACITY", "256"))
+        self.max_prefixes = max_prefixes or int(
+            os.getenv("CACHE_METRICS_MAX_PREFIXES", "64")
+        )
+        self._lock = threading.Lock()
+        self._random = random.random
+        self.hot_keys = SpaceSaving(self.capacity)
+        self.big_keys = SpaceSaving(self.capacity)
+        # Last encoded size seen per key tracked by ``big_keys``
+        self._sizes: Dict[str, int] = {}
+        self._prefixes: Dict[str, Dict[str, float]] = {}
+        self._children: Dict[Tuple[str, str], tuple] = {}
+
+    def _prefix(self, key: str) -> str:
+        prefix = key_prefix(key)
+        if prefix not in self._prefixes and len(self._prefixes) >= self.max_prefixes:
+            return OTHER_PREFIX
+        return prefix
+
+    def _prefix_stats(self, prefix: str) -> Dict[str, float]:
+        stats = self._prefixes.get(prefix)
+        if stats is None:
+            stats = self._prefixes[prefix] = {
+                "hits": 0,
+                "misses": 0,
+                "sets": 0,
+                "bytes_read": 0,
+                "bytes_written": 0,
+                "seconds": 0.0,
+                "operations": 0,
+            }
+        return stats
+
+    def _metrics(self, prefix: str, operation: str) -> tuple:
+        """Labelled Prometheus children, resolved once per (prefix, operation)."""
+        children = self._children.get((prefix, operation))
+        if children is None:
+            children = self._children[(prefix, operation)] = (
+                CACHE_PREFIX_LOOKUPS.labels(prefix=prefix, result="hit"),
+                CACHE_PREFIX_LOOKUPS.labels(prefix=prefix, result="miss"),
+                CACHE_OPERATION_DURATION.labels(prefix=prefix, operation=operation),
+                CACHE_PAYLOAD_BYTES.labels(prefix=prefix, operation=operation),
+            )
+        return children
+
+    def record(
+        self,
+        operation: str,
+        key: str,
+        seconds: float,
+        hit: Optional[bool] = None,
+        size: Optional[int] = None,
+    ):
+        """
+        Record one cache operation.
+
+        Args:
+            operation: ``get`` or ``set``
+            key: Cache key
+            seconds: Operation latency
+            hit: Lookup result (reads only)
+            size: Encoded value size, when known
+        """
+        self.record_many(operation, [(key, hit, size)], seconds)
+
+    def record_many(
+        self,
+        operation: str,
+        entries: Iterable[Tuple[str, Optional[bool], Optional[int]]],
+        seconds: float,
+    ):
+        """
+        Record a bulk operation.
+
+        Args:
+            operation: ``get``, ``set``, ``get_many`` or ``set_many``
+            entries: ``(key, hit, size)`` per key, as for ``record``
+            seconds: Latency of the whole call, observed once under the
+                common prefix of its keys (``mixed`` if they differ)
+        """
+        call_prefix = None
+        with self._lock:
+            for key, hit, size in entries:
+                prefix = self._prefix(key)
+                call_prefix = prefix if call_prefix in (None, prefix) else "mixed"
+                stats = self._prefix_stats(prefix)
+                if hit is None:
+                    stats["sets"] += 1
+                else:
+                    stats["hits" if hit else "misses"] += 1
+                if size is not None:
+                    stats["bytes_written" if hit is None else "bytes_read"] += size
+
+                if PROMETHEUS_AVAILABLE:
+                    hits, misses, _, sizes = self._metrics(prefix, operation)
+                    if hit is not None:
+                        (hits if hit else misses).inc()
+                    if size is not None:
+                        sizes.observe(size)
+
+                if self.sample_rate > 0 and self._random() < self.sample_rate:
+                    # Scale sampled weights back to estimated totals
+                    weight = 1 / self.sample_rate
+                    self.hot_keys.offer(key, weight)
+                    if size is not None:
+                        self.big_keys.offer(key, size * weight)
+                        self._sizes[key] = size
+                        if len(self._sizes) > 2 * self.capacity:
+                            self._sizes = {
+                                k: v
+                                for k, v in self._sizes.items()
+                                if k in self.big_keys.counters
+                            }
+
+            if call_prefix is None:
+                return
+            if call_prefix != "mixed":
+                stats = self._prefixes[call_prefix]
+                stats["seconds"] += seconds
+                stats["operations"] += 1
+            if PROMETHEUS_AVAILABLE:
+                self._metrics(call_prefix, operation)[2].observe(seconds)
+
+    def hit_ratio(self) -> float:
+        """Hits / lookups over all prefixes since start (0 without lookups)."""
+        with self._lock:
+            hits = sum(stats["hits"] for stats in self._prefixes.values())
+            lookups = hits + sum(stats["misses"] for stats in self._prefixes.values())
+        return hits / lookups if lookups else 0.0
+
+    def prefix_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-prefix hit rate, traffic and mean latency."""
+        with self._lock:
+            prefixes = {prefix: dict(stats) for prefix, stats in self._prefixes.items()}
+        report = {}
+        for prefix, stats in sorted(prefixes.items()):
+            lookups = stats["hits"] + stats["misses"]
+            report[prefix] = {
+                "hits": stats["hits"],
+                "misses": stats["misses"],
+                "sets": stats["sets"],
+                "hit_rate_percent": (
+                    round(stats["hits"] / lookups * 100, 2) if lookups else 0
+                ),
+                "bytes_read": stats["bytes_read"],
+                "bytes_written": stats["bytes_written"],
+                "avg_latency_ms": (
+                    round(stats["seconds"] / stats["operations"] * 1000, 3)
+                    if stats["operations"]
+                    else 0
+                ),
+            }
+        return report
+
+    def top_keys(self, limit: int = 20) -> Dict[str, List[Dict[str, float]]]:
+        """
+        Heaviest keys by estimated accesses and by estimated bytes.
+
+        Args:
+            limit: Keys per list
+
+        Returns:
+            ``{"hot": [...], "big": [...]}``; ``error`` bounds how much each
+            estimate may be overcounted
+        """
+        with self._lock:
+            hot = self.hot_keys.top(limit)
+            big = self.big_keys.top(limit)
+            sizes = dict(self._sizes)
+        return {
+            "hot": [
+                {
+                    "key": key,
+                    "prefix": key_prefix(key),
+                    "accesses": round(count),
+                    "error": round(error),
+                }
+                for key, count, error in hot
+            ],
+            "big": [
+                {
+                    "key": key,
+                    "prefix": key_prefix(key),
+                    "bytes": round(count),
+                    "error": round(error),
+                    "last_size_bytes": sizes.get(key),
+                }
+                for key, count, error in big
+            ],
+        }
+
+    def report(self, limit: int = 20) -> Dict[str, object]:
+        """Top keys plus per-prefix statistics, as served by the admin endpoint."""
+        return {
+            "sample_rate": self.sample_rate,
+            "tracker_capacity": self.capacity,
+            "top_keys": self.top_keys(limit),
+            "prefixes": self.prefix_stats(),
+        }
+
+    def reset(self):
+        """Forget everything tracked so far (Prometheus counters keep running)."""
+        with self._lock:
+            self.hot_keys.clear()
+            self.big_keys.clear()
+            self._sizes.clear()
+            self._prefixes.clear()
+
+
+__all__ = ["CacheAnalytics", "SpaceSaving", "key_prefix"]
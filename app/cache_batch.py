@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Cache Batches
+===============================
+
+Queues cache operations and runs them together: one Redis pipeline round
+trip (``MULTI``/``EXEC`` when transactional), or a single critical section
+of the in-memory store. Used by both cache services::
+
+    with cache_service.batch() as batch:
+        for host in hosts:
+            batch.get(f"host_status:{host}")
+    statuses = batch.results
+
+Nothing is sent if the ``with`` block raises.
+"""
+
+import logging
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CacheBatch:
+    """Cache operations queued by ``batch()`` and executed together."""
+
+    def __init__(
+        self,
+        redis_client,
+        memory_cache,
+        serialize: Callable[[Any], str],
+        deserialize: Callable[[str], Any],
+        default_ttl: int,
+        transaction: bool = False,
+        on_write: Optional[Callable[[List[str]], None]] = None,
+    ):
+        """
+        Initialize the batch.
+
+        Args:
+            redis_client: Redis client, or None to use ``memory_cache``
+            memory_cache: ``MemoryCache`` fallback
+            serialize: Value -> Redis string
+            deserialize: Redis string -> value
+            default_ttl: TTL of ``set`` calls without one
+            transaction: Run atomically (``MULTI``/``EXEC`` on Redis)
+            on_write: Called with the written and deleted keys after execution
+        """
+        self.redis_client = redis_client
+        self.memory_cache = memory_cache
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self.default_ttl = default_ttl
+        self.transaction = transaction
+        self.on_write = on_write
+        self._ops: List[tuple] = []
+        self.results: List[Any] = []
+        self.error: Optional[Exception] = None
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def get(self, key: str) -> "CacheBatch":
+        """Queue a read; its result is the value or None."""
+        self._ops.append(("get", key, None, None))
+        return self
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> "CacheBatch":
+        """Queue a write; its result is True when stored."""
+        self._ops.append(("set", key, value, ttl or self.default_ttl))
+        return self
+
+    def delete(self, key: str) -> "CacheBatch":
+        """Queue a delete; its result is True when the key existed."""
+        self._ops.append(("delete", key, None, None))
+        return self
+
+    def execute(self) -> List[Any]:
+        """
+        Run the queued operations in order.
+
+        Returns:
+            One result per operation; all None if the batch failed
+            (the error is kept in ``self.error``)
+        """
+        ops, self._ops = self._ops, []
+        if not ops:
+            return self.results
+        try:
+            if self.redis_client is not None:
+                self.results = self._execute_redis(ops)
+            else:
+                self.results = self._execute_memory(ops)
+        except Exception as e:
+            logger.error(f"Cache batch of {len(ops)} operations failed: {e}")
+            self.error = e
+            self.results = [None] * len(ops)
+            return self.results
+
+        written = [key for op, key, _, _ in ops if op != "get"]
+        if written and self.on_write:
+            self.on_write(written)
+        return self.results
+
+    def _execute_redis(self, ops: Iterable[tuple]) -> List[Any]:
+        pipe = self.redis_client.pipeline(transaction=self.transaction)
+        for op, key, value, ttl in ops:
+            if op == "get":
+                pipe.get(key)
+            elif op == "set":
+                pipe.setex(key, ttl, self.serialize(value))
+            else:
+                pipe.delete(key)
+
+        results = []
+        for (op, _, _, _), raw in zip(ops, pipe.execute()):
+            if op == "get":
+                results.append(None if raw is None else self.deserialize(raw))
+            else:
+                results.append(bool(raw))
+        return results
+
+    def _execute_memory(self, ops: Iterable[tuple]) -> List[Any]:
+        results = []
+        # The store's lock is reentrant: the whole batch is one critical section
+        with self.memory_cache.lock:
+            for op, key, value, ttl in ops:
+                if op == "get":
+                    results.append(self.memory_cache.get(key))
+                elif op == "set":
+                    self.memory_cache.set(key, value, ttl)
+                    results.append(True)
+                else:
+                    results.append(self.memory_cache.delete(key))
+        return results
+
+
+__all__ = ["CacheBatch"]
@@ -5,15 +5,55 @@ SmartCloudOps AI - Cache Service
 
 Comprehensive caching service with Redis and memory fallback.
 Enhanced for production use with unified configuration.
+
+Two-tier mode (CACHE_L1_ENABLED=true, Redis connected): a small in-process
+L1 answers hot reads in microseconds in front of Redis (L2). Every write,
+delete and clear is published on CACHE_INVALIDATION_CHANNEL in the same
+round trip, and each process drops the affected L1 entries when it
+receives it. L1 entries never outlive their Redis TTL and are capped by
+CACHE_L1_TTL, which also bounds staleness if an invalidation is lost. L1
+is bypassed while the invalidation subscription is down.
+
+``@cached`` protects expensive loaders from stampedes: concurrent misses
+for a key are coalesced into one recompute (per process, and across
+processes with a Redis lock), entries are refreshed early with
+probability rising towards expiry, and, where a call site opts in with
+``stale_ttl``, for that many seconds after expiry callers get the stale
+value while one background refresh runs.
+With ``warm=True`` the entry is also populated at startup and refreshed
+before it expires by ``cache_warmer``.
+
+Invalidation never walks the keyspace: ``set(..., tags=[...])`` adds the
+key to a Redis set per tag (``smartcloudops:tag:<tag>``), and
+``invalidate_tags`` unlinks just the k members of those sets. ``@cached``
+tags entries with their prefix and ``@cache_invalidate`` invalidates that
+tag. Pattern ``clear`` uses incremental ``SCAN`` + ``UNLINK`` instead of
+``KEYS``, and the memory fallback answers both from its namespace and tag
+indexes.
+
+Redis values use the tagged binary codecs of ``utils.serialization``
+(msgpack, zstd above CACHE_COMPRESS_THRESHOLD bytes); untagged JSON
+entries written by earlier versions are still read.
+
+Every lookup and write is attributed to its key prefix in Prometheus
+(hits, misses, latency and payload size; see ``cache_analytics``), and a
+sampled sketch tracks the hottest and biggest keys
+(``get_key_analytics``).
 """
 
 
 import hashlib
 import json
 import logging
+import math
+import os
+import random
+import threading
 import time
+import uuid
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from functools import wraps
+from functools import partial, wraps
 from typing import Any, Dict, List, Optional
 
 try:
@@ -24,18 +64,134 @@ except ImportError:
     REDIS_AVAILABLE = False
     redis = None
 
+try:
+    from prometheus_client import Counter
+
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+try:
+    from flask import copy_current_request_context, has_request_context
+
+    FLASK_AVAILABLE = True
+except ImportError:
+    FLASK_AVAILABLE = False
+
+try:
+    from app.cache_analytics import CacheAnalytics
+    from app.cache_batch import CacheBatch
+    from app.cache_warmer import register_warmup
+    from app.memory_cache import MemoryCache
+    from app.utils.serialization import dumps, loads_compat
+except ImportError:
+    from cache_analytics import CacheAnalytics
+    from cache_batch import CacheBatch
+    from cache_warmer import register_warmup
+    from memory_cache import MemoryCache
+    from utils.serialization import dumps, loads_compat
+
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+# Keys per SCAN page and per UNLINK call
+SCAN_BATCH = 500
+
+
+def _glob_prefix(pattern: str) -> str:
+    """Literal prefix of a glob pattern (``a:b:*`` -> ``a:b:``)."""
+    for i, char in enumerate(pattern):
+        if char in "*?[\\":
+            return pattern[:i]
+    return pattern
+
+
+# Releases a recompute lock only if this caller still holds it
+_UNLOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+if PROMETHEUS_AVAILABLE:
+    CACHE_LOOKUPS = Counter(
+        "cache_lookups_total",
+        "Cache lookups by tier (l1, l2, memory) and result",
+        ["tier", "result"],
+    )
+    CACHE_RECOMPUTES = Counter(
+        "cache_recomputes_total",
+        "Cached loader executions by trigger (miss, stale, early, warm)",
+        ["prefix", "trigger"],
+    )
+    CACHE_COALESCED = Counter(
+        "cache_recomputes_coalesced_total",
+        "Callers that shared another caller's recompute instead of running their own",
+        ["prefix"],
+    )
+    CACHE_STALE_SERVED = Counter(
+        "cache_stale_served_total",
+        "Stale values served while a refresh ran in the background",
+        ["prefix"],
+    )
+
 
 class CacheService:
     """Comprehensive caching service with Redis and memory fallback."""
 
-    def __init__(self, redis_url: Optional[str] = None, max_connections: int = 10):
-        """Initialize cache service."""
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        max_connections: int = 10,
+        l1_enabled: Optional[bool] = None,
+    ):
+        """
+        Initialize cache service.
+
+        Args:
+            redis_url: Redis URL; None or unreachable uses the memory cache
+            max_connections: Redis connection pool size
+            l1_enabled: Put an in-process L1 in front of Redis
+                (CACHE_L1_ENABLED, default false)
+        """
         self.redis_client = None
-        self.memory_cache = {}
-        self.cache_stats = {"hits": 0, "misses": 0, "sets": 0, "deletes": 0}
+        self.memory_cache = MemoryCache()
+        self.cache_stats = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "deletes": 0,
+            "l1_hits": 0,
+            "l1_misses": 0,
+            "l2_hits": 0,
+            "l2_misses": 0,
+            "memory_hits": 0,
+            "memory_misses": 0,
+        }
+        # Per-prefix metrics and sampled hot/big key tracking
+        self.analytics = CacheAnalytics()
         self.max_connections = max_connections
+        self.compress_threshold = int(os.getenv("CACHE_COMPRESS_THRESHOLD", "1024"))
+        if l1_enabled is None:
+            l1_enabled = os.getenv("CACHE_L1_ENABLED", "false").lower() == "true"
+
+        # L1 state: entries, TTL cap and the invalidation subscription
+        self.l1: Optional[MemoryCache] = None
+        self.l1_ttl = float(os.getenv("CACHE_L1_TTL", "5"))
+        # Tag sets outlive their members (EXPIRE without GT works on any Redis)
+        self.tag_ttl = int(os.getenv("CACHE_TAG_TTL", "86400"))
+        self.invalidation_channel = os.getenv(
+            "CACHE_INVALIDATION_CHANNEL", "smartcloudops:cache:invalidate"
+        )
+        self._origin = uuid.uuid4().hex
+        self._l1_lock = threading.Lock()
+        self._l1_epoch = 0
+        self._l1_live = threading.Event()
+        self._stop = threading.Event()
+        self._listener: Optional[threading.Thread] = None
 
         # Try to connect to Redis
         if REDIS_AVAILABLE and redis_url:
@@ -46,7 +202,8 @@ class CacheService:
                     socket_timeout=5,
                     socket_connect_timeout=5,
                     retry_on_timeout=True,
-                    decode_responses=True,
+                    # Values are binary codec payloads
+                    decode_responses=False,
                 )
                 # Test connection
                 self.redis_client.ping()
@@ -57,6 +214,105 @@ class CacheService:
 
         if not self.redis_client:
             logger.info("Using in-memory cache")
+        elif l1_enabled:
+            self._start_l1()
+
+    def _start_l1(self):
+        """Create the L1 and subscribe to invalidations."""
+        self.l1 = MemoryCache(
+            max_entries=int(os.getenv("CACHE_L1_MAX_ENTRIES", "1024")),
+            max_bytes=int(os.getenv("CACHE_L1_MAX_BYTES", str(8 * 1024 * 1024))),
+        )
+        self._listener = threading.Thread(
+            target=self._listen_invalidations, name="cache-l1-invalidation", daemon=True
+        )
+        self._listener.start()
+        logger.info(f"✅ L1 cache enabled (TTL cap {self.l1_ttl}s)")
+
+    def _listen_invalidations(self):
+        """Apply invalidations published by every process until closed."""
+        backoff = 0.5
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.invalidation_channel)
+                # Invalidations may have been missed while unsubscribed
+                with self._l1_lock:
+                    self._l1_epoch += 1
+                    self.l1.clear()
+                self._l1_live.set()
+                backoff = 0.5
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self._apply_invalidation(message["data"])
+            except Exception as e:
+                if not self._stop.is_set():
+                    logger.warning(
+                        f"L1 invalidation subscription lost, bypassing L1: {e}"
+                    )
+            finally:
+                self._l1_live.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _apply_invalidation(self, data: str):
+        """Drop the L1 entries named by an invalidation message."""
+        try:
+            message = json.loads(data)
+        except (json.JSONDecodeError, TypeError):
+            return
+        if message.get("o") == self._origin:
+            return
+        with self._l1_lock:
+            # Fills that read L2 before this point must not reach L1
+            self._l1_epoch += 1
+            if "p" in message:
+                self.l1.delete_prefix(message["p"])
+            else:
+                self.l1.delete_many(message.get("k", []))
+
+    def _invalidation(
+        self, keys: Optional[List[str]] = None, prefix: Optional[str] = None
+    ) -> str:
+        message = {"o": self._origin}
+        if prefix is not None:
+            message["p"] = prefix
+        else:
+            message["k"] = keys
+        return json.dumps(message)
+
+    def _l1_active(self) -> bool:
+        return self.l1 is not None and self._l1_live.is_set()
+
+    def _l1_fill(self, key: str, value: Any, l2_ttl_ms: Optional[int], epoch: int):
+        """Cache an L2 value in L1 unless an invalidation arrived meanwhile."""
+        ttl = self.l1_ttl
+        if l2_ttl_ms is not None and l2_ttl_ms >= 0:
+            ttl = min(ttl, l2_ttl_ms / 1000)
+        if ttl <= 0:
+            return
+        with self._l1_lock:
+            if epoch == self._l1_epoch:
+                self.l1.set(key, value, ttl)
+
+    def _record(self, tier: str, hit: bool):
+        """Count a lookup against one tier."""
+        self.cache_stats[f"{tier}_{'hits' if hit else 'misses'}"] += 1
+        if PROMETHEUS_AVAILABLE:
+            CACHE_LOOKUPS.labels(tier=tier, result="hit" if hit else "miss").inc()
+
+    def close(self):
+        """Stop the L1 invalidation listener."""
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=5)
 
     def _generate_key(self, prefix: str, *args, **kwargs) -> str:
         """Generate cache key from prefix and arguments."""
@@ -65,62 +321,114 @@ class CacheService:
         key_hash = hashlib.md5(key_data.encode()).hexdigest()
         return f"smartcloudops:{prefix}:{key_hash}"
 
-    def _serialize_value(self, value: Any) -> str:
-        """Serialize value for caching."""
-        if isinstance(value, (dict, list, str, int, float, bool)):
-            return json.dumps(value, default=str)
-        else:
-            return str(value)
+    def _serialize_value(self, value: Any) -> bytes:
+        """Serialize value for caching (tagged binary payload)."""
+        return dumps(value, self.compress_threshold)
 
-    def _deserialize_value(self, value: str) -> Any:
-        """Deserialize cached value."""
-        try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            return value
+    def _deserialize_value(self, value: bytes) -> Any:
+        """Deserialize cached value, including legacy JSON entries."""
+        return loads_compat(value)
 
     def get(self, key: str, default: Any = None) -> Any:
         """Get value from cache."""
+        start = time.perf_counter()
         try:
-            if self.redis_client:
-                # Try Redis first
-                value = self.redis_client.get(key)
-                if value is not None:
-                    self.cache_stats["hits"] += 1
-                    return self._deserialize_value(value)
-
-            # Fall back to memory cache
-            if key in self.memory_cache:
-                item = self.memory_cache[key]
-                if item["expires_at"] > time.time():
-                    self.cache_stats["hits"] += 1
-                    return item["value"]
-                else:
-                    # Expired, remove it
-                    del self.memory_cache[key]
-
-            self.cache_stats["misses"] += 1
-            return default
-
+            value, size = self._lookup(key)
         except Exception as e:
             logger.error(f"Cache get error: {e}")
             return default
 
-    def set(self, key: str, value: Any, ttl: int = 300) -> bool:
-        """Set value in cache with TTL."""
+        hit = value is not _MISSING
+        self.cache_stats["hits" if hit else "misses"] += 1
+        self.analytics.record(
+            "get", key, time.perf_counter() - start, hit=hit, size=size
+        )
+        return value if hit else default
+
+    def _lookup(self, key: str):
+        """Find ``key`` tier by tier; returns ``(value or _MISSING, encoded size)``."""
+        if self._l1_active():
+            value = self.l1.get(key, _MISSING)
+            self._record("l1", value is not _MISSING)
+            if value is not _MISSING:
+                return value, None
+
+            epoch = self._l1_epoch
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            raw, pttl = pipe.execute()
+            self._record("l2", raw is not None)
+            if raw is not None:
+                value = self._deserialize_value(raw)
+                self._l1_fill(key, value, pttl, epoch)
+                return value, len(raw)
+
+        elif self.redis_client:
+            # Try Redis first
+            raw = self.redis_client.get(key)
+            self._record("l2", raw is not None)
+            if raw is not None:
+                return self._deserialize_value(raw), len(raw)
+
+        # Fall back to memory cache
+        value = self.memory_cache.get(key, _MISSING)
+        self._record("memory", value is not _MISSING)
+        return value, None
+
+    def _tag_key(self, tag: str) -> str:
+        return f"smartcloudops:tag:{tag}"
+
+    def set(
+        self, key: str, value: Any, ttl: int = 300, tags: Optional[List[str]] = None
+    ) -> bool:
+        """
+        Set value in cache with TTL.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Seconds to live
+            tags: Tags to invalidate the entry with (``invalidate_tags``)
+
+        Returns:
+            True if stored
+        """
+        start = time.perf_counter()
         try:
             serialized_value = self._serialize_value(value)
 
             if self.redis_client:
-                # Try Redis first
-                success = self.redis_client.setex(key, ttl, serialized_value)
+                # Value, tag registration and L1 invalidation in one round trip
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.setex(key, ttl, serialized_value)
+                for tag in tags or ():
+                    tag_key = self._tag_key(tag)
+                    pipe.sadd(tag_key, key)
+                    pipe.expire(tag_key, max(ttl, self.tag_ttl))
+                if self.l1 is not None:
+                    pipe.publish(self.invalidation_channel, self._invalidation([key]))
+                success = pipe.execute()[0]
                 if success:
+                    if self.l1 is not None:
+                        with self._l1_lock:
+                            self._l1_epoch += 1
+                            self.l1.set(key, value, min(self.l1_ttl, ttl))
                     self.cache_stats["sets"] += 1
+                    self.analytics.record(
+                        "set",
+                        key,
+                        time.perf_counter() - start,
+                        size=len(serialized_value),
+                    )
                     return True
 
             # Fall back to memory cache
-            self.memory_cache[key] = {"value": value, "expires_at": time.time() + ttl}
+            self.memory_cache.set(key, value, ttl, tags=tags)
             self.cache_stats["sets"] += 1
+            self.analytics.record(
+                "set", key, time.perf_counter() - start, size=len(serialized_value)
+            )
             return True
 
         except Exception as e:
@@ -130,7 +438,19 @@ class CacheService:
     def delete(self, key: str) -> bool:
         """Delete value from cache."""
         try:
-            if self.redis_client:
+            if self.l1 is not None:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.delete(key)
+                pipe.publish(self.invalidation_channel, self._invalidation([key]))
+                result = pipe.execute()[0]
+                with self._l1_lock:
+                    self._l1_epoch += 1
+                    self.l1.delete(key)
+                if result > 0:
+                    self.cache_stats["deletes"] += 1
+                    return True
+
+            elif self.redis_client:
                 # Try Redis first
                 result = self.redis_client.delete(key)
                 if result > 0:
@@ -138,8 +458,7 @@ class CacheService:
                     return True
 
             # Fall back to memory cache
-            if key in self.memory_cache:
-                del self.memory_cache[key]
+            if self.memory_cache.delete(key):
                 self.cache_stats["deletes"] += 1
                 return True
 
@@ -149,6 +468,192 @@ class CacheService:
             logger.error(f"Cache delete error: {e}")
             return False
 
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Get several values in one round trip (``MGET``).
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Found keys and their values; missing keys are left out
+        """
+        start = time.perf_counter()
+        found: Dict[str, Any] = {}
+        sizes: Dict[str, int] = {}
+        pending = list(dict.fromkeys(keys))
+        try:
+            if self._l1_active():
+                for key in pending:
+                    value = self.l1.get(key, _MISSING)
+                    self._record("l1", value is not _MISSING)
+                    if value is not _MISSING:
+                        found[key] = value
+                pending = [key for key in pending if key not in found]
+
+            if self.redis_client and pending:
+                epoch = self._l1_epoch
+                pttls = None
+                if self._l1_active():
+                    # Remaining TTLs cap the L1 copies, same round trip
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    pipe.mget(pending)
+                    for key in pending:
+                        pipe.pttl(key)
+                    results = pipe.execute()
+                    raw_values, pttls = results[0], results[1:]
+                else:
+                    raw_values = self.redis_client.mget(pending)
+
+                missing = []
+                for i, (key, raw) in enumerate(zip(pending, raw_values)):
+                    self._record("l2", raw is not None)
+                    if raw is None:
+                        missing.append(key)
+                        continue
+                    found[key] = self._deserialize_value(raw)
+                    sizes[key] = len(raw)
+                    if pttls is not None:
+                        self._l1_fill(key, found[key], pttls[i], epoch)
+                pending = missing
+
+            # Fall back to memory cache
+            if pending:
+                values = self.memory_cache.get_many(pending)
+                for key in pending:
+                    self._record("memory", key in values)
+                found.update(values)
+
+        except Exception as e:
+            logger.error(f"Cache get_many error: {e}")
+
+        self.cache_stats["hits"] += len(found)
+        self.cache_stats["misses"] += len(set(keys)) - len(found)
+        self.analytics.record_many(
+            "get_many",
+            [(key, key in found, sizes.get(key)) for key in dict.fromkeys(keys)],
+            time.perf_counter() - start,
+        )
+        return found
+
+    def set_many(
+        self, mapping: Dict[str, Any], ttl: int = 300, tags: Optional[List[str]] = None
+    ) -> bool:
+        """
+        Set several values with one TTL in one round trip.
+
+        Args:
+            mapping: Keys and values
+            ttl: Seconds to live
+            tags: Tags to invalidate the entries with
+
+        Returns:
+            True if all were stored
+        """
+        if not mapping:
+            return True
+        start = time.perf_counter()
+        try:
+            encoded = {
+                key: self._serialize_value(value) for key, value in mapping.items()
+            }
+            if self.redis_client:
+                # MSET has no TTL; pipelined SETEX costs the same round trip
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, payload in encoded.items():
+                    pipe.setex(key, ttl, payload)
+                for tag in tags or ():
+                    tag_key = self._tag_key(tag)
+                    pipe.sadd(tag_key, *mapping)
+                    pipe.expire(tag_key, max(ttl, self.tag_ttl))
+                if self.l1 is not None:
+                    pipe.publish(
+                        self.invalidation_channel, self._invalidation(list(mapping))
+                    )
+                results = pipe.execute()
+                if all(results[: len(mapping)]):
+                    if self.l1 is not None:
+                        with self._l1_lock:
+                            self._l1_epoch += 1
+                            for key, value in mapping.items():
+                                self.l1.set(key, value, min(self.l1_ttl, ttl))
+                    self.cache_stats["sets"] += len(mapping)
+                    self._record_writes(encoded, start)
+                    return True
+
+            # Fall back to memory cache
+            self.memory_cache.set_many(mapping, ttl, tags=tags)
+            self.cache_stats["sets"] += len(mapping)
+            self._record_writes(encoded, start)
+            return True
+
+        except Exception as e:
+            logger.error(f"Cache set_many error: {e}")
+            return False
+
+    def _record_writes(self, encoded: Dict[str, bytes], start: float):
+        self.analytics.record_many(
+            "set_many",
+            [(key, None, len(payload)) for key, payload in encoded.items()],
+            time.perf_counter() - start,
+        )
+
+    def delete_many(self, keys: List[str]) -> int:
+        """
+        Delete several keys in one round trip.
+
+        Returns:
+            Number of deleted entries
+        """
+        if not keys:
+            return 0
+        try:
+            deleted_count = 0
+            if self.redis_client:
+                deleted_count = self.redis_client.delete(*keys)
+                self._invalidate_l1(list(keys))
+
+            # Fall back to memory cache
+            deleted_count += self.memory_cache.delete_many(keys)
+            self.cache_stats["deletes"] += deleted_count
+            return deleted_count
+
+        except Exception as e:
+            logger.error(f"Cache delete_many error: {e}")
+            return 0
+
+    @contextmanager
+    def batch(self, transaction: bool = False):
+        """
+        Queue gets, sets and deletes and run them in one round trip.
+
+        Args:
+            transaction: Apply atomically (``MULTI``/``EXEC`` on Redis)
+
+        Yields:
+            ``CacheBatch``; its ``results`` are filled when the block exits
+        """
+        batch = CacheBatch(
+            self.redis_client,
+            self.memory_cache,
+            self._serialize_value,
+            self._deserialize_value,
+            default_ttl=300,
+            transaction=transaction,
+            on_write=self._invalidate_l1 if self.l1 is not None else None,
+        )
+        yield batch
+        batch.execute()
+
+    def _invalidate_l1(self, keys: List[str]):
+        """Drop ``keys`` from the L1 of every process."""
+        if self.l1 is None or not keys:
+            return
+        self.redis_client.publish(self.invalidation_channel, self._invalidation(keys))
+        with self._l1_lock:
+            self._l1_epoch += 1
+            self.l1.delete_many(keys)
+
     def exists(self, key: str) -> bool:
         """Check if key exists in cache."""
         try:
@@ -156,15 +661,7 @@ class CacheService:
                 return bool(self.redis_client.exists(key))
 
             # Fall back to memory cache
-            if key in self.memory_cache:
-                item = self.memory_cache[key]
-                if item["expires_at"] > time.time():
-                    return True
-                else:
-                    # Expired, remove it
-                    del self.memory_cache[key]
-
-            return False
+            return key in self.memory_cache
 
         except Exception as e:
             logger.error(f"Cache exists error: {e}")
@@ -176,20 +673,33 @@ class CacheService:
             deleted_count = 0
 
             if self.redis_client:
-                # Clear Redis cache
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    deleted_count = self.redis_client.delete(*keys)
+                # Incremental SCAN keeps Redis responsive, UNLINK frees in the background
+                batch = []
+                for key in self.redis_client.scan_iter(match=pattern, count=SCAN_BATCH):
+                    batch.append(key)
+                    if len(batch) >= SCAN_BATCH:
+                        deleted_count += self.redis_client.unlink(*batch)
+                        batch = []
+                if batch:
+                    deleted_count += self.redis_client.unlink(*batch)
+
+            prefix = _glob_prefix(pattern)
+            if self.l1 is not None:
+                # Dropping every key with the literal prefix is a safe superset
+                self.redis_client.publish(
+                    self.invalidation_channel, self._invalidation(prefix=prefix)
+                )
+                with self._l1_lock:
+                    self._l1_epoch += 1
+                    self.l1.delete_prefix(prefix)
 
             # Clear memory cache
-            memory_keys = [
-                k
-                for k in self.memory_cache.keys()
-                if k.startswith(pattern.replace("*", ""))
-            ]
-            for key in memory_keys:
-                del self.memory_cache[key]
-                deleted_count += 1
+            if pattern == f"{prefix}*":
+                deleted_count += len(self.memory_cache.delete_prefix(prefix))
+            else:
+                deleted_count += self.memory_cache.delete_many(
+                    self.memory_cache.keys(pattern)
+                )
 
             return deleted_count
 
@@ -197,6 +707,46 @@ class CacheService:
             logger.error(f"Cache clear error: {e}")
             return 0
 
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        Delete every entry registered under any of ``tags``.
+
+        Costs O(k) in the number of tagged entries, independent of the
+        size of the keyspace.
+
+        Returns:
+            Number of invalidated entries
+        """
+        try:
+            deleted_count = 0
+
+            if self.redis_client and tags:
+                # Read and drop the tag sets atomically; entries tagged after
+                # this point register in fresh sets
+                pipe = self.redis_client.pipeline(transaction=True)
+                for tag in tags:
+                    pipe.smembers(self._tag_key(tag))
+                    pipe.unlink(self._tag_key(tag))
+                results = pipe.execute()
+                keys = sorted(k.decode("utf-8") for k in set().union(*results[::2]))
+                for i in range(0, len(keys), SCAN_BATCH):
+                    deleted_count += self.redis_client.unlink(*keys[i : i + SCAN_BATCH])
+
+                if self.l1 is not None and keys:
+                    self.redis_client.publish(
+                        self.invalidation_channel, self._invalidation(keys)
+                    )
+                    with self._l1_lock:
+                        self._l1_epoch += 1
+                        self.l1.delete_many(keys)
+
+            deleted_count += len(self.memory_cache.delete_tags(tags))
+            return deleted_count
+
+        except Exception as e:
+            logger.error(f"Cache tag invalidation error for {tags}: {e}")
+            return 0
+
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
         total_requests = self.cache_stats["hits"] + self.cache_stats["misses"]
@@ -206,6 +756,19 @@ class CacheService:
             else 0
         )
 
+        tiers = {}
+        for tier in ("l1", "l2", "memory"):
+            hits = self.cache_stats[f"{tier}_hits"]
+            lookups = hits + self.cache_stats[f"{tier}_misses"]
+            tiers[tier] = {
+                "hits": hits,
+                "lookups": lookups,
+                "hit_rate_percent": round(hits / lookups * 100, 2) if lookups else 0,
+            }
+        if self.l1 is not None:
+            tiers["l1"]["entries"] = len(self.l1)
+            tiers["l1"]["subscribed"] = self._l1_live.is_set()
+
         return {
             "hits": self.cache_stats["hits"],
             "misses": self.cache_stats["misses"],
@@ -213,10 +776,31 @@ class CacheService:
             "deletes": self.cache_stats["deletes"],
             "hit_rate_percent": round(hit_rate, 2),
             "total_requests": total_requests,
+            "tiers": tiers,
+            "prefixes": self.analytics.prefix_stats(),
             "memory_cache_size": len(self.memory_cache),
+            "memory_cache": self.memory_cache.get_stats(),
             "redis_available": self.redis_client is not None,
+            "l1_enabled": self.l1 is not None,
         }
 
+    def hit_ratio(self) -> float:
+        """Hits / lookups since start, 0..1 (feeds the ``cache_hit_ratio`` gauge)."""
+        total_requests = self.cache_stats["hits"] + self.cache_stats["misses"]
+        return self.cache_stats["hits"] / total_requests if total_requests else 0.0
+
+    def get_key_analytics(self, limit: int = 20) -> Dict[str, Any]:
+        """
+        Hottest and biggest keys plus per-prefix statistics.
+
+        Args:
+            limit: Keys per list
+
+        Returns:
+            Sampled top keys by accesses and by bytes, and per-prefix stats
+        """
+        return self.analytics.report(limit)
+
     def health_check(self) -> Dict[str, Any]:
         """Perform health check on cache service."""
         try:
@@ -275,8 +859,7 @@ class CacheService:
                     ),
                 }
             else:
-                # Estimate memory cache usage
-                memory_size = sum(len(str(v)) for v in self.memory_cache.values())
+                memory_size = self.memory_cache.size_bytes
                 return {
                     "memory_cache_entries": len(self.memory_cache),
                     "memory_cache_size_bytes": memory_size,
@@ -291,28 +874,299 @@ class CacheService:
 cache_service = CacheService()
 
 
-def cached(prefix: str, ttl: int = 300):
-    """Decorator for caching function results."""
+class _Flight:
+    """One in-progress recompute that other callers can wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = _MISSING
+        self.error: Optional[BaseException] = None
+
+
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+_recompute_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _count(prefix: str, event: str, trigger: Optional[str] = None):
+    """Record a recompute, coalesced call or stale hit for ``prefix``."""
+    with _flights_lock:
+        stats = _recompute_stats.setdefault(
+            prefix,
+            {
+                "recomputes": 0,
+                "coalesced": 0,
+                "stale_served": 0,
+                "early_refreshes": 0,
+                "warm_refreshes": 0,
+            },
+        )
+        stats[event] += 1
+        if trigger in ("early", "warm"):
+            stats[f"{trigger}_refreshes"] += 1
+    if not PROMETHEUS_AVAILABLE:
+        return
+    if event == "recomputes":
+        CACHE_RECOMPUTES.labels(prefix=prefix, trigger=trigger).inc()
+    elif event == "coalesced":
+        CACHE_COALESCED.labels(prefix=prefix).inc()
+    else:
+        CACHE_STALE_SERVED.labels(prefix=prefix).inc()
+
+
+def get_recompute_stats() -> Dict[str, Dict[str, int]]:
+    """Per-prefix recompute, coalesced, stale-served and early-refresh counts."""
+    with _flights_lock:
+        return {prefix: dict(stats) for prefix, stats in _recompute_stats.items()}
+
+
+def _join_flight(key: str):
+    """Return ``(flight, is_leader)`` for the recompute of ``key``."""
+    with _flights_lock:
+        flight = _flights.get(key)
+        if flight is not None:
+            return flight, False
+        flight = _flights[key] = _Flight()
+        return flight, True
+
+
+def _land_flight(key: str, flight: _Flight, result: Any = _MISSING, error=None):
+    """Publish the leader's outcome and release the waiters."""
+    flight.result, flight.error = result, error
+    with _flights_lock:
+        _flights.pop(key, None)
+    flight.done.set()
+
+
+def _is_entry(value: Any) -> bool:
+    return isinstance(value, dict) and value.get("__cached__") == 1
+
+
+def _load_exclusive(
+    prefix: str, key: str, load, lock_timeout: float, wait: bool
+) -> Any:
+    """
+    Run ``load`` unless another process already recomputes ``key``.
+
+    Args:
+        prefix: Key prefix (metrics label)
+        key: Cache key
+        load: Recomputes and stores the value
+        lock_timeout: Lock lease and maximum wait in seconds
+        wait: Wait for the other process's value instead of giving up
+
+    Returns:
+        The value, or ``_MISSING`` if another process holds the lock and
+        ``wait`` is False
+    """
+    client = cache_service.redis_client
+    if client is None:
+        return load()
+
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex
+    try:
+        acquired = client.set(lock_key, token, nx=True, px=int(lock_timeout * 1000))
+    except Exception as e:
+        logger.warning(f"Recompute lock unavailable for {key}: {e}")
+        return load()
+
+    if not acquired:
+        if not wait:
+            return _MISSING
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache_service.get(key)
+            if _is_entry(entry):
+                _count(prefix, "coalesced")
+                return entry["v"]
+        # The holder died or is too slow; compute it ourselves
+        return load()
+
+    try:
+        return load()
+    finally:
+        try:
+            client.eval(_UNLOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.debug(f"Recompute lock release failed for {key}: {e}")
+
+
+def _refresh_in_background(
+    prefix: str, key: str, load, trigger: str, lock_timeout: float
+):
+    """Start one background refresh of ``key`` unless one is already running."""
+    flight, leader = _join_flight(key)
+    if not leader:
+        _count(prefix, "coalesced")
+        return
+
+    load = partial(load, trigger)
+    if FLASK_AVAILABLE and has_request_context():
+        # Route loaders read ``request``; keep it available in the thread
+        load = copy_current_request_context(load)
+
+    def refresh():
+        try:
+            result = _load_exclusive(prefix, key, load, lock_timeout, wait=False)
+            _land_flight(key, flight, result=result)
+        except Exception as e:
+            logger.warning(f"Background refresh of {key} failed: {e}")
+            _land_flight(key, flight, error=e)
+
+    threading.Thread(
+        target=refresh, name=f"cache-refresh-{prefix}", daemon=True
+    ).start()
+
+
+def cached(
+    prefix: str,
+    ttl: int = 300,
+    stale_ttl: int = 0,
+    early_refresh_beta: float = 1.0,
+    lock_timeout: Optional[float] = None,
+    warm: bool = False,
+):
+    """
+    Decorator for caching function results.
+
+    Args:
+        prefix: Key prefix (also the label of the recompute metrics)
+        ttl: Seconds a result is fresh
+        stale_ttl: Seconds after ``ttl`` during which the stale result is
+            served while one caller refreshes it (default 0: disabled; opt in
+            only where a result up to ``ttl + stale_ttl`` old is acceptable)
+        early_refresh_beta: Aggressiveness of probabilistic early refresh;
+            entries that took longer to compute refresh earlier (0 disables)
+        lock_timeout: Seconds to wait for another caller's recompute
+            (CACHE_LOCK_TIMEOUT, default 10)
+        warm: Keep the entry of the argument-less call warm with the cache
+            warmer (routes and functions; see ``cache_warmer``)
+
+    The wrapper gets ``refresh(args, kwargs, min_fresh)``, which recomputes
+    the entry of ``func(*args, **kwargs)`` unless it stays fresh for
+    ``min_fresh`` more seconds.
+    """
+    wait_timeout = (
+        lock_timeout
+        if lock_timeout is not None
+        else float(os.getenv("CACHE_LOCK_TIMEOUT", "10"))
+    )
 
     def decorator(func):
+        def loader(args, kwargs):
+            """Cache key of a call and the function recomputing its entry."""
+            cache_key = cache_service._generate_key(prefix, *args, **kwargs)
+
+            def load(trigger: str = "miss"):
+                _count(prefix, "recomputes", trigger)
+                started = time.monotonic()
+                result = func(*args, **kwargs)
+                entry = {
+                    "__cached__": 1,
+                    "v": result,
+                    "x": time.time() + ttl,
+                    "d": time.monotonic() - started,
+                }
+                cache_service.set(cache_key, entry, ttl + stale_ttl, tags=[prefix])
+                return result
+
+            return cache_key, load
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Generate cache key
-            cache_key = cache_service._generate_key(prefix, *args, **kwargs)
+            cache_key, load = loader(args, kwargs)
 
             # Try to get from cache
-            cached_result = cache_service.get(cache_key)
-            if cached_result is not None:
+            entry = cache_service.get(cache_key)
+            now = time.time()
+            # Without a stale window an expired entry is a miss
+            if _is_entry(entry) and (stale_ttl or now < entry["x"]):
+                if now >= entry["x"]:
+                    _count(prefix, "stale_served")
+                    _refresh_in_background(
+                        prefix, cache_key, load, "stale", wait_timeout
+                    )
+                elif early_refresh_beta and (
+                    now
+                    - entry["d"] * early_refresh_beta * math.log(1.0 - random.random())
+                    >= entry["x"]
+                ):
+                    _refresh_in_background(
+                        prefix, cache_key, load, "early", wait_timeout
+                    )
                 logger.debug(f"Cache hit for {cache_key}")
-                return cached_result
+                return entry["v"]
+
+            # Miss: one caller recomputes, concurrent callers share its result
+            flight, leader = _join_flight(cache_key)
+            if not leader:
+                _count(prefix, "coalesced")
+                if flight.done.wait(wait_timeout):
+                    if flight.error is not None:
+                        raise flight.error
+                    if flight.result is not _MISSING:
+                        return flight.result
+                return load()
 
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache_service.set(cache_key, result, ttl)
+            try:
+                result = _load_exclusive(
+                    prefix, cache_key, load, wait_timeout, wait=True
+                )
+            except Exception as e:
+                _land_flight(cache_key, flight, error=e)
+                raise
+            _land_flight(cache_key, flight, result=result)
             logger.debug(f"Cache miss for {cache_key}, cached result")
 
             return result
 
+        def refresh(
+            args: tuple = (),
+            kwargs: Optional[Dict[str, Any]] = None,
+            min_fresh: float = 0.0,
+        ) -> str:
+            """
+            Recompute one entry ahead of its expiry.
+
+            Args:
+                args: Positional arguments of the call
+                kwargs: Keyword arguments of the call
+                min_fresh: Skip entries fresh for at least this many more seconds
+
+            Returns:
+                ``refreshed``, ``fresh`` (still fresh, e.g. another instance
+                refreshed it) or ``busy`` (another process is recomputing it)
+            """
+            cache_key, load = loader(args, kwargs or {})
+            entry = cache_service.get(cache_key)
+            if _is_entry(entry) and entry["x"] - time.time() > min_fresh:
+                return "fresh"
+
+            flight, leader = _join_flight(cache_key)
+            if not leader:
+                # A request is recomputing it already
+                flight.done.wait(wait_timeout)
+                if flight.error is not None:
+                    raise flight.error
+                return "busy"
+            try:
+                result = _load_exclusive(
+                    prefix, cache_key, partial(load, "warm"), wait_timeout, wait=False
+                )
+            except Exception as e:
+                _land_flight(cache_key, flight, error=e)
+                raise
+            _land_flight(cache_key, flight, result=result)
+            return "busy" if result is _MISSING else "refreshed"
+
+        wrapper.refresh = refresh
+        wrapper.cache_prefix = prefix
+        wrapper.cache_ttl = ttl
+        wrapper.cache_warm = warm
+        if warm:
+            register_warmup(wrapper)
         return wrapper
 
     return decorator
@@ -327,12 +1181,9 @@ def cache_invalidate(prefix: str):
             # Execute function
             result = func(*args, **kwargs)
 
-            # Invalidate cache
-            pattern = f"smartcloudops:{prefix}:*"
-            deleted_count = cache_service.clear(pattern)
-            logger.debug(
-                f"Invalidated {deleted_count} cache entries for pattern {pattern}"
-            )
+            # Invalidate cache (entries are tagged with their prefix by @cached)
+            deleted_count = cache_service.invalidate_tags(prefix)
+            logger.debug(f"Invalidated {deleted_count} cache entries tagged {prefix}")
 
             return result
 
@@ -372,5 +1223,6 @@ __all__ = [
     "is_cache_available",
     "cached",
     "cache_invalidate",
+    "get_recompute_stats",
     "CACHE_CONFIGS",
 ]
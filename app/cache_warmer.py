@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Cache Warmer
+==============================
+
+Populates ``@cached`` entries before traffic needs them.
+
+Functions and endpoints opt in with ``@cached(..., warm=True)``; functions
+that take arguments register the calls to warm with ``register_warmup``.
+On start the warmer refreshes every registered entry concurrently
+(CACHE_WARM_WORKERS threads) and then keeps each one warm by refreshing
+it shortly before its TTL runs out (CACHE_WARM_REFRESH_AHEAD of the TTL).
+
+The instance reports ready (``is_ready``, ``/ready``) once the first pass
+has finished, or after CACHE_WARM_BUDGET seconds so that one slow loader
+cannot keep an instance out of the load balancer; unfinished entries keep
+warming in the background. Entries another instance refreshed recently
+are not recomputed, so a fleet shares the warm-up work.
+
+Endpoints need a request context; the warmer finds the GET routes of the
+application whose view opted in and calls them in a test request context
+for the route's path.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupJob:
+    """One cache entry kept warm: a ``@cached`` function and its arguments."""
+
+    name: str
+    func: Callable
+    args: tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    path: Optional[str] = None
+    last_warmed: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_result: Optional[str] = None
+    error: Optional[str] = None
+    next_refresh: float = 0.0
+
+    @property
+    def ttl(self) -> float:
+        return self.func.cache_ttl
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "ttl": self.ttl,
+            "warm": self.last_warmed is not None,
+            "last_warmed": self.last_warmed,
+            "last_duration_ms": (
+                round(self.last_duration * 1000, 2)
+                if self.last_duration is not None
+                else None
+            ),
+            "last_result": self.last_result,
+            "error": self.error,
+        }
+
+
+_registry: Dict[str, WarmupJob] = {}
+_registry_lock = threading.Lock()
+
+
+def register_warmup(
+    func: Callable,
+    args: tuple = (),
+    kwargs: Optional[Dict[str, Any]] = None,
+    name: Optional[str] = None,
+) -> WarmupJob:
+    """
+    Keep the entry of ``func(*args, **kwargs)`` warm.
+
+    Args:
+        func: Function decorated with ``@cached``
+        args: Positional arguments of the call to warm
+        kwargs: Keyword arguments of the call to warm
+        name: Job name (default: qualified function name and arguments)
+
+    Returns:
+        The registered job
+    """
+    if not hasattr(func, "refresh"):
+        raise TypeError(f"{func.__qualname__} is not decorated with @cached")
+    if name is None:
+        name = f"{func.__module__}.{func.__qualname__}"
+        if args or kwargs:
+            name += f"{args}{kwargs or ''}"
+    job = WarmupJob(name=name, func=func, args=tuple(args), kwargs=dict(kwargs or {}))
+    with _registry_lock:
+        _registry[name] = job
+    return job
+
+
+def get_warmup_registry() -> Dict[str, WarmupJob]:
+    """Registered jobs by name."""
+    with _registry_lock:
+        return dict(_registry)
+
+
+class CacheWarmer:
+    """Warms registered cache entries at startup and before they expire."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        budget: Optional[float] = None,
+        refresh_ahead: Optional[float] = None,
+    ):
+        """
+        Initialize the warmer.
+
+        Args:
+            workers: Concurrent loaders (CACHE_WARM_WORKERS, default 4)
+            budget: Seconds the first pass may delay readiness
+                (CACHE_WARM_BUDGET, default 30)
+            refresh_ahead: Fraction of the TTL left when an entry is
+                refreshed (CACHE_WARM_REFRESH_AHEAD, default 0.2)
+        """
+        self.workers = workers or int(os.getenv("CACHE_WARM_WORKERS", "4"))
+        self.budget = (
+            budget
+            if budget is not None
+            else float(os.getenv("CACHE_WARM_BUDGET", "30"))
+        )
+        self.refresh_ahead = (
+            refresh_ahead
+            if refresh_ahead is not None
+            else float(os.getenv("CACHE_WARM_REFRESH_AHEAD", "0.2"))
+        )
+        self.jobs: List[WarmupJob] = []
+        self.app = None
+        self.started_at: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.budget_exceeded = False
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._fork_hook = False
+
+    def _collect_jobs(self, app, jobs: Optional[List[WarmupJob]]) -> List[WarmupJob]:
+        """Registered (or given) jobs plus the opted-in GET routes of ``app``."""
+        if jobs is None:
+            jobs = list(get_warmup_registry().values())
+        jobs = {id(job.func.refresh): job for job in jobs}
+        if app is not None:
+            for rule in app.url_map.iter_rules():
+                view = app.view_functions.get(rule.endpoint)
+                if (
+                    not getattr(view, "cache_warm", False)
+                    or rule.arguments
+                    or "GET" not in (rule.methods or ())
+                ):
+                    continue
+                # Route decorators copy the @cached attributes onto their wrapper
+                jobs[id(view.refresh)] = WarmupJob(
+                    name=rule.endpoint, func=view, path=rule.rule
+                )
+        return list(jobs.values())
+
+    def start(self, app=None, jobs: Optional[List[WarmupJob]] = None) -> "CacheWarmer":
+        """
+        Start warming in the background; returns immediately.
+
+        Args:
+            app: Flask application whose opted-in routes are warmed and
+                whose context loaders run in
+            jobs: Jobs to warm instead of the registered ones
+        """
+        if self._thread is not None:
+            return self
+        self.app = app
+        self.jobs = self._collect_jobs(app, jobs)
+        self.started_at = time.time()
+        if not self._fork_hook and hasattr(os, "register_at_fork"):
+            # Threads do not survive fork (gunicorn --preload): restart in workers
+            os.register_at_fork(after_in_child=self._restart_after_fork)
+            self._fork_hook = True
+        if not self.jobs:
+            self._ready.set()
+            return self
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="cache-warmer"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="cache-warmer", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"🔥 Warming {len(self.jobs)} cache entries (budget {self.budget}s)"
+        )
+        return self
+
+    def _restart_after_fork(self):
+        if self.started_at is None:
+            return
+        self._thread = None
+        self._executor = None
+        self._running = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        for job in self.jobs:
+            job.next_refresh = 0.0
+        self.start(self.app, self.jobs)
+
+    def stop(self):
+        """Stop refreshing; running loaders finish in the background."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def is_ready(self) -> bool:
+        """True once the first pass finished or ran out of budget (or never started)."""
+        return self.started_at is None or self._ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until ready; False on timeout."""
+        return self.started_at is None or self._ready.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness and the state of every job."""
+        return {
+            "ready": self.is_ready(),
+            "started": self.started_at is not None,
+            "warmup_seconds": self.warmup_seconds,
+            "budget_seconds": self.budget,
+            "budget_exceeded": self.budget_exceeded,
+            "jobs": [job.to_dict() for job in self.jobs],
+        }
+
+    def _run(self):
+        """First pass within the budget, then refresh entries before expiry."""
+        started = time.monotonic()
+        futures = [
+            self._submit(job, min_fresh=self._min_fresh(job)) for job in self.jobs
+        ]
+        _, pending = wait(futures, timeout=self.budget)
+        self.warmup_seconds = round(time.monotonic() - started, 3)
+        self.budget_exceeded = bool(pending)
+        failed = [job.name for job in self.jobs if job.error]
+        if pending:
+            logger.warning(
+                f"⚠️ Cache warm-up exceeded its {self.budget}s budget, "
+                f"{len(pending)} entries still loading"
+            )
+        elif failed:
+            logger.warning(
+                f"⚠️ Cache warm-up finished with failures: {', '.join(failed)}"
+            )
+        else:
+            logger.info(f"✅ Cache warm in {self.warmup_seconds}s")
+        self._ready.set()
+
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for job in self.jobs:
+                if job.next_refresh <= now:
+                    self._submit(job, min_fresh=self._min_fresh(job))
+            next_due = min(job.next_refresh for job in self.jobs)
+            self._stop.wait(min(max(next_due - time.monotonic(), 0.1), 60))
+
+    def _min_fresh(self, job: WarmupJob) -> float:
+        return job.ttl * self.refresh_ahead
+
+    def _submit(self, job: WarmupJob, min_fresh: float):
+        """Queue a refresh of ``job`` unless one is still running."""
+        with self._lock:
+            future = self._running.get(job.name)
+            if future is not None and not future.done():
+                return future
+            # Re-checked after ``ttl - min_fresh``, when it is due again
+            job.next_refresh = time.monotonic() + max(job.ttl - min_fresh, 1)
+            future = self._running[job.name] = self._executor.submit(
+                self._warm, job, min_fresh
+            )
+            return future
+
+    def _warm(self, job: WarmupJob, min_fresh: float):
+        started = time.monotonic()
+        try:
+            if self.app is not None and job.path is not None:
+                with self.app.test_request_context(job.path):
+                    result = job.func.refresh(job.args, job.kwargs, min_fresh)
+            elif self.app is not None:
+                with self.app.app_context():
+                    result = job.func.refresh(job.args, job.kwargs, min_fresh)
+            else:
+                result = job.func.refresh(job.args, job.kwargs, min_fresh)
+            job.last_warmed = time.time()
+            job.last_result = result
+            job.error = None
+        except Exception as e:
+            logger.warning(f"Cache warm-up of {job.name} failed: {e}")
+            job.error = str(e)
+            # Retry sooner than a full TTL
+            job.next_refresh = min(
+                job.next_refresh, time.monotonic() + max(job.ttl * 0.1, 1)
+            )
+        finally:
+            job.last_duration = time.monotonic() - started
+
+
+# Global warmer instance
+cache_warmer = CacheWarmer()
+
+
+def get_cache_warmer() -> CacheWarmer:
+    """Get the global cache warmer instance."""
+    return cache_warmer
+
+
+def start_cache_warmer(app=None) -> CacheWarmer:
+    """
+    Start the global warmer unless CACHE_WARM_ENABLED is false.
+
+    Args:
+        app: Flask application whose opted-in routes are warmed
+    """
+    if os.getenv("CACHE_WARM_ENABLED", "true").lower() != "true":
+        logger.info("Cache warm-up disabled")
+        return cache_warmer
+    return cache_warmer.start(app)
+
+
+__all__ = [
+    "CacheWarmer",
+    "WarmupJob",
+    "get_cache_warmer",
+    "get_warmup_registry",
+    "register_warmup",
+    "start_cache_warmer",
+]
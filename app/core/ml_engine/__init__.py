@@ -23,9 +23,25 @@ except ImportError:
     ProductionInferenceEngine = None  # type: ignore
     PRODUCTION_ENGINE_AVAILABLE = False
 
+try:
+    from .inference_server import (
+        InferenceClient,
+        InferenceServer,
+        RemoteInferenceEngine,
+    )
+
+    INFERENCE_SERVER_AVAILABLE = True
+except ImportError:
+    InferenceServer = None  # type: ignore
+    InferenceClient = None  # type: ignore
+    RemoteInferenceEngine = None  # type: ignore
+    INFERENCE_SERVER_AVAILABLE = False
+
 # Export what's available
 __all__ = []
 if SECURE_ENGINE_AVAILABLE:
     __all__.append("SecureMLInferenceEngine")
 if PRODUCTION_ENGINE_AVAILABLE:
     __all__.append("ProductionInferenceEngine")
+if INFERENCE_SERVER_AVAILABLE:
+    __all__.extend(["InferenceServer", "InferenceClient", "RemoteInferenceEngine"])
@@ -0,0 +1,642 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Shared Local Inference Server
+===============================================
+
+Standalone inference daemon that holds a single copy of the model bundle and
+serves scoring to every Gunicorn worker, Celery worker and background thread
+on the host over a Unix domain socket.
+
+Wire format: each frame is a 5-byte header (payload length, codec id) followed
+by a msgpack (or JSON, when msgpack is not installed) encoded array.
+
+    request:  [msg_id, op, payload]
+    response: [msg_id, ok, result_or_error]
+
+Requests are pipelined (clients may send many frames before reading replies,
+and replies carry the msg_id they answer) and predictions from all connections
+are coalesced into micro-batches scored with a single vectorized model call.
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = os.getenv(
+    "ML_INFERENCE_SOCKET", "/run/smartcloudops/inference.sock"
+)
+
+_HEADER = struct.Struct(">IB")
+_CODEC_JSON = 0
+_CODEC_MSGPACK = 1
+_MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+
+class InferenceServerError(Exception):
+    """Raised when the inference server cannot be reached or rejects a request."""
+
+
+class InferenceServerUnavailable(InferenceServerError):
+    """Raised when the inference server cannot be reached or does not answer."""
+
+
+def _encode_frame(message: List[Any]) -> bytes:
+    """Encode a message array into a length-prefixed frame."""
+    if MSGPACK_AVAILABLE:
+        payload = msgpack.packb(message, use_bin_type=True)
+        codec = _CODEC_MSGPACK
+    else:
+        payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        codec = _CODEC_JSON
+    return _HEADER.pack(len(payload), codec) + payload
+
+
+def _decode_payload(codec: int, payload: bytes) -> List[Any]:
+    """Decode a frame payload produced by either peer's codec."""
+    if codec == _CODEC_MSGPACK:
+        if not MSGPACK_AVAILABLE:
+            raise InferenceServerError("Received msgpack frame but msgpack is missing")
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload.decode("utf-8"))
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    """Read exactly ``size`` bytes, returning None on a clean EOF."""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def _read_frame(sock: socket.socket) -> Optional[List[Any]]:
+    """Read and decode one frame from the socket."""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    length, codec = _HEADER.unpack(header)
+    if length > _MAX_FRAME_SIZE:
+        raise InferenceServerError(f"Frame of {length} bytes exceeds limit")
+    payload = _recv_exact(sock, length)
+    if payload is None:
+        return None
+    return _decode_payload(codec, payload)
+
+
+class _Connection:
+    """Server-side client connection with a serialized writer."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.write_lock = threading.Lock()
+        self.closed = False
+
+    def send(self, message: List[Any]):
+        """Send a response frame; drop it silently if the client went away."""
+        if self.closed:
+            return
+        frame = _encode_frame(message)
+        try:
+            with self.write_lock:
+                self.sock.sendall(frame)
+        except OSError:
+            self.closed = True
+
+
+class InferenceServer:
+    """Unix-socket inference daemon with request pipelining and micro-batching."""
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        engine=None,
+        max_batch_size: int = 64,
+        max_batch_delay_ms: float = 2.0,
+    ):
+        """
+        Initialize the inference server.
+
+        Args:
+            socket_path: Filesystem path of the Unix domain socket
+            engine: Engine exposing predict_batch/health_check/get_model_info
+                (a SecureMLInferenceEngine is created when omitted)
+            max_batch_size: Maximum predictions scored per model call
+            max_batch_delay_ms: How long to wait for a batch to fill up
+        """
+        self.socket_path = socket_path
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay_ms / 1000.0
+        self.pending: "queue.Queue[Tuple[_Connection, Any, Dict[str, Any]]]" = (
+            queue.Queue()
+        )
+        self.stats = {
+            "connections": 0,
+            "requests": 0,
+            "predictions": 0,
+            "batches": 0,
+            "errors": 0,
+        }
+        self.lock = threading.Lock()
+        self._listener: Optional[socket.socket] = None
+        self._running = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _load_engine(self):
+        """Create the in-process engine that owns the model bundle."""
+        if self.engine is None:
+            from app.core.ml_engine.secure_inference import SecureMLInferenceEngine
+
+            self.engine = SecureMLInferenceEngine()
+        logger.info("Inference server engine ready")
+
+    def start(self):
+        """Bind the socket and start the accept and batching threads."""
+        self._load_engine()
+
+        socket_dir = Path(self.socket_path).parent
+        socket_dir.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        self._listener.listen(128)
+        self._running.set()
+
+        for target, name in (
+            (self._accept_loop, "inference-accept"),
+            (self._batch_loop, "inference-batcher"),
+        ):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"Inference server listening on {self.socket_path}")
+
+    def serve_forever(self):
+        """Start the server and block until it is stopped."""
+        self.start()
+        try:
+            while self._running.is_set():
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop accepting connections and remove the socket file."""
+        self._running.clear()
+        if self._listener:
+            try:
+                self._listener.close()
+            except OSError:
+                pass
+            self._listener = None
+        if os.path.exists(self.socket_path):
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        logger.info("Inference server stopped")
+
+    def _accept_loop(self):
+        """Accept client connections and spawn a reader per connection."""
+        while self._running.is_set():
+            try:
+                client_sock, _ = self._listener.accept()
+            except OSError:
+                break
+            with self.lock:
+                self.stats["connections"] += 1
+            conn = _Connection(client_sock)
+            threading.Thread(
+                target=self._reader_loop,
+                args=(conn,),
+                name="inference-conn",
+                daemon=True,
+            ).start()
+
+    def _reader_loop(self, conn: _Connection):
+        """Read pipelined requests from one connection."""
+        try:
+            while self._running.is_set():
+                message = _read_frame(conn.sock)
+                if message is None:
+                    break
+                try:
+                    self._dispatch(conn, message)
+                except Exception as e:
+                    # One failing request must not end the connection
+                    logger.warning(f"Inference request failed: {e}")
+                    self._record_error()
+                    msg_id = (
+                        message[0] if isinstance(message, list) and message else None
+                    )
+                    conn.send([msg_id, False, str(e)])
+        except (OSError, InferenceServerError, ValueError) as e:
+            logger.debug(f"Inference connection closed: {e}")
+        finally:
+            conn.closed = True
+            try:
+                conn.sock.close()
+            except OSError:
+                pass
+
+    def _dispatch(self, conn: _Connection, message: List[Any]):
+        """Route a request to the batcher or answer it inline."""
+        with self.lock:
+            self.stats["requests"] += 1
+
+        try:
+            msg_id, op, payload = message
+        except (TypeError, ValueError):
+            conn.send([None, False, "Malformed request"])
+            return
+
+        if op == "predict":
+            self.pending.put((conn, msg_id, payload))
+        elif op == "predict_batch":
+            try:
+                results = self.engine.predict_batch(payload)
+                self._record_batch(len(payload))
+                conn.send([msg_id, True, results])
+            except Exception as e:
+                self._record_error()
+                conn.send([msg_id, False, str(e)])
+        elif op == "health":
+            conn.send([msg_id, True, self.health_check()])
+        elif op == "info":
+            conn.send([msg_id, True, self.engine.get_model_info()])
+        else:
+            conn.send([msg_id, False, f"Unknown operation: {op}"])
+
+    def _batch_loop(self):
+        """Coalesce single predictions from all connections into batches."""
+        while self._running.is_set():
+            try:
+                first = self.pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_batch_delay
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._score_batch(batch)
+
+    def _score_batch(self, batch: List[Tuple[_Connection, Any, Dict[str, Any]]]):
+        """Score a batch and fan the results back out to their connections."""
+        try:
+            results = self.engine.predict_batch([payload for _, _, payload in batch])
+        except Exception:
+            # Fall back to per-item scoring so one bad sample can't fail the batch
+            for conn, msg_id, payload in batch:
+                try:
+                    conn.send([msg_id, True, self.engine.predict_batch([payload])[0]])
+                except Exception as e:
+                    self._record_error()
+                    conn.send([msg_id, False, str(e)])
+            self._record_batch(len(batch))
+            return
+
+        for (conn, msg_id, _), result in zip(batch, results):
+            conn.send([msg_id, True, result])
+        self._record_batch(len(batch))
+
+    def _record_batch(self, size: int):
+        with self.lock:
+            self.stats["batches"] += 1
+            self.stats["predictions"] += size
+
+    def _record_error(self):
+        with self.lock:
+            self.stats["errors"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get server statistics."""
+        with self.lock:
+            stats = self.stats.copy()
+        stats["avg_batch_size"] = (
+            round(stats["predictions"] / stats["batches"], 2) if stats["batches"] else 0
+        )
+        stats["queue_depth"] = self.pending.qsize()
+        return stats
+
+    def health_check(self) -> Dict[str, Any]:
+        """Engine health plus server statistics."""
+        health = self.engine.health_check()
+        health["server"] = self.get_stats()
+        health["socket_path"] = self.socket_path
+        return health
+
+
+class InferenceClient:
+    """Thread-safe pipelining client for the local inference server."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 5.0):
+        """
+        Initialize the client.
+
+        Args:
+            socket_path: Path of the server's Unix domain socket
+            timeout: Seconds to wait for each response
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _ensure_connected(self) -> socket.socket:
+        """Connect lazily and start the response reader."""
+        with self._lock:
+            if self._sock is not None:
+                return self._sock
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                sock.close()
+                raise InferenceServerUnavailable(
+                    f"Inference server unavailable at {self.socket_path}: {e}"
+                )
+            self._sock = sock
+            threading.Thread(
+                target=self._reader_loop,
+                args=(sock,),
+                name="inference-client",
+                daemon=True,
+            ).start()
+            return sock
+
+    def _reader_loop(self, sock: socket.socket):
+        """Resolve pending futures as responses arrive, in any order."""
+        error: Exception = InferenceServerUnavailable(
+            "Inference server closed connection"
+        )
+        try:
+            while True:
+                message = _read_frame(sock)
+                if message is None:
+                    break
+                msg_id, ok, result = message
+                with self._lock:
+                    future = self._pending.pop(msg_id, None)
+                if future is None:
+                    continue
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(InferenceServerError(result))
+        except (OSError, ValueError, InferenceServerError) as e:
+            error = InferenceServerUnavailable(f"Inference connection failed: {e}")
+        finally:
+            with self._lock:
+                if self._sock is sock:
+                    self._sock = None
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def submit(self, op: str, payload: Any = None) -> Future:
+        """Send a request without waiting for the reply."""
+        sock = self._ensure_connected()
+        msg_id = next(self._ids)
+        future: Future = Future()
+        with self._lock:
+            self._pending[msg_id] = future
+        frame = _encode_frame([msg_id, op, payload])
+        try:
+            with self._write_lock:
+                sock.sendall(frame)
+        except OSError as e:
+            with self._lock:
+                self._pending.pop(msg_id, None)
+            raise InferenceServerUnavailable(f"Failed to send inference request: {e}")
+        future.msg_id = msg_id
+        return future
+
+    def call(self, op: str, payload: Any = None) -> Any:
+        """Send a request and wait for its reply."""
+        future = self.submit(op, payload)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._pending.pop(future.msg_id, None)
+            raise InferenceServerUnavailable(
+                f"Inference server did not answer {op} within {self.timeout}s"
+            )
+
+    def close(self):
+        """Close the connection to the server."""
+        with self._lock:
+            sock, self._sock = self._sock, None
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+
+def _in_process_engine():
+    """Engine that scores in this process, loading its own model copy."""
+    from app.core.ml_engine.secure_inference import SecureMLInferenceEngine
+
+    return SecureMLInferenceEngine()
+
+
+class RemoteInferenceEngine:
+    """Engine backend that scores through the shared inference server.
+
+    Mirrors the SecureMLInferenceEngine interface so callers can use either.
+    When the server cannot be reached, requests are scored by an in-process
+    engine (created on first use) and the server is tried again after
+    ML_INFERENCE_RETRY_SECONDS.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        timeout: float = 5.0,
+        fallback_factory: Optional[Callable[[], Any]] = _in_process_engine,
+    ):
+        """
+        Initialize the remote engine.
+
+        Args:
+            socket_path: Path of the server's Unix domain socket
+            timeout: Seconds to wait for each response
+            fallback_factory: Creates the in-process engine used while the
+                server is down; None disables the fallback
+        """
+        self.socket_path = socket_path
+        self.client = InferenceClient(socket_path, timeout=timeout)
+        self.fallback_factory = fallback_factory
+        self.retry_interval = float(os.getenv("ML_INFERENCE_RETRY_SECONDS", "30"))
+        self.is_initialized = True
+        self._local = None
+        self._local_lock = threading.Lock()
+        self._server_down_until = 0.0
+        self._last_error: Optional[str] = None
+
+    def _local_engine(self):
+        with self._local_lock:
+            if self._local is None:
+                self._local = self.fallback_factory()
+            return self._local
+
+    def _call(self, op: str, payload: Any, local: Callable[[Any], Any]) -> Any:
+        """Ask the server, or score in process while it is unreachable."""
+        if time.monotonic() >= self._server_down_until:
+            try:
+                result = self.client.call(op, payload)
+                if self._last_error is not None:
+                    logger.info("✅ Inference server reachable again")
+                    self._last_error = None
+                return result
+            except InferenceServerUnavailable as e:
+                if self.fallback_factory is None:
+                    raise
+                if self._last_error is None:
+                    logger.warning(f"⚠️ Inference server down, scoring in process: {e}")
+                self._last_error = str(e)
+                self._server_down_until = time.monotonic() + self.retry_interval
+        return local(self._local_engine())
+
+    def predict(self, metrics: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        """Score one sample; coalesced with other callers on the server."""
+        return self._call("predict", metrics, lambda engine: engine.predict(metrics))
+
+    def predict_batch(self, metrics_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Score many samples in a single round trip."""
+        metrics_list = list(metrics_list)
+        return self._call(
+            "predict_batch",
+            metrics_list,
+            lambda engine: engine.predict_batch(metrics_list),
+        )
+
+    def predict_anomaly(
+        self, metrics: Dict[str, Any], user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Predict anomaly and return the simplified result shape."""
+        try:
+            raw = self.predict(metrics)
+            return {
+                "anomaly": bool(raw.get("is_anomaly", False)),
+                "confidence": float(raw.get("confidence", 0.0)),
+                "details": {
+                    "model_version": raw.get("model_version", "unknown"),
+                    "prediction_timestamp": raw.get("prediction_timestamp"),
+                },
+            }
+        except Exception:
+            return {"anomaly": False, "confidence": 0.0}
+
+    def get_model_info(self) -> Dict[str, Any]:
+        """Get model information from the server."""
+        return self._call("info", None, lambda engine: engine.get_model_info())
+
+    def health_check(self) -> Dict[str, Any]:
+        """Health of the remote engine, or of the in-process fallback scoring for it."""
+        try:
+            return self.client.call("health")
+        except Exception as e:
+            if self._local is not None:
+                health = dict(self._local.health_check())
+                health.update({"backend": "in_process", "server_error": str(e)})
+                return health
+            return {
+                "status": "unhealthy",
+                "error": str(e),
+                "socket_path": self.socket_path,
+            }
+
+
+def is_inference_server_available(socket_path: str = DEFAULT_SOCKET_PATH) -> bool:
+    """Check whether an inference server is listening on the socket."""
+    if not os.path.exists(socket_path):
+        return False
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def main():
+    """Run the inference server as a standalone daemon."""
+    parser = argparse.ArgumentParser(description="SmartCloudOps inference server")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="Socket path")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-batch-delay-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    # The engine modules import siblings relative to the app directory
+    app_dir = Path(__file__).resolve().parents[2]
+    sys.path.insert(0, str(app_dir))
+    sys.path.insert(0, str(app_dir.parent))
+
+    server = InferenceServer(
+        socket_path=args.socket,
+        max_batch_size=args.max_batch_size,
+        max_batch_delay_ms=args.max_batch_delay_ms,
+    )
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -13,14 +13,19 @@ import sys
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import joblib
 import numpy as np
 import pandas as pd
 
 from utils.response import build_error_response, build_success_response
-from utils.validation import validate_ml_metrics
+from utils.validation import ML_METRIC_RULES, validate_ml_metrics
+
+try:
+    from app.metrics_archive import load_training_frame
+except ImportError:
+    from metrics_archive import load_training_frame
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent.parent
@@ -35,6 +40,7 @@ class SecureMLInferenceEngine:
         self.logger = logging.getLogger(__name__)
         self.model_path = model_path or os.getenv("ML_MODEL_PATH", "./ml_models")
         self.model = None
+        self.scaler = None
         self.model_metadata = {}
         self.feature_names = []
         self.is_initialized = False
@@ -73,6 +79,10 @@ class SecureMLInferenceEngine:
                 # Load model
                 self.model = joblib.load(model_file)
 
+                # Load scaler once instead of on every prediction
+                scaler_file = Path(self.model_path) / "feature_scaler.pkl"
+                self.scaler = joblib.load(scaler_file) if scaler_file.exists() else None
+
                 # Load metadata
                 with open(metadata_file, "r") as f:
                     self.model_metadata = json.load(f)
@@ -94,8 +104,10 @@ class SecureMLInferenceEngine:
             from sklearn.ensemble import IsolationForest
             from sklearn.preprocessing import StandardScaler
 
-            # Generate synthetic training data
-            training_data = self._generate_training_data()
+            # Prefer archived real metrics; fall back to synthetic data
+            training_data = self._load_archived_training_data()
+            if training_data is None:
+                training_data = self._generate_training_data()
 
             # Prepare features
             X = training_data[self.feature_names].values
@@ -109,6 +121,7 @@ class SecureMLInferenceEngine:
                 contamination=0.1, random_state=42, n_estimators=100
             )
             self.model.fit(X_scaled)
+            self.scaler = scaler
 
             # Save model
             self._save_model(scaler)
@@ -119,6 +132,31 @@ class SecureMLInferenceEngine:
             self.logger.error(f"Failed to train model: {e}")
             raise
 
+    def _load_archived_training_data(self) -> Optional[pd.DataFrame]:
+        """Load recent real metrics from the Parquet archive, if populated."""
+        features = [
+            "cpu_usage",
+            "memory_usage",
+            "disk_usage",
+            "network_io",
+            "load_1m",
+            "load_5m",
+            "load_15m",
+            "response_time",
+        ]
+        try:
+            training_data = load_training_frame(features)
+        except Exception as e:
+            self.logger.warning(f"Could not load archived training data: {e}")
+            return None
+
+        if training_data is None:
+            return None
+
+        self.feature_names = features
+        self.logger.info(f"Training on {len(training_data)} archived metric rows")
+        return training_data
+
     def _generate_training_data(self) -> pd.DataFrame:
         """Generate synthetic training data for model training."""
         np.random.seed(42)
@@ -205,59 +243,15 @@ class SecureMLInferenceEngine:
             validated_metrics = validate_ml_metrics(metrics)
 
             # Prepare features
-            features = []
-            for feature_name in self.feature_names:
-                if feature_name in validated_metrics:
-                    features.append(validated_metrics[feature_name])
-                else:
-                    # Use default value if feature is missing
-                    features.append(0.0)
-
-            # Convert to numpy array
-            X = np.array(features).reshape(1, -1)
-
-            # Load scaler
-            scaler_file = Path(self.model_path) / "feature_scaler.pkl"
-            if scaler_file.exists():
-                scaler = joblib.load(scaler_file)
-                X_scaled = scaler.transform(X)
-            else:
-                X_scaled = X
+            X = self._build_feature_matrix([validated_metrics])
 
             # Make prediction
-            prediction = self.model.predict(X_scaled)[0]
-            anomaly_score = self.model.score_samples(X_scaled)[0]
-
-            # Determine if anomaly
+            prediction = self.model.predict(X)[0]
+            anomaly_score = self.model.score_samples(X)[0]
             is_anomaly = prediction == -1
 
-            # Calculate confidence
-            confidence = self._calculate_confidence(anomaly_score)
-
-            # Map severity level based on confidence
-            if confidence >= 0.9:
-                severity_level = "critical" if is_anomaly else "low"
-            elif confidence >= 0.7:
-                severity_level = "high" if is_anomaly else "low"
-            elif confidence >= 0.5:
-                severity_level = "medium" if is_anomaly else "low"
-            else:
-                severity_level = "low"
-
-            # Prepare response with both naming styles for compatibility
-            result = {
-                "is_anomaly": bool(is_anomaly),
-                "anomaly": bool(is_anomaly),
-                "anomaly_detected": bool(is_anomaly),
-                "anomaly_score": float(anomaly_score),
-                "confidence": float(confidence),
-                "confidence_score": float(confidence),
-                "severity_level": severity_level,
-                "prediction_timestamp": datetime.now(timezone.utc).isoformat(),
-                "model_version": self.model_metadata.get("model_version", "1.0.0"),
-                "features_used": self.feature_names,
-                "input_metrics": validated_metrics,
-            }
+            result = self._build_result(validated_metrics, is_anomaly, anomaly_score)
+            confidence = result["confidence"]
 
             # Log prediction
             self.logger.info(
@@ -270,6 +264,109 @@ class SecureMLInferenceEngine:
             self.logger.error(f"Prediction failed: {e}")
             raise
 
+    def predict_batch(
+        self, metrics_list: List[Dict[str, Union[int, float]]]
+    ) -> List[Dict[str, Any]]:
+        """Score many metric samples with a single vectorized model call.
+
+        Args:
+            metrics_list: List of metrics dictionaries
+
+        Returns:
+            List of prediction results in the same order as the input
+        """
+        if not self.is_initialized:
+            raise RuntimeError("ML inference engine not initialized")
+
+        if not metrics_list:
+            return []
+
+        validated = [validate_ml_metrics(metrics) for metrics in metrics_list]
+        X = self._build_feature_matrix(validated)
+
+        predictions = self.model.predict(X)
+        anomaly_scores = self.model.score_samples(X)
+
+        return [
+            self._build_result(metrics, prediction == -1, score)
+            for metrics, prediction, score in zip(validated, predictions, anomaly_scores)
+        ]
+
+    def score_frame(self, frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Score a DataFrame of raw metrics without per-row validation.
+
+        Applies the same rules as ``validate_ml_metrics`` column-wise:
+        missing and non-finite values become the default, the rest is
+        clamped to the valid range.
+
+        Args:
+            frame: One row per sample, one column per feature
+
+        Returns:
+            (is_anomaly, anomaly_score) arrays aligned with the frame rows
+        """
+        if not self.is_initialized:
+            raise RuntimeError("ML inference engine not initialized")
+
+        columns = []
+        for name in self.feature_names:
+            rules = ML_METRIC_RULES.get(name, {"min": -np.inf, "max": np.inf, "default": 0.0})
+            if name in frame:
+                values = pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=float)
+            else:
+                values = np.full(len(frame), rules["default"])
+            values = np.where(np.isfinite(values), values, rules["default"])
+            columns.append(np.clip(values, rules["min"], rules["max"]))
+
+        X = np.column_stack(columns) if columns else np.empty((len(frame), 0))
+        if self.scaler is not None:
+            X = self.scaler.transform(X)
+        return self.model.predict(X) == -1, self.model.score_samples(X)
+
+    def _build_feature_matrix(self, validated: List[Dict[str, float]]) -> np.ndarray:
+        """Build the scaled feature matrix for validated metrics."""
+        # Use default value if feature is missing
+        X = np.array(
+            [
+                [metrics.get(name, 0.0) for name in self.feature_names]
+                for metrics in validated
+            ],
+            dtype=float,
+        )
+        if self.scaler is not None:
+            return self.scaler.transform(X)
+        return X
+
+    def _build_result(
+        self, validated_metrics: Dict[str, float], is_anomaly: bool, anomaly_score: float
+    ) -> Dict[str, Any]:
+        """Build a prediction result with both legacy and new key formats."""
+        confidence = self._calculate_confidence(anomaly_score)
+
+        # Map severity level based on confidence
+        if confidence >= 0.9:
+            severity_level = "critical" if is_anomaly else "low"
+        elif confidence >= 0.7:
+            severity_level = "high" if is_anomaly else "low"
+        elif confidence >= 0.5:
+            severity_level = "medium" if is_anomaly else "low"
+        else:
+            severity_level = "low"
+
+        return {
+            "is_anomaly": bool(is_anomaly),
+            "anomaly": bool(is_anomaly),
+            "anomaly_detected": bool(is_anomaly),
+            "anomaly_score": float(anomaly_score),
+            "confidence": float(confidence),
+            "confidence_score": float(confidence),
+            "severity_level": severity_level,
+            "prediction_timestamp": datetime.now(timezone.utc).isoformat(),
+            "model_version": self.model_metadata.get("model_version", "1.0.0"),
+            "features_used": self.feature_names,
+            "input_metrics": validated_metrics,
+        }
+
     # Compatibility layer for tests expecting a higher-level API
     def predict_anomaly(
         self, metrics: Dict[str, Union[int, float]], user_id: Optional[str] = None
@@ -393,11 +490,22 @@ _ENGINE_SINGLETON: Optional[SecureMLInferenceEngine] = None
 def get_secure_inference_engine() -> SecureMLInferenceEngine:
     """Return a singleton instance of the secure inference engine.
 
-    Prefers loading an existing model from the default path to avoid heavy
-    training in test environments.
+    Uses the shared inference server when ML_INFERENCE_SOCKET points at a
+    running daemon. Otherwise prefers loading an existing model from the
+    default path to avoid heavy training in test environments.
     """
     global _ENGINE_SINGLETON
     if _ENGINE_SINGLETON is None:
+        # Share the host-wide inference server when one is running
+        socket_path = os.getenv("ML_INFERENCE_SOCKET")
+        if socket_path:
+            from app.core.ml_engine.inference_server import (
+                RemoteInferenceEngine, is_inference_server_available)
+
+            if is_inference_server_available(socket_path):
+                _ENGINE_SINGLETON = RemoteInferenceEngine(socket_path)
+                return _ENGINE_SINGLETON
+
         # Ensure model path points to repo's ml_models directory by default
         default_model_path = os.getenv("ML_MODEL_PATH", str(Path(__file__).resolve().parents[3] / "ml_models"))
         os.environ.setdefault("ML_MODEL_PATH", default_model_path)
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Async Database Access
+=======================================
+
+asyncio data-access layer for I/O-bound endpoints and background loops,
+mirroring the synchronous ``DatabaseService`` operations:
+
+- store_metrics / store_metrics_batch / store_prediction
+- get_latest_metrics / get_anomalies / get_metrics_page (keyset cursors)
+- get_metrics_count / get_performance_summary (served from rollups)
+
+Backends:
+- PostgreSQL via asyncpg: native pool, per-connection prepared-statement
+  cache and ``COPY`` for bulk inserts
+- SQLite via aiosqlite: small connection pool with sqlite3's statement cache
+
+Every query carries a timeout. When a query is cancelled (timeout or task
+cancellation) the server-side statement is cancelled too, and the
+connection goes back to the pool in a usable state.
+"""
+
+import asyncio
+import logging
+import os
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import asyncpg
+
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+    asyncpg = None
+
+try:
+    import aiosqlite
+
+    AIOSQLITE_AVAILABLE = True
+except ImportError:
+    AIOSQLITE_AVAILABLE = False
+    aiosqlite = None
+
+try:
+    from app.database_integration import (
+        ANOMALY_HISTORY_FIELDS,
+        METRIC_HISTORY_FIELDS,
+        METRICS_COLUMNS,
+        PREDICTION_COLUMNS,
+        build_metrics_params,
+        build_prediction_params,
+    )
+    from app.metrics_rollups import (
+        MetricsRollupManager,
+        merge_segments,
+        plan_segments,
+        segment_query,
+    )
+    from app.prediction_sampling import prediction_sampler_from_env
+    from app.query_indexes import boolean_literal
+    from app.utils.pagination import build_page, keyset_condition
+except ImportError:
+    from database_integration import (
+        ANOMALY_HISTORY_FIELDS,
+        METRIC_HISTORY_FIELDS,
+        METRICS_COLUMNS,
+        PREDICTION_COLUMNS,
+        build_metrics_params,
+        build_prediction_params,
+    )
+    from metrics_rollups import (
+        MetricsRollupManager,
+        merge_segments,
+        plan_segments,
+        segment_query,
+    )
+    from prediction_sampling import prediction_sampler_from_env
+    from query_indexes import boolean_literal
+    from utils.pagination import build_page, keyset_condition
+
+logger = logging.getLogger(__name__)
+
+_NAMED_PARAM = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+# Parameters bound to timestamp columns; asyncpg needs datetimes, not strings
+_TIMESTAMP_PARAMS = {"timestamp", "cursor_ts", "start", "end", "bucket_start"}
+
+
+@lru_cache(maxsize=512)
+def to_positional(sql: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Rewrite ``:name`` parameters as asyncpg's ``$n`` placeholders.
+
+    Args:
+        sql: SQL with named parameters (``::type`` casts are left alone)
+
+    Returns:
+        (rewritten_sql, parameter_names_in_order)
+    """
+    names: List[str] = []
+
+    def replace(match):
+        name = match.group(1)
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+
+    return _NAMED_PARAM.sub(replace, sql), tuple(names)
+
+
+def _pg_value(name: str, value: Any) -> Any:
+    """Coerce ISO timestamp strings to datetimes for asyncpg."""
+    if name in _TIMESTAMP_PARAMS and isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+    return value
+
+
+class AsyncSQLitePool:
+    """Fixed-size pool of aiosqlite connections."""
+
+    def __init__(self, path: str, size: int = 5, statement_cache_size: int = 256):
+        self.path = path
+        self.size = size
+        self.statement_cache_size = statement_cache_size
+        self._idle: "asyncio.Queue" = asyncio.Queue()
+        self._created = 0
+        self._all = []
+
+    async def _connect(self):
+        conn = await aiosqlite.connect(
+            self.path, cached_statements=self.statement_cache_size
+        )
+        conn.row_factory = aiosqlite.Row
+        await conn.execute("PRAGMA busy_timeout = 10000")
+        self._all.append(conn)
+        return conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self._idle.empty() and self._created < self.size:
+            self._created += 1
+            try:
+                conn = await self._connect()
+            except Exception:
+                self._created -= 1
+                raise
+        else:
+            conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+    async def close(self):
+        for conn in self._all:
+            await conn.close()
+        self._all.clear()
+
+
+class AsyncDatabaseService:
+    """Async counterpart of DatabaseService for asyncio code paths."""
+
+    def __init__(
+        self,
+        database_url: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        query_timeout: Optional[float] = None,
+        statement_cache_size: Optional[int] = None,
+    ):
+        """
+        Initialize the async database service (call ``connect`` before use).
+
+        Args:
+            database_url: postgresql:// or sqlite:/// URL (DATABASE_URL)
+            min_size: Minimum pooled connections (DB_ASYNC_MIN_SIZE, default 5)
+            max_size: Maximum pooled connections (DB_ASYNC_MAX_SIZE, default 50)
+            query_timeout: Per-query timeout in seconds (DB_ASYNC_QUERY_TIMEOUT)
+            statement_cache_size: Prepared statements cached per connection
+        """
+        self.database_url = database_url or os.getenv("DATABASE_URL", "")
+        self.min_size = min_size or int(os.getenv("DB_ASYNC_MIN_SIZE", "5"))
+        self.max_size = max_size or int(os.getenv("DB_ASYNC_MAX_SIZE", "50"))
+        self.query_timeout = query_timeout or float(
+            os.getenv("DB_ASYNC_QUERY_TIMEOUT", "10")
+        )
+        self.statement_cache_size = statement_cache_size or int(
+            os.getenv("DB_ASYNC_STATEMENT_CACHE", "256")
+        )
+
+        if self.database_url.startswith(("postgresql://", "postgres://")):
+            self.backend = "postgresql"
+        elif self.database_url.startswith("sqlite:///"):
+            self.backend = "sqlite"
+        else:
+            raise ValueError(f"Unsupported async database URL: {self.database_url}")
+
+        self.pool = None
+        self.rollups = MetricsRollupManager(dialect=self.backend)
+        # Counters go to prediction_counts_1m, created by DatabaseService
+        self.prediction_sampler = prediction_sampler_from_env(dialect=self.backend)
+        self._system_user_id = None
+        self._system_user_loaded = False
+
+    async def connect(self):
+        """Create the connection pool."""
+        if self.pool is not None:
+            return
+
+        if self.backend == "postgresql":
+            if not ASYNCPG_AVAILABLE:
+                raise RuntimeError("asyncpg is required for async PostgreSQL access")
+            self.pool = await asyncpg.create_pool(
+                self.database_url,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                statement_cache_size=self.statement_cache_size,
+                command_timeout=self.query_timeout,
+            )
+        else:
+            if not AIOSQLITE_AVAILABLE:
+                raise RuntimeError("aiosqlite is required for async SQLite access")
+            self.pool = AsyncSQLitePool(
+                self.database_url[len("sqlite:///") :],
+                size=self.max_size,
+                statement_cache_size=self.statement_cache_size,
+            )
+        logger.info(f"✅ Async database pool ready ({self.backend})")
+
+    async def close(self):
+        """Close the connection pool."""
+        if self.pool is not None:
+            await self._flush_prediction_counts(force=True)
+            await self.pool.close()
+            self.pool = None
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a pooled connection."""
+        if self.pool is None:
+            await self.connect()
+        async with self.pool.acquire() as conn:
+            yield conn
+
+    # Low-level query helpers (named parameters on both backends)
+
+    async def _sqlite_call(self, conn, coro):
+        """Await a SQLite operation, interrupting it if cancelled or timed out."""
+        try:
+            return await asyncio.wait_for(coro, self.query_timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            raw = getattr(conn, "_conn", None)
+            if raw is not None:
+                raw.interrupt()
+            raise
+
+    async def fetch(
+        self, sql: str, params: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Run a query and return all rows as dictionaries."""
+        params = params or {}
+        async with self.acquire() as conn:
+            if self.backend == "postgresql":
+                query, names = to_positional(sql)
+                rows = await conn.fetch(
+                    query,
+                    *[_pg_value(n, params.get(n)) for n in names],
+                    timeout=self.query_timeout,
+                )
+                return [dict(row) for row in rows]
+
+            async def run():
+                async with conn.execute(sql, params) as cursor:
+                    return [dict(row) for row in await cursor.fetchall()]
+
+            return await self._sqlite_call(conn, run())
+
+    async def fetchrow(
+        self, sql: str, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Run a query and return its first row, if any."""
+        rows = await self.fetch(sql, params)
+        return rows[0] if rows else None
+
+    async def execute_many(self, sql: str, rows: Sequence[Dict[str, Any]]):
+        """Execute a statement once per parameter dict in one round trip batch."""
+        if not rows:
+            return
+        async with self.acquire() as conn:
+            if self.backend == "postgresql":
+                query, names = to_positional(sql)
+                await conn.executemany(
+                    query,
+                    [tuple(_pg_value(n, row.get(n)) for n in names) for row in rows],
+                    timeout=self.query_timeout,
+                )
+                return
+
+            async def run():
+                await conn.executemany(sql, rows)
+                await conn.commit()
+
+            await self._sqlite_call(conn, run())
+
+    # Writes
+
+    async def _get_system_user_id(self) -> Optional[int]:
+        """Look up the 'system' user id once."""
+        if not self._system_user_loaded:
+            try:
+                row = await self.fetchrow(
+                    "SELECT id FROM users WHERE username = 'system'"
+                )
+                self._system_user_id = row["id"] if row else None
+            except Exception as e:
+                logger.warning(f"Could not resolve system user id: {e}")
+            self._system_user_loaded = True
+        return self._system_user_id
+
+    async def store_metrics_batch(self, metrics_list: List[Dict[str, Any]]) -> int:
+        """
+        Insert many metric samples and fold them into the rollups.
+
+        PostgreSQL uses binary COPY; SQLite uses a single executemany.
+
+        Returns:
+            Number of rows stored
+        """
+        if not metrics_list:
+            return 0
+
+        created_by = await self._get_system_user_id()
+        rows = [build_metrics_params(m, created_by) for m in metrics_list]
+
+        try:
+            if self.backend == "postgresql":
+                async with self.acquire() as conn:
+                    await conn.copy_records_to_table(
+                        "metrics",
+                        records=[
+                            tuple(_pg_value(c, row[c]) for c in METRICS_COLUMNS)
+                            for row in rows
+                        ],
+                        columns=list(METRICS_COLUMNS),
+                        timeout=self.query_timeout,
+                    )
+            else:
+                await self.execute_many(
+                    f"INSERT INTO metrics ({', '.join(METRICS_COLUMNS)}) "
+                    f"VALUES ({', '.join(':' + c for c in METRICS_COLUMNS)})",
+                    rows,
+                )
+        except Exception as e:
+            logger.error(f"Error storing metrics batch: {e}")
+            return 0
+
+        await self._update_rollups(rows)
+        return len(rows)
+
+    async def store_metrics(self, metrics: Dict[str, Any]) -> bool:
+        """Store one metric sample."""
+        return await self.store_metrics_batch([metrics]) == 1
+
+    async def store_prediction(
+        self, metrics: Dict[str, Any], prediction: Dict[str, Any]
+    ) -> bool:
+        """Store a prediction result (subject to prediction sampling)."""
+        params = build_prediction_params(metrics, prediction)
+        sampler = self.prediction_sampler
+        if sampler and sampler.due():
+            await self._flush_prediction_counts()
+        if sampler and not sampler.admit(params):
+            return True
+
+        try:
+            await self.execute_many(
+                f"INSERT INTO anomaly_predictions ({', '.join(PREDICTION_COLUMNS)}) "
+                f"VALUES ({', '.join(':' + c for c in PREDICTION_COLUMNS)})",
+                [params],
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error storing prediction: {e}")
+            return False
+
+    async def _flush_prediction_counts(self, force: bool = False):
+        """Merge closed per-minute prediction counters into the counts table."""
+        if not self.prediction_sampler:
+            return
+        params = self.prediction_sampler.drain(force)
+        if not params:
+            return
+        try:
+            await self.execute_many(self.prediction_sampler.upsert_sql, params)
+        except Exception as e:
+            logger.error(f"Failed to flush prediction counts: {e}")
+            self.prediction_sampler.restore(params)
+
+    async def _update_rollups(self, rows: List[Dict[str, Any]]):
+        """Merge newly stored rows into the rollup tables."""
+        try:
+            for granularity, params in self.rollups.aggregate(rows).items():
+                await self.execute_many(self.rollups.upsert_sql(granularity), params)
+        except Exception as e:
+            logger.error(f"Failed to update metric rollups: {e}")
+
+    # Reads
+
+    async def get_metrics_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        anomalies_only: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Get one page of metrics, newest first, using keyset pagination.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        condition, params = keyset_condition(cursor)
+        columns = ANOMALY_HISTORY_FIELDS if anomalies_only else METRIC_HISTORY_FIELDS
+        # A literal (not a parameter) lets the planner match the partial
+        # anomaly index, including for generic prepared-statement plans
+        where = condition + (
+            f" AND is_anomaly = {boolean_literal(self.backend)}"
+            if anomalies_only
+            else ""
+        )
+        params["limit"] = limit + 1
+        rows = await self.fetch(
+            f"SELECT id, {', '.join(columns)} FROM metrics WHERE {where} "
+            "ORDER BY timestamp DESC, id DESC LIMIT :limit",
+            params,
+        )
+        return build_page(rows, limit)
+
+    async def get_latest_metrics(
+        self, limit: int = 10, cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get latest metrics."""
+        return (await self.get_metrics_page(limit, cursor))["items"]
+
+    async def get_anomalies(
+        self, limit: int = 10, cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get latest anomalies."""
+        return (await self.get_metrics_page(limit, cursor, anomalies_only=True))[
+            "items"
+        ]
+
+    async def get_metrics_count(self) -> int:
+        """Get total number of metrics."""
+        row = await self.fetchrow("SELECT COUNT(*) AS count FROM metrics")
+        return row["count"] if row else 0
+
+    async def get_performance_summary(self, hours: int = 24) -> Dict[str, Any]:
+        """
+        Summarize the last ``hours`` of metrics from the rollup tables.
+
+        Segment queries run concurrently on separate pooled connections.
+        """
+        end = datetime.now(timezone.utc).replace(tzinfo=None)
+        segments = plan_segments(end - timedelta(hours=hours), end)
+        rows = await asyncio.gather(
+            *[
+                self.fetchrow(
+                    segment_query(granularity),
+                    {
+                        "start": self.rollups.bucket_value(seg_start),
+                        "end": self.rollups.bucket_value(seg_end),
+                    },
+                )
+                for granularity, seg_start, seg_end in segments
+            ]
+        )
+        stats = merge_segments([r for r in rows if r], len(segments))
+        return {
+            "status": "healthy",
+            "metrics_count": stats["metrics_count"],
+            "avg_cpu_usage": round(stats["avg_cpu_usage"], 2),
+            "max_cpu_usage": round(stats["max_cpu_usage"], 2),
+            "avg_memory_usage": round(stats["avg_memory_usage"], 2),
+            "max_memory_usage": round(stats["max_memory_usage"], 2),
+            "avg_response_time": round(stats["avg_response_time"], 2),
+            "anomalies_24h": stats["anomaly_count"],
+            "last_updated": datetime.now(timezone.utc).isoformat(),
+            "source": "rollups",
+        }
+
+    async def health_check(self) -> Dict[str, Any]:
+        """Check connectivity."""
+        try:
+            await self.fetchrow("SELECT 1 AS test")
+            return {
+                "status": "healthy",
+                "backend": self.backend,
+                "pool_max_size": self.max_size,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
+        except Exception as e:
+            return {
+                "status": "unhealthy",
+                "error": str(e),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
+
+
+# Global async database service instance (created lazily)
+async_db_service: Optional[AsyncDatabaseService] = None
+
+
+async def get_async_database_service() -> AsyncDatabaseService:
+    """Get the connected global async database service."""
+    global async_db_service
+    if async_db_service is None:
+        async_db_service = AsyncDatabaseService()
+    await async_db_service.connect()
+    return async_db_service
+
+
+__all__ = [
+    "AsyncDatabaseService",
+    "AsyncSQLitePool",
+    "get_async_database_service",
+    "to_positional",
+]
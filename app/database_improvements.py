@@ -16,7 +16,7 @@ import logging
 import os
 from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 import psycopg2
 import redis
@@ -27,6 +27,24 @@ from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import QueuePool
 
+try:
+    from app.bulk_writer import BulkWriter
+    from app.metrics_archive import MetricsArchiver
+    from app.metrics_partitioning import PostgresPartitionManager
+    from app.prediction_sampling import prediction_sampler_from_env
+except ImportError:
+    from bulk_writer import BulkWriter
+    from metrics_archive import MetricsArchiver
+    from metrics_partitioning import PostgresPartitionManager
+    from prediction_sampling import prediction_sampler_from_env
+
+try:
+    from app.query_cache import QueryCache
+    from app.utils.pagination import build_page, keyset_condition
+except ImportError:
+    from query_cache import QueryCache
+    from utils.pagination import build_page, keyset_condition
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -45,6 +63,12 @@ class DatabaseConfig:
         self.max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "30"))
         self.pool_timeout = int(os.getenv("DB_POOL_TIMEOUT", "30"))
         self.pool_recycle = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+        self.bulk_writes = os.getenv("DB_BULK_WRITES", "false").lower() == "true"
+        self.bulk_batch_size = int(os.getenv("DB_BULK_BATCH_SIZE", "1000"))
+        self.bulk_flush_ms = int(os.getenv("DB_BULK_FLUSH_MS", "200"))
+        self.bulk_queue_size = int(os.getenv("DB_BULK_QUEUE_SIZE", "100000"))
+        self.partitioning = os.getenv("DB_PARTITIONING", "false").lower() == "true"
+        self.archive = os.getenv("METRICS_ARCHIVE", "false").lower() == "true"
 
 
 class RedisConfig:
@@ -67,7 +91,12 @@ class ProductionDatabaseService:
         self.engine = None
         self.SessionLocal = None
         self.redis_client = None
+        self.query_cache = None
+        self.metrics_writer = None
+        self.partitions = None
+        self.prediction_sampler = None
         self._initialize_connections()
+        self._initialize_redis()
 
     def _initialize_connections(self):
         """Initialize database and Redis connections with proper error handling."""
@@ -99,6 +128,45 @@ class ProductionDatabaseService:
 
             logger.info("✅ Database connection established successfully")
 
+            if self.config.partitioning:
+                if self.engine.dialect.name == "postgresql":
+                    self.partitions = PostgresPartitionManager(
+                        self.engine, tables=("system_metrics",)
+                    )
+                    self.partitions.setup()
+                    logger.info("✅ system_metrics is range-partitioned by timestamp")
+                else:
+                    logger.warning(
+                        f"⚠️ DB_PARTITIONING needs PostgreSQL, not {self.engine.dialect.name};"
+                        " system_metrics stays unpartitioned"
+                    )
+
+            if self.config.bulk_writes:
+                self.metrics_writer = BulkWriter(
+                    self.engine,
+                    "system_metrics",
+                    (
+                        "timestamp",
+                        "cpu_usage",
+                        "memory_usage",
+                        "disk_usage",
+                        "network_io",
+                    ),
+                    batch_size=self.config.bulk_batch_size,
+                    flush_interval_ms=self.config.bulk_flush_ms,
+                    max_queue_size=self.config.bulk_queue_size,
+                    on_flush=lambda rows: self._invalidate_metrics(),
+                )
+                logger.info("✅ Bulk writes enabled for system metrics")
+
+            self.prediction_sampler = prediction_sampler_from_env(self.engine)
+            if self.prediction_sampler:
+                self.prediction_sampler.ensure_table()
+                logger.info(
+                    f"✅ Persisting anomalies and 1 in "
+                    f"{self.prediction_sampler.sample_every} normal predictions"
+                )
+
         except Exception as e:
             logger.error(f"❌ Database connection failed: {e}")
             raise
@@ -122,6 +190,18 @@ class ProductionDatabaseService:
             self.redis_client.ping()
             logger.info("✅ Redis connection established successfully")
 
+            # Query results are binary-encoded, so the cache needs raw bytes
+            self.query_cache = QueryCache(
+                redis.Redis(
+                    connection_pool=redis.ConnectionPool(
+                        **{
+                            **self.redis_client.connection_pool.connection_kwargs,
+                            "decode_responses": False,
+                        }
+                    )
+                )
+            )
+
         except RedisError as e:
             logger.error(f"❌ Redis connection failed: {e}")
             # Redis is optional, don't raise exception
@@ -176,24 +256,27 @@ class ProductionDatabaseService:
 
         return health_status
 
-    def get_metrics(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get system metrics with caching."""
-        cache_key = f"metrics:latest:{limit}"
+    def _cached(self, name: str, params: Dict[str, Any], loader):
+        """
+        Serve a system_metrics read from the query cache.
 
-        # Try to get from cache first
-        if self.redis_client:
-            try:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    logger.info("📊 Metrics retrieved from cache")
-                    return eval(cached_data)  # In production, use proper serialization
-            except Exception as e:
-                logger.warning(f"Cache retrieval failed: {e}")
+        Only enabled with Redis: versions must be shared by every worker for
+        a write in one process to invalidate reads in the others.
+        """
+        if not self.query_cache:
+            return loader()
+        return self.query_cache.get_or_load(name, params, ("system_metrics",), loader)
 
-        # Get from database
-        try:
+    def _invalidate_metrics(self):
+        """Invalidate cached system_metrics reads after a committed write."""
+        if self.query_cache:
+            self.query_cache.bump("system_metrics")
+
+    def get_metrics(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get system metrics, cached until the next write to system_metrics."""
+
+        def load():
             with self.get_db_session() as session:
-                # Example query - adjust based on your schema
                 result = session.execute(
                     text(
                         """
@@ -210,24 +293,82 @@ class ProductionDatabaseService:
                     ),
                     {"limit": limit},
                 )
+                return [dict(row._mapping) for row in result]
 
-                metrics = [dict(row) for row in result]
-
-                # Cache the result for 5 minutes
-                if self.redis_client and metrics:
-                    try:
-                        self.redis_client.setex(cache_key, 300, str(metrics))
-                    except Exception as e:
-                        logger.warning(f"Cache storage failed: {e}")
-
-                return metrics
-
+        try:
+            return self._cached("metrics:latest", {"limit": limit}, load)
         except Exception as e:
             logger.error(f"Failed to retrieve metrics: {e}")
             return []
 
+    def _history_query(self, cursor: Optional[str], limited: bool):
+        """Build the newest-first keyset query over system_metrics."""
+        condition, params = keyset_condition(cursor)
+        sql = (
+            "SELECT id, timestamp, cpu_usage, memory_usage, disk_usage, network_io "
+            f"FROM system_metrics WHERE {condition} "
+            "ORDER BY timestamp DESC, id DESC"
+        )
+        if limited:
+            sql += " LIMIT :limit"
+        return sql, params
+
+    def get_metrics_page(
+        self, limit: int = 100, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of system metrics using keyset pagination.
+
+        Args:
+            limit: Page size
+            cursor: Continuation token from the previous page
+
+        Returns:
+            Dictionary with "items" and "next_cursor"
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        sql, params = self._history_query(cursor, limited=True)
+        params["limit"] = limit + 1
+
+        def load():
+            with self.get_db_session() as session:
+                result = session.execute(text(sql), params)
+                return [dict(row._mapping) for row in result]
+
+        try:
+            rows = self._cached(
+                "metrics:page", {"limit": limit, "cursor": cursor}, load
+            )
+            return build_page(rows, limit)
+        except Exception as e:
+            logger.error(f"Failed to retrieve metrics page: {e}")
+            return {"items": [], "next_cursor": None}
+
+    def iter_metrics(
+        self, cursor: Optional[str] = None, batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream system metrics newest first through a server-side cursor.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        sql, params = self._history_query(cursor, limited=False)
+        with self.engine.connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, yield_per=batch_size
+            ).execute(text(sql), params)
+            for row in result:
+                yield dict(row._mapping)
+
     def store_metrics(self, metrics: Dict[str, Any]) -> bool:
         """Store system metrics with retry logic."""
+        if self.metrics_writer:
+            # Buffered path: the writer batches rows and spills to disk on outage
+            return self.metrics_writer.submit(metrics)
+
         max_retries = 3
         retry_delay = 1
 
@@ -246,7 +387,9 @@ class ProductionDatabaseService:
                     )
                     session.commit()
                     logger.info("📊 Metrics stored successfully")
-                    return True
+
+                self._invalidate_metrics()
+                return True
 
             except Exception as e:
                 logger.error(
@@ -262,8 +405,53 @@ class ProductionDatabaseService:
 
         return False
 
+    def record_prediction(
+        self, metrics: Dict[str, Any], prediction: Dict[str, Any]
+    ) -> bool:
+        """
+        Persist the metrics behind a prediction, subject to prediction sampling.
+
+        Anomalies and sampled normal results are stored in full; the rest
+        are only counted per minute. Returns True if nothing failed.
+        """
+        if self.prediction_sampler:
+            row = {
+                "timestamp": metrics.get("timestamp"),
+                "source": metrics.get("source", "ml_predict"),
+                "anomaly_detected": prediction.get("prediction") == "anomaly",
+                "confidence_score": prediction.get("confidence", 0.0),
+                "model_version": prediction.get("model_version", "unknown"),
+            }
+            if not self.prediction_sampler.admit(row):
+                return True
+        return self.store_metrics(metrics)
+
     def cleanup_old_metrics(self, days_to_keep: int = 30) -> int:
-        """Clean up old metrics to prevent database bloat."""
+        """
+        Clean up old metrics to prevent database bloat.
+
+        With partitioning enabled whole expired partitions are dropped and
+        the number of partitions removed is returned; otherwise expired rows
+        are deleted and the row count is returned. With METRICS_ARCHIVE=true
+        closed days are exported to Parquet first.
+        """
+        if self.config.archive:
+            try:
+                MetricsArchiver(self.engine).run(tables=("system_metrics",))
+            except Exception as e:
+                logger.error(f"Failed to archive system metrics: {e}")
+
+        if self.partitions:
+            try:
+                results = self.partitions.maintain(days_to_keep)
+                dropped = results["system_metrics"]["dropped"]
+                logger.info(f"🧹 Dropped {dropped} expired metric partitions")
+                self._invalidate_metrics()
+                return dropped
+            except Exception as e:
+                logger.error(f"Failed to drop expired metric partitions: {e}")
+                return 0
+
         try:
             with self.get_db_session() as session:
                 cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
@@ -274,7 +462,9 @@ class ProductionDatabaseService:
                 session.commit()
                 deleted_count = result.rowcount
                 logger.info(f"🧹 Cleaned up {deleted_count} old metric records")
-                return deleted_count
+
+            self._invalidate_metrics()
+            return deleted_count
 
         except Exception as e:
             logger.error(f"Failed to cleanup old metrics: {e}")
@@ -9,11 +9,13 @@ Integrates PostgreSQL/MySQL database with application logic.
 
 
 import logging
+import os
 import sys
 import time
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
 
 # Add database path to imports
 app_dir = Path(__file__).parent
@@ -31,19 +33,268 @@ except ImportError:
     SQLALCHEMY_AVAILABLE = False
     SQLAlchemy = None
 
+try:
+    from app.bulk_writer import BulkWriter
+    from app.metrics_partitioning import PostgresPartitionManager, SQLiteShardManager
+    from app.metrics_rollups import MetricsRollupManager
+    from app.prediction_sampling import prediction_sampler_from_env
+except ImportError:
+    from bulk_writer import BulkWriter
+    from metrics_partitioning import PostgresPartitionManager, SQLiteShardManager
+    from metrics_rollups import MetricsRollupManager
+    from prediction_sampling import prediction_sampler_from_env
+
+try:
+    from app.query_cache import QueryCache
+    from app.query_indexes import apply_indexes
+    from app.replica_routing import ReplicaRouter
+    from app.sqlite_embedded import (
+        SQLiteWriter,
+        configure_sqlite_engine,
+        create_read_engine,
+    )
+    from app.utils.pagination import build_page, keyset_condition
+except ImportError:
+    from query_cache import QueryCache
+    from query_indexes import apply_indexes
+    from replica_routing import ReplicaRouter
+    from sqlite_embedded import (
+        SQLiteWriter,
+        configure_sqlite_engine,
+        create_read_engine,
+    )
+    from utils.pagination import build_page, keyset_condition
+
+try:
+    import redis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
 logger = logging.getLogger(__name__)
 
+# Column order used for single-row and bulk inserts
+METRICS_COLUMNS = (
+    "timestamp",
+    "source",
+    "cpu_usage",
+    "memory_usage",
+    "disk_usage",
+    "load_1m",
+    "load_5m",
+    "load_15m",
+    "disk_io_read",
+    "disk_io_write",
+    "network_rx",
+    "network_tx",
+    "response_time",
+    "error_rate",
+    "is_anomaly",
+    "anomaly_score",
+    "created_by",
+)
+
+PREDICTION_COLUMNS = (
+    "timestamp",
+    "source",
+    "anomaly_detected",
+    "severity",
+    "confidence_score",
+    "model_name",
+    "model_version",
+)
+
+# Columns returned by the history readers (plus id for keyset cursors)
+METRIC_HISTORY_FIELDS = (
+    "timestamp",
+    "source",
+    "cpu_usage",
+    "memory_usage",
+    "disk_usage",
+    "response_time",
+    "is_anomaly",
+    "anomaly_score",
+)
+
+ANOMALY_HISTORY_FIELDS = (
+    "timestamp",
+    "source",
+    "cpu_usage",
+    "memory_usage",
+    "anomaly_score",
+    "response_time",
+)
+
+# Raw 24 h summary used when rollups are unavailable
+PERFORMANCE_SUMMARY_SQL = """
+    SELECT
+        COUNT(*) as total_metrics,
+        AVG(cpu_usage) as avg_cpu,
+        MAX(cpu_usage) as max_cpu,
+        AVG(memory_usage) as avg_memory,
+        MAX(memory_usage) as max_memory,
+        AVG(response_time) as avg_response_time,
+        COUNT(CASE WHEN is_anomaly = 1 THEN 1 END) as total_anomalies
+    FROM metrics
+    WHERE timestamp >= datetime('now', '-24 hours')
+"""
+
+# Per-shard partials of PERFORMANCE_SUMMARY_SQL, merged across shards
+SHARD_SUMMARY_SQL = """
+    SELECT
+        COUNT(*) as total_metrics,
+        SUM(cpu_usage) as sum_cpu, COUNT(cpu_usage) as n_cpu, MAX(cpu_usage) as max_cpu,
+        SUM(memory_usage) as sum_memory, COUNT(memory_usage) as n_memory,
+        MAX(memory_usage) as max_memory,
+        SUM(response_time) as sum_response_time, COUNT(response_time) as n_response_time,
+        COUNT(CASE WHEN is_anomaly = 1 THEN 1 END) as total_anomalies
+    FROM metrics
+    WHERE timestamp >= datetime('now', '-24 hours')
+"""
+
+# Prediction counts since :start, summable across shards
+PREDICTION_STATS_SQL = """
+    SELECT
+        COUNT(*) as n,
+        COUNT(CASE WHEN anomaly_detected = 1 THEN 1 END) as anomalies,
+        SUM(confidence_score) as confidence_sum,
+        COUNT(confidence_score) as confidence_n
+    FROM anomaly_predictions
+    WHERE timestamp >= :start{source_filter}
+"""
+
+# Latest deployed version of an active model
+MODEL_INFO_SQL = """
+    SELECT m.model_name, m.model_type, m.description,
+           mv.version, mv.accuracy, mv.precision_score,
+           mv.recall_score, mv.f1_score, mv.training_timestamp
+    FROM ml_models m
+    JOIN ml_model_versions mv ON m.id = mv.model_id
+    WHERE m.is_active = 1 AND mv.is_deployed = 1
+    ORDER BY mv.created_at DESC
+    LIMIT 1
+"""
+
+SYSTEM_USER_SQL = "SELECT id FROM users WHERE username = 'system'"
+
+# Per-shard schema for the SQLite time-sharded fallback
+SHARD_SCHEMA = {
+    "metrics": """
+        CREATE TABLE IF NOT EXISTS metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL, source TEXT, cpu_usage REAL,
+            memory_usage REAL, disk_usage REAL, load_1m REAL, load_5m REAL,
+            load_15m REAL, disk_io_read INTEGER, disk_io_write INTEGER,
+            network_rx INTEGER, network_tx INTEGER, response_time REAL,
+            error_rate REAL, is_anomaly INTEGER, anomaly_score REAL,
+            created_by INTEGER
+        )
+    """,
+    "anomaly_predictions": """
+        CREATE TABLE IF NOT EXISTS anomaly_predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL, source TEXT, anomaly_detected INTEGER,
+            severity TEXT, confidence_score REAL, model_name TEXT,
+            model_version TEXT
+        )
+    """,
+}
+
+
+def _fetch_one(engine, sql: str, params: Optional[Dict[str, Any]] = None):
+    """First row of a query on its own connection."""
+    with engine.connect() as conn:
+        return conn.execute(text(sql), params or {}).fetchone()
+
+
+def build_metrics_params(
+    metrics: Dict[str, Any], created_by: Optional[int] = None
+) -> Dict[str, Any]:
+    """Build a metrics row (METRICS_COLUMNS) from an incoming sample."""
+    timestamp = metrics.get("timestamp")
+    if timestamp is None:
+        timestamp = datetime.now(timezone.utc).isoformat()
+    return {
+        "timestamp": timestamp,
+        "source": metrics.get("source", "api"),
+        "cpu_usage": metrics.get("cpu_usage", 0.0),
+        "memory_usage": metrics.get("memory_usage", 0.0),
+        "disk_usage": metrics.get("disk_usage", 0.0),
+        "load_1m": metrics.get("load_1m", 0.0),
+        "load_5m": metrics.get("load_5m", 0.0),
+        "load_15m": metrics.get("load_15m", 0.0),
+        "disk_io_read": metrics.get("disk_io_read", 0),
+        "disk_io_write": metrics.get("disk_io_write", 0),
+        "network_rx": metrics.get("network_rx", 0),
+        "network_tx": metrics.get("network_tx", 0),
+        "response_time": metrics.get("response_time", 0.0),
+        "error_rate": metrics.get("error_rate", 0.0),
+        "is_anomaly": metrics.get("is_anomaly", False),
+        "anomaly_score": metrics.get("anomaly_score", 0.0),
+        "created_by": created_by,
+    }
+
+
+def build_prediction_params(
+    metrics: Dict[str, Any], prediction: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Build an anomaly_predictions row (PREDICTION_COLUMNS)."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "source": metrics.get("source", "api_request"),
+        "anomaly_detected": prediction.get("anomaly", False),
+        "severity": prediction.get("severity", "low"),
+        "confidence_score": prediction.get("confidence", 0.0),
+        "model_name": prediction.get("model_name", "real_data_anomaly_detector"),
+        "model_version": prediction.get("model_version", "1.0.0"),
+    }
+
 
 class DatabaseService:
     """Database service layer for Flask application using SQLAlchemy."""
 
-    def __init__(self, app=None, database_url: Optional[str] = None):
-        """Initialize database service."""
+    def __init__(
+        self,
+        app=None,
+        database_url: Optional[str] = None,
+        replica_urls: Optional[List[str]] = None,
+    ):
+        """
+        Initialize database service.
+
+        Args:
+            app: Optional Flask app
+            database_url: Primary database URL
+            replica_urls: Read replica URLs (default: DATABASE_REPLICA_URLS,
+                comma-separated); dashboard reads are routed to them
+        """
         self.app = app
         self.db = None
         self.engine = None
         self.SessionLocal = None
         self.database_url = database_url
+        self.replica_urls = replica_urls or [
+            url.strip()
+            for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+            if url.strip()
+        ]
+        self.replica_engines = []
+        self.router = None
+        self.read_engine = None
+        self.embedded = False
+        self.sqlite_writer = None
+        self.metrics_writer = None
+        self.predictions_writer = None
+        self.rollups = None
+        self.prediction_sampler = None
+        self.partitions = None
+        self.shards = None
+        self.query_cache = None
+        self._system_user_id = None
+        self._system_user_loaded = False
+        self._system_user_retry_at = 0.0
 
         if app:
             self.init_app(app)
@@ -78,10 +329,27 @@ class DatabaseService:
                 autocommit=False, autoflush=False, bind=self.engine
             )
 
+            self._init_embedded_sqlite()
+
             # Create tables
             with app.app_context():
                 self.db.create_all()
 
+            self._init_prediction_sampling()
+            self._init_partitioning()
+            self._init_indexes()
+            self._init_rollups()
+            self._init_replicas()
+
+            if self.embedded or os.getenv("DB_BULK_WRITES", "false").lower() == "true":
+                self.enable_bulk_writes()
+
+            if os.getenv("QUERY_CACHE", "false").lower() == "true":
+                self.enable_query_cache()
+
+            if self.router:
+                app.before_request(self.router.begin_request)
+
             logger.info("✅ Database service initialized with Flask app")
 
         except Exception as e:
@@ -108,12 +376,349 @@ class DatabaseService:
                 autocommit=False, autoflush=False, bind=self.engine
             )
 
+            self._init_embedded_sqlite()
+            self._init_prediction_sampling()
+            self._init_partitioning()
+            self._init_indexes()
+            self._init_rollups()
+            self._init_replicas()
+
+            if self.embedded or os.getenv("DB_BULK_WRITES", "false").lower() == "true":
+                self.enable_bulk_writes()
+
+            if os.getenv("QUERY_CACHE", "false").lower() == "true":
+                self.enable_query_cache()
+
             logger.info("✅ Database service initialized standalone")
 
         except Exception as e:
             logger.error(f"Failed to initialize standalone database: {e}")
             self.engine = None
 
+    def _init_rollups(self):
+        """
+        Create the metric rollup tables unless disabled via METRICS_ROLLUPS.
+
+        Summaries are read from the rollups only, so when the tables are
+        first created they are backfilled from the raw history still within
+        METRICS_RETENTION_DAYS (from the shards when partitioned).
+        """
+        if os.getenv("METRICS_ROLLUPS", "true").lower() != "true":
+            return
+
+        try:
+            rollups = MetricsRollupManager(self.engine)
+            if rollups.ensure_tables():
+                retention_days = int(os.getenv("METRICS_RETENTION_DAYS", "30"))
+                since = datetime.utcnow() - timedelta(days=retention_days)
+                rows = None
+                if self.shards:
+                    rows = self.shards.query(
+                        "SELECT timestamp, source, is_anomaly, cpu_usage, "
+                        "memory_usage, response_time FROM metrics",
+                        start=since,
+                        newest_first=False,
+                    )
+                rollups.rebuild(since=since, rows=rows)
+            self.rollups = rollups
+        except Exception as e:
+            logger.warning(f"Metric rollups unavailable, summaries scan raw rows: {e}")
+            self.rollups = None
+
+    def _init_indexes(self):
+        """
+        Create the hot-query indexes unless disabled via DB_HOT_QUERY_INDEXES.
+
+        Runs after ``_init_partitioning`` so that the indexes land on the
+        partitioned parents, not on the heap tables they replace.
+        """
+        if os.getenv("DB_HOT_QUERY_INDEXES", "true").lower() != "true":
+            return
+
+        try:
+            apply_indexes(self.engine)
+        except Exception as e:
+            logger.warning(f"Could not create hot query indexes: {e}")
+
+    def _init_prediction_sampling(self):
+        """
+        Persist anomalies and 1 in PREDICTION_SAMPLE_EVERY normal predictions.
+
+        Everything else is only counted per minute in prediction_counts_1m.
+        Off by default (PREDICTION_SAMPLE_EVERY=1 stores every prediction).
+        """
+        sampler = prediction_sampler_from_env(self.engine)
+        if sampler is None:
+            return
+
+        try:
+            sampler.ensure_table()
+            sampler.executor = self.sqlite_writer
+            self.prediction_sampler = sampler
+        except Exception as e:
+            logger.warning(
+                f"Prediction sampling unavailable, storing every prediction: {e}"
+            )
+            sampler.close()
+            self.prediction_sampler = None
+
+    def _init_embedded_sqlite(self):
+        """
+        Enable embedded mode for SQLite when SQLITE_EMBEDDED=true.
+
+        The primary engine switches to WAL with tuned pragmas, reads go to a
+        pool of read-only connections, and every write runs on one
+        ``SQLiteWriter`` thread (bulk inserts in batched transactions,
+        rollup upserts, prediction counter flushes).
+        """
+        if (
+            self.engine.dialect.name != "sqlite"
+            or os.getenv("SQLITE_EMBEDDED", "false").lower() != "true"
+        ):
+            return
+
+        try:
+            configure_sqlite_engine(self.engine)
+            # Reconnect so pooled connections pick up the pragmas (WAL is
+            # persistent, so this also converts an existing database file)
+            self.engine.dispose()
+            with self.engine.connect():
+                pass
+
+            self.read_engine = create_read_engine(str(self.engine.url))
+            self.sqlite_writer = SQLiteWriter()
+            self.embedded = True
+            logger.info(
+                "✅ Embedded SQLite mode enabled (WAL, read-only reader pool, single writer)"
+            )
+        except Exception as e:
+            logger.error(f"Failed to enable embedded SQLite mode: {e}")
+
+    def _init_replicas(self):
+        """Create read replica engines and the replica router."""
+        if not self.replica_urls:
+            return
+
+        try:
+            replicas = {}
+            for i, url in enumerate(self.replica_urls):
+                engine = create_engine(url, pool_pre_ping=True)
+                self.replica_engines.append(engine)
+                replicas[f"replica{i}"] = engine
+
+            self.router = ReplicaRouter(
+                replicas,
+                lag_probe=_engine_replication_lag,
+                read_your_writes_window=float(
+                    os.getenv("DB_READ_YOUR_WRITES_SECONDS", "2")
+                ),
+                max_lag_seconds=float(os.getenv("DB_MAX_REPLICA_LAG", "30")),
+            )
+            logger.info(f"✅ Routing reads to {len(replicas)} replicas")
+        except Exception as e:
+            logger.error(f"Failed to initialize read replicas: {e}")
+            self.router = None
+
+    def _read(self, fn):
+        """Run a read callable on a replica or the read-only pool when available, else the primary."""
+        if self.router:
+            return self.router.execute(fn, self.engine)
+        return fn(self.read_engine or self.engine)
+
+    def run_write(self, fn, *args):
+        """Run a write callable on the embedded writer thread, or inline."""
+        if self.sqlite_writer:
+            return self.sqlite_writer.call(fn, *args)
+        return fn(*args)
+
+    def _record_write(self):
+        """Keep this request's next reads on the primary (read-your-writes)."""
+        if self.router:
+            self.router.record_write()
+
+    def _init_partitioning(self):
+        """
+        Enable time-partitioned storage when DB_PARTITIONING=true.
+
+        PostgreSQL tables are converted to range partitions; SQLite writes go
+        to per-period shard files under DB_SHARD_DIR.
+        """
+        if os.getenv("DB_PARTITIONING", "false").lower() != "true":
+            return
+
+        try:
+            dialect = self.engine.dialect.name
+            if dialect == "postgresql":
+                partitions = PostgresPartitionManager(
+                    self.engine, tables=("metrics", "anomaly_predictions")
+                )
+                partitions.setup()
+                self.partitions = partitions
+            elif dialect == "sqlite":
+                self.shards = SQLiteShardManager(
+                    os.getenv("DB_SHARD_DIR", "data/shards"), SHARD_SCHEMA
+                )
+            logger.info(f"✅ Time-partitioned storage enabled ({dialect})")
+        except Exception as e:
+            logger.error(f"Failed to enable partitioned storage: {e}")
+
+    def apply_retention(self, retention_days: int = 30) -> Dict[str, Any]:
+        """
+        Drop metric and prediction data older than ``retention_days``.
+
+        Whole partitions or shard files are dropped, so the cost does not
+        depend on how many rows expire. Upcoming partitions are pre-created.
+
+        Returns:
+            Summary of the retention run
+        """
+        if self.partitions:
+            result = {
+                "mode": "partitions",
+                "tables": self.partitions.maintain(retention_days),
+            }
+        elif self.shards:
+            cutoff = datetime.utcnow() - timedelta(days=retention_days)
+            result = {"mode": "shards", "dropped": self.shards.drop_before(cutoff)}
+        else:
+            return {"mode": "unpartitioned", "dropped": 0}
+
+        self._invalidate("metrics", "anomaly_predictions")
+        return result
+
+    def enable_bulk_writes(
+        self,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+    ):
+        """
+        Route metric and prediction inserts through buffered bulk writers.
+
+        Args:
+            batch_size: Rows per flush (DB_BULK_BATCH_SIZE, default 1000)
+            flush_interval_ms: Max buffering delay (DB_BULK_FLUSH_MS, default 200)
+            max_queue_size: Buffer capacity (DB_BULK_QUEUE_SIZE, default 100000)
+        """
+        if not self.engine:
+            raise RuntimeError("Database not initialized")
+
+        options = {
+            "batch_size": batch_size or int(os.getenv("DB_BULK_BATCH_SIZE", "1000")),
+            "flush_interval_ms": flush_interval_ms
+            or int(os.getenv("DB_BULK_FLUSH_MS", "200")),
+            "max_queue_size": max_queue_size
+            or int(os.getenv("DB_BULK_QUEUE_SIZE", "100000")),
+        }
+        self.metrics_writer = BulkWriter(
+            self.engine,
+            "metrics",
+            METRICS_COLUMNS,
+            on_flush=self._after_metrics_write,
+            sink=self._shard_sink("metrics", METRICS_COLUMNS),
+            executor=self.sqlite_writer,
+            **options,
+        )
+        self.predictions_writer = BulkWriter(
+            self.engine,
+            "anomaly_predictions",
+            PREDICTION_COLUMNS,
+            on_flush=lambda rows: self._invalidate("anomaly_predictions"),
+            sink=self._shard_sink("anomaly_predictions", PREDICTION_COLUMNS),
+            executor=self.sqlite_writer,
+            **options,
+        )
+        logger.info("✅ Bulk writes enabled for metrics and predictions")
+
+    def enable_query_cache(
+        self,
+        redis_url: Optional[str] = None,
+        ttl: Optional[int] = None,
+        single_process: Optional[bool] = None,
+    ) -> bool:
+        """
+        Cache read results, invalidated by per-table versions bumped on write.
+
+        Args:
+            redis_url: Redis shared by all workers (QUERY_CACHE_REDIS_URL or
+                REDIS_URL)
+            ttl: Entry lifetime in seconds (QUERY_CACHE_TTL, default 300)
+            single_process: Allow a per-process cache when Redis is missing
+                (QUERY_CACHE_SINGLE_PROCESS). Writes made by other processes
+                do not invalidate it, so only set this when one process
+                serves and writes the database.
+
+        Returns:
+            True if the cache was enabled
+        """
+        redis_url = (
+            redis_url or os.getenv("QUERY_CACHE_REDIS_URL") or os.getenv("REDIS_URL")
+        )
+        client = None
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                client = redis.from_url(
+                    redis_url, socket_timeout=1, decode_responses=False
+                )
+                client.ping()
+            except Exception as e:
+                logger.warning(f"Query cache Redis unavailable: {e}")
+                client = None
+
+        if single_process is None:
+            single_process = (
+                os.getenv("QUERY_CACHE_SINGLE_PROCESS", "false").lower() == "true"
+            )
+        if client is None and not single_process:
+            logger.warning(
+                "⚠️ Query cache disabled: it needs Redis to stay coherent across "
+                "processes (set QUERY_CACHE_SINGLE_PROCESS=true for one process)"
+            )
+            return False
+
+        self.query_cache = QueryCache(
+            client, ttl=ttl or int(os.getenv("QUERY_CACHE_TTL", "300"))
+        )
+        logger.info(
+            f"✅ Query result cache enabled ({self.query_cache.get_stats()['backend']})"
+        )
+        return True
+
+    def _cached(
+        self, name: str, params: Any, tables, loader, ttl: Optional[int] = None
+    ):
+        """Serve a read from the query cache when enabled."""
+        if not self.query_cache:
+            return loader()
+        return self.query_cache.get_or_load(name, params, tables, loader, ttl=ttl)
+
+    def _invalidate(self, *tables: str):
+        """Bump cache versions of tables after a committed write."""
+        if self.query_cache:
+            self.query_cache.bump(*tables)
+
+    def _after_metrics_write(self, rows: List[Dict[str, Any]]):
+        """Fold committed metric rows into rollups and invalidate cached reads."""
+        if self.rollups:
+            self.rollups.ingest(rows)
+        self._invalidate("metrics")
+
+    def _shard_sink(self, table: str, columns):
+        """Bulk writer sink routing batches to SQLite shards, if enabled."""
+        if not self.shards:
+            return None
+        return lambda batch: self.shards.insert(table, columns, batch)
+
+    def flush_writes(self) -> bool:
+        """Flush buffered bulk writes, if enabled."""
+        flushed = True
+        for writer in (self.metrics_writer, self.predictions_writer):
+            if writer:
+                flushed = writer.flush() and flushed
+        if self.prediction_sampler:
+            flushed = self.prediction_sampler.flush(force=True) and flushed
+        return flushed
+
     def get_session(self):
         """Get database session."""
         if not self.SessionLocal:
@@ -135,75 +740,160 @@ class DatabaseService:
 
     def get_metrics_count(self) -> int:
         """Get total number of metrics."""
-        if not self.is_available():
+        if not self.engine:
             return 0
 
+        def count(engine):
+            with engine.connect() as conn:
+                return conn.execute(text("SELECT COUNT(*) FROM metrics")).scalar() or 0
+
+        def load():
+            if self.shards:
+                return self.shards.count("metrics")
+            return self._read(count)
+
         try:
-            with self.get_session() as session:
-                result = session.execute(text("SELECT COUNT(*) as count FROM metrics"))
-                row = result.fetchone()
-                return row.count if row else 0
+            return self._cached("metrics_count", {}, ("metrics",), load)
         except Exception as e:
             logger.error(f"Error getting metrics count: {e}")
             return 0
 
-    def get_latest_metrics(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get latest metrics from database."""
-        if not self.is_available():
-            return []
+    def _history_query(
+        self, cursor: Optional[str], anomalies_only: bool, limited: bool
+    ):
+        """Build the newest-first keyset query over metrics."""
+        condition, params = keyset_condition(cursor)
+        columns = ANOMALY_HISTORY_FIELDS if anomalies_only else METRIC_HISTORY_FIELDS
+        where = condition + (" AND is_anomaly = 1" if anomalies_only else "")
+        sql = (
+            f"SELECT id, {', '.join(columns)} FROM metrics "
+            f"WHERE {where} ORDER BY timestamp DESC, id DESC"
+        )
+        if limited:
+            sql += " LIMIT :limit"
+        return sql, params
+
+    def get_metrics_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        anomalies_only: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Get one page of metrics, newest first, using keyset pagination.
+
+        Args:
+            limit: Page size
+            cursor: Continuation token from the previous page
+            anomalies_only: Only return anomalous samples
+
+        Returns:
+            Dictionary with "items" and "next_cursor"
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        sql, params = self._history_query(cursor, anomalies_only, limited=True)
+        if not self.engine:
+            return {"items": [], "next_cursor": None}
 
-        try:
-            with self.get_session() as session:
-                result = session.execute(
-                    text(
-                        """
-                    SELECT timestamp, source, cpu_usage, memory_usage, disk_usage,
-                           response_time, is_anomaly, anomaly_score
-                    FROM metrics 
-                    ORDER BY timestamp DESC 
-                    LIMIT :limit
-                """
-                    ),
-                    {"limit": limit},
-                )
+        def fetch(engine):
+            with engine.connect() as conn:
+                result = conn.execute(text(sql), {**params, "limit": limit + 1})
+                return [dict(row._mapping) for row in result]
 
-                rows = result.fetchall()
-                return [dict(row._mapping) for row in rows]
-        except Exception as e:
-            logger.error(f"Error getting latest metrics: {e}")
-            return []
-
-    def get_anomalies(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get anomalies from database."""
-        if not self.is_available():
-            return []
+        def load():
+            if self.shards:
+                return list(self.shards.query(sql, params, limit=limit + 1))
+            return self._read(fetch)
 
         try:
-            with self.get_session() as session:
-                result = session.execute(
-                    text(
-                        """
-                    SELECT timestamp, source, cpu_usage, memory_usage, 
-                           anomaly_score, response_time
-                    FROM metrics 
-                    WHERE is_anomaly = 1 
-                    ORDER BY timestamp DESC 
-                    LIMIT :limit
-                """
-                    ),
-                    {"limit": limit},
-                )
+            rows = self._cached(
+                "metrics_page",
+                {"limit": limit, "cursor": cursor, "anomalies_only": anomalies_only},
+                ("metrics",),
+                load,
+            )
+            return build_page(rows, limit)
+        except Exception as e:
+            logger.error(f"Error getting metrics page: {e}")
+            return {"items": [], "next_cursor": None}
+
+    def iter_metrics(
+        self,
+        cursor: Optional[str] = None,
+        anomalies_only: bool = False,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream metrics newest first through a server-side cursor.
+
+        Rows are fetched ``batch_size`` at a time, so memory stays constant
+        regardless of how many rows the caller consumes.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        sql, params = self._history_query(cursor, anomalies_only, limited=False)
+        if self.shards:
+            yield from self.shards.query(sql, params)
+            return
 
-                rows = result.fetchall()
-                return [dict(row._mapping) for row in rows]
+        # A stream can't fail over mid-way, so pick one target up front
+        replica = self.router.acquire() if self.router else None
+        engine = replica.target if replica else (self.read_engine or self.engine)
+        error = None
+        try:
+            with engine.connect() as conn:
+                result = conn.execution_options(
+                    stream_results=True, yield_per=batch_size
+                ).execute(text(sql), params)
+                for row in result:
+                    yield dict(row._mapping)
         except Exception as e:
-            logger.error(f"Error getting anomalies: {e}")
-            return []
+            error = e
+            raise
+        finally:
+            if replica:
+                self.router.release(replica, error=error)
+
+    def get_latest_metrics(
+        self, limit: int = 10, cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get latest metrics from database."""
+        return self.get_metrics_page(limit, cursor)["items"]
+
+    def get_anomalies(
+        self, limit: int = 10, cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get anomalies from database."""
+        return self.get_metrics_page(limit, cursor, anomalies_only=True)["items"]
 
     def store_prediction(
         self, metrics: Dict[str, Any], prediction: Dict[str, Any]
     ) -> bool:
-        """Store prediction result in database."""
+        """
+        Store prediction result in database.
+
+        With prediction sampling enabled, routine normal results that fall
+        outside the sample are only counted and True is returned.
+        """
+        params = self._prediction_params(metrics, prediction)
+        if self.prediction_sampler and not self.prediction_sampler.admit(params):
+            return True
+        self._record_write()
+
+        if self.predictions_writer:
+            return self.predictions_writer.submit(params)
+
+        if self.shards:
+            stored = (
+                self.shards.insert("anomaly_predictions", PREDICTION_COLUMNS, [params])
+                == 1
+            )
+            self._invalidate("anomaly_predictions")
+            return stored
+
         if not self.is_available():
             logger.warning("Database not available - prediction not stored")
             return False
@@ -221,42 +911,44 @@ class DatabaseService:
                              :confidence_score, :model_name, :model_version)
                 """
                     ),
-                    {
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "source": metrics.get("source", "api_request"),
-                        "anomaly_detected": prediction.get("anomaly", False),
-                        "severity": prediction.get("severity", "low"),
-                        "confidence_score": prediction.get("confidence", 0.0),
-                        "model_name": prediction.get(
-                            "model_name", "real_data_anomaly_detector"
-                        ),
-                        "model_version": prediction.get("model_version", "1.0.0"),
-                    },
+                    params,
                 )
 
                 session.commit()
                 logger.info("✅ Prediction stored in database")
-                return True
+
+            self._invalidate("anomaly_predictions")
+            return True
 
         except Exception as e:
             logger.error(f"Error storing prediction: {e}")
             return False
 
+    def _prediction_params(
+        self, metrics: Dict[str, Any], prediction: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build anomaly_predictions insert parameters."""
+        return build_prediction_params(metrics, prediction)
+
     def store_metrics(self, metrics: Dict[str, Any]) -> bool:
         """Store new metrics in database."""
+        self._record_write()
+        if self.metrics_writer:
+            params = self._metrics_params(metrics, self._get_system_user_id())
+            return self.metrics_writer.submit(params)
+
+        if self.shards:
+            return self.store_metrics_batch([metrics]) == 1
+
         if not self.is_available():
             logger.warning("Database not available - metrics not stored")
             return False
 
         try:
             with self.get_session() as session:
-                # Get system user ID
-                result = session.execute(
-                    text("SELECT id FROM users WHERE username = 'system'")
+                params = self._metrics_params(
+                    metrics, self._get_system_user_id(session)
                 )
-                user_row = result.fetchone()
-                system_user_id = user_row.id if user_row else None
-
                 # Store metrics
                 session.execute(
                     text(
@@ -272,82 +964,237 @@ class DatabaseService:
                              :is_anomaly, :anomaly_score, :created_by)
                 """
                     ),
-                    {
-                        "timestamp": metrics.get(
-                            "timestamp", datetime.now(timezone.utc).isoformat()
-                        ),
-                        "source": metrics.get("source", "api"),
-                        "cpu_usage": metrics.get("cpu_usage", 0.0),
-                        "memory_usage": metrics.get("memory_usage", 0.0),
-                        "disk_usage": metrics.get("disk_usage", 0.0),
-                        "load_1m": metrics.get("load_1m", 0.0),
-                        "load_5m": metrics.get("load_5m", 0.0),
-                        "load_15m": metrics.get("load_15m", 0.0),
-                        "disk_io_read": metrics.get("disk_io_read", 0),
-                        "disk_io_write": metrics.get("disk_io_write", 0),
-                        "network_rx": metrics.get("network_rx", 0),
-                        "network_tx": metrics.get("network_tx", 0),
-                        "response_time": metrics.get("response_time", 0.0),
-                        "error_rate": metrics.get("error_rate", 0.0),
-                        "is_anomaly": metrics.get("is_anomaly", False),
-                        "anomaly_score": metrics.get("anomaly_score", 0.0),
-                        "created_by": system_user_id,
-                    },
+                    params,
                 )
 
                 session.commit()
                 logger.info("✅ Metrics stored in database")
-                return True
+
+            self._after_metrics_write([params])
+            return True
 
         except Exception as e:
             logger.error(f"Error storing metrics: {e}")
             return False
 
-    def get_performance_summary(self) -> Dict[str, Any]:
-        """Get performance metrics summary."""
+    def store_metrics_batch(self, metrics_list: List[Dict[str, Any]]) -> int:
+        """
+        Store many metric samples with a single multi-row insert.
+
+        Returns:
+            Number of rows accepted
+        """
+        if not metrics_list:
+            return 0
+
+        created_by = self._get_system_user_id()
+        rows = [self._metrics_params(m, created_by) for m in metrics_list]
+        self._record_write()
+
+        if self.metrics_writer:
+            return self.metrics_writer.submit_many(rows)
+
         if not self.is_available():
-            return {"status": "database_unavailable"}
+            logger.warning("Database not available - metrics not stored")
+            return 0
 
         try:
-            with self.get_session() as session:
-                result = session.execute(
-                    text(
-                        """
-                    SELECT
-                        COUNT(*) as total_metrics,
-                        AVG(cpu_usage) as avg_cpu,
-                        MAX(cpu_usage) as max_cpu,
-                        AVG(memory_usage) as avg_memory,
-                        MAX(memory_usage) as max_memory,
-                        AVG(response_time) as avg_response_time,
-                        COUNT(CASE WHEN is_anomaly = 1 THEN 1 END) as total_anomalies
-                    FROM metrics
-                    WHERE timestamp >= datetime('now', '-24 hours')
-                """
+            if self.shards:
+                self.shards.insert("metrics", METRICS_COLUMNS, rows)
+            else:
+                with self.engine.begin() as conn:
+                    conn.execute(
+                        text(
+                            f"INSERT INTO metrics ({', '.join(METRICS_COLUMNS)}) "
+                            f"VALUES ({', '.join(':' + c for c in METRICS_COLUMNS)})"
+                        ),
+                        rows,
                     )
+            self._after_metrics_write(rows)
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error storing metrics batch: {e}")
+            return 0
+
+    def _get_system_user_id(self, session=None) -> Optional[int]:
+        """Look up the 'system' user id once and reuse it for every insert."""
+        if self._system_user_loaded or time.monotonic() < self._system_user_retry_at:
+            return self._system_user_id
+
+        try:
+            if session is None and self.embedded:
+                # Request threads stay off the embedded writer's connection
+                user_row = self._read(
+                    lambda engine: _fetch_one(engine, SYSTEM_USER_SQL)
                 )
+            elif session is None:
+                with self.get_session() as own_session:
+                    return self._get_system_user_id(own_session)
+            else:
+                user_row = session.execute(text(SYSTEM_USER_SQL)).fetchone()
+            self._system_user_id = user_row.id if user_row else None
+            self._system_user_loaded = True
+        except Exception as e:
+            # Back off so a missing users table doesn't cost a query per row
+            self._system_user_retry_at = time.monotonic() + 60
+            logger.warning(f"Could not resolve system user id: {e}")
+
+        return self._system_user_id
+
+    def _metrics_params(
+        self, metrics: Dict[str, Any], created_by: Optional[int]
+    ) -> Dict[str, Any]:
+        """Build metrics insert parameters."""
+        return build_metrics_params(metrics, created_by)
+
+    def _rollup_summary(self) -> Dict[str, Any]:
+        """Summarize the last 24 hours from the rollup tables."""
+        end = datetime.now(timezone.utc)
+        stats = self._read(
+            lambda engine: self.rollups.summarize(
+                end - timedelta(hours=24), end, engine=engine
+            )
+        )
+        return {
+            "status": "healthy",
+            "metrics_count": stats["metrics_count"],
+            "avg_cpu_usage": round(stats["avg_cpu_usage"], 2),
+            "max_cpu_usage": round(stats["max_cpu_usage"], 2),
+            "avg_memory_usage": round(stats["avg_memory_usage"], 2),
+            "max_memory_usage": round(stats["max_memory_usage"], 2),
+            "avg_response_time": round(stats["avg_response_time"], 2),
+            "anomalies_24h": stats["anomaly_count"],
+            "last_updated": end.isoformat(),
+            "source": "rollups",
+        }
 
-                stats = result.fetchone()
+    def get_performance_summary(self) -> Dict[str, Any]:
+        """Get performance metrics summary for the last 24 hours."""
+        if self.rollups and self.engine:
+            try:
+                # The window slides, so cached summaries also expire after a minute
+                return self._cached(
+                    "performance_summary",
+                    {"hours": 24},
+                    ("metrics",),
+                    self._rollup_summary,
+                    ttl=60,
+                )
+            except Exception as e:
+                logger.warning(f"Rollup summary failed, scanning raw metrics: {e}")
 
-                if stats:
-                    return {
-                        "status": "healthy",
-                        "metrics_count": stats.total_metrics,
-                        "avg_cpu_usage": round(stats.avg_cpu or 0, 2),
-                        "max_cpu_usage": round(stats.max_cpu or 0, 2),
-                        "avg_memory_usage": round(stats.avg_memory or 0, 2),
-                        "max_memory_usage": round(stats.max_memory or 0, 2),
-                        "avg_response_time": round(stats.avg_response_time or 0, 2),
-                        "anomalies_24h": stats.total_anomalies,
-                        "last_updated": datetime.now(timezone.utc).isoformat(),
-                    }
-                else:
-                    return {"status": "no_data"}
+        if not self.is_available():
+            return {"status": "database_unavailable"}
+
+        try:
+            if self.shards:
+                stats = self._shard_performance_summary()
+            else:
+                with self.get_session() as session:
+                    stats = session.execute(text(PERFORMANCE_SUMMARY_SQL)).fetchone()
+
+            if stats:
+                return {
+                    "status": "healthy",
+                    "metrics_count": stats.total_metrics,
+                    "avg_cpu_usage": round(stats.avg_cpu or 0, 2),
+                    "max_cpu_usage": round(stats.max_cpu or 0, 2),
+                    "avg_memory_usage": round(stats.avg_memory or 0, 2),
+                    "max_memory_usage": round(stats.max_memory or 0, 2),
+                    "avg_response_time": round(stats.avg_response_time or 0, 2),
+                    "anomalies_24h": stats.total_anomalies,
+                    "last_updated": datetime.now(timezone.utc).isoformat(),
+                }
+            else:
+                return {"status": "no_data"}
 
         except Exception as e:
             logger.error(f"Error getting performance summary: {e}")
             return {"status": "error", "message": str(e)}
 
+    def _shard_performance_summary(self) -> SimpleNamespace:
+        """Merge the raw 24 h summary over the shards of the last day."""
+        totals: Dict[str, float] = {}
+        start = datetime.utcnow() - timedelta(hours=24)
+        for row in self.shards.query(SHARD_SUMMARY_SQL, start=start):
+            for key, value in row.items():
+                if value is None:
+                    continue
+                if key.startswith("max_"):
+                    totals[key] = max(totals.get(key, value), value)
+                else:
+                    totals[key] = totals.get(key, 0) + value
+
+        def mean(field):
+            n = totals.get(f"n_{field}", 0)
+            return totals.get(f"sum_{field}", 0) / n if n else None
+
+        return SimpleNamespace(
+            total_metrics=int(totals.get("total_metrics", 0)),
+            avg_cpu=mean("cpu"),
+            max_cpu=totals.get("max_cpu"),
+            avg_memory=mean("memory"),
+            max_memory=totals.get("max_memory"),
+            avg_response_time=mean("response_time"),
+            total_anomalies=int(totals.get("total_anomalies", 0)),
+        )
+
+    def get_prediction_stats(
+        self, hours: int = 24, source: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Prediction counts and anomaly rate over the last ``hours``.
+
+        With sampling enabled the figures come from the per-minute counters,
+        so they count every prediction, not only the stored sample.
+        """
+        if not self.engine:
+            return {"status": "database_unavailable"}
+
+        end = datetime.utcnow()
+        start = end - timedelta(hours=hours)
+        try:
+            if self.prediction_sampler:
+                stats = self._read(
+                    lambda engine: self.prediction_sampler.summarize(
+                        start, end, source, engine=engine
+                    )
+                )
+                return {"status": "healthy", "sampled": True, **stats}
+
+            sql = PREDICTION_STATS_SQL.format(
+                source_filter=" AND source = :source" if source else ""
+            )
+            params = {
+                "start": start.replace(tzinfo=timezone.utc).isoformat(),
+                "source": source,
+            }
+            if self.shards:
+                rows = list(self.shards.query(sql, params, start=start))
+            else:
+                with self.engine.connect() as conn:
+                    rows = [dict(conn.execute(text(sql), params).fetchone()._mapping)]
+
+            n = sum(r["n"] or 0 for r in rows)
+            anomalies = sum(r["anomalies"] or 0 for r in rows)
+            confidence_n = sum(r["confidence_n"] or 0 for r in rows)
+            confidence_sum = sum(r["confidence_sum"] or 0.0 for r in rows)
+            return {
+                "status": "healthy",
+                "sampled": False,
+                "prediction_count": n,
+                "anomaly_count": anomalies,
+                "anomaly_rate": anomalies / n if n else 0.0,
+                "avg_confidence": (
+                    confidence_sum / confidence_n if confidence_n else 0.0
+                ),
+                "stored_count": n,
+                "write_reduction": 0.0,
+            }
+        except Exception as e:
+            logger.error(f"Error getting prediction stats: {e}")
+            return {"status": "error", "message": str(e)}
+
     def get_model_info(self) -> Dict[str, Any]:
         """Get ML model information from database."""
         if not self.is_available():
@@ -355,20 +1202,7 @@ class DatabaseService:
 
         try:
             with self.get_session() as session:
-                result = session.execute(
-                    text(
-                        """
-                    SELECT m.model_name, m.model_type, m.description,
-                           mv.version, mv.accuracy, mv.precision_score,
-                           mv.recall_score, mv.f1_score, mv.training_timestamp
-                    FROM ml_models m
-                    JOIN ml_model_versions mv ON m.id = mv.model_id
-                    WHERE m.is_active = 1 AND mv.is_deployed = 1
-                    ORDER BY mv.created_at DESC
-                    LIMIT 1
-                """
-                    )
-                )
+                result = session.execute(text(MODEL_INFO_SQL))
 
                 model = result.fetchone()
 
@@ -427,6 +1261,10 @@ class DatabaseService:
                     self.engine.url.drivername if self.engine else "unknown"
                 ),
                 "connection_pool_size": self.engine.pool.size() if self.engine else 0,
+                "replication": self.router.get_stats() if self.router else None,
+                "query_cache": (
+                    self.query_cache.get_stats() if self.query_cache else None
+                ),
                 "timestamp": datetime.now(timezone.utc).isoformat(),
             }
 
@@ -439,6 +1277,21 @@ class DatabaseService:
             }
 
 
+def _engine_replication_lag(engine) -> float:
+    """Replication lag of a replica engine in seconds (0 when not applicable)."""
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            lag = conn.execute(
+                text(
+                    "SELECT COALESCE(EXTRACT(EPOCH FROM now() - "
+                    "pg_last_xact_replay_timestamp()), 0)"
+                )
+            ).scalar()
+            return float(lag or 0)
+        conn.execute(text("SELECT 1"))
+        return 0.0
+
+
 # Global database service instance
 db_service = DatabaseService()
 
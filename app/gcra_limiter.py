@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - GCRA Rate Limiter
+===================================
+
+O(1), bounded-memory rate limiting with the Generic Cell Rate Algorithm.
+
+A limit of ``limit`` requests per ``period`` seconds admits one request
+every ``period / limit`` seconds with bursts of up to ``limit``: it is a
+token bucket of ``limit`` tokens refilled continuously. GCRA stores a
+single timestamp per client and limit, the theoretical arrival time
+(TAT) at which the bucket is full again, so a check costs O(limits)
+whatever the request rate, and several windows (per minute and per hour)
+are checked together; a request is admitted only if every window admits
+it.
+
+A client whose TATs have all passed is indistinguishable from a new one,
+so idle clients are evicted without changing any decision. The table is
+also bounded (RATE_LIMIT_MAX_CLIENTS); past the bound the least recently
+seen client is dropped.
+
+``create_rate_limiter`` returns this limiter, or the Redis-backed one of
+``redis_rate_limiter`` when RATE_LIMIT_BACKEND is ``redis``.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Idle clients reclaimed per check, keeps checks O(1) amortized
+EVICT_PER_CHECK = 2
+
+# ``(limit, period seconds)`` pairs
+Limits = Tuple[Tuple[int, float], ...]
+
+
+class RateLimitResult(NamedTuple):
+    """Outcome of a check, reported for the most constraining window."""
+
+    allowed: bool
+    limit: int
+    period: float
+    remaining: int
+    # Seconds until that window is fully replenished
+    reset_after: float
+    # Seconds until a denied request would be admitted (0 when allowed)
+    retry_after: float
+
+    @property
+    def reset(self) -> int:
+        """Unix time at which the window is fully replenished."""
+        return int(math.ceil(time.time() + self.reset_after))
+
+
+def per_minute_and_hour(per_minute: int, per_hour: int) -> Limits:
+    """Limits of the ``@rate_limit(per_minute, per_hour)`` decorators."""
+    return ((per_minute, 60.0), (per_hour, 3600.0))
+
+
+class GCRALimiter:
+    """Thread-safe multi-window GCRA limiter over a bounded client table."""
+
+    def __init__(self, max_clients: Optional[int] = None, clock=time.monotonic):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_clients: Client table bound (RATE_LIMIT_MAX_CLIENTS, default 100000)
+            clock: Monotonic time source in seconds
+        """
+        self.max_clients = max_clients or int(
+            os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000")
+        )
+        self.clock = clock
+        self.lock = threading.Lock()
+        # key -> [limits, TATs, latest TAT]; order is least recently seen first
+        self._clients: "OrderedDict[str, list]" = OrderedDict()
+        self.stats = {"allowed": 0, "denied": 0, "evicted_idle": 0, "evicted_full": 0}
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def check(self, key: str, limits: Limits, cost: int = 1) -> RateLimitResult:
+        """
+        Admit or deny one request of ``key``.
+
+        Args:
+            key: Client (and endpoint) identifier
+            limits: ``(limit, period)`` windows that must all admit the request
+            cost: Tokens the request takes
+
+        Returns:
+            Result for the window closest to its limit
+        """
+        with self.lock:
+            now = self.clock()
+            entry = self._clients.get(key)
+            if entry is None or entry[0] != limits:
+                entry = [limits, [now] * len(limits), now]
+                self._clients[key] = entry
+            else:
+                self._clients.move_to_end(key)
+
+            result = self._evaluate(entry, now, cost, commit=True)
+            self.stats["allowed" if result.allowed else "denied"] += 1
+            self._evict(now)
+            return result
+
+    def peek(self, key: str, limits: Limits) -> RateLimitResult:
+        """Report the state of ``key`` without taking a token."""
+        with self.lock:
+            now = self.clock()
+            entry = self._clients.get(key)
+            if entry is None or entry[0] != limits:
+                entry = [limits, [now] * len(limits), now]
+            return self._evaluate(entry, now, 0, commit=False)
+
+    def is_allowed(
+        self, key: str, limit_per_minute: int = 10, limit_per_hour: int = 100
+    ) -> bool:
+        """Check a per-minute and per-hour limit (``SimpleRateLimiter`` API)."""
+        return self.check(
+            key, per_minute_and_hour(limit_per_minute, limit_per_hour)
+        ).allowed
+
+    def _evaluate(
+        self, entry: list, now: float, cost: int, commit: bool
+    ) -> RateLimitResult:
+        """Run GCRA on every window; commit the new TATs if all admit the request."""
+        new_tats = []
+        denied = None
+        tightest = None
+        for (limit, period), tat in zip(entry[0], entry[1]):
+            interval = period / limit
+            new_tat = (tat if tat > now else now) + interval * cost
+            # The bucket holds ``period`` seconds worth of tokens
+            over = new_tat - now - period
+            if over > 1e-9:
+                # Admitted once the slowest window has room again
+                if denied is None or over > denied[2]:
+                    denied = (limit, period, over, tat)
+            elif denied is None:
+                remaining = int((period - new_tat + now) / interval + 1e-9)
+                if tightest is None or remaining < tightest[2]:
+                    tightest = (limit, period, remaining, new_tat)
+            new_tats.append(new_tat)
+
+        if denied is not None:
+            limit, period, over, tat = denied
+            return RateLimitResult(False, limit, period, 0, max(tat - now, 0.0), over)
+        if commit and cost:
+            entry[1] = new_tats
+            entry[2] = max(new_tats)
+        # Report the window with the fewest tokens left
+        limit, period, remaining, new_tat = tightest
+        return RateLimitResult(True, limit, period, remaining, new_tat - now, 0.0)
+
+    def _evict(self, now: float):
+        """Drop idle clients from the cold end, and any beyond the bound."""
+        clients = self._clients
+        for _ in range(EVICT_PER_CHECK):
+            if not clients:
+                break
+            key, entry = next(iter(clients.items()))
+            if entry[2] > now:
+                break
+            del clients[key]
+            self.stats["evicted_idle"] += 1
+        while len(clients) > self.max_clients:
+            clients.popitem(last=False)
+            self.stats["evicted_full"] += 1
+
+    def purge_idle(self) -> int:
+        """Drop every idle client; returns how many were dropped."""
+        with self.lock:
+            now = self.clock()
+            idle = [key for key, entry in self._clients.items() if entry[2] <= now]
+            for key in idle:
+                del self._clients[key]
+            self.stats["evicted_idle"] += len(idle)
+            return len(idle)
+
+    def reset(self, key: Optional[str] = None):
+        """Forget one client, or all of them."""
+        with self.lock:
+            if key is None:
+                self._clients.clear()
+            else:
+                self._clients.pop(key, None)
+
+    def get_stats(self):
+        """Decision and eviction counters plus the table size."""
+        with self.lock:
+            return {
+                **self.stats,
+                "clients": len(self._clients),
+                "max_clients": self.max_clients,
+            }
+
+
+def create_rate_limiter(namespace: str = "default", max_clients: Optional[int] = None):
+    """
+    Limiter for the configured backend (RATE_LIMIT_BACKEND).
+
+    ``memory`` (default) limits each process on its own; ``redis`` shares
+    the limits of every worker and node through Redis
+    (RATE_LIMIT_REDIS_URL, then REDIS_URL).
+
+    Args:
+        namespace: Key namespace of this limiter in Redis
+        max_clients: Bound of the in-process client table
+    """
+    backend = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+    if backend == "redis":
+        try:
+            from app.redis_rate_limiter import REDIS_AVAILABLE, RedisGCRALimiter
+        except ImportError:
+            from redis_rate_limiter import REDIS_AVAILABLE, RedisGCRALimiter
+
+        redis_url = os.getenv("RATE_LIMIT_REDIS_URL") or os.getenv("REDIS_URL")
+        if REDIS_AVAILABLE and redis_url:
+            return RedisGCRALimiter(
+                redis_url=redis_url, namespace=namespace, max_clients=max_clients
+            )
+        logger.warning("⚠️ Redis rate limiting unavailable, limiting per process")
+    elif backend != "memory":
+        logger.warning(
+            f"⚠️ Unknown RATE_LIMIT_BACKEND {backend!r}, limiting per process"
+        )
+    return GCRALimiter(max_clients=max_clients)
+
+
+__all__ = [
+    "GCRALimiter",
+    "RateLimitResult",
+    "Limits",
+    "create_rate_limiter",
+    "per_minute_and_hour",
+]
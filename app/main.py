@@ -8,9 +8,9 @@ database integration, caching, and background task processing.
 """
 
 import logging
+import math
 import os
 import sys
-import time
 import traceback
 import uuid
 from datetime import datetime, timezone
@@ -29,11 +29,22 @@ from werkzeug.exceptions import RequestEntityTooLarge
 from api.v1 import (analytics, chatops, health, integration, legacy, logs,
                     metrics, ml, remediation)
 from background_tasks import celery_app, get_task_status
-from cache_service import CacheService
+# One cache module for the app and its blueprints
+try:
+    from app.cache_service import CacheService
+except ImportError:
+    from cache_service import CacheService
 # Import unified configuration
 from config import config, logger
+
+# The blueprints register their warm-up jobs with the package module
+try:
+    from app.cache_warmer import start_cache_warmer
+except ImportError:
+    from cache_warmer import start_cache_warmer
 # Import our services
 from database_integration import DatabaseService
+from gcra_limiter import create_rate_limiter, per_minute_and_hour
 
 # Import authentication and security
 try:
@@ -89,60 +100,22 @@ app.register_blueprint(ml.bp)
 app.register_blueprint(remediation.bp)
 
 
-# Simple rate limiting (without external dependencies)
-class SimpleRateLimiter:
-    """Simple rate limiter using in-memory storage"""
-
-    def __init__(self):
-        self.requests = {}
-        self.blocked_ips = {}
-
-    def is_allowed(
-        self, ip_address: str, limit_per_minute: int = 10, limit_per_hour: int = 100
-    ) -> bool:
-        """Check if request is allowed based on rate limits"""
-        current_time = time.time()
-
-        # Clean old entries
-        minute_cutoff = current_time - 60
-        hour_cutoff = current_time - 3600
-
-        if ip_address in self.requests:
-            self.requests[ip_address] = [
-                timestamp
-                for timestamp in self.requests[ip_address]
-                if timestamp > hour_cutoff
-            ]
-        else:
-            self.requests[ip_address] = []
-
-        # Check limits
-        minute_requests = len(
-            [t for t in self.requests[ip_address] if t > minute_cutoff]
-        )
-        hour_requests = len(self.requests[ip_address])
-
-        if minute_requests >= limit_per_minute or hour_requests >= limit_per_hour:
-            return False
-
-        # Record this request
-        self.requests[ip_address].append(current_time)
-        return True
-
-
-# Initialize rate limiter
-rate_limiter = SimpleRateLimiter()
+# Per-client, per-endpoint GCRA limiter, shared through Redis when configured
+rate_limiter = create_rate_limiter("api")
 
 
 def rate_limit(per_minute: int = 10, per_hour: int = 100):
     """Rate limiting decorator"""
 
+    limits = per_minute_and_hour(per_minute, per_hour)
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             client_ip = request.remote_addr or "unknown"
 
-            if not rate_limiter.is_allowed(client_ip, per_minute, per_hour):
+            result = rate_limiter.check(f"{client_ip}:{request.endpoint}", limits)
+            if not result.allowed:
                 logger.warning(f"Rate limit exceeded for IP: {client_ip}")
                 return (
                     jsonify(
@@ -153,6 +126,7 @@ def rate_limit(per_minute: int = 10, per_hour: int = 100):
                         }
                     ),
                     429,
+                    {"Retry-After": str(math.ceil(result.retry_after))},
                 )
 
             return f(*args, **kwargs)
@@ -471,6 +445,59 @@ def system_metrics():
         )
 
 
+def admin_only(f):
+    """Require an admin API key; admin endpoints are disabled without auth."""
+    if AUTH_AVAILABLE:
+        return require_admin()(f)
+
+    @wraps(f)
+    def unavailable(*args, **kwargs):
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "error": "Admin endpoints require authentication",
+                    "request_id": getattr(g, "request_id", None),
+                }
+            ),
+            503,
+        )
+
+    return unavailable
+
+
+@app.route("/admin/cache/keys", methods=["GET"])
+@admin_only
+@rate_limit(per_minute=10, per_hour=100)
+def cache_key_analytics():
+    """List the hottest and biggest cache keys and per-prefix statistics."""
+    try:
+        limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+        return (
+            jsonify(
+                {
+                    "status": "success",
+                    "data": cache_service.get_key_analytics(limit),
+                    "request_id": getattr(g, "request_id", None),
+                }
+            ),
+            200,
+        )
+
+    except Exception as e:
+        logger.error(f"Cache key analytics endpoint error: {e}")
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "error": "Unable to retrieve cache key analytics",
+                    "request_id": getattr(g, "request_id", None),
+                }
+            ),
+            500,
+        )
+
+
 @app.route("/tasks/<task_id>/status", methods=["GET"])
 @rate_limit(per_minute=30, per_hour=300)
 def get_task_status_endpoint(task_id):
@@ -520,7 +547,9 @@ def root():
                     "status": "/status",
                     "metrics": "/metrics",
                     "api_v1": "/api/v1/",
+                    "ready": "/ready",
                     "tasks": "/tasks/{task_id}/status",
+                    "cache_keys": "/admin/cache/keys",
                 },
                 "documentation": "https://docs.smartcloudops.ai",
             }
@@ -529,6 +558,11 @@ def root():
     )
 
 
+# Warm the dashboard and status caches when the app is created, so WSGI
+# servers importing ``app`` warm too; /ready reports 503 until done
+start_cache_warmer(app)
+
+
 def main():
     """Main entry point for the unified application."""
     logger.info("🚀 SmartCloudOps AI - Unified Application Starting")
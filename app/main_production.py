@@ -19,7 +19,7 @@ from contextlib import contextmanager
 from datetime import datetime
 
 import structlog
-from flask import Flask, g, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from monitoring.production_monitoring import get_monitoring
 from werkzeug.exceptions import HTTPException
 
@@ -27,8 +27,13 @@ from werkzeug.exceptions import HTTPException
 from auth_secure import (get_current_user, get_request_id, require_admin,
                          require_api_key, require_ml_access)
 # Import production components
+try:
+    from app.cache_service import get_cache_service
+except ImportError:
+    from cache_service import get_cache_service
 from database_improvements import get_db_service
 from ml_production_pipeline import get_ml_pipeline
+from utils.pagination import decode_cursor, iter_ndjson
 
 # Configure structured logging
 structlog.configure(
@@ -71,6 +76,7 @@ def create_production_app():
     db_service = get_db_service()
     ml_pipeline = get_ml_pipeline()
     monitoring = get_monitoring()
+    monitoring.metrics.track_cache_hit_ratio(get_cache_service().hit_ratio)
 
     # Request timing middleware
     @app.before_request
@@ -324,9 +330,9 @@ def create_production_app():
                 is_anomaly=prediction.get("prediction") == "anomaly",
             )
 
-            # Store metrics in database
+            # Store metrics in database (anomalies plus a sample of normal results)
             try:
-                db_service.store_metrics(metrics)
+                db_service.record_prediction(metrics, prediction)
             except Exception as e:
                 logger.warning(
                     "Failed to store metrics in database",
@@ -357,16 +363,39 @@ def create_production_app():
     @app.route("/metrics/history")
     @require_api_key
     def get_metrics_history():
-        """Get historical metrics from database."""
+        """
+        Get historical metrics from database, newest first.
+
+        Query parameters:
+            limit: Page size (max 1000)
+            cursor: Continuation token from a previous page's next_cursor
+            format: "ndjson" streams every row after the cursor as
+                newline-delimited JSON with constant server memory
+        """
         try:
-            limit = request.args.get("limit", 100, type=int)
-            if limit > 1000:
-                limit = 1000
+            cursor = request.args.get("cursor") or None
+            if cursor:
+                try:
+                    decode_cursor(cursor)
+                except ValueError as e:
+                    return jsonify({"error": str(e), "request_id": g.request_id}), 400
+
+            if request.args.get("format") == "ndjson":
+                return Response(
+                    stream_with_context(iter_ndjson(db_service.iter_metrics(cursor))),
+                    mimetype="application/x-ndjson",
+                )
 
-            metrics = db_service.get_metrics(limit=limit)
+            limit = max(1, min(request.args.get("limit", 100, type=int), 1000))
+            page = db_service.get_metrics_page(limit=limit, cursor=cursor)
 
             return jsonify(
-                {"metrics": metrics, "count": len(metrics), "request_id": g.request_id}
+                {
+                    "metrics": page["items"],
+                    "count": len(page["items"]),
+                    "next_cursor": page["next_cursor"],
+                    "request_id": g.request_id,
+                }
             )
 
         except Exception as e:
@@ -16,10 +16,9 @@ Version: 3.2.0 Security Hardened
 
 
 import logging
-import time
+import math
 import traceback
 import uuid
-from collections import defaultdict
 from datetime import datetime, timezone
 from functools import wraps
 
@@ -38,6 +37,8 @@ from app.secure_api import (ErrorCode, HealthCheckDTO, MLPredictionDTO,
                             validate_request_data)
 from app.utils.response import success_response, error_response
 from app.auth_secure import auth
+from app.cache_warmer import get_cache_warmer, start_cache_warmer
+from app.gcra_limiter import create_rate_limiter, per_minute_and_hour
 
 # Import application modules
 try:
@@ -138,51 +139,15 @@ if missing_vars:
     )
 
 
-# Initialize simple rate limiting (without external dependencies)
-class SimpleRateLimiter:
-    """Simple rate limiter using in-memory storage"""
-
-    def __init__(self):
-        self.requests = defaultdict(list)
-        self.blocked_ips = defaultdict(list)
-
-    def is_allowed(
-        self, ip_address: str, limit_per_minute: int = 10, limit_per_hour: int = 100
-    ) -> bool:
-        """Check if request is allowed based on rate limits"""
-        current_time = time.time()
-
-        # Clean old entries
-        minute_cutoff = current_time - 60
-        hour_cutoff = current_time - 3600
-
-        self.requests[ip_address] = [
-            timestamp
-            for timestamp in self.requests[ip_address]
-            if timestamp > hour_cutoff
-        ]
-
-        # Check limits
-        minute_requests = len(
-            [t for t in self.requests[ip_address] if t > minute_cutoff]
-        )
-        hour_requests = len(self.requests[ip_address])
-
-        if minute_requests >= limit_per_minute or hour_requests >= limit_per_hour:
-            return False
-
-        # Record this request
-        self.requests[ip_address].append(current_time)
-        return True
-
-
-# Initialize rate limiter
-rate_limiter = SimpleRateLimiter()
+# Per-client, per-endpoint GCRA limiter, shared through Redis when configured
+rate_limiter = create_rate_limiter("api")
 
 
 def rate_limit(per_minute: int = 10, per_hour: int = 100):
     """Rate limiting decorator"""
 
+    limits = per_minute_and_hour(per_minute, per_hour)
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
@@ -195,7 +160,8 @@ def rate_limit(per_minute: int = 10, per_hour: int = 100):
                 pass
             client_ip = request.remote_addr or "unknown"
 
-            if not rate_limiter.is_allowed(client_ip, per_minute, per_hour):
+            result = rate_limiter.check(f"{client_ip}:{request.endpoint}", limits)
+            if not result.allowed:
                 logger.warning(f"Rate limit exceeded for IP: {client_ip}")
                 return (
                     jsonify(
@@ -206,6 +172,7 @@ def rate_limit(per_minute: int = 10, per_hour: int = 100):
                         )
                     ),
                     429,
+                    {"Retry-After": str(math.ceil(result.retry_after))},
                 )
 
             return f(*args, **kwargs)
@@ -722,18 +689,16 @@ def ml_metrics():
     try:
         user = get_current_user()
 
-        # Use accessor so tests can monkeypatch
+        # Cached and kept warm by the cache warmer; the accessor it uses
+        # can be monkeypatched by tests
         try:
-            from app.api.v1 import ml as ml_module
-            engine = (
-                ml_module.get_secure_inference_engine()
-                if hasattr(ml_module, "get_secure_inference_engine")
-                else ml_engine
-            )
+            from app.api.v1.ml import get_ml_metrics
         except Exception:
-            engine = ml_engine
+            get_ml_metrics = None
 
-        if not engine:
+        if get_ml_metrics is not None:
+            metrics_data = get_ml_metrics()
+        elif not ml_engine:
             metrics_data = {
                 "status": "unavailable",
                 "metrics": {},
@@ -741,7 +706,7 @@ def ml_metrics():
             }
         else:
             health = (
-                engine.health_check() if hasattr(engine, "health_check") else {}
+                ml_engine.health_check() if hasattr(ml_engine, "health_check") else {}
             )
             metrics_data = {
                 "status": health.get("status", "unknown"),
@@ -934,6 +899,26 @@ def health_check():
     )
 
 
+# Readiness probe (public): instances join the load balancer once warm
+@app.route("/ready", methods=["GET"])
+def readiness_check():
+    """
+    Readiness endpoint: 503 until the cache warm-up has finished.
+    """
+    warmer = get_cache_warmer()
+    status = warmer.status()
+    return (
+        jsonify(
+            {
+                "status": "ready" if status["ready"] else "warming",
+                "cache_warmup": status,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
+        ),
+        200 if status["ready"] else 503,
+    )
+
+
 # Public query endpoint used by tests for ChatOps-style queries
 @app.route("/query", methods=["POST"]) 
 @rate_limit(per_minute=30, per_hour=300)
@@ -984,6 +969,15 @@ def home():
     """Public home endpoint with a standardized success response."""
     return success_response(message="SmartCloudOps AI Platform", status_code=200)
 
+
+# Warm the dashboard and status caches before traffic arrives
+try:
+    # Registers the ML metrics with the warmer (also used by /ml/metrics)
+    from app.api.v1 import ml as ml_api  # noqa: F401
+except Exception as e:
+    logger.warning(f"⚠️ ML metrics not registered for cache warm-up: {e}")
+start_cache_warmer(app)
+
 if __name__ == "__main__":
     """
     Production startup with comprehensive security configuration.
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - In-Memory Cache Backend
+=========================================
+
+Bounded LRU + TTL store shared by the cache services' in-memory fallback.
+
+- ``get`` / ``set`` / ``delete`` are O(1): entries live in an ``OrderedDict``
+  whose order is the LRU order (``move_to_end`` on every hit)
+- expiry is lazy on read, plus a min-heap of deadlines that ``set`` drains a
+  few entries at a time and ``purge_expired`` drains fully, so expired keys
+  never require a scan of the whole cache
+- the store is bounded by entry count and by approximate bytes; the least
+  recently used entries are evicted first
+- all operations are guarded by one lock, so the store can be shared by
+  request threads and background workers
+- keys are indexed by namespace (everything before the last ``:``) and by
+  tag, so prefix and tag invalidation touch only the affected keys
+"""
+
+import fnmatch
+import heapq
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Expired entries reclaimed per write, keeps ``set`` O(1) amortized
+PURGE_PER_WRITE = 8
+
+
+def namespace(key: str) -> str:
+    """Index bucket of a key: ``a:b:hash`` -> ``a:b``."""
+    return key.rpartition(":")[0]
+
+
+def estimate_size(key: str, value: Any) -> int:
+    """Approximate memory footprint of an entry in bytes (shallow)."""
+    if isinstance(value, (str, bytes, bytearray)):
+        size = len(value)
+    else:
+        size = sys.getsizeof(value)
+    return size + len(key) + 64
+
+
+class MemoryCache:
+    """Thread-safe LRU cache with per-entry TTL and entry/byte bounds."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        sizeof: Callable[[str, Any], int] = estimate_size,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            max_entries: Entry bound (CACHE_MEMORY_MAX_ENTRIES, default 10000;
+                0 disables)
+            max_bytes: Approximate size bound (CACHE_MEMORY_MAX_BYTES, default
+                64 MiB; 0 disables)
+            default_ttl: Seconds an entry lives when ``set`` gets no TTL;
+                None keeps such entries until evicted
+            sizeof: Returns the size charged for ``(key, value)``
+        """
+        self.max_entries = (
+            max_entries
+            if max_entries is not None
+            else int(os.getenv("CACHE_MEMORY_MAX_ENTRIES", "10000"))
+        )
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else int(os.getenv("CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+        )
+        self.default_ttl = default_ttl
+        self.sizeof = sizeof
+        # Reentrant so callers can group several operations atomically
+        self.lock = threading.RLock()
+        # key -> (value, expires_at or None, size)
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._deadlines: List[tuple] = []
+        self._bytes = 0
+        self._namespaces: Dict[str, Set[str]] = {}
+        self._tags: Dict[str, Set[str]] = {}
+        self._key_tags: Dict[str, Sequence[str]] = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    @property
+    def size_bytes(self) -> int:
+        """Approximate bytes held by live and not yet reclaimed entries."""
+        return self._bytes
+
+    def _deadline(self, ttl: Optional[float], now: float) -> Optional[float]:
+        if ttl is None:
+            ttl = self.default_ttl
+        return now + ttl if ttl and ttl > 0 else None
+
+    def _remove(self, key: str) -> tuple:
+        entry = self._data.pop(key)
+        self._bytes -= entry[2]
+        self._unindex(key)
+        return entry
+
+    def _index(self, key: str, tags: Optional[Sequence[str]]):
+        self._namespaces.setdefault(namespace(key), set()).add(key)
+        if tags:
+            self._key_tags[key] = tuple(tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def _unindex(self, key: str):
+        ns = namespace(key)
+        keys = self._namespaces.get(ns)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._namespaces[ns]
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _purge(self, now: float, limit: Optional[int] = None) -> int:
+        """Drop entries whose deadline passed, earliest first."""
+        purged = 0
+        heap = self._deadlines
+        while heap and heap[0][0] <= now and (limit is None or purged < limit):
+            expires_at, key = heapq.heappop(heap)
+            entry = self._data.get(key)
+            # Heap items of overwritten or deleted keys are skipped lazily
+            if entry is not None and entry[1] == expires_at:
+                self._remove(key)
+                self.stats["expirations"] += 1
+                purged += 1
+        return purged
+
+    def _compact_deadlines(self):
+        """Rebuild the heap once stale items dominate it (amortized O(1))."""
+        if len(self._deadlines) > 2 * len(self._data) + 1024:
+            self._deadlines = [
+                (entry[1], key)
+                for key, entry in self._data.items()
+                if entry[1] is not None
+            ]
+            heapq.heapify(self._deadlines)
+
+    def _evict(self):
+        """Evict least recently used entries until both bounds hold."""
+        while self._data and (
+            (self.max_entries and len(self._data) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            key = next(iter(self._data))
+            self._remove(key)
+            self.stats["evictions"] += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the live value of ``key`` and mark it recently used."""
+        with self.lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return default
+            if entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        tags: Optional[Sequence[str]] = None,
+    ):
+        """
+        Store ``value`` under ``key``.
+
+        Args:
+            key: Cache key
+            value: Value, stored by reference
+            ttl: Seconds to live; None uses ``default_ttl``, <= 0 never expires
+            tags: Tags the entry is invalidated with (``delete_tags``)
+        """
+        size = self.sizeof(key, value)
+        with self.lock:
+            now = time.monotonic()
+            expires_at = self._deadline(ttl, now)
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            self._index(key, tags)
+            if expires_at is not None:
+                heapq.heappush(self._deadlines, (expires_at, key))
+            self.stats["sets"] += 1
+
+            self._purge(now, PURGE_PER_WRITE)
+            self._compact_deadlines()
+            self._evict()
+
+    def delete(self, key: str) -> bool:
+        """Remove ``key``; True if a live entry was removed."""
+        with self.lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False
+            self._remove(key)
+            return entry[1] is None or entry[1] > time.monotonic()
+
+    def expire(self, key: str, ttl: Optional[float]) -> bool:
+        """Reset the TTL of a live entry; True if it exists."""
+        with self.lock:
+            now = time.monotonic()
+            entry = self._data.get(key)
+            if entry is None or (entry[1] is not None and entry[1] <= now):
+                return False
+            expires_at = now + ttl if ttl and ttl > 0 else None
+            self._data[key] = (entry[0], expires_at, entry[2])
+            if expires_at is not None:
+                heapq.heappush(self._deadlines, (expires_at, key))
+            return True
+
+    def ttl(self, key: str) -> Optional[float]:
+        """Seconds left for ``key``; None if it never expires or is missing."""
+        with self.lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] is None:
+                return None
+            return max(0.0, entry[1] - time.monotonic())
+
+    def keys(self, pattern: Optional[str] = None) -> List[str]:
+        """Live keys, optionally filtered by a glob ``pattern``."""
+        with self.lock:
+            self._purge(time.monotonic())
+            keys = list(self._data)
+        if pattern is None or pattern == "*":
+            return keys
+        return [k for k in keys if fnmatch.fnmatchcase(k, pattern)]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Live values of ``keys`` (missing keys are left out)."""
+        found = {}
+        with self.lock:
+            for key in keys:
+                value = self.get(key, _MISSING)
+                if value is not _MISSING:
+                    found[key] = value
+        return found
+
+    def set_many(
+        self,
+        mapping: Dict[str, Any],
+        ttl: Optional[float] = None,
+        tags: Optional[Sequence[str]] = None,
+    ):
+        """Store several entries under one lock."""
+        with self.lock:
+            for key, value in mapping.items():
+                self.set(key, value, ttl, tags=tags)
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Remove several keys under one lock; returns how many existed."""
+        removed = 0
+        with self.lock:
+            for key in keys:
+                if key in self._data:
+                    self._remove(key)
+                    removed += 1
+        return removed
+
+    def delete_prefix(self, prefix: str) -> List[str]:
+        """
+        Remove every key starting with ``prefix``.
+
+        Only the namespaces that can contain such keys are visited, so the
+        cost is O(namespaces + matching keys) rather than O(all keys).
+
+        Returns:
+            Removed keys
+        """
+        with self.lock:
+            victims = []
+            for ns, keys in self._namespaces.items():
+                if ns and (ns.startswith(prefix) or f"{ns}:".startswith(prefix)):
+                    victims.extend(keys)
+                elif not ns or prefix.startswith(f"{ns}:"):
+                    victims.extend(k for k in keys if k.startswith(prefix))
+            for key in victims:
+                self._remove(key)
+        return victims
+
+    def delete_tags(self, tags: Iterable[str]) -> List[str]:
+        """Remove every key registered under any of ``tags``; returns them."""
+        with self.lock:
+            victims = set()
+            for tag in tags:
+                victims.update(self._tags.get(tag, ()))
+            for key in victims:
+                self._remove(key)
+        return list(victims)
+
+    def purge_expired(self) -> int:
+        """Reclaim every expired entry; returns how many were dropped."""
+        with self.lock:
+            purged = self._purge(time.monotonic())
+            self._compact_deadlines()
+            return purged
+
+    def clear(self):
+        """Drop all entries."""
+        with self.lock:
+            self._data.clear()
+            self._deadlines = []
+            self._bytes = 0
+            self._namespaces.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters, occupancy and hit ratio."""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._data)
+            stats["bytes"] = self._bytes
+        stats["max_entries"] = self.max_entries
+        stats["max_bytes"] = self.max_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+__all__ = ["MemoryCache", "estimate_size", "namespace"]
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Columnar Metrics Archive
+==========================================
+
+Compacts closed days of the time-series tables (``metrics``,
+``system_metrics``, ``anomaly_predictions``) into zstd-compressed Parquet
+files and loads them back column- and range-selectively for model training.
+
+Layout (hive-style, one file per day and source)::
+
+    <archive_dir>/<table>/day=2026-05-01/source=api/part-0.parquet
+
+A day is "closed" once the UTC date has moved past it. Exported days are
+recorded in ``<archive_dir>/<table>/_manifest.json`` so each day is written
+once; run the exporter before retention drops the underlying partitions.
+
+Loading goes through ``pyarrow.dataset``: day/source directories outside the
+requested range are never opened, and the timestamp predicate and column
+projection are pushed down into the Parquet reader (row-group statistics).
+"""
+
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+from urllib.parse import quote
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pa = None
+    ds = None
+    pq = None
+
+try:
+    from sqlalchemy import inspect, text
+
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+    inspect = None
+    text = None
+
+try:
+    from app.metrics_rollups import to_utc_naive
+except ImportError:
+    from metrics_rollups import to_utc_naive
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_TABLES = ("metrics", "system_metrics", "anomaly_predictions")
+
+# Features the training paths can derive from archived raw columns
+DERIVED_FEATURES = {
+    "network_io": lambda df: df["network_rx"].fillna(0) + df["network_tx"].fillna(0),
+}
+
+MANIFEST_NAME = "_manifest.json"
+
+
+def default_archive_dir() -> str:
+    """Archive root (METRICS_ARCHIVE_DIR, default data/archive)."""
+    return os.getenv("METRICS_ARCHIVE_DIR", "data/archive")
+
+
+class MetricsArchiver:
+    """Exports closed days of time-series tables to Parquet."""
+
+    def __init__(
+        self,
+        engine,
+        archive_dir: Optional[str] = None,
+        shards=None,
+        compression: str = "zstd",
+        chunk_size: int = 50000,
+    ):
+        """
+        Initialize the archiver.
+
+        Args:
+            engine: SQLAlchemy engine holding the tables
+            archive_dir: Archive root directory
+            shards: SQLiteShardManager when metrics live in shard files
+            compression: Parquet codec
+            chunk_size: Rows fetched per round trip while exporting
+        """
+        self.engine = engine
+        self.archive_dir = Path(archive_dir or default_archive_dir())
+        self.shards = shards
+        self.compression = compression
+        self.chunk_size = chunk_size
+
+    # Manifest
+
+    def _manifest_path(self, table: str) -> Path:
+        return self.archive_dir / table / MANIFEST_NAME
+
+    def _load_manifest(self, table: str) -> Dict[str, Any]:
+        path = self._manifest_path(table)
+        if path.exists():
+            return json.loads(path.read_text())
+        return {"days": {}, "partition_by": ["day"]}
+
+    def _save_manifest(self, table: str, manifest: Dict[str, Any]):
+        path = self._manifest_path(table)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        os.replace(tmp, path)
+
+    # Source access
+
+    def _in_shards(self, table: str) -> bool:
+        return self.shards is not None and table in self.shards.schema
+
+    def _has_table(self, table: str) -> bool:
+        return self._in_shards(table) or inspect(self.engine).has_table(table)
+
+    def _bind(self, table: str, value: datetime) -> Any:
+        """SQLite stores timestamps as ISO text; other dialects take datetimes."""
+        if self._in_shards(table) or self.engine.dialect.name == "sqlite":
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        return value
+
+    def _first_day(self, table: str) -> Optional[date]:
+        sql = f"SELECT MIN(timestamp) AS first FROM {table}"
+        if self._in_shards(table):
+            rows = list(self.shards.query(sql, newest_first=False))
+            values = [to_utc_naive(r["first"]) for r in rows if r["first"] is not None]
+            first = min(values) if values else None
+        else:
+            with self.engine.connect() as conn:
+                first = to_utc_naive(conn.execute(text(sql)).scalar())
+        return first.date() if first else None
+
+    def _day_range(self, table: str, day: date):
+        """Bounds of ``day`` and their bind parameters."""
+        start = datetime.combine(day, datetime.min.time())
+        end = start + timedelta(days=1)
+        return (
+            start,
+            end,
+            {"start": self._bind(table, start), "end": self._bind(table, end)},
+        )
+
+    def _count_day(self, table: str, day: date) -> int:
+        """Number of source rows of ``table`` with timestamp in [day, day + 1)."""
+        start, end, params = self._day_range(table, day)
+        sql = f"SELECT COUNT(*) AS n FROM {table} WHERE timestamp >= :start AND timestamp < :end"
+        if self._in_shards(table):
+            return sum(
+                r["n"] for r in self.shards.query(sql, params, start=start, end=end)
+            )
+        with self.engine.connect() as conn:
+            return conn.execute(text(sql), params).scalar() or 0
+
+    def _read_day(self, table: str, day: date) -> pd.DataFrame:
+        """All rows of ``table`` with timestamp in [day, day + 1)."""
+        start, end, params = self._day_range(table, day)
+        sql = (
+            f"SELECT * FROM {table} WHERE timestamp >= :start AND timestamp < :end "
+            "ORDER BY timestamp"
+        )
+
+        if self._in_shards(table):
+            return pd.DataFrame(
+                list(
+                    self.shards.query(
+                        sql, params, start=start, end=end, newest_first=False
+                    )
+                )
+            )
+
+        with self.engine.connect() as conn:
+            chunks = list(
+                pd.read_sql(
+                    text(sql),
+                    conn.execution_options(stream_results=True),
+                    params=params,
+                    chunksize=self.chunk_size,
+                )
+            )
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+    # Export
+
+    def export_day(self, table: str, day: date) -> int:
+        """
+        Write one day of ``table`` to Parquet, one file per source.
+
+        Returns:
+            Number of rows archived
+        """
+        return self._write_day(table, day, self._read_day(table, day))
+
+    def _write_day(self, table: str, day: date, df: pd.DataFrame) -> int:
+        if df.empty:
+            return 0
+
+        # Normalize mixed ISO strings / aware datetimes to naive UTC microseconds
+        df["timestamp"] = (
+            pd.to_datetime(df["timestamp"], utc=True, format="mixed")
+            .dt.tz_convert(None)
+            .astype("datetime64[us]")
+        )
+
+        day_dir = self.archive_dir / table / f"day={day.isoformat()}"
+        groups = (
+            df.groupby(df["source"].fillna("unknown"), sort=False)
+            if "source" in df.columns
+            else [(None, df)]
+        )
+        for source, group in groups:
+            target_dir = day_dir
+            if source is not None:
+                # Source lives in the directory name, not in the file
+                target_dir = day_dir / f"source={quote(str(source), safe='')}"
+                group = group.drop(columns=["source"])
+            target_dir.mkdir(parents=True, exist_ok=True)
+
+            tmp = target_dir / "part-0.parquet.tmp"
+            pq.write_table(
+                pa.Table.from_pandas(group, preserve_index=False),
+                tmp,
+                compression=self.compression,
+                row_group_size=self.chunk_size,
+            )
+            os.replace(tmp, target_dir / "part-0.parquet")
+
+        return len(df)
+
+    def export_closed(self, table: str, max_days: int = 31) -> Dict[str, Any]:
+        """
+        Archive every closed day of ``table`` not yet in the manifest.
+
+        Args:
+            table: Table name
+            max_days: Upper bound on days exported per call
+
+        Returns:
+            Days and rows archived
+        """
+        if not PYARROW_AVAILABLE:
+            return {"status": "pyarrow_not_available"}
+        if not self._has_table(table):
+            return {"status": "missing_table"}
+
+        first = self._first_day(table)
+        if first is None:
+            return {"status": "empty", "days": 0, "rows": 0}
+
+        manifest = self._load_manifest(table)
+        today = datetime.utcnow().date()
+        exported_days, exported_rows = 0, 0
+        day = first
+        while day < today and exported_days < max_days:
+            key = day.isoformat()
+            if key not in manifest["days"]:
+                df = self._read_day(table, day)
+                rows = self._write_day(table, day, df)
+                source_rows = self._count_day(table, day)
+                if rows != source_rows:
+                    # Leave the day out of the manifest so the next run retries it
+                    logger.warning(
+                        f"⚠️ Archived {rows} of {source_rows} {table} rows for {key}, "
+                        "will retry"
+                    )
+                    day += timedelta(days=1)
+                    continue
+                (self.archive_dir / table).mkdir(parents=True, exist_ok=True)
+                manifest["days"][key] = rows
+                if rows:
+                    if "source" in df.columns:
+                        manifest["partition_by"] = ["day", "source"]
+                    logger.info(f"📦 Archived {rows} {table} rows for {key}")
+                self._save_manifest(table, manifest)
+                exported_days += 1
+                exported_rows += rows
+            day += timedelta(days=1)
+
+        return {"status": "ok", "days": exported_days, "rows": exported_rows}
+
+    def run(self, tables: Sequence[str] = ARCHIVE_TABLES) -> Dict[str, Any]:
+        """Archive closed days of every table present in this database."""
+        results = {}
+        for table in tables:
+            try:
+                results[table] = self.export_closed(table)
+            except Exception as e:
+                logger.error(f"Archiving {table} failed: {e}")
+                results[table] = {"status": "error", "error": str(e)}
+        return results
+
+
+def load_archive(
+    table: str = "metrics",
+    columns: Optional[Sequence[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    sources: Optional[Sequence[str]] = None,
+    archive_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Load archived rows into a DataFrame with partition and predicate pushdown.
+
+    Args:
+        table: Archived table name
+        columns: Columns to read (None for all); "timestamp" and "source"
+            are always available
+        start: Inclusive range start (naive UTC)
+        end: Exclusive range end (naive UTC)
+        sources: Only these sources
+        archive_dir: Archive root directory
+
+    Returns:
+        DataFrame (empty when nothing is archived or pyarrow is missing)
+    """
+    root = Path(archive_dir or default_archive_dir()) / table
+    if not PYARROW_AVAILABLE:
+        logger.warning("pyarrow not available, cannot read the metrics archive")
+        return pd.DataFrame(columns=list(columns or []))
+    if not (root / MANIFEST_NAME).exists():
+        return pd.DataFrame(columns=list(columns or []))
+
+    manifest = json.loads((root / MANIFEST_NAME).read_text())
+    keys = manifest.get("partition_by", ["day"])
+    partitioning = ds.partitioning(
+        pa.schema([(k, pa.string()) for k in keys]), flavor="hive"
+    )
+    dataset = ds.dataset(
+        str(root),
+        format="parquet",
+        partitioning=partitioning,
+        ignore_prefixes=["_", "."],
+    )
+
+    predicate = None
+
+    def add(condition):
+        nonlocal predicate
+        predicate = condition if predicate is None else predicate & condition
+
+    start, end = to_utc_naive(start), to_utc_naive(end)
+    if start is not None:
+        # Directory pruning on the day key, row-group pruning on timestamp
+        add(ds.field("day") >= start.date().isoformat())
+        add(ds.field("timestamp") >= pa.scalar(start, type=pa.timestamp("us")))
+    if end is not None:
+        add(ds.field("day") <= end.date().isoformat())
+        add(ds.field("timestamp") < pa.scalar(end, type=pa.timestamp("us")))
+    if sources and "source" in keys:
+        add(ds.field("source").isin(list(sources)))
+
+    names = set(dataset.schema.names)
+    selected = [c for c in columns if c in names] if columns else None
+    return dataset.to_table(columns=selected, filter=predicate).to_pandas()
+
+
+def load_training_frame(
+    features: Sequence[str],
+    days: int = 30,
+    min_rows: int = 500,
+    archive_dir: Optional[str] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Load the last ``days`` of archived metrics as a training frame.
+
+    Features missing from the archive are derived where possible (see
+    ``DERIVED_FEATURES``).
+
+    Returns:
+        DataFrame with ``features`` (plus ``is_anomaly`` when archived), or
+        None when the archive cannot supply enough complete rows
+    """
+    raw_columns = set(features) | {"is_anomaly", "network_rx", "network_tx"}
+    end = datetime.utcnow()
+    df = load_archive(
+        "metrics",
+        columns=sorted(raw_columns),
+        start=end - timedelta(days=days),
+        end=end,
+        archive_dir=archive_dir,
+    )
+    if df.empty:
+        return None
+
+    for feature in features:
+        if feature not in df.columns:
+            derive = DERIVED_FEATURES.get(feature)
+            try:
+                df[feature] = derive(df) if derive else None
+            except KeyError:
+                df[feature] = None
+
+    keep = list(features) + (["is_anomaly"] if "is_anomaly" in df.columns else [])
+    frame = df[keep].dropna(subset=list(features))
+    if len(frame) < min_rows:
+        return None
+    return frame.reset_index(drop=True)
+
+
+__all__ = [
+    "ARCHIVE_TABLES",
+    "MetricsArchiver",
+    "load_archive",
+    "load_training_frame",
+]
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Time-Partitioned Metrics Storage
+==================================================
+
+Range partitioning for the append-only time-series tables (``metrics``,
+``system_metrics``, ``anomaly_predictions``) so retention drops whole
+partitions instead of running ``DELETE ... WHERE timestamp < :cutoff``.
+
+- PostgreSQL: declarative ``PARTITION BY RANGE (timestamp)`` with daily or
+  weekly partitions, pre-created ahead of time, plus a default partition
+  for out-of-range rows. Range predicates on ``timestamp`` are pruned by
+  the planner.
+- SQLite fallback: one database file per period. Range reads only open the
+  shards overlapping the range and retention deletes whole files.
+"""
+
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from sqlalchemy import create_engine, text
+
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+    create_engine = None
+    text = None
+
+try:
+    from app.metrics_rollups import to_utc_naive
+except ImportError:
+    from metrics_rollups import to_utc_naive
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("metrics", "system_metrics", "anomaly_predictions")
+PARTITION_KEY = "timestamp"
+PARTITION_INTERVALS = ("day", "week")
+
+_BOUND_PATTERN = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def period_start(ts: datetime, interval: str = "day") -> datetime:
+    """Start of the day (or ISO week, Monday) containing ``ts``."""
+    start = datetime(ts.year, ts.month, ts.day)
+    if interval == "week":
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def next_period(start: datetime, interval: str = "day") -> datetime:
+    """Start of the period following the one beginning at ``start``."""
+    return start + timedelta(days=7 if interval == "week" else 1)
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    """Parse a partition bound literal; MINVALUE/MAXVALUE map to None."""
+    value = value.strip().strip("'")
+    if value.upper() in ("MINVALUE", "MAXVALUE"):
+        return None
+    return to_utc_naive(value)
+
+
+class PostgresPartitionManager:
+    """Creates, lists and drops range partitions on PostgreSQL."""
+
+    def __init__(
+        self,
+        engine,
+        tables: Sequence[str] = PARTITIONED_TABLES,
+        interval: Optional[str] = None,
+        premake: Optional[int] = None,
+    ):
+        """
+        Initialize the partition manager.
+
+        Args:
+            engine: SQLAlchemy engine connected to PostgreSQL
+            tables: Time-series tables to partition on ``timestamp``
+            interval: "day" or "week" (DB_PARTITION_INTERVAL, default day)
+            premake: Future partitions kept ready (DB_PARTITION_PREMAKE, default 7)
+        """
+        self.engine = engine
+        self.tables = tuple(tables)
+        self.interval = interval or os.getenv("DB_PARTITION_INTERVAL", "day")
+        if self.interval not in PARTITION_INTERVALS:
+            raise ValueError(f"Unsupported partition interval: {self.interval}")
+        self.premake = (
+            premake
+            if premake is not None
+            else int(os.getenv("DB_PARTITION_PREMAKE", "7"))
+        )
+
+    def partition_name(self, table: str, start: datetime) -> str:
+        """Name of the partition holding the period beginning at ``start``."""
+        return f"{table}_p{start:%Y%m%d}"
+
+    def is_partitioned(self, conn, table: str) -> bool:
+        """Whether ``table`` is already a partitioned parent."""
+        row = conn.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:table)"
+            ),
+            {"table": table},
+        ).fetchone()
+        return row is not None
+
+    def convert_to_partitioned(
+        self, table: str, now: Optional[datetime] = None
+    ) -> bool:
+        """
+        Turn an existing heap table into a partitioned parent.
+
+        The old table is kept as the first partition (MINVALUE up to the
+        period after its newest row), so existing rows are never copied and
+        age out through normal retention.
+
+        Returns:
+            True if the table was converted, False if already partitioned
+        """
+        now = now or datetime.utcnow()
+        legacy = f"{table}_legacy"
+
+        with self.engine.begin() as conn:
+            if self.is_partitioned(conn, table):
+                return False
+
+            newest = conn.execute(
+                text(f"SELECT MAX({PARTITION_KEY}) FROM {table}")
+            ).scalar()
+            newest = to_utc_naive(newest) or now
+            boundary = next_period(
+                period_start(max(newest, now), self.interval), self.interval
+            )
+
+            conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+            conn.execute(
+                text(
+                    f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS "
+                    f"INCLUDING STORAGE INCLUDING COMMENTS) "
+                    f"PARTITION BY RANGE ({PARTITION_KEY})"
+                )
+            )
+
+            # Serial sequences must outlive the legacy partition once it is dropped
+            sequences = conn.execute(
+                text(
+                    "SELECT attname, pg_get_serial_sequence(:legacy, attname) AS seq "
+                    "FROM pg_attribute WHERE attrelid = to_regclass(:legacy) "
+                    "AND attnum > 0 AND NOT attisdropped"
+                ),
+                {"legacy": legacy},
+            ).fetchall()
+            for column, sequence in sequences:
+                if sequence:
+                    conn.execute(
+                        text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.{column}")
+                    )
+
+            conn.execute(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table}_{PARTITION_KEY} "
+                    f"ON {table} ({PARTITION_KEY})"
+                )
+            )
+            conn.execute(
+                text(
+                    f"ALTER TABLE {table} ATTACH PARTITION {legacy} "
+                    f"FOR VALUES FROM (MINVALUE) TO ('{boundary:%Y-%m-%d %H:%M:%S}+00')"
+                )
+            )
+            conn.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+                )
+            )
+
+        logger.info(f"✅ Converted {table} to {self.interval}ly range partitions")
+        return True
+
+    def list_partitions(
+        self, table: str
+    ) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+        """
+        List range partitions of ``table``.
+
+        Returns:
+            (name, lower_bound, upper_bound) tuples; None means unbounded.
+            The default partition is not included.
+        """
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound "
+                    "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                    "WHERE i.inhparent = to_regclass(:table)"
+                ),
+                {"table": table},
+            ).fetchall()
+
+        partitions = []
+        for name, bound in rows:
+            match = _BOUND_PATTERN.search(bound or "")
+            if match:
+                partitions.append(
+                    (name, _parse_bound(match.group(1)), _parse_bound(match.group(2)))
+                )
+        return sorted(partitions, key=lambda p: p[2] or datetime.max)
+
+    def ensure_partitions(self, table: str, now: Optional[datetime] = None) -> int:
+        """
+        Pre-create partitions from the current period through ``premake`` ahead.
+
+        Periods already covered by an existing partition are skipped.
+
+        Returns:
+            Number of partitions created
+        """
+        now = now or datetime.utcnow()
+        covered = [
+            (lo or datetime.min, hi or datetime.max)
+            for _, lo, hi in self.list_partitions(table)
+        ]
+
+        created = 0
+        start = period_start(now, self.interval)
+        with self.engine.begin() as conn:
+            for _ in range(self.premake + 1):
+                end = next_period(start, self.interval)
+                if not any(lo < end and start < hi for lo, hi in covered):
+                    conn.execute(
+                        text(
+                            f"CREATE TABLE IF NOT EXISTS {self.partition_name(table, start)} "
+                            f"PARTITION OF {table} FOR VALUES "
+                            f"FROM ('{start:%Y-%m-%d %H:%M:%S}+00') "
+                            f"TO ('{end:%Y-%m-%d %H:%M:%S}+00')"
+                        )
+                    )
+                    created += 1
+                start = end
+
+        if created:
+            logger.info(f"📅 Created {created} partitions for {table}")
+        return created
+
+    def drop_partitions_before(self, table: str, cutoff: datetime) -> int:
+        """
+        Detach and drop every partition whose rows are all older than ``cutoff``.
+
+        Partitions straddling the cutoff are kept until they fully expire.
+
+        Returns:
+            Number of partitions dropped
+        """
+        dropped = 0
+        for name, _, upper in self.list_partitions(table):
+            if upper is None or upper > cutoff:
+                continue
+            with self.engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                conn.execute(text(f"DROP TABLE {name}"))
+            dropped += 1
+            logger.info(f"🧹 Dropped partition {name}")
+        return dropped
+
+    def maintain(
+        self, retention_days: int, now: Optional[datetime] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Pre-create upcoming partitions and drop expired ones for every table.
+
+        Returns:
+            Per-table counts of created and dropped partitions
+        """
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(days=retention_days)
+        results = {}
+        for table in self.tables:
+            try:
+                results[table] = {
+                    "created": self.ensure_partitions(table, now),
+                    "dropped": self.drop_partitions_before(table, cutoff),
+                }
+            except Exception as e:
+                logger.error(f"Partition maintenance failed for {table}: {e}")
+                results[table] = {"created": 0, "dropped": 0, "error": str(e)}
+        return results
+
+    def setup(self, now: Optional[datetime] = None):
+        """Convert unpartitioned tables and pre-create partitions."""
+        for table in self.tables:
+            self.convert_to_partitioned(table, now)
+            self.ensure_partitions(table, now)
+
+
+class SQLiteShardManager:
+    """Stores time-series rows in one SQLite file per day or week."""
+
+    def __init__(
+        self,
+        directory: str,
+        schema: Dict[str, str],
+        interval: Optional[str] = None,
+    ):
+        """
+        Initialize the shard manager.
+
+        Args:
+            directory: Folder holding the shard files
+            schema: Table name -> CREATE TABLE IF NOT EXISTS statement
+            interval: "day" or "week" (DB_PARTITION_INTERVAL, default day)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.schema = dict(schema)
+        self.interval = interval or os.getenv("DB_PARTITION_INTERVAL", "day")
+        if self.interval not in PARTITION_INTERVALS:
+            raise ValueError(f"Unsupported partition interval: {self.interval}")
+        self._engines: Dict[datetime, Any] = {}
+        self.lock = threading.Lock()
+
+    def shard_path(self, start: datetime) -> Path:
+        """File backing the period beginning at ``start``."""
+        return self.directory / f"shard_{start:%Y%m%d}.db"
+
+    def engine(self, start: datetime):
+        """Engine for a shard, creating the file and schema on first use."""
+        with self.lock:
+            engine = self._engines.get(start)
+            if engine is None:
+                engine = create_engine(f"sqlite:///{self.shard_path(start)}")
+                with engine.begin() as conn:
+                    for ddl in self.schema.values():
+                        conn.execute(text(ddl))
+                self._engines[start] = engine
+            return engine
+
+    def shards(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[datetime]:
+        """
+        Period starts of existing shards overlapping [start, end), oldest first.
+
+        This is the pruning step: shards outside the range are never opened.
+        """
+        periods = []
+        for path in self.directory.glob("shard_*.db"):
+            try:
+                periods.append(datetime.strptime(path.stem[len("shard_") :], "%Y%m%d"))
+            except ValueError:
+                continue
+
+        selected = []
+        for shard_start in sorted(periods):
+            shard_end = next_period(shard_start, self.interval)
+            if start is not None and shard_end <= start:
+                continue
+            if end is not None and shard_start >= end:
+                continue
+            selected.append(shard_start)
+        return selected
+
+    def insert(
+        self, table: str, columns: Sequence[str], rows: Iterable[Dict[str, Any]]
+    ) -> int:
+        """
+        Route rows to the shard of their timestamp and insert them per shard.
+
+        Returns:
+            Number of rows inserted
+        """
+        by_shard: Dict[datetime, List[Dict[str, Any]]] = {}
+        for row in rows:
+            ts = to_utc_naive(row.get(PARTITION_KEY)) or datetime.utcnow()
+            by_shard.setdefault(period_start(ts, self.interval), []).append(
+                {c: row.get(c) for c in columns}
+            )
+
+        sql = text(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + c for c in columns)})"
+        )
+        inserted = 0
+        for shard_start, shard_rows in by_shard.items():
+            with self.engine(shard_start).begin() as conn:
+                conn.execute(sql, shard_rows)
+            inserted += len(shard_rows)
+        return inserted
+
+    def query(
+        self,
+        sql: str,
+        params: Optional[Dict[str, Any]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        newest_first: bool = True,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Run ``sql`` against each shard overlapping the range and chain results.
+
+        Shards are time-disjoint, so per-shard ``ORDER BY timestamp`` results
+        concatenated in shard order are globally ordered. When ``limit`` is
+        given it is bound as ``:limit`` and decreases as rows arrive, and no
+        further shards are opened once it is satisfied.
+        """
+        remaining = limit
+        shards = self.shards(start, end)
+        for shard_start in reversed(shards) if newest_first else shards:
+            if remaining is not None and remaining <= 0:
+                return
+            bound = dict(params or {})
+            if remaining is not None:
+                bound["limit"] = remaining
+            with self.engine(shard_start).connect() as conn:
+                for row in conn.execute(text(sql), bound):
+                    if remaining is not None:
+                        remaining -= 1
+                    yield dict(row._mapping)
+
+    def count(self, table: str) -> int:
+        """Total rows of ``table`` across all shards."""
+        total = 0
+        for shard_start in self.shards():
+            with self.engine(shard_start).connect() as conn:
+                total += (
+                    conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() or 0
+                )
+        return total
+
+    def drop_before(self, cutoff: datetime) -> int:
+        """
+        Delete every shard whose period ends at or before ``cutoff``.
+
+        Returns:
+            Number of shard files removed
+        """
+        dropped = 0
+        for shard_start in self.shards():
+            if next_period(shard_start, self.interval) > cutoff:
+                continue
+            with self.lock:
+                engine = self._engines.pop(shard_start, None)
+            if engine is not None:
+                engine.dispose()
+            self.shard_path(shard_start).unlink(missing_ok=True)
+            dropped += 1
+            logger.info(f"🧹 Dropped shard {self.shard_path(shard_start).name}")
+        return dropped
+
+
+__all__ = [
+    "PostgresPartitionManager",
+    "SQLiteShardManager",
+    "PARTITIONED_TABLES",
+    "period_start",
+    "next_period",
+]
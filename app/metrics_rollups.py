@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Metrics Rollups
+=================================
+
+Incrementally maintained 1-minute, 5-minute and 1-hour rollup tables for the
+raw ``metrics`` table. Each bucket holds count, sum, min, max and anomaly
+count per source, upserted as rows are ingested.
+
+Summaries are answered by a query router that covers the requested range
+with the coarsest aligned buckets available and fills the edges from finer
+tables, so their cost depends on the range length, not on raw history size.
+"""
+
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from sqlalchemy import inspect, text
+
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+    inspect = text = None
+
+logger = logging.getLogger(__name__)
+
+# Granularity name -> bucket width in seconds, finest first
+ROLLUP_GRANULARITIES = OrderedDict([("1m", 60), ("5m", 300), ("1h", 3600)])
+
+# Raw metric columns aggregated into each bucket
+ROLLUP_FIELDS = ("cpu_usage", "memory_usage", "response_time")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def rollup_table(granularity: str) -> str:
+    """Name of the rollup table for a granularity."""
+    return f"metrics_rollup_{granularity}"
+
+
+def floor_bucket(ts: datetime, seconds: int) -> datetime:
+    """Align a naive UTC datetime down to a bucket boundary."""
+    offset = int((ts - _EPOCH).total_seconds()) // seconds * seconds
+    return _EPOCH + timedelta(seconds=offset)
+
+
+def ceil_bucket(ts: datetime, seconds: int) -> datetime:
+    """Align a naive UTC datetime up to a bucket boundary."""
+    floored = floor_bucket(ts, seconds)
+    return floored if floored == ts else floored + timedelta(seconds=seconds)
+
+
+def to_utc_naive(value: Any) -> Optional[datetime]:
+    """Parse a metric timestamp (datetime or ISO string) into naive UTC."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def plan_segments(
+    start: datetime, end: datetime
+) -> List[Tuple[str, datetime, datetime]]:
+    """
+    Cover [start, end) with the coarsest aligned buckets available.
+
+    The range is widened to whole minutes. The middle is served from the
+    1h table and the ragged edges from the 5m and 1m tables.
+
+    Returns:
+        List of (granularity, segment_start, segment_end)
+    """
+    finest = next(iter(ROLLUP_GRANULARITIES.values()))
+    start = floor_bucket(start, finest)
+    end = ceil_bucket(end, finest)
+    return _plan(start, end, list(ROLLUP_GRANULARITIES.items())[::-1])
+
+
+def _plan(start, end, levels) -> List[Tuple[str, datetime, datetime]]:
+    if start >= end or not levels:
+        return []
+    (granularity, seconds), finer = levels[0], levels[1:]
+    inner_start, inner_end = ceil_bucket(start, seconds), floor_bucket(end, seconds)
+    if not finer:
+        return [(granularity, start, end)]
+    if inner_start >= inner_end:
+        return _plan(start, end, finer)
+    return (
+        _plan(start, inner_start, finer)
+        + [(granularity, inner_start, inner_end)]
+        + _plan(inner_end, end, finer)
+    )
+
+
+def segment_query(granularity: str, source: Optional[str] = None) -> str:
+    """Aggregate query over one segment (binds :start, :end and :source)."""
+    selects = ["SUM(sample_count) AS n", "SUM(anomaly_count) AS anomalies"]
+    for field in ROLLUP_FIELDS:
+        selects += [
+            f"SUM({field}_sum) AS {field}_sum",
+            f"MIN({field}_min) AS {field}_min",
+            f"MAX({field}_max) AS {field}_max",
+        ]
+    source_filter = " AND source = :source" if source else ""
+    return (
+        f"SELECT {', '.join(selects)} FROM {rollup_table(granularity)} "
+        f"WHERE bucket_start >= :start AND bucket_start < :end{source_filter}"
+    )
+
+
+def merge_segments(rows: Iterable[Any], segments_scanned: int) -> Dict[str, Any]:
+    """
+    Combine per-segment aggregate rows into one summary.
+
+    Args:
+        rows: Mappings produced by ``segment_query``
+        segments_scanned: Number of segments queried
+
+    Returns:
+        Count, averages, min/max and anomaly count
+    """
+    totals = {"n": 0, "anomalies": 0}
+    for field in ROLLUP_FIELDS:
+        totals.update({f"{field}_sum": 0.0, f"{field}_min": None, f"{field}_max": None})
+
+    for row in rows:
+        if not row["n"]:
+            continue
+        totals["n"] += row["n"]
+        totals["anomalies"] += row["anomalies"] or 0
+        for field in ROLLUP_FIELDS:
+            totals[f"{field}_sum"] += row[f"{field}_sum"] or 0.0
+            for agg, pick in (("min", min), ("max", max)):
+                value = row[f"{field}_{agg}"]
+                current = totals[f"{field}_{agg}"]
+                totals[f"{field}_{agg}"] = (
+                    value if current is None else pick(current, value)
+                )
+
+    n = totals["n"]
+    summary = {
+        "metrics_count": n,
+        "anomaly_count": totals["anomalies"],
+        "segments_scanned": segments_scanned,
+    }
+    for field in ROLLUP_FIELDS:
+        summary[f"avg_{field}"] = totals[f"{field}_sum"] / n if n else 0.0
+        summary[f"min_{field}"] = totals[f"{field}_min"] or 0.0
+        summary[f"max_{field}"] = totals[f"{field}_max"] or 0.0
+    return summary
+
+
+class MetricsRollupManager:
+    """Maintains rollup tables and routes summary queries to them."""
+
+    def __init__(self, engine=None, dialect: Optional[str] = None):
+        """
+        Initialize the rollup manager.
+
+        Args:
+            engine: SQLAlchemy engine of the metrics database
+            dialect: Dialect name when used without an engine (e.g. by the
+                async data layer, which only needs aggregation and SQL)
+        """
+        self.engine = engine
+        self.dialect = dialect or getattr(getattr(engine, "dialect", None), "name", "")
+        self._upsert_sql = {g: self._build_upsert(g) for g in ROLLUP_GRANULARITIES}
+
+    def ensure_tables(self) -> bool:
+        """
+        Create the rollup tables if they do not exist.
+
+        Returns:
+            True if any table was missing, i.e. the rollups need a backfill
+        """
+        inspector = inspect(self.engine)
+        created = not all(
+            inspector.has_table(rollup_table(g)) for g in ROLLUP_GRANULARITIES
+        )
+
+        value_columns = []
+        for field in ROLLUP_FIELDS:
+            for agg in ("sum", "min", "max"):
+                value_columns.append(f"{field}_{agg} DOUBLE PRECISION")
+
+        with self.engine.begin() as conn:
+            for granularity in ROLLUP_GRANULARITIES:
+                conn.execute(
+                    text(
+                        f"""
+                    CREATE TABLE IF NOT EXISTS {rollup_table(granularity)} (
+                        bucket_start TIMESTAMP NOT NULL,
+                        source VARCHAR(100) NOT NULL,
+                        sample_count INTEGER NOT NULL DEFAULT 0,
+                        anomaly_count INTEGER NOT NULL DEFAULT 0,
+                        {', '.join(value_columns)},
+                        PRIMARY KEY (bucket_start, source)
+                    )
+                """
+                    )
+                )
+        return created
+
+    def _build_upsert(self, granularity: str) -> str:
+        """Dialect-specific INSERT ... ON CONFLICT merge statement."""
+        table = rollup_table(granularity)
+        columns = ["bucket_start", "source", "sample_count", "anomaly_count"]
+        for field in ROLLUP_FIELDS:
+            columns += [f"{field}_sum", f"{field}_min", f"{field}_max"]
+
+        if self.dialect == "mysql":
+            least, greatest = "LEAST", "GREATEST"
+            incoming = "VALUES({})".format
+            current = "{}".format
+        else:
+            least, greatest = (
+                ("MIN", "MAX") if self.dialect == "sqlite" else ("LEAST", "GREATEST")
+            )
+            incoming = "excluded.{}".format
+            current = (table + ".{}").format
+
+        updates = []
+        for column in columns[2:]:
+            if column.endswith("_min"):
+                expr = f"{least}({current(column)}, {incoming(column)})"
+            elif column.endswith("_max"):
+                expr = f"{greatest}({current(column)}, {incoming(column)})"
+            else:
+                expr = f"{current(column)} + {incoming(column)}"
+            updates.append(f"{column} = {expr}")
+
+        insert = (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + c for c in columns)}) "
+        )
+        if self.dialect == "mysql":
+            return insert + "ON DUPLICATE KEY UPDATE " + ", ".join(updates)
+        return (
+            insert
+            + "ON CONFLICT (bucket_start, source) DO UPDATE SET "
+            + ", ".join(updates)
+        )
+
+    def upsert_sql(self, granularity: str) -> str:
+        """Merge statement for one rollup table (named parameters)."""
+        return self._upsert_sql[granularity]
+
+    def bucket_value(self, bucket: datetime) -> Any:
+        """Bind value for bucket_start; SQLite stores a sortable string."""
+        if self.dialect == "sqlite":
+            return bucket.strftime("%Y-%m-%d %H:%M:%S")
+        return bucket
+
+    def aggregate(
+        self, rows: Iterable[Dict[str, Any]]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Pre-aggregate raw rows into per-bucket partials for every granularity.
+
+        Returns:
+            Mapping of granularity to upsert parameter dicts
+        """
+        partials: Dict[str, Dict[Tuple[datetime, str], Dict[str, Any]]] = {
+            g: {} for g in ROLLUP_GRANULARITIES
+        }
+
+        for row in rows:
+            ts = to_utc_naive(row.get("timestamp"))
+            if ts is None:
+                continue
+            source = row.get("source") or "api"
+            values = {f: float(row.get(f) or 0.0) for f in ROLLUP_FIELDS}
+            anomaly = 1 if row.get("is_anomaly") else 0
+
+            for granularity, seconds in ROLLUP_GRANULARITIES.items():
+                key = (floor_bucket(ts, seconds), source)
+                bucket = partials[granularity].get(key)
+                if bucket is None:
+                    bucket = {"sample_count": 0, "anomaly_count": 0}
+                    for field, value in values.items():
+                        bucket[f"{field}_sum"] = 0.0
+                        bucket[f"{field}_min"] = value
+                        bucket[f"{field}_max"] = value
+                    partials[granularity][key] = bucket
+
+                bucket["sample_count"] += 1
+                bucket["anomaly_count"] += anomaly
+                for field, value in values.items():
+                    bucket[f"{field}_sum"] += value
+                    if value < bucket[f"{field}_min"]:
+                        bucket[f"{field}_min"] = value
+                    if value > bucket[f"{field}_max"]:
+                        bucket[f"{field}_max"] = value
+
+        return {
+            granularity: [
+                {"bucket_start": self.bucket_value(b), "source": s, **values}
+                for (b, s), values in buckets.items()
+            ]
+            for granularity, buckets in partials.items()
+        }
+
+    def ingest(self, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Fold newly written raw rows into every rollup table.
+
+        Args:
+            rows: Raw metric rows (as inserted into ``metrics``)
+
+        Returns:
+            True if the rollups were updated
+        """
+        if not rows:
+            return True
+
+        partials = self.aggregate(rows)
+        try:
+            with self.engine.begin() as conn:
+                self._upsert(conn, partials)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to update metric rollups: {e}")
+            return False
+
+    def _upsert(self, conn, partials: Dict[str, List[Dict[str, Any]]]):
+        """Merge pre-aggregated partials into the rollup tables."""
+        for granularity, params in partials.items():
+            if params:
+                conn.execute(text(self._upsert_sql[granularity]), params)
+
+    def adjust_anomalies(
+        self, conn, changes: Iterable[Tuple[Any, Optional[str], int]]
+    ) -> int:
+        """
+        Apply anomaly flag changes of existing raw rows to the rollups.
+
+        Used when rows are re-scored: only the buckets holding changed rows
+        are touched, in ``conn``'s transaction, so no history is rebuilt.
+
+        Args:
+            conn: Open connection of the rollup database
+            changes: ``(timestamp, source, delta)`` per changed row, delta
+                being +1 for a new anomaly and -1 for a cleared one
+
+        Returns:
+            Number of bucket updates issued
+        """
+        deltas: Dict[str, Dict[Tuple[datetime, str], int]] = {
+            g: {} for g in ROLLUP_GRANULARITIES
+        }
+        for timestamp, source, delta in changes:
+            ts = to_utc_naive(timestamp)
+            if ts is None or not delta:
+                continue
+            for granularity, seconds in ROLLUP_GRANULARITIES.items():
+                key = (floor_bucket(ts, seconds), source or "api")
+                deltas[granularity][key] = deltas[granularity].get(key, 0) + delta
+
+        updates = 0
+        for granularity, buckets in deltas.items():
+            params = [
+                {"bucket_start": self.bucket_value(b), "source": s, "delta": d}
+                for (b, s), d in buckets.items()
+                if d
+            ]
+            if params:
+                conn.execute(
+                    text(
+                        f"UPDATE {rollup_table(granularity)} "
+                        "SET anomaly_count = anomaly_count + :delta "
+                        "WHERE bucket_start = :bucket_start AND source = :source"
+                    ),
+                    params,
+                )
+                updates += len(params)
+        return updates
+
+    def plan(
+        self, start: datetime, end: datetime
+    ) -> List[Tuple[str, datetime, datetime]]:
+        """Cover [start, end) with rollup segments (see ``plan_segments``)."""
+        return plan_segments(start, end)
+
+    def summarize(
+        self,
+        start: datetime,
+        end: datetime,
+        source: Optional[str] = None,
+        engine=None,
+    ) -> Dict[str, Any]:
+        """
+        Summarize metrics in [start, end) from the rollup tables.
+
+        Args:
+            start: Range start (naive UTC or aware)
+            end: Range end (naive UTC or aware)
+            source: Optional source filter
+            engine: Engine to read from (e.g. a read replica); defaults to
+                the engine rollups are written to
+
+        Returns:
+            Count, averages, maxima and anomaly count over the range
+        """
+        segments = plan_segments(to_utc_naive(start), to_utc_naive(end))
+
+        rows = []
+        with (engine or self.engine).connect() as conn:
+            for granularity, seg_start, seg_end in segments:
+                row = conn.execute(
+                    text(segment_query(granularity, source)),
+                    {
+                        "start": self.bucket_value(seg_start),
+                        "end": self.bucket_value(seg_end),
+                        "source": source,
+                    },
+                ).fetchone()
+                if row is not None:
+                    rows.append(row._mapping)
+
+        return merge_segments(rows, len(segments))
+
+    def rebuild(
+        self,
+        chunk_size: int = 10000,
+        since: Optional[datetime] = None,
+        rows: Optional[Iterable[Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        Recompute rollups from the raw metrics table.
+
+        Used once when rollups are introduced on a database that already has
+        history, or after raw rows were edited out of band.
+
+        Args:
+            chunk_size: Raw rows aggregated per upsert
+            since: Only rebuild buckets from this time on (aligned down to
+                the hour); older buckets are kept as they are
+            rows: Raw rows to fold in instead of scanning ``metrics`` (e.g.
+                rows read from time-partitioned shards)
+
+        Returns:
+            Number of raw rows folded in
+        """
+        columns = ["timestamp", "source", "is_anomaly", *ROLLUP_FIELDS]
+        coarsest = max(ROLLUP_GRANULARITIES.values())
+        if since is not None:
+            since = floor_bucket(to_utc_naive(since), coarsest)
+
+        def in_range(chunk):
+            if since is None:
+                return chunk
+            return [
+                r for r in chunk if (to_utc_naive(r["timestamp"]) or since) >= since
+            ]
+
+        total = 0
+        with self.engine.begin() as conn:
+            for granularity in ROLLUP_GRANULARITIES:
+                if since is None:
+                    conn.execute(text(f"DELETE FROM {rollup_table(granularity)}"))
+                else:
+                    conn.execute(
+                        text(
+                            f"DELETE FROM {rollup_table(granularity)} "
+                            "WHERE bucket_start >= :since"
+                        ),
+                        {"since": self.bucket_value(since)},
+                    )
+
+            if rows is None:
+                result = conn.execution_options(stream_results=True).execute(
+                    text(f"SELECT {', '.join(columns)} FROM metrics")
+                )
+                chunks = iter(
+                    lambda: [dict(r._mapping) for r in result.fetchmany(chunk_size)], []
+                )
+            else:
+                chunks = _chunked(rows, chunk_size)
+
+            for chunk in chunks:
+                chunk = in_range(chunk)
+                if chunk:
+                    self._upsert(conn, self.aggregate(chunk))
+                    total += len(chunk)
+
+        logger.info(f"✅ Rebuilt metric rollups from {total} raw rows")
+        return total
+
+
+def _chunked(
+    rows: Iterable[Dict[str, Any]], size: int
+) -> Iterable[List[Dict[str, Any]]]:
+    """Split an iterable of rows into lists of at most ``size`` rows."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+__all__ = [
+    "MetricsRollupManager",
+    "ROLLUP_GRANULARITIES",
+    "rollup_table",
+    "floor_bucket",
+    "ceil_bucket",
+    "to_utc_naive",
+    "plan_segments",
+    "segment_query",
+    "merge_segments",
+]
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Sampled Prediction Persistence
+================================================
+
+Most predictions are routine "normal" results, and writing one row per
+request for them costs far more than they are worth. The persistence policy
+here keeps:
+
+- every anomaly, in full
+- a deterministic 1-in-N sample of normal predictions, in full
+- exact per-minute counters (predictions, anomalies, stored rows,
+  confidence sum) per source and model version for everything
+
+Counters accumulate in memory and are merged into ``prediction_counts_1m``
+once their minute has closed, so they cost one small upsert per minute
+instead of one insert per request. A background flusher merges closed
+minutes even without further traffic, and everything left is flushed when
+the process exits.
+
+Sampling is opt-in (PREDICTION_SAMPLE_EVERY > 1). Totals and rates are
+read from the counters (``PredictionSampler.summarize``), never from the
+stored sample, so they stay exact.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from sqlalchemy import text
+
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+    text = None
+
+try:
+    from app.metrics_rollups import floor_bucket, to_utc_naive
+except ImportError:
+    from metrics_rollups import floor_bucket, to_utc_naive
+
+logger = logging.getLogger(__name__)
+
+PREDICTION_COUNTS_TABLE = "prediction_counts_1m"
+
+BUCKET_SECONDS = 60
+
+COUNTER_COLUMNS = (
+    "prediction_count",
+    "anomaly_count",
+    "stored_count",
+    "confidence_sum",
+)
+
+# Pending buckets kept in memory while the counts table is unreachable
+MAX_PENDING_BUCKETS = 10000
+
+
+class PredictionSampler:
+    """Decides which predictions are persisted and counts the rest."""
+
+    def __init__(
+        self,
+        engine=None,
+        sample_every: Optional[int] = None,
+        dialect: Optional[str] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        """
+        Initialize the sampler.
+
+        Args:
+            engine: SQLAlchemy engine holding ``prediction_counts_1m``; None
+                when counters are flushed by the caller (see ``drain``)
+            sample_every: Persist one in N normal predictions
+                (PREDICTION_SAMPLE_EVERY, default 1: keep every row)
+            dialect: Dialect name when used without an engine
+            flush_interval: Seconds between background flushes of closed
+                minutes (PREDICTION_COUNTS_FLUSH_SECONDS, default 15); only
+                used with an engine
+        """
+        self.engine = engine
+        self.dialect = dialect or getattr(getattr(engine, "dialect", None), "name", "")
+        self.sample_every = max(
+            1, sample_every or int(os.getenv("PREDICTION_SAMPLE_EVERY", "1"))
+        )
+        self.lock = threading.Lock()
+        self._seen: Dict[Tuple[str, str], int] = {}
+        self._pending: Dict[Tuple[datetime, str, str], List[float]] = {}
+        self._open_bucket: Optional[datetime] = None
+        # SQLiteWriter that performs the flushes in embedded mode
+        self.executor = None
+        self.upsert_sql = self._build_upsert()
+
+        self.flush_interval = flush_interval or float(
+            os.getenv("PREDICTION_COUNTS_FLUSH_SECONDS", "15")
+        )
+        self._stop = threading.Event()
+        self._thread = None
+        if engine is not None:
+            self._thread = threading.Thread(
+                target=self._run, name="prediction-counts-flusher", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        """Flush closed minutes periodically, so they don't wait for traffic."""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Prediction count flusher failed: {e}")
+
+    def close(self):
+        """Stop the background flusher and flush every pending counter."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self.engine is not None:
+            self.flush(force=True)
+
+    def ensure_table(self):
+        """Create the per-minute counters table if it does not exist."""
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"""
+                CREATE TABLE IF NOT EXISTS {PREDICTION_COUNTS_TABLE} (
+                    bucket_start TIMESTAMP NOT NULL,
+                    source VARCHAR(100) NOT NULL,
+                    model_version VARCHAR(50) NOT NULL,
+                    prediction_count INTEGER NOT NULL DEFAULT 0,
+                    anomaly_count INTEGER NOT NULL DEFAULT 0,
+                    stored_count INTEGER NOT NULL DEFAULT 0,
+                    confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+                    PRIMARY KEY (bucket_start, source, model_version)
+                )
+            """
+                )
+            )
+
+    def _build_upsert(self) -> str:
+        """Dialect-specific merge statement adding to existing counters."""
+        columns = ("bucket_start", "source", "model_version") + COUNTER_COLUMNS
+        insert = (
+            f"INSERT INTO {PREDICTION_COUNTS_TABLE} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + c for c in columns)}) "
+        )
+        if self.dialect == "mysql":
+            updates = [f"{c} = {c} + VALUES({c})" for c in COUNTER_COLUMNS]
+            return insert + "ON DUPLICATE KEY UPDATE " + ", ".join(updates)
+        updates = [
+            f"{c} = {PREDICTION_COUNTS_TABLE}.{c} + excluded.{c}"
+            for c in COUNTER_COLUMNS
+        ]
+        return (
+            insert
+            + "ON CONFLICT (bucket_start, source, model_version) DO UPDATE SET "
+            + ", ".join(updates)
+        )
+
+    def bucket_value(self, bucket: datetime) -> Any:
+        """Bind value for bucket_start; SQLite stores a sortable string."""
+        if self.dialect == "sqlite":
+            return bucket.strftime("%Y-%m-%d %H:%M:%S")
+        return bucket
+
+    def admit(self, row: Dict[str, Any]) -> int:
+        """
+        Count a prediction and decide whether its row is persisted.
+
+        Args:
+            row: Prediction row (``anomaly_detected``, ``source``,
+                ``model_version``, ``confidence_score``, ``timestamp``)
+
+        Returns:
+            Sample weight of the row if it should be persisted, 0 otherwise
+        """
+        ts = to_utc_naive(row.get("timestamp")) or datetime.utcnow()
+        bucket = floor_bucket(ts, BUCKET_SECONDS)
+        source = str(row.get("source") or "api")
+        model_version = str(row.get("model_version") or "unknown")
+        anomaly = bool(row.get("anomaly_detected"))
+
+        with self.lock:
+            if anomaly:
+                weight = 1
+            else:
+                # Deterministic: the 1st, (N+1)th, (2N+1)th ... normal result
+                # per source and model version is kept
+                seen = self._seen.get((source, model_version), 0)
+                self._seen[(source, model_version)] = seen + 1
+                weight = self.sample_every if seen % self.sample_every == 0 else 0
+
+            counters = self._pending.setdefault(
+                (bucket, source, model_version), [0, 0, 0, 0.0]
+            )
+            counters[0] += 1
+            counters[1] += int(anomaly)
+            counters[2] += int(weight > 0)
+            counters[3] += float(row.get("confidence_score") or 0.0)
+
+            minute_closed = self._open_bucket is not None and bucket > self._open_bucket
+            if self._open_bucket is None or bucket > self._open_bucket:
+                self._open_bucket = bucket
+
+        if minute_closed and self.engine is not None:
+            if self.executor is not None:
+                self.executor.post(self._flush, False)
+            else:
+                self.flush()
+        return weight
+
+    def _cutoff(self) -> datetime:
+        """Start of the open minute; buckets before it are closed."""
+        now = floor_bucket(datetime.utcnow(), BUCKET_SECONDS)
+        return max(self._open_bucket, now) if self._open_bucket else now
+
+    def due(self) -> bool:
+        """True when pending counters include a closed minute."""
+        with self.lock:
+            cutoff = self._cutoff()
+            return any(key[0] < cutoff for key in self._pending)
+
+    def drain(self, force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Remove pending counters and return them as upsert parameters.
+
+        Args:
+            force: Include the current, still open minute
+
+        Returns:
+            Parameter dicts for ``upsert_sql``
+        """
+        with self.lock:
+            cutoff = self._cutoff()
+            keys = [key for key in self._pending if force or key[0] < cutoff]
+            drained = [(key, self._pending.pop(key)) for key in keys]
+
+        return [
+            {
+                "bucket_start": self.bucket_value(bucket),
+                "source": source,
+                "model_version": model_version,
+                **dict(zip(COUNTER_COLUMNS, counters)),
+            }
+            for (bucket, source, model_version), counters in drained
+        ]
+
+    def restore(self, params: List[Dict[str, Any]]):
+        """Put drained counters back after a failed flush."""
+        with self.lock:
+            for p in params:
+                bucket = p["bucket_start"]
+                if isinstance(bucket, str):
+                    bucket = datetime.strptime(bucket, "%Y-%m-%d %H:%M:%S")
+                counters = self._pending.setdefault(
+                    (bucket, p["source"], p["model_version"]), [0, 0, 0, 0.0]
+                )
+                for i, column in enumerate(COUNTER_COLUMNS):
+                    counters[i] += p[column]
+
+            overflow = len(self._pending) - MAX_PENDING_BUCKETS
+            if overflow > 0:
+                for key in sorted(self._pending)[:overflow]:
+                    del self._pending[key]
+                logger.error(f"Dropped {overflow} unflushed prediction count buckets")
+
+    def flush(self, force: bool = False) -> bool:
+        """
+        Merge pending counters into the counts table.
+
+        Args:
+            force: Also flush the current, still open minute
+
+        Returns:
+            True if nothing failed
+        """
+        if self.executor is not None:
+            # Embedded SQLite: written on the single writer thread
+            return self.executor.call(self._flush, force)
+        return self._flush(force)
+
+    def _flush(self, force: bool) -> bool:
+        params = self.drain(force)
+        if not params:
+            return True
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(self.upsert_sql), params)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to flush prediction counts: {e}")
+            self.restore(params)
+            return False
+
+    def _rows(self, start: datetime, end: datetime, source: Optional[str], engine):
+        """Stored counters in [start, end) merged with unflushed local ones."""
+        start, end = to_utc_naive(start), to_utc_naive(end)
+        source_filter = " AND source = :source" if source else ""
+        totals: Dict[Tuple[Any, str, str], List[float]] = {}
+
+        with (engine or self.engine).connect() as conn:
+            result = conn.execute(
+                text(
+                    f"SELECT bucket_start, source, model_version, "
+                    f"{', '.join(COUNTER_COLUMNS)} FROM {PREDICTION_COUNTS_TABLE} "
+                    f"WHERE bucket_start >= :start AND bucket_start < :end{source_filter}"
+                ),
+                {
+                    "start": self.bucket_value(start),
+                    "end": self.bucket_value(end),
+                    "source": source,
+                },
+            )
+            for row in result:
+                key = (to_utc_naive(row[0]), row[1], row[2])
+                totals[key] = [float(v or 0) for v in row[3:]]
+
+        with self.lock:
+            for key, counters in self._pending.items():
+                if start <= key[0] < end and (source is None or key[1] == source):
+                    merged = totals.setdefault(key, [0, 0, 0, 0.0])
+                    for i, value in enumerate(counters):
+                        merged[i] += value
+        return totals
+
+    def summarize(
+        self,
+        start: datetime,
+        end: datetime,
+        source: Optional[str] = None,
+        engine=None,
+    ) -> Dict[str, Any]:
+        """
+        Exact prediction statistics for [start, end) from the counters.
+
+        Args:
+            start: Range start (naive UTC or aware)
+            end: Range end (naive UTC or aware)
+            source: Optional source filter
+            engine: Engine to read from (defaults to the sampler's engine)
+
+        Returns:
+            Prediction and anomaly counts, anomaly rate, mean confidence and
+            how many rows were actually stored
+        """
+        predictions = anomalies = stored = 0
+        confidence_sum = 0.0
+        for counters in self._rows(start, end, source, engine).values():
+            predictions += int(counters[0])
+            anomalies += int(counters[1])
+            stored += int(counters[2])
+            confidence_sum += counters[3]
+
+        return {
+            "prediction_count": predictions,
+            "anomaly_count": anomalies,
+            "anomaly_rate": anomalies / predictions if predictions else 0.0,
+            "avg_confidence": confidence_sum / predictions if predictions else 0.0,
+            "stored_count": stored,
+            "write_reduction": 1 - stored / predictions if predictions else 0.0,
+        }
+
+
+def prediction_sampler_from_env(engine=None, dialect: Optional[str] = None):
+    """
+    Sampler configured by PREDICTION_SAMPLE_EVERY, or None to keep every row.
+
+    Sampling is off unless PREDICTION_SAMPLE_EVERY is set above 1.
+    """
+    if int(os.getenv("PREDICTION_SAMPLE_EVERY", "1")) <= 1:
+        return None
+    return PredictionSampler(engine, dialect=dialect)
+
+
+__all__ = [
+    "PREDICTION_COUNTS_TABLE",
+    "PredictionSampler",
+    "prediction_sampler_from_env",
+]
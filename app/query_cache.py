@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Query Result Cache
+====================================
+
+Caches read-query results keyed by query name and parameters, and
+invalidates them with per-table version counters instead of TTL guesses:
+
+- every write bumps the version of the tables it touched (after commit)
+- a cached result stores the versions of the tables it was read from
+- a lookup fetches the current versions and the cached entry in one
+  round trip (``MGET``) and only returns the entry if the versions match
+
+Readers therefore never see results older than the last committed write,
+while repeated dashboard queries are answered without touching the
+database. Values are stored in the compact binary format of
+``utils.serialization``.
+
+With Redis the versions are shared by every worker and node; without it
+they live in this process only, which is correct for a single process.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence
+
+try:
+    from app.utils.serialization import dumps, loads
+except ImportError:
+    from utils.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """Version-invalidated cache for query results."""
+
+    def __init__(
+        self,
+        redis_client=None,
+        ttl: int = 300,
+        max_local_entries: int = 1024,
+        namespace: str = "smartcloudops:qc",
+    ):
+        """
+        Initialize the query cache.
+
+        Args:
+            redis_client: Redis client created with ``decode_responses=False``;
+                None keeps entries and versions in process memory
+            ttl: Default seconds an entry may live even without writes
+            max_local_entries: LRU bound of the in-process store
+            namespace: Redis key prefix
+        """
+        self.redis = redis_client
+        self.ttl = ttl
+        self.max_local_entries = max_local_entries
+        self.namespace = namespace
+        self.lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "errors": 0, "bumps": 0}
+
+    def _version_key(self, table: str) -> str:
+        return f"{self.namespace}:ver:{table}"
+
+    def _entry_key(self, name: str, params: Any) -> str:
+        digest = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return f"{self.namespace}:{name}:{digest}"
+
+    def bump(self, *tables: str):
+        """Invalidate every cached result read from ``tables``."""
+        with self.lock:
+            self.stats["bumps"] += 1
+            if self.redis is None:
+                for table in tables:
+                    self._versions[table] = self._versions.get(table, 0) + 1
+                return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for table in tables:
+                pipe.incr(self._version_key(table))
+            pipe.execute()
+        except Exception as e:
+            # A lost bump would leave stale entries until their TTL expires
+            logger.error(f"Query cache invalidation failed for {tables}: {e}")
+
+    def _lookup(self, key: str, tables: Sequence[str]):
+        """Current versions of ``tables`` and the raw cached entry."""
+        if self.redis is None:
+            with self.lock:
+                versions = [self._versions.get(t, 0) for t in tables]
+                entry = self._entries.get(key)
+                if entry is not None:
+                    expires_at, payload = entry
+                    if expires_at < time.monotonic():
+                        del self._entries[key]
+                        return versions, None
+                    self._entries.move_to_end(key)
+                    return versions, payload
+                return versions, None
+
+        values = self.redis.mget([self._version_key(t) for t in tables] + [key])
+        return [int(v or 0) for v in values[:-1]], values[-1]
+
+    def _store(self, key: str, payload: bytes, ttl: int):
+        if self.redis is None:
+            with self.lock:
+                self._entries[key] = (time.monotonic() + ttl, payload)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_local_entries:
+                    self._entries.popitem(last=False)
+            return
+        self.redis.set(key, payload, ex=ttl)
+
+    def get_or_load(
+        self,
+        name: str,
+        params: Any,
+        tables: Sequence[str],
+        loader: Callable[[], Any],
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """
+        Return the cached result of a query, loading it on a miss.
+
+        Args:
+            name: Query name (part of the cache key)
+            params: Query parameters (JSON-serializable, part of the key)
+            tables: Tables the query reads from
+            loader: Runs the query; exceptions propagate and nothing is cached
+            ttl: Entry lifetime override in seconds
+
+        Returns:
+            Query result
+        """
+        key = self._entry_key(name, params)
+        try:
+            versions, payload = self._lookup(key, tables)
+        except Exception as e:
+            with self.lock:
+                self.stats["errors"] += 1
+            logger.warning(f"Query cache lookup failed: {e}")
+            return loader()
+
+        if payload is not None:
+            try:
+                entry = loads(payload)
+                if entry["v"] == versions:
+                    with self.lock:
+                        self.stats["hits"] += 1
+                    return entry["d"]
+                with self.lock:
+                    self.stats["stale"] += 1
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Discarding unreadable query cache entry: {e}")
+
+        with self.lock:
+            self.stats["misses"] += 1
+
+        # Versions were read before loading, so a write racing with this
+        # load leaves the entry tagged with outdated versions (never served)
+        result = loader()
+        try:
+            self._store(key, dumps({"v": versions, "d": result}), ttl or self.ttl)
+        except Exception as e:
+            with self.lock:
+                self.stats["errors"] += 1
+            logger.warning(f"Query cache store failed: {e}")
+        return result
+
+    def clear(self):
+        """Drop all in-process entries (Redis entries age out via versions/TTL)."""
+        with self.lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and hit ratio."""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["local_entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["backend"] = "redis" if self.redis is not None else "memory"
+        return stats
+
+
+__all__ = ["QueryCache"]
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Hot Query Indexes
+===================================
+
+Purpose-built indexes for the queries behind the dashboard and API:
+
+- latest metrics / history pages: ``ORDER BY timestamp DESC, id DESC``
+  with keyset cursors, plus the 24 h summary range scan
+- anomalies: the same ordering restricted to ``is_anomaly``, served by a
+  partial index that only holds anomalous rows
+- deployed model lookup: ``ml_models`` joined to ``ml_model_versions``
+  (deployed versions, newest first)
+
+On PostgreSQL the indexes are built ``CONCURRENTLY`` and carry the
+returned columns in ``INCLUDE`` so the reads are index-only scans. SQLite
+has no ``INCLUDE``; the columns are appended to the key instead.
+
+Partitioned parents (``DB_PARTITIONING``) do not support ``CONCURRENTLY``.
+Their indexes are created on the parent, which builds them on every
+partition (attaching matching existing ones) and on partitions created
+later.
+
+The module also captures query plans, so tests and operators can check
+that none of these queries falls back to a full table scan.
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from sqlalchemy import inspect, text
+
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+    inspect = None
+    text = None
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DIALECTS = ("postgresql", "sqlite")
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """One index: key columns, covered columns and an optional boolean filter."""
+
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+    include: Tuple[str, ...] = ()
+    # Boolean column the index is restricted to (partial index)
+    where_true: Optional[str] = None
+
+
+_METRIC_COLUMNS = (
+    "source",
+    "cpu_usage",
+    "memory_usage",
+    "disk_usage",
+    "response_time",
+    "is_anomaly",
+    "anomaly_score",
+)
+
+HOT_QUERY_INDEXES = (
+    IndexSpec(
+        "idx_metrics_timestamp_id",
+        "metrics",
+        ("timestamp", "id"),
+        include=_METRIC_COLUMNS,
+    ),
+    IndexSpec(
+        "idx_metrics_anomalies_timestamp_id",
+        "metrics",
+        ("timestamp", "id"),
+        include=(
+            "source",
+            "cpu_usage",
+            "memory_usage",
+            "anomaly_score",
+            "response_time",
+        ),
+        where_true="is_anomaly",
+    ),
+    IndexSpec("idx_ml_models_active", "ml_models", ("id",), where_true="is_active"),
+    IndexSpec(
+        "idx_ml_model_versions_deployed",
+        "ml_model_versions",
+        ("created_at", "model_id"),
+        where_true="is_deployed",
+    ),
+)
+
+
+def boolean_literal(dialect: str) -> str:
+    """SQL literal for true in ``dialect`` (SQLite stores booleans as 1)."""
+    return "true" if dialect == "postgresql" else "1"
+
+
+def index_ddl(spec: IndexSpec, dialect: str, partitioned: bool = False) -> str:
+    """
+    CREATE INDEX statement for one index in ``dialect``.
+
+    Args:
+        spec: Index to create
+        dialect: SQLAlchemy dialect name
+        partitioned: The table is a PostgreSQL partitioned parent
+    """
+    columns = list(spec.columns)
+    include = ""
+    if dialect == "postgresql":
+        concurrently = "" if partitioned else "CONCURRENTLY "
+        if spec.include:
+            include = f" INCLUDE ({', '.join(spec.include)})"
+    else:
+        concurrently = ""
+        columns += [c for c in spec.include if c not in columns]
+
+    where = ""
+    if spec.where_true:
+        where = f" WHERE {spec.where_true} = {boolean_literal(dialect)}"
+
+    return (
+        f"CREATE INDEX {concurrently}IF NOT EXISTS {spec.name} "
+        f"ON {spec.table} ({', '.join(columns)}){include}{where}"
+    )
+
+
+def _partitioned_tables(conn) -> set:
+    """Names of the PostgreSQL partitioned parents."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid"
+        )
+    )
+    return {row[0] for row in rows}
+
+
+def _free_index_name(conn, spec: IndexSpec):
+    """
+    Rename an index called ``spec.name`` that belongs to another table.
+
+    Indexes built before a table was converted to partitions stay on the
+    old heap table (now the ``_legacy`` partition) and would turn
+    ``CREATE INDEX IF NOT EXISTS`` on the parent into a no-op.
+    """
+    owner = conn.execute(
+        text(
+            "SELECT indrelid::regclass::text FROM pg_index "
+            "WHERE indexrelid = to_regclass(:name)"
+        ),
+        {"name": spec.name},
+    ).scalar()
+    if owner and owner != spec.table:
+        conn.execute(text(f"ALTER INDEX {spec.name} RENAME TO {spec.name}_{owner}"))
+        logger.info(f"Renamed index {spec.name} of {owner} to {spec.name}_{owner}")
+
+
+def apply_indexes(
+    engine, specs: Sequence[IndexSpec] = HOT_QUERY_INDEXES, analyze: bool = True
+) -> List[str]:
+    """
+    Create missing hot-query indexes on the tables that exist.
+
+    Args:
+        engine: SQLAlchemy engine
+        specs: Indexes to create
+        analyze: Refresh planner statistics of newly indexed tables
+
+    Returns:
+        Names of the indexes that were created
+    """
+    dialect = engine.dialect.name
+    if dialect not in SUPPORTED_DIALECTS:
+        logger.info(f"Hot query indexes not defined for {dialect}")
+        return []
+
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    existing = {
+        index["name"]
+        for table in {s.table for s in specs} & tables
+        for index in inspector.get_indexes(table)
+    }
+
+    applied = []
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        partitioned = _partitioned_tables(conn) if dialect == "postgresql" else set()
+        for spec in specs:
+            if spec.table not in tables or spec.name in existing:
+                continue
+            if spec.table in partitioned:
+                _free_index_name(conn, spec)
+            conn.execute(
+                text(index_ddl(spec, dialect, partitioned=spec.table in partitioned))
+            )
+            applied.append(spec.name)
+
+        if analyze:
+            for table in sorted({s.table for s in specs if s.name in applied}):
+                conn.execute(text(f"ANALYZE {table}"))
+
+    if applied:
+        logger.info(f"✅ Created hot query indexes: {', '.join(applied)}")
+    return applied
+
+
+def explain(engine, sql: str, params: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Query plan of ``sql`` as one line per plan node.
+
+    SQLite lines are the ``EXPLAIN QUERY PLAN`` details (e.g. ``SCAN metrics``);
+    PostgreSQL lines are ``<Node Type> on <relation> using <index>``.
+    """
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        if dialect == "sqlite":
+            rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params or {})
+            return [row[-1] for row in rows]
+
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params or {}).scalar()
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    lines = []
+    stack = [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        line = node["Node Type"]
+        if "Relation Name" in node:
+            line += f" on {node['Relation Name']}"
+        if "Index Name" in node:
+            line += f" using {node['Index Name']}"
+        lines.append(line)
+        stack.extend(reversed(node.get("Plans", [])))
+    return lines
+
+
+def full_scans(plan: Sequence[str]) -> List[str]:
+    """Plan lines that read a whole table instead of an index."""
+    problems = []
+    for line in plan:
+        if line.startswith("Seq Scan"):
+            problems.append(line)
+        elif line.startswith("SCAN ") and " USING " not in line:
+            problems.append(line)
+    return problems
+
+
+def profile_queries(
+    engine,
+    queries: Dict[str, Tuple[str, Dict[str, Any]]],
+    runs: int = 5,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Capture plans and timings of named queries.
+
+    Args:
+        engine: SQLAlchemy engine
+        queries: Mapping of name to (sql, params)
+        runs: Timed executions per query (the median is reported)
+
+    Returns:
+        Per query: plan lines, full scans found and median milliseconds
+    """
+    report = {}
+    for name, (sql, params) in queries.items():
+        plan = explain(engine, sql, params)
+        timings = []
+        with engine.connect() as conn:
+            for _ in range(runs):
+                start = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        report[name] = {
+            "plan": plan,
+            "full_scans": full_scans(plan),
+            "median_ms": round(timings[len(timings) // 2], 3),
+        }
+    return report
+
+
+__all__ = [
+    "HOT_QUERY_INDEXES",
+    "IndexSpec",
+    "apply_indexes",
+    "boolean_literal",
+    "explain",
+    "full_scans",
+    "index_ddl",
+    "profile_queries",
+]
@@ -8,24 +8,24 @@ Comprehensive rate limiting system for API protection.
 
 
 import logging
-import time
-from collections import defaultdict, deque
+import math
 from functools import wraps
 from typing import Any, Dict, Optional, Tuple
 
 import requests
 from flask import g, jsonify, request
 
+from app.gcra_limiter import Limits, RateLimitResult, create_rate_limiter
 from app.utils.response import error_response
 
 logger = logging.getLogger(__name__)
 
 
 class RateLimiter:
-    """Rate limiting implementation with sliding window."""
+    """Per-client, per-endpoint-type rate limiting with GCRA (see ``create_rate_limiter``)."""
 
-    def __init__(self):
-        self.requests = defaultdict(lambda: deque())
+    def __init__(self, max_clients: Optional[int] = None):
+        self.limiter = create_rate_limiter("endpoint", max_clients=max_clients)
         self.limits = {
             "default": {"requests": 100, "window": 60},  # 100 requests per minute
             "ml_predict": {
@@ -61,55 +61,41 @@ class RateLimiter:
         else:
             return "default"
 
-    def _clean_old_requests(self, client_id: str, window_seconds: int):
-        """Remove requests outside the current window."""
-        current_time = time.time()
-        cutoff_time = current_time - window_seconds
-
-        # Remove old requests
-        while self.requests[client_id] and self.requests[client_id][0] < cutoff_time:
-            self.requests[client_id].popleft()
-
-    def is_rate_limited(self, endpoint: str) -> Tuple[bool, Dict[str, Any]]:
-        """Check if request should be rate limited."""
+    def _resolve(self, endpoint: str) -> Tuple[str, str, Limits]:
+        """Client id, limiter key and limits of a request to ``endpoint``."""
         client_id = self._get_client_identifier()
         endpoint_type = self._get_endpoint_type(endpoint)
         limit_config = self.limits.get(endpoint_type, self.limits["default"])
+        limits = ((limit_config["requests"], float(limit_config["window"])),)
+        return client_id, f"{client_id}:{endpoint_type}", limits
 
-        # Clean old requests
-        self._clean_old_requests(client_id, limit_config["window"])
-
-        # Check if limit exceeded
-        current_requests = len(self.requests[client_id])
-        is_limited = current_requests >= limit_config["requests"]
-
-        # Add current request if not limited
-        if not is_limited:
-            self.requests[client_id].append(time.time())
-
-        # Calculate remaining requests and reset time
-        remaining_requests = max(
-            0, limit_config["requests"] - current_requests - (0 if is_limited else 1)
-        )
-
-        # Calculate reset time
-        if self.requests[client_id]:
-            oldest_request = self.requests[client_id][0]
-            reset_time = int(oldest_request + limit_config["window"])
-        else:
-            reset_time = int(time.time() + limit_config["window"])
-
-        return is_limited, {
-            "limit": limit_config["requests"],
-            "remaining": remaining_requests,
-            "reset": reset_time,
-            "window": limit_config["window"],
+    @staticmethod
+    def _limit_info(client_id: str, result: RateLimitResult) -> Dict[str, Any]:
+        return {
+            "limit": result.limit,
+            "remaining": result.remaining,
+            "reset": result.reset,
+            "retry_after": int(math.ceil(result.retry_after)),
+            "window": int(result.period),
             "client_id": client_id[:20] + "..." if len(client_id) > 20 else client_id,
         }
 
+    def is_rate_limited(self, endpoint: str) -> Tuple[bool, Dict[str, Any]]:
+        """Check if request should be rate limited; admitted requests take a token."""
+        client_id, key, limits = self._resolve(endpoint)
+        result = self.limiter.check(key, limits)
+        return not result.allowed, self._limit_info(client_id, result)
+
     def get_rate_limit_headers(self, endpoint: str) -> Dict[str, str]:
-        """Get rate limit headers for response."""
-        _, info = self.is_rate_limited(endpoint)
+        """Get rate limit headers for response (does not take a token)."""
+        client_id, key, limits = self._resolve(endpoint)
+        return self.headers_for(
+            self._limit_info(client_id, self.limiter.peek(key, limits))
+        )
+
+    @staticmethod
+    def headers_for(info: Dict[str, Any]) -> Dict[str, str]:
+        """Rate limit headers for the ``info`` of ``is_rate_limited``."""
         return {
             "X-RateLimit-Limit": str(info["limit"]),
             "X-RateLimit-Remaining": str(info["remaining"]),
@@ -147,7 +133,7 @@ def rate_limit(endpoint_type: Optional[str] = None):
                         "limit": limit_info["limit"],
                         "remaining": limit_info["remaining"],
                         "reset": limit_info["reset"],
-                        "retry_after": max(0, limit_info["reset"] - int(time.time())),
+                        "retry_after": limit_info["retry_after"],
                     },
                 }
 
@@ -159,14 +145,15 @@ def rate_limit(endpoint_type: Optional[str] = None):
                 )
 
                 # Add rate limit headers
-                headers = rate_limiter.get_rate_limit_headers(endpoint)
+                headers = rate_limiter.headers_for(limit_info)
+                headers["Retry-After"] = str(limit_info["retry_after"])
                 for key, value in headers.items():
-                    response[0].headers[key] = value
+                    response.headers[key] = value
 
                 return response
 
             # Add rate limit headers to successful response
-            g.rate_limit_headers = rate_limiter.get_rate_limit_headers(endpoint)
+            g.rate_limit_headers = rate_limiter.headers_for(limit_info)
 
             return f(*args, **kwargs)
 
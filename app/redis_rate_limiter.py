@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Distributed Rate Limiter
+==========================================
+
+GCRA rate limiting with its state in Redis, shared by every worker and
+node, so a client gets the configured limit once rather than once per
+process.
+
+Each check is one atomic Lua script (one round trip) that reads and
+advances the client's theoretical arrival times on the Redis clock. To
+absorb bursts without a round trip per request, a check may lease a few
+tokens at once (RATE_LIMIT_LOCAL_BATCH, at most 5% of the smallest limit)
+and spend them locally for RATE_LIMIT_LOCAL_TTL seconds; denials are
+remembered locally until the client may retry. Leased tokens that expire
+unspent are lost, so leasing can only make a limit stricter.
+
+When Redis is unreachable the limiter fails according to
+RATE_LIMIT_FAIL_MODE: ``open`` admits everything, ``closed`` denies
+everything, ``local`` (default) falls back to per-process limits. Redis
+is retried after RATE_LIMIT_REDIS_RETRY seconds.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+try:
+    import redis
+    from redis.backoff import NoBackoff
+    from redis.retry import Retry
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+try:
+    from app.gcra_limiter import GCRALimiter, Limits, RateLimitResult
+except ImportError:
+    from gcra_limiter import GCRALimiter, Limits, RateLimitResult
+
+logger = logging.getLogger(__name__)
+
+FAIL_MODES = ("open", "closed", "local")
+
+# Takes up to ARGV[1] tokens, and at least ARGV[2], from every window, or
+# only reports the state when ARGV[1] is 0. ARGV[3..] are limit/period
+# pairs; the hash KEYS[1] holds one theoretical arrival time per window.
+# Returns {allowed, granted, window, remaining, reset_after, retry_after}.
+_GCRA_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local want, need = tonumber(ARGV[1]), tonumber(ARGV[2])
+local n = (#ARGV - 2) / 2
+local fields, tats, intervals, available = {}, {}, {}, {}
+for i = 1, n do
+    fields[i] = ARGV[2 * i + 1] .. ':' .. ARGV[2 * i + 2]
+end
+local stored = redis.call('HMGET', KEYS[1], unpack(fields))
+local grant, tightest = want, 1
+for i = 1, n do
+    local limit, period = tonumber(ARGV[2 * i + 1]), tonumber(ARGV[2 * i + 2])
+    intervals[i] = period / limit
+    tats[i] = math.max(tonumber(stored[i]) or now, now)
+    available[i] = math.floor((period - (tats[i] - now)) / intervals[i] + 1e-9)
+    grant = math.min(grant, available[i])
+    if available[i] < available[tightest] then tightest = i end
+end
+
+if want == 0 or grant < need then
+    if available[tightest] >= math.max(need, 1) then
+        return {1, 0, tightest, available[tightest], tostring(tats[tightest] - now), '0'}
+    end
+    -- Admitted once the slowest window has room again
+    local slowest, retry = tightest, 0
+    for i = 1, n do
+        local period = tonumber(ARGV[2 * i + 2])
+        local wait = tats[i] + intervals[i] * math.max(need, 1) - now - period
+        if wait > retry then slowest, retry = i, wait end
+    end
+    return {0, 0, slowest, 0, tostring(tats[slowest] - now), tostring(retry)}
+end
+
+local updates, horizon = {}, 0
+for i = 1, n do
+    tats[i] = tats[i] + intervals[i] * grant
+    updates[#updates + 1] = fields[i]
+    updates[#updates + 1] = tostring(tats[i])
+    horizon = math.max(horizon, tats[i] - now)
+end
+redis.call('HSET', KEYS[1], unpack(updates))
+redis.call('PEXPIRE', KEYS[1], math.ceil(horizon * 1000))
+return {1, grant, tightest, available[tightest] - grant, tostring(tats[tightest] - now), '0'}
+"""
+
+
+class _Lease:
+    """Tokens taken from Redis ahead of time, or a remembered denial."""
+
+    __slots__ = ("limits", "expires", "tokens", "result")
+
+    def __init__(
+        self, limits: Limits, expires: float, tokens: int, result: RateLimitResult
+    ):
+        self.limits = limits
+        self.expires = expires
+        self.tokens = tokens
+        self.result = result
+
+
+class RedisGCRALimiter:
+    """GCRA limiter shared through Redis, with a local token cache."""
+
+    def __init__(
+        self,
+        redis_client=None,
+        redis_url: Optional[str] = None,
+        namespace: str = "default",
+        fail_mode: Optional[str] = None,
+        local_batch: Optional[int] = None,
+        local_ttl: Optional[float] = None,
+        max_clients: Optional[int] = None,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            redis_client: Redis client to use instead of connecting to ``redis_url``
+            redis_url: Redis URL (RATE_LIMIT_REDIS_URL, then REDIS_URL)
+            namespace: Key namespace, one per limiter sharing the server
+            fail_mode: ``open``, ``closed`` or ``local`` when Redis is
+                unreachable (RATE_LIMIT_FAIL_MODE, default local)
+            local_batch: Most tokens leased per round trip
+                (RATE_LIMIT_LOCAL_BATCH, default 10; 1 disables leasing)
+            local_ttl: Seconds leased tokens and denials are kept locally
+                (RATE_LIMIT_LOCAL_TTL, default 1)
+            max_clients: Bound of the local cache and of the fallback limiter
+        """
+        self.fail_mode = (
+            fail_mode or os.getenv("RATE_LIMIT_FAIL_MODE", "local")
+        ).lower()
+        if self.fail_mode not in FAIL_MODES:
+            raise ValueError(
+                f"RATE_LIMIT_FAIL_MODE must be one of {', '.join(FAIL_MODES)}"
+            )
+        self.local_batch = max(
+            1,
+            (
+                local_batch
+                if local_batch is not None
+                else int(os.getenv("RATE_LIMIT_LOCAL_BATCH", "10"))
+            ),
+        )
+        self.local_ttl = (
+            local_ttl
+            if local_ttl is not None
+            else float(os.getenv("RATE_LIMIT_LOCAL_TTL", "1"))
+        )
+        self.retry_interval = float(os.getenv("RATE_LIMIT_REDIS_RETRY", "1"))
+        self.prefix = f"smartcloudops:ratelimit:{namespace}:"
+        self.fallback = GCRALimiter(max_clients=max_clients)
+        self.max_local = min(self.fallback.max_clients, 10000)
+
+        if redis_client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError(
+                    "redis package is required for the Redis rate limiter"
+                )
+            redis_client = redis.from_url(
+                redis_url
+                or os.getenv("RATE_LIMIT_REDIS_URL")
+                or os.getenv("REDIS_URL"),
+                # Checks sit on the request path: fail fast, no retries
+                socket_timeout=float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.25")),
+                socket_connect_timeout=float(
+                    os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.25")
+                ),
+                retry=Retry(NoBackoff(), 0),
+                retry_on_timeout=False,
+            )
+        self.redis_client = redis_client
+        # EVALSHA, loading the script on NOSCRIPT
+        self._script = redis_client.register_script(_GCRA_SCRIPT)
+        self._local: "OrderedDict[str, _Lease]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        self.stats = {
+            "allowed": 0,
+            "denied": 0,
+            "round_trips": 0,
+            "local_hits": 0,
+            "redis_errors": 0,
+            "fail_mode_decisions": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._local)
+
+    def _lease_size(self, limits: Limits) -> int:
+        """Tokens to lease: at most 5% of the smallest limit, so workers stay fair."""
+        return max(1, min(self.local_batch, min(limit for limit, _ in limits) // 20))
+
+    def check(self, key: str, limits: Limits, cost: int = 1) -> RateLimitResult:
+        """
+        Admit or deny one request of ``key``.
+
+        Args:
+            key: Client (and endpoint) identifier
+            limits: ``(limit, period)`` windows that must all admit the request
+            cost: Tokens the request takes
+
+        Returns:
+            Result for the window closest to its limit
+        """
+        now = time.monotonic()
+        if cost == 1:
+            result = self._check_local(key, limits, now)
+            if result is not None:
+                return result
+
+        if now < self._down_until:
+            return self._fail(key, limits, cost)
+
+        want = self._lease_size(limits) if cost == 1 else cost
+        try:
+            result, granted = self._eval(key, limits, want, cost)
+        except Exception as e:
+            self._mark_down(e)
+            return self._fail(key, limits, cost)
+
+        if cost != want and result.allowed:
+            # Keep the leased tokens beyond this request
+            result = result._replace(remaining=result.remaining + granted - 1)
+            if granted > 1:
+                self._remember(
+                    key, _Lease(limits, now + self.local_ttl, granted - 1, result)
+                )
+        elif not result.allowed and cost == 1:
+            # No token can appear before the retry time
+            self._remember(key, _Lease(limits, now + result.retry_after, 0, result))
+        self._count(result.allowed)
+        return result
+
+    def _check_local(
+        self, key: str, limits: Limits, now: float
+    ) -> Optional[RateLimitResult]:
+        """Answer from a lease or a remembered denial, if one is current."""
+        with self._lock:
+            lease = self._local.get(key)
+            if lease is None:
+                return None
+            if lease.expires <= now or lease.limits != limits:
+                del self._local[key]
+                return None
+            self.stats["local_hits"] += 1
+            if lease.tokens == 0:
+                self.stats["denied"] += 1
+                return lease.result._replace(retry_after=lease.expires - now)
+            lease.tokens -= 1
+            lease.result = lease.result._replace(remaining=lease.result.remaining - 1)
+            if lease.tokens == 0:
+                del self._local[key]
+            self.stats["allowed"] += 1
+            return lease.result
+
+    def _remember(self, key: str, lease: _Lease):
+        with self._lock:
+            self._local[key] = lease
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local:
+                self._local.popitem(last=False)
+
+    def _eval(
+        self, key: str, limits: Limits, want: int, need: int
+    ) -> Tuple[RateLimitResult, int]:
+        """Take ``need`` to ``want`` tokens in one round trip."""
+        args = [want, need]
+        for limit, period in limits:
+            args.extend((int(limit), repr(float(period))))
+        self.stats["round_trips"] += 1
+        allowed, granted, window, remaining, reset_after, retry_after = self._script(
+            keys=[self.prefix + key], args=args
+        )
+        limit, period = limits[int(window) - 1]
+        return (
+            RateLimitResult(
+                bool(allowed),
+                limit,
+                period,
+                int(remaining),
+                float(reset_after),
+                float(retry_after),
+            ),
+            int(granted),
+        )
+
+    def peek(self, key: str, limits: Limits) -> RateLimitResult:
+        """Report the state of ``key`` without taking a token."""
+        if time.monotonic() >= self._down_until:
+            try:
+                return self._eval(key, limits, 0, 0)[0]
+            except Exception as e:
+                self._mark_down(e)
+        return self.fallback.peek(key, limits)
+
+    def is_allowed(
+        self, key: str, limit_per_minute: int = 10, limit_per_hour: int = 100
+    ) -> bool:
+        """Check a per-minute and per-hour limit (``SimpleRateLimiter`` API)."""
+        return self.check(
+            key, ((limit_per_minute, 60.0), (limit_per_hour, 3600.0))
+        ).allowed
+
+    def _mark_down(self, error: Exception):
+        """Stop calling Redis for a while; log once per outage."""
+        self.stats["redis_errors"] += 1
+        if time.monotonic() >= self._down_until + self.retry_interval:
+            logger.warning(
+                f"⚠️ Rate limit store unreachable, failing {self.fail_mode} "
+                f"for {self.retry_interval}s: {error}"
+            )
+        self._down_until = time.monotonic() + self.retry_interval
+
+    def _fail(self, key: str, limits: Limits, cost: int) -> RateLimitResult:
+        """Decide without Redis, as configured."""
+        self.stats["fail_mode_decisions"] += 1
+        if self.fail_mode == "local":
+            result = self.fallback.check(key, limits, cost)
+        else:
+            limit, period = limits[0]
+            if self.fail_mode == "open":
+                result = RateLimitResult(True, limit, period, limit, 0.0, 0.0)
+            else:
+                retry = (
+                    max(self._down_until - time.monotonic(), 0.0) or self.retry_interval
+                )
+                result = RateLimitResult(False, limit, period, 0, retry, retry)
+        self._count(result.allowed)
+        return result
+
+    def _count(self, allowed: bool):
+        with self._lock:
+            self.stats["allowed" if allowed else "denied"] += 1
+
+    def reset(self, key: Optional[str] = None):
+        """Forget one client, or every client of this namespace."""
+        with self._lock:
+            if key is None:
+                self._local.clear()
+            else:
+                self._local.pop(key, None)
+        self.fallback.reset(key)
+        if key is not None:
+            self.redis_client.delete(self.prefix + key)
+            return
+        batch = []
+        for name in self.redis_client.scan_iter(match=self.prefix + "*", count=500):
+            batch.append(name)
+            if len(batch) >= 500:
+                self.redis_client.unlink(*batch)
+                batch = []
+        if batch:
+            self.redis_client.unlink(*batch)
+
+    def get_stats(self):
+        """Decision counters, round trips saved by the local cache and Redis health."""
+        with self._lock:
+            return {
+                **self.stats,
+                "backend": "redis",
+                "fail_mode": self.fail_mode,
+                "redis_up": time.monotonic() >= self._down_until,
+                "local_entries": len(self._local),
+            }
+
+
+__all__ = ["RedisGCRALimiter", "FAIL_MODES"]
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Read Replica Routing
+======================================
+
+Routes read-only work to healthy read replicas by least outstanding
+requests, keeps writes and transactions on the primary, and supports a
+read-your-writes window so a request that just wrote reads from the primary.
+
+Used by both ``DatabasePool`` (DB-API pools) and ``DatabaseService``
+(SQLAlchemy engines); targets are opaque to the router.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaState:
+    """Routing and health state of one read replica."""
+
+    def __init__(self, name: str, target: Any):
+        self.name = name
+        self.target = target
+        self.healthy = True
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.avg_latency_ms = 0.0
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable view for stats endpoints."""
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_latency_ms": round(self.avg_latency_ms, 3),
+            "lag_seconds": self.lag_seconds,
+            "last_error": self.last_error,
+        }
+
+
+class ReplicaRouter:
+    """Least-outstanding-requests router over a set of read replicas."""
+
+    def __init__(
+        self,
+        replicas: Dict[str, Any],
+        lag_probe: Optional[Callable[[Any], float]] = None,
+        read_your_writes_window: float = 0.0,
+        max_lag_seconds: float = 30.0,
+        check_interval: float = 5.0,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            replicas: Replica name -> target (pool or engine)
+            lag_probe: Callable returning a replica's replication lag in
+                seconds; raising marks the replica unhealthy
+            read_your_writes_window: Seconds after a write during which the
+                same request/context reads from the primary
+            max_lag_seconds: Replicas lagging more than this are skipped
+            check_interval: Seconds between lazy health/lag probes
+        """
+        self.replicas: List[ReplicaState] = [
+            ReplicaState(name, target) for name, target in replicas.items()
+        ]
+        self.lag_probe = lag_probe
+        self.read_your_writes_window = read_your_writes_window
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.primary_reads = 0
+        self.lock = threading.Lock()
+        self._last_check = 0.0
+        self._checking = False
+        self._last_write = contextvars.ContextVar(
+            f"replica_router_last_write_{id(self)}", default=0.0
+        )
+
+    def begin_request(self):
+        """Reset the read-your-writes marker at the start of a request."""
+        self._last_write.set(0.0)
+
+    def record_write(self):
+        """Note that the current request/context just wrote to the primary."""
+        self._last_write.set(time.monotonic())
+
+    def _in_write_window(self) -> bool:
+        last_write = self._last_write.get()
+        return (
+            self.read_your_writes_window > 0
+            and last_write > 0
+            and time.monotonic() - last_write < self.read_your_writes_window
+        )
+
+    def acquire(self) -> Optional[ReplicaState]:
+        """
+        Pick the healthy replica with the fewest outstanding requests.
+
+        Returns:
+            The chosen replica (call ``release`` when done), or None when the
+            read must go to the primary
+        """
+        self._maybe_check_health()
+
+        if not self.replicas or self._in_write_window():
+            with self.lock:
+                self.primary_reads += 1
+            return None
+
+        with self.lock:
+            candidates = [r for r in self.replicas if r.healthy]
+            if not candidates:
+                self.primary_reads += 1
+                return None
+            chosen = min(candidates, key=lambda r: (r.outstanding, r.avg_latency_ms))
+            chosen.outstanding += 1
+            chosen.requests += 1
+            return chosen
+
+    def release(
+        self,
+        replica: ReplicaState,
+        elapsed: Optional[float] = None,
+        error: Optional[Exception] = None,
+    ):
+        """Return a replica acquired with ``acquire`` and record the outcome."""
+        with self.lock:
+            replica.outstanding -= 1
+            if error is not None:
+                replica.errors += 1
+                replica.healthy = False
+                replica.last_error = str(error)
+            elif elapsed is not None:
+                latency_ms = elapsed * 1000
+                replica.avg_latency_ms = (
+                    latency_ms
+                    if replica.avg_latency_ms == 0
+                    else 0.8 * replica.avg_latency_ms + 0.2 * latency_ms
+                )
+
+    def execute(self, fn: Callable[[Any], Any], primary: Any) -> Any:
+        """
+        Run a read on a replica, falling back to the primary on failure.
+
+        Args:
+            fn: Callable taking a target (replica or primary) and returning
+                the read result
+            primary: Primary target
+
+        Returns:
+            Result of ``fn``
+        """
+        replica = self.acquire()
+        if replica is None:
+            return fn(primary)
+
+        start = time.perf_counter()
+        try:
+            result = fn(replica.target)
+        except Exception as e:
+            self.release(replica, error=e)
+            logger.warning(f"Replica {replica.name} failed, reading from primary: {e}")
+            with self.lock:
+                self.primary_reads += 1
+            return fn(primary)
+
+        self.release(replica, elapsed=time.perf_counter() - start)
+        return result
+
+    def _maybe_check_health(self):
+        """Run the health/lag probe at most once per ``check_interval``."""
+        if not self.lag_probe or not self.replicas:
+            return
+        with self.lock:
+            now = time.monotonic()
+            if self._checking or now - self._last_check < self.check_interval:
+                return
+            self._checking = True
+            self._last_check = now
+        try:
+            self.check_health()
+        finally:
+            with self.lock:
+                self._checking = False
+
+    def check_health(self):
+        """Probe every replica's availability and replication lag."""
+        for replica in self.replicas:
+            try:
+                lag = self.lag_probe(replica.target)
+                healthy = lag is None or lag <= self.max_lag_seconds
+                error = None if healthy else f"lag {lag:.1f}s exceeds limit"
+            except Exception as e:
+                lag, healthy, error = None, False, str(e)
+
+            with self.lock:
+                replica.lag_seconds = lag
+                replica.healthy = healthy
+                if error:
+                    replica.last_error = error
+            if not healthy:
+                logger.warning(f"Replica {replica.name} marked unhealthy: {error}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-replica routing, latency and lag statistics."""
+        with self.lock:
+            return {
+                "primary_reads": self.primary_reads,
+                "read_your_writes_window": self.read_your_writes_window,
+                "replicas": [r.to_dict() for r in self.replicas],
+            }
+
+
+__all__ = ["ReplicaRouter", "ReplicaState"]
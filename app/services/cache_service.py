@@ -4,20 +4,28 @@ SmartCloudOps AI - Cache Service
 ================================
 
 Caching service with Redis support and in-memory fallback.
+
+Redis values use the tagged binary codecs of ``utils.serialization``;
+integers stay plain text so ``increment`` (INCR) keeps working, and
+untagged JSON entries written by earlier versions are still read.
 """
 
 
-import json
 import logging
-import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
+from ..cache_batch import CacheBatch
+from ..memory_cache import MemoryCache
 from ..utils.exceptions import ServiceUnavailableError
+from ..utils.serialization import dumps, loads_compat
 from .base_service import BaseService
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
 
 class CacheService(BaseService):
     """Service for caching data with Redis support and in-memory fallback."""
@@ -25,13 +33,21 @@ class CacheService(BaseService):
     def __init__(self, config: Optional[Dict] = None):
         super().__init__(config)
         self.redis_client = None
-        self.memory_cache = {}
         self.use_redis = self.get_config("use_redis", True)
         self.redis_url = self.get_config("redis_url", "redis://localhost:6379")
         self.default_ttl = self.get_config("default_ttl", 3600)  # 1 hour
         self.max_memory_size = self.get_config(
             "max_memory_size", 1000
         )  # Max items in memory cache
+        self.max_memory_bytes = self.get_config(
+            "max_memory_bytes", 64 * 1024 * 1024
+        )  # Approximate byte bound of memory cache
+        self.compress_threshold = self.get_config(
+            "compress_threshold", 1024
+        )  # Compress Redis payloads larger than this
+        self.memory_cache = MemoryCache(
+            max_entries=self.max_memory_size, max_bytes=self.max_memory_bytes
+        )
 
     def _initialize_service(self) -> None:
         """Initialize the cache service."""
@@ -40,7 +56,7 @@ class CacheService(BaseService):
                 import redis
 
                 self.redis_client = redis.from_url(
-                    self.redis_url, decode_responses=True
+                    self.redis_url, decode_responses=False
                 )
                 # Test connection
                 self.redis_client.ping()
@@ -54,39 +70,18 @@ class CacheService(BaseService):
 
         if not self.use_redis:
             logger.info("Using in-memory cache")
-            self._cleanup_memory_cache()
-
-    def _cleanup_memory_cache(self) -> None:
-        """Clean up expired items from memory cache."""
-        current_time = time.time()
-        expired_keys = []
-
-        for key, (value, expiry) in self.memory_cache.items():
-            if expiry and current_time > expiry:
-                expired_keys.append(key)
-
-        for key in expired_keys:
-            del self.memory_cache[key]
+            self.memory_cache.purge_expired()
 
-        # If cache is too large, remove oldest items
-        if len(self.memory_cache) > self.max_memory_size:
-            sorted_items = sorted(self.memory_cache.items(), key=lambda x: x[1][1] or 0)
-            items_to_remove = len(sorted_items) - self.max_memory_size
-            for i in range(items_to_remove):
-                del self.memory_cache[sorted_items[i][0]]
-
-    def _serialize_value(self, value: Any) -> str:
+    def _serialize_value(self, value: Any) -> bytes:
         """Serialize value for storage."""
-        if isinstance(value, (dict, list, str, int, float, bool)):
-            return json.dumps(value)
-        return str(value)
+        if isinstance(value, int) and not isinstance(value, bool):
+            # Plain digits, as INCR expects
+            return str(value).encode("ascii")
+        return dumps(value, self.compress_threshold)
 
-    def _deserialize_value(self, value: str) -> Any:
+    def _deserialize_value(self, value: bytes) -> Any:
         """Deserialize value from storage."""
-        try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            return value
+        return loads_compat(value)
 
     def get(self, key: str, default: Any = None) -> Any:
         """Get value from cache."""
@@ -96,13 +91,9 @@ class CacheService(BaseService):
                 if value is not None:
                     return self._deserialize_value(value)
             else:
-                self._cleanup_memory_cache()
-                if key in self.memory_cache:
-                    value, expiry = self.memory_cache[key]
-                    if not expiry or time.time() <= expiry:
-                        return value
-                    else:
-                        del self.memory_cache[key]
+                value = self.memory_cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value
 
             return default
         except Exception as e:
@@ -118,9 +109,7 @@ class CacheService(BaseService):
             if self.use_redis and self.redis_client:
                 return self.redis_client.setex(key, ttl, serialized_value)
             else:
-                self._cleanup_memory_cache()
-                expiry = time.time() + ttl if ttl > 0 else None
-                self.memory_cache[key] = (value, expiry)
+                self.memory_cache.set(key, value, ttl)
                 return True
         except Exception as e:
             logger.error(f"Error setting cache key {key}: {e}")
@@ -132,29 +121,96 @@ class CacheService(BaseService):
             if self.use_redis and self.redis_client:
                 return bool(self.redis_client.delete(key))
             else:
-                self._cleanup_memory_cache()
-                if key in self.memory_cache:
-                    del self.memory_cache[key]
-                    return True
-                return False
+                return self.memory_cache.delete(key)
         except Exception as e:
             logger.error(f"Error deleting cache key {key}: {e}")
             return False
 
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several values in one round trip (MGET); missing keys are left out."""
+        try:
+            keys = list(dict.fromkeys(keys))
+            if self.use_redis and self.redis_client:
+                values = self.redis_client.mget(keys) if keys else []
+                return {
+                    key: self._deserialize_value(value)
+                    for key, value in zip(keys, values)
+                    if value is not None
+                }
+            else:
+                return self.memory_cache.get_many(keys)
+        except Exception as e:
+            logger.error(f"Error getting {len(keys)} cache keys: {e}")
+            return {}
+
+    def set_many(self, mapping: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Set several values with one TTL in one round trip."""
+        try:
+            ttl = ttl or self.default_ttl
+
+            if self.use_redis and self.redis_client:
+                if not mapping:
+                    return True
+                if ttl <= 0:
+                    return bool(
+                        self.redis_client.mset(
+                            {k: self._serialize_value(v) for k, v in mapping.items()}
+                        )
+                    )
+                # MSET has no TTL; pipelined SETEX costs the same round trip
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, value in mapping.items():
+                    pipe.setex(key, ttl, self._serialize_value(value))
+                return all(pipe.execute())
+            else:
+                self.memory_cache.set_many(mapping, ttl)
+                return True
+        except Exception as e:
+            logger.error(f"Error setting {len(mapping)} cache keys: {e}")
+            return False
+
+    def delete_many(self, keys: List[str]) -> int:
+        """Delete several keys in one round trip; returns how many existed."""
+        try:
+            if not keys:
+                return 0
+            if self.use_redis and self.redis_client:
+                return self.redis_client.delete(*keys)
+            else:
+                return self.memory_cache.delete_many(keys)
+        except Exception as e:
+            logger.error(f"Error deleting {len(keys)} cache keys: {e}")
+            return 0
+
+    @contextmanager
+    def batch(self, transaction: bool = False):
+        """
+        Queue gets, sets and deletes and run them in one round trip.
+
+        Args:
+            transaction: Apply atomically (MULTI/EXEC on Redis)
+
+        Yields:
+            CacheBatch whose ``results`` are filled when the block exits
+        """
+        batch = CacheBatch(
+            self.redis_client if self.use_redis else None,
+            self.memory_cache,
+            self._serialize_value,
+            self._deserialize_value,
+            default_ttl=self.default_ttl,
+            transaction=transaction,
+        )
+        yield batch
+        batch.execute()
+
     def exists(self, key: str) -> bool:
         """Check if key exists in cache."""
         try:
             if self.use_redis and self.redis_client:
                 return bool(self.redis_client.exists(key))
             else:
-                self._cleanup_memory_cache()
-                if key in self.memory_cache:
-                    value, expiry = self.memory_cache[key]
-                    if not expiry or time.time() <= expiry:
-                        return True
-                    else:
-                        del self.memory_cache[key]
-                return False
+                return key in self.memory_cache
         except Exception as e:
             logger.error(f"Error checking cache key {key}: {e}")
             return False
@@ -165,13 +221,7 @@ class CacheService(BaseService):
             if self.use_redis and self.redis_client:
                 return bool(self.redis_client.expire(key, ttl))
             else:
-                self._cleanup_memory_cache()
-                if key in self.memory_cache:
-                    value, _ = self.memory_cache[key]
-                    expiry = time.time() + ttl if ttl > 0 else None
-                    self.memory_cache[key] = (value, expiry)
-                    return True
-                return False
+                return self.memory_cache.expire(key, ttl)
         except Exception as e:
             logger.error(f"Error setting expiration for cache key {key}: {e}")
             return False
@@ -182,13 +232,8 @@ class CacheService(BaseService):
             if self.use_redis and self.redis_client:
                 return self.redis_client.ttl(key)
             else:
-                self._cleanup_memory_cache()
-                if key in self.memory_cache:
-                    value, expiry = self.memory_cache[key]
-                    if expiry:
-                        remaining = int(expiry - time.time())
-                        return max(0, remaining)
-                return -1
+                remaining = self.memory_cache.ttl(key)
+                return int(remaining) if remaining is not None else -1
         except Exception as e:
             logger.error(f"Error getting TTL for cache key {key}: {e}")
             return -1
@@ -209,16 +254,13 @@ class CacheService(BaseService):
         """Get keys matching pattern."""
         try:
             if self.use_redis and self.redis_client:
-                return self.redis_client.keys(pattern)
-            else:
-                self._cleanup_memory_cache()
-                import fnmatch
-
+                # SCAN pages through the keyspace without blocking Redis like KEYS
                 return [
-                    key
-                    for key in self.memory_cache.keys()
-                    if fnmatch.fnmatch(key, pattern)
+                    key.decode("utf-8")
+                    for key in self.redis_client.scan_iter(match=pattern, count=500)
                 ]
+            else:
+                return self.memory_cache.keys(pattern)
         except Exception as e:
             logger.error(f"Error getting cache keys: {e}")
             return []
@@ -283,13 +325,17 @@ class CacheService(BaseService):
                     "total_commands_processed": info.get("total_commands_processed", 0),
                 }
             else:
-                self._cleanup_memory_cache()
+                self.memory_cache.purge_expired()
+                memory_stats = self.memory_cache.get_stats()
                 return {
                     "type": "memory",
-                    "total_keys": len(self.memory_cache),
+                    "total_keys": memory_stats["entries"],
                     "max_size": self.max_memory_size,
-                    "usage_percent": (len(self.memory_cache) / self.max_memory_size)
+                    "usage_percent": (memory_stats["entries"] / self.max_memory_size)
                     * 100,
+                    "size_bytes": memory_stats["bytes"],
+                    "hit_ratio": memory_stats["hit_ratio"],
+                    "evictions": memory_stats["evictions"],
                 }
         except Exception as e:
             logger.error(f"Error getting cache stats: {e}")
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Embedded SQLite Mode
+======================================
+
+Connection tuning for single-node (edge) deployments running on SQLite:
+
+- WAL journal so readers never block the writer and vice versa
+- ``synchronous=NORMAL`` (durable at checkpoints, no fsync per commit in WAL)
+- larger page cache and memory-mapped I/O for the read path
+- a separate pool of read-only connections (``mode=ro``, ``query_only``)
+
+Every write goes through one ``SQLiteWriter`` thread: the bulk writers of
+all tables drain their buffers on it in batched transactions, and rollup
+upserts, prediction counter flushes and backfill updates run on it as
+queued jobs. There is a single writer and no lock contention between
+request threads.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+try:
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.pool import QueuePool
+
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+    create_engine = None
+    event = None
+
+logger = logging.getLogger(__name__)
+
+
+def sqlite_pragmas(readonly: bool = False) -> dict:
+    """
+    PRAGMA settings for embedded mode, overridable via environment.
+
+    Args:
+        readonly: Settings for read-only connections (no journal changes)
+    """
+    pragmas = {
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        # Negative cache_size is in KiB
+        "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        "temp_store": "MEMORY",
+    }
+    if readonly:
+        pragmas["query_only"] = "ON"
+    else:
+        pragmas["journal_mode"] = "WAL"
+        pragmas["synchronous"] = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    return pragmas
+
+
+def _apply_pragmas(dbapi_connection, pragmas: dict):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def configure_sqlite_engine(engine, readonly: bool = False):
+    """
+    Apply embedded-mode pragmas to every new connection of ``engine``.
+
+    Args:
+        engine: SQLAlchemy engine on a SQLite database
+        readonly: Engine only serves reads
+    """
+    pragmas = sqlite_pragmas(readonly)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, pragmas)
+
+    return engine
+
+
+def sqlite_path(database_url: str) -> Optional[str]:
+    """Filesystem path of a sqlite:/// URL (None for in-memory databases)."""
+    if not database_url.startswith("sqlite:///"):
+        return None
+    path = database_url[len("sqlite:///") :].split("?", 1)[0]
+    return path if path and path != ":memory:" else None
+
+
+def create_read_engine(database_url: str, pool_size: Optional[int] = None):
+    """
+    Create a pool of read-only connections to a SQLite database file.
+
+    Args:
+        database_url: sqlite:/// URL of the (WAL-mode) database
+        pool_size: Reader connections (SQLITE_READERS, default 8)
+
+    Returns:
+        SQLAlchemy engine, or None for in-memory databases
+    """
+    path = sqlite_path(database_url)
+    if path is None:
+        return None
+
+    size = pool_size or int(os.getenv("SQLITE_READERS", "8"))
+    engine = create_engine(
+        f"sqlite:///file:{os.path.abspath(path)}?mode=ro&uri=true",
+        poolclass=QueuePool,
+        pool_size=size,
+        max_overflow=0,
+        pool_timeout=30,
+        connect_args={"check_same_thread": False},
+    )
+    return configure_sqlite_engine(engine, readonly=True)
+
+
+class SQLiteWriter:
+    """Single thread that performs every write of an embedded database."""
+
+    def __init__(
+        self, tick_interval_ms: Optional[int] = None, name: str = "sqlite-writer"
+    ):
+        """
+        Start the writer thread.
+
+        Args:
+            tick_interval_ms: How often periodic tasks (bulk writer drains)
+                run (DB_BULK_FLUSH_MS, default 200)
+            name: Thread name
+        """
+        self.tick_interval = (
+            tick_interval_ms or int(os.getenv("DB_BULK_FLUSH_MS", "200"))
+        ) / 1000.0
+        self.jobs: "queue.Queue[tuple]" = queue.Queue()
+        self._periodic: List[Callable[[], Any]] = []
+        self.stats = {"jobs": 0, "job_errors": 0, "ticks": 0}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def in_writer_thread(self) -> bool:
+        """True when called from the writer thread itself."""
+        return threading.current_thread() is self._thread
+
+    def _inline(self) -> bool:
+        # Jobs from the writer thread, or after close(), run in the caller
+        return self.in_writer_thread() or self._stop.is_set()
+
+    def call(self, fn: Callable, *args, timeout: Optional[float] = 30.0) -> Any:
+        """
+        Run ``fn(*args)`` on the writer thread and wait for its result.
+
+        Raises:
+            Whatever ``fn`` raised, or TimeoutError
+        """
+        if self._inline():
+            return fn(*args)
+        return self.post(fn, *args).result(timeout=timeout)
+
+    def post(self, fn: Callable, *args) -> Future:
+        """Queue ``fn(*args)`` on the writer thread without waiting."""
+        future: Future = Future()
+        if self._inline():
+            self._execute(fn, args, future)
+        else:
+            self.jobs.put((fn, args, future))
+        return future
+
+    def add_periodic(self, fn: Callable[[], Any]):
+        """Run ``fn()`` on the writer thread every tick and once more at close."""
+        self._periodic.append(fn)
+
+    def _run(self):
+        """Writer loop: run queued jobs, and periodic tasks every tick."""
+        next_tick = time.monotonic() + self.tick_interval
+        while not self._stop.is_set():
+            try:
+                job = self.jobs.get(timeout=max(0.0, next_tick - time.monotonic()))
+                self._execute(*job)
+            except queue.Empty:
+                pass
+            if time.monotonic() >= next_tick:
+                self._tick()
+                next_tick = time.monotonic() + self.tick_interval
+
+        # Finish what was queued before close()
+        while True:
+            try:
+                self._execute(*self.jobs.get_nowait())
+            except queue.Empty:
+                break
+        self._tick()
+
+    def _execute(self, fn: Callable, args: tuple, future: Future):
+        if not future.set_running_or_notify_cancel():
+            return
+        self.stats["jobs"] += 1
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            self.stats["job_errors"] += 1
+            future.set_exception(e)
+
+    def _tick(self):
+        self.stats["ticks"] += 1
+        for fn in list(self._periodic):
+            try:
+                fn()
+            except Exception as e:
+                logger.error(f"SQLite writer task failed: {e}")
+
+    def close(self, timeout: float = 10.0):
+        """Stop the thread after running queued jobs and a final tick."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        # Jobs queued while the thread was finishing
+        while True:
+            try:
+                self._execute(*self.jobs.get_nowait())
+            except queue.Empty:
+                break
+
+    def get_stats(self):
+        """Job counters and queue depth."""
+        return {**self.stats, "queue_depth": self.jobs.qsize()}
+
+
+__all__ = [
+    "SQLiteWriter",
+    "configure_sqlite_engine",
+    "create_read_engine",
+    "sqlite_pragmas",
+    "sqlite_path",
+]
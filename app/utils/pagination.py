@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Pagination Utilities
+=====================================
+
+Keyset (seek) pagination on ``(timestamp, id)`` with opaque continuation
+tokens, and NDJSON streaming helpers for time-series endpoints.
+
+Keyset pages cost the same at any depth because the database seeks straight
+to the cursor through the ``(timestamp, id)`` index instead of skipping
+OFFSET rows.
+"""
+
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+CURSOR_VERSION = 1
+
+
+def encode_cursor(timestamp: Any, row_id: Any) -> str:
+    """
+    Build an opaque continuation token for the row at (timestamp, id).
+
+    Args:
+        timestamp: Timestamp of the last row returned (datetime or string)
+        row_id: Primary key of the last row returned
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = {
+        "v": CURSOR_VERSION,
+        "t": timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp,
+        "d": isinstance(timestamp, datetime),
+        "i": row_id,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """
+    Decode a continuation token.
+
+    Args:
+        cursor: Token produced by ``encode_cursor``
+
+    Returns:
+        (timestamp, id) of the last row of the previous page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload.get("v") != CURSOR_VERSION:
+            raise ValueError("unsupported cursor version")
+        timestamp = payload["t"]
+        if payload.get("d"):
+            timestamp = datetime.fromisoformat(timestamp)
+        return timestamp, payload["i"]
+    except (KeyError, TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid pagination cursor: {e}")
+
+
+def keyset_condition(
+    cursor: Optional[str], descending: bool = True
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    SQL predicate selecting rows after the cursor in (timestamp, id) order.
+
+    Args:
+        cursor: Continuation token, or None for the first page
+        descending: True for newest-first pagination
+
+    Returns:
+        (sql_fragment, params); the fragment is "1=1" without a cursor
+    """
+    if not cursor:
+        return "1=1", {}
+
+    timestamp, row_id = decode_cursor(cursor)
+    op = "<" if descending else ">"
+    return (
+        f"(timestamp, id) {op} (:cursor_ts, :cursor_id)",
+        {"cursor_ts": timestamp, "cursor_id": row_id},
+    )
+
+
+def build_page(rows: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    """
+    Turn ``limit + 1`` fetched rows into a page with a continuation token.
+
+    Args:
+        rows: Rows fetched with LIMIT limit + 1, ordered by (timestamp, id)
+        limit: Requested page size
+
+    Returns:
+        Dictionary with "items" and "next_cursor" (None on the last page)
+    """
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    next_cursor = None
+    if has_more and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last["timestamp"], last["id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Encode rows as newline-delimited JSON, one line per row.
+
+    Args:
+        rows: Any iterable of row dictionaries (typically a streaming cursor)
+
+    Yields:
+        JSON lines terminated by a newline
+    """
+    for row in rows:
+        yield json.dumps(row, default=str, separators=(",", ":")) + "\n"
+
+
+__all__ = [
+    "encode_cursor",
+    "decode_cursor",
+    "keyset_condition",
+    "build_page",
+    "iter_ndjson",
+]
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Binary Serialization
+======================================
+
+Compact, safe encoding for cached values. Every payload starts with a
+one-byte format tag so encodings can change without invalidating caches:
+
+- ``M``: msgpack (datetime/date/Decimal/numpy arrays carried as extension types)
+- ``J``: JSON with tagged datetime/date/Decimal/ndarray objects (no msgpack)
+- ``Z``: zstd-compressed inner payload
+- ``X``: zlib-compressed inner payload (no zstandard)
+
+Payloads larger than ``compress_threshold`` bytes are compressed. Further
+formats can be added with ``register_codec``. ``loads_compat`` also reads
+the untagged JSON/text values written before tags existed, so caches
+survive the switch. Numpy scalars are stored as Python numbers and
+dataclasses as dicts.
+"""
+
+import base64
+import dataclasses
+import json
+import threading
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    msgpack = None
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    zstandard = None
+
+TAG_MSGPACK = b"M"
+TAG_JSON = b"J"
+TAG_ZSTD = b"Z"
+TAG_ZLIB = b"X"
+
+DEFAULT_COMPRESS_THRESHOLD = 4096
+
+# msgpack extension type codes
+EXT_DATETIME = 1
+EXT_DATE = 2
+EXT_DECIMAL = 3
+EXT_NDARRAY = 4
+
+_local = threading.local()
+
+
+def _zstd_compressor():
+    # zstandard contexts are not thread-safe; keep one per thread
+    if not hasattr(_local, "compressor"):
+        _local.compressor = zstandard.ZstdCompressor(level=3)
+        _local.decompressor = zstandard.ZstdDecompressor()
+    return _local.compressor, _local.decompressor
+
+
+_UNSUPPORTED = object()
+
+
+def _plain(value: Any):
+    """Python equivalent of numpy scalars, dataclasses and sets."""
+    if NUMPY_AVAILABLE and isinstance(value, np.generic):
+        return value.item()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return _UNSUPPORTED
+
+
+def _array_parts(value):
+    """dtype, shape and raw bytes of a numeric ndarray (None for object arrays)."""
+    if value.dtype.hasobject:
+        return None
+    return value.dtype.str, list(value.shape), np.ascontiguousarray(value).tobytes()
+
+
+def _array_from_parts(dtype: str, shape, data: bytes):
+    # frombuffer views are read-only; callers expect a normal array
+    return np.frombuffer(data, dtype=np.dtype(dtype)).reshape(shape).copy()
+
+
+def _msgpack_default(value: Any):
+    if NUMPY_AVAILABLE and isinstance(value, np.ndarray):
+        parts = _array_parts(value)
+        if parts is None:
+            return value.tolist()
+        return msgpack.ExtType(EXT_NDARRAY, msgpack.packb(parts, use_bin_type=True))
+    plain = _plain(value)
+    if plain is not _UNSUPPORTED:
+        return plain
+    if isinstance(value, datetime):
+        return msgpack.ExtType(EXT_DATETIME, value.isoformat().encode("ascii"))
+    if isinstance(value, date):
+        return msgpack.ExtType(EXT_DATE, value.isoformat().encode("ascii"))
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, str(value).encode("ascii"))
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _msgpack_ext_hook(code: int, data: bytes):
+    if code == EXT_DATETIME:
+        return datetime.fromisoformat(data.decode("ascii"))
+    if code == EXT_DATE:
+        return date.fromisoformat(data.decode("ascii"))
+    if code == EXT_DECIMAL:
+        return Decimal(data.decode("ascii"))
+    if code == EXT_NDARRAY:
+        if not NUMPY_AVAILABLE:
+            raise ValueError("numpy is required to decode this payload")
+        return _array_from_parts(*msgpack.unpackb(data, raw=False))
+    return msgpack.ExtType(code, data)
+
+
+def _json_default(value: Any):
+    if NUMPY_AVAILABLE and isinstance(value, np.ndarray):
+        parts = _array_parts(value)
+        if parts is None:
+            return value.tolist()
+        dtype, shape, data = parts
+        return {
+            "__type__": "ndarray",
+            "dtype": dtype,
+            "shape": shape,
+            "value": base64.b64encode(data).decode("ascii"),
+        }
+    plain = _plain(value)
+    if plain is not _UNSUPPORTED:
+        return plain
+    if isinstance(value, datetime):
+        return {"__type__": "datetime", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {"__type__": "date", "value": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"__type__": "decimal", "value": str(value)}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+_JSON_TYPES = {
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "decimal": Decimal,
+}
+
+
+def _json_object_hook(obj):
+    kind = obj.get("__type__")
+    if kind in _JSON_TYPES and len(obj) == 2:
+        return _JSON_TYPES[kind](obj["value"])
+    if kind == "ndarray" and len(obj) == 4 and NUMPY_AVAILABLE:
+        return _array_from_parts(
+            obj["dtype"], obj["shape"], base64.b64decode(obj["value"])
+        )
+    return obj
+
+
+def _encode_msgpack(value: Any) -> bytes:
+    return msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+
+
+def _decode_msgpack(body: bytes) -> Any:
+    if not MSGPACK_AVAILABLE:
+        raise ValueError("msgpack is required to decode this payload")
+    return msgpack.unpackb(body, ext_hook=_msgpack_ext_hook, raw=False)
+
+
+def _encode_json(value: Any) -> bytes:
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def _decode_json(body: bytes) -> Any:
+    return json.loads(body.decode("utf-8"), object_hook=_json_object_hook)
+
+
+def _decode_zstd(body: bytes) -> Any:
+    if not ZSTD_AVAILABLE:
+        raise ValueError("zstandard is required to decode this payload")
+    return loads(_zstd_compressor()[1].decompress(body))
+
+
+def _decode_zlib(body: bytes) -> Any:
+    return loads(zlib.decompress(body))
+
+
+# tag -> (encoder or None for compression wrappers, decoder of the body)
+_CODECS: Dict[bytes, tuple] = {
+    TAG_MSGPACK: (_encode_msgpack if MSGPACK_AVAILABLE else None, _decode_msgpack),
+    TAG_JSON: (_encode_json, _decode_json),
+    TAG_ZSTD: (None, _decode_zstd),
+    TAG_ZLIB: (None, _decode_zlib),
+}
+
+
+def register_codec(
+    tag: bytes,
+    encode: Optional[Callable[[Any], bytes]],
+    decode: Callable[[bytes], Any],
+):
+    """
+    Register a payload format.
+
+    Args:
+        tag: One uppercase ASCII letter; JSON text never starts with one,
+            so legacy untagged entries stay distinguishable
+        encode: Value -> body bytes (None if the format is decode-only)
+        decode: Body bytes -> value; raise ValueError on corrupt input
+
+    Raises:
+        ValueError: If the tag is malformed or already taken
+    """
+    if len(tag) != 1 or not tag.isalpha() or not tag.isupper():
+        raise ValueError(f"Codec tag must be one uppercase letter, got {tag!r}")
+    if tag in _CODECS:
+        raise ValueError(f"Codec tag {tag!r} is already registered")
+    _CODECS[tag] = (encode, decode)
+
+
+def dumps(
+    value: Any,
+    compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD,
+    codec: Optional[bytes] = None,
+) -> bytes:
+    """
+    Encode a value as tagged bytes.
+
+    Args:
+        value: JSON-like value (dicts, lists, scalars, datetimes, Decimals,
+            numpy arrays and scalars, dataclasses)
+        compress_threshold: Compress payloads larger than this many bytes
+            (0 disables compression)
+        codec: Tag of the format to use (default msgpack, else JSON)
+
+    Returns:
+        Encoded payload
+
+    Raises:
+        TypeError: If the value contains an unsupported type
+        ValueError: If the codec is unknown or decode-only
+    """
+    tag = codec or (TAG_MSGPACK if MSGPACK_AVAILABLE else TAG_JSON)
+    encode = _CODECS.get(tag, (None, None))[0]
+    if encode is None:
+        raise ValueError(f"No encoder for payload format {tag!r}")
+    payload = tag + encode(value)
+
+    if compress_threshold and len(payload) > compress_threshold:
+        if ZSTD_AVAILABLE:
+            return TAG_ZSTD + _zstd_compressor()[0].compress(payload)
+        return TAG_ZLIB + zlib.compress(payload, 6)
+    return payload
+
+
+def loads(data: bytes) -> Any:
+    """
+    Decode bytes produced by ``dumps``.
+
+    Raises:
+        ValueError: If the payload is corrupt or uses an unavailable format
+    """
+    if not data:
+        raise ValueError("Empty payload")
+
+    tag, body = data[:1], data[1:]
+    if tag not in _CODECS:
+        raise ValueError(f"Unknown payload format {tag!r}")
+    try:
+        return _CODECS[tag][1](body)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Corrupt payload: {e}")
+
+
+def loads_compat(data: Union[bytes, str]) -> Any:
+    """
+    Decode a tagged payload or a legacy untagged JSON/text value.
+
+    Values written before the codec layer are plain JSON (or ``str()`` of
+    the value); they are returned as before.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if data[:1] in _CODECS:
+        try:
+            return loads(data)
+        except ValueError:
+            pass
+    text = data.decode("utf-8", errors="replace")
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return text
+
+
+__all__ = [
+    "dumps",
+    "loads",
+    "loads_compat",
+    "register_codec",
+    "MSGPACK_AVAILABLE",
+    "NUMPY_AVAILABLE",
+    "ZSTD_AVAILABLE",
+]
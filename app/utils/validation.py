@@ -15,6 +15,18 @@ from typing import Any, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Expected ML metrics with their validation rules
+ML_METRIC_RULES = {
+    "cpu_usage": {"min": 0.0, "max": 100.0, "default": 0.0},
+    "memory_usage": {"min": 0.0, "max": 100.0, "default": 0.0},
+    "disk_usage": {"min": 0.0, "max": 100.0, "default": 0.0},
+    "network_io": {"min": 0.0, "max": 1000.0, "default": 0.0},
+    "load_1m": {"min": 0.0, "max": 100.0, "default": 0.0},
+    "load_5m": {"min": 0.0, "max": 100.0, "default": 0.0},
+    "load_15m": {"min": 0.0, "max": 100.0, "default": 0.0},
+    "response_time": {"min": 0.0, "max": 10000.0, "default": 0.0},
+}
+
 
 def validate_ml_metrics(metrics: Dict[str, Any]) -> Dict[str, float]:
     """
@@ -34,19 +46,7 @@ def validate_ml_metrics(metrics: Dict[str, Any]) -> Dict[str, float]:
 
     validated_metrics = {}
 
-    # Define expected metrics with their validation rules
-    metric_rules = {
-        "cpu_usage": {"min": 0.0, "max": 100.0, "default": 0.0},
-        "memory_usage": {"min": 0.0, "max": 100.0, "default": 0.0},
-        "disk_usage": {"min": 0.0, "max": 100.0, "default": 0.0},
-        "network_io": {"min": 0.0, "max": 1000.0, "default": 0.0},
-        "load_1m": {"min": 0.0, "max": 100.0, "default": 0.0},
-        "load_5m": {"min": 0.0, "max": 100.0, "default": 0.0},
-        "load_15m": {"min": 0.0, "max": 100.0, "default": 0.0},
-        "response_time": {"min": 0.0, "max": 10000.0, "default": 0.0},
-    }
-
-    for metric_name, rules in metric_rules.items():
+    for metric_name, rules in ML_METRIC_RULES.items():
         value = metrics.get(metric_name)
 
         if value is None:
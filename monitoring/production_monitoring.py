@@ -19,7 +19,7 @@ import time
 import json
 import requests
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
 
 from prometheus_client import (
@@ -234,6 +234,10 @@ class ProductionMetrics:
         self.redis_connections_active.set(connections)
         self.cache_hit_ratio.set(hit_ratio)
     
+    def track_cache_hit_ratio(self, hit_ratio: Callable[[], float]):
+        """Report ``hit_ratio()`` (0..1) as the cache hit ratio on every scrape."""
+        self.cache_hit_ratio.set_function(hit_ratio)
+    
     def record_error(self, error_type: str, component: str):
         """Record error metrics."""
         self.errors_total.labels(
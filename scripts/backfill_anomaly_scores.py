@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Anomaly Score Backfill
+========================================
+
+Re-scores stored metrics with the deployed model. Interrupting the run is
+safe: running it again resumes from the last checkpointed chunk.
+
+Usage:
+    python scripts/backfill_anomaly_scores.py --database-url sqlite:///smartcloudops.db \
+        [--chunk-size 5000] [--max-rows-per-second 20000] [--max-chunks N] [--reset]
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "app"))
+
+from app.backfill_scoring import BackfillScorer  # noqa: E402
+from app.core.ml_engine.secure_inference import SecureMLInferenceEngine  # noqa: E402
+from app.database_integration import SHARD_SCHEMA  # noqa: E402
+from app.metrics_partitioning import SQLiteShardManager  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-score stored metrics with the deployed model"
+    )
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument(
+        "--model-path", default=None, help="Model directory (ML_MODEL_PATH)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--max-rows-per-second", type=float, default=None)
+    parser.add_argument("--duty-cycle", type=float, default=None)
+    parser.add_argument("--max-chunks", type=int, default=None)
+    parser.add_argument(
+        "--reset", action="store_true", help="Start over instead of resuming"
+    )
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
+    )
+
+    engine = create_engine(args.database_url, pool_pre_ping=True)
+    shards = None
+    if (
+        os.getenv("DB_PARTITIONING", "false").lower() == "true"
+        and engine.dialect.name == "sqlite"
+    ):
+        shards = SQLiteShardManager(
+            os.getenv("DB_SHARD_DIR", "data/shards"), SHARD_SCHEMA
+        )
+    scorer = BackfillScorer(
+        engine,
+        SecureMLInferenceEngine(args.model_path),
+        chunk_size=args.chunk_size,
+        max_rows_per_second=args.max_rows_per_second,
+        duty_cycle=args.duty_cycle,
+        shards=shards,
+    )
+    state = scorer.run(max_chunks=args.max_chunks, reset=args.reset)
+
+    if state["completed"]:
+        status = "completed"
+    else:
+        table = f"shard {state['shard']}" if state["shard"] else "metrics"
+        status = f"paused after {table} id {state['last_id']}"
+    print(
+        f"📊 Model {scorer.model_version}: {state['rows_scored']} rows re-scored, "
+        f"{state['anomalies']} anomalies ({status})"
+    )
+
+
+if __name__ == "__main__":
+    main()
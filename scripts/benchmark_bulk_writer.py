@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Bulk Writer Benchmark
+=======================================
+
+Measures sustained ingest rate of DatabaseService.store_metrics with the
+per-row path versus the buffered bulk writer.
+
+Usage:
+    python scripts/benchmark_bulk_writer.py [--rows 200000] [--database-url URL]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.database_integration import DatabaseService  # noqa: E402
+
+METRICS_DDL = """
+CREATE TABLE IF NOT EXISTS metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT, source TEXT, cpu_usage REAL, memory_usage REAL,
+    disk_usage REAL, load_1m REAL, load_5m REAL, load_15m REAL,
+    disk_io_read INTEGER, disk_io_write INTEGER, network_rx INTEGER,
+    network_tx INTEGER, response_time REAL, error_rate REAL,
+    is_anomaly INTEGER, anomaly_score REAL, created_by INTEGER
+)
+"""
+
+
+def _sample(i: int) -> dict:
+    return {
+        "timestamp": f"2026-01-01T00:{(i // 60) % 60:02d}:{i % 60:02d}",
+        "source": f"host-{i % 16}",
+        "cpu_usage": float(i % 100),
+        "memory_usage": float((i * 7) % 100),
+        "response_time": float(i % 500),
+    }
+
+
+def run(database_url: str, rows: int, bulk: bool) -> float:
+    service = DatabaseService(database_url=database_url)
+    if bulk:
+        service.enable_bulk_writes(batch_size=5000, flush_interval_ms=100)
+
+    start = time.perf_counter()
+    for i in range(rows):
+        service.store_metrics(_sample(i))
+    service.flush_writes()
+    elapsed = time.perf_counter() - start
+
+    if service.metrics_writer:
+        service.metrics_writer.close()
+    service.engine.dispose()
+    return rows / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk metric ingest")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--per-row-rows", type=int, default=2000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("DB_SPILL_DIR", os.path.join(tmp, "spill"))
+        database_url = args.database_url or f"sqlite:///{tmp}/bench.db"
+        engine = create_engine(database_url)
+        with engine.begin() as conn:
+            conn.execute(text(METRICS_DDL))
+            conn.execute(
+                text("CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT)")
+            )
+            conn.execute(text("INSERT INTO users (id, username) VALUES (1, 'system')"))
+        engine.dispose()
+
+        per_row = run(database_url, args.per_row_rows, bulk=False)
+        bulk = run(database_url, args.rows, bulk=True)
+
+    print("📊 Metrics ingest throughput")
+    print("-" * 50)
+    print(f"per-row store_metrics : {per_row:>12,.0f} rows/s")
+    print(f"bulk writer           : {bulk:>12,.0f} rows/s")
+    print(f"speedup               : {bulk / per_row:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
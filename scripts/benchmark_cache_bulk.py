@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Bulk Cache Operation Benchmark
+================================================
+
+Compares N single get/set calls with one bulk call (get_many/set_many) and
+one pipelined batch against a local Redis.
+
+Usage:
+    python scripts/benchmark_cache_bulk.py [--redis-url redis://localhost:6379/15] [--keys 1000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.cache_service import CacheService  # noqa: E402
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk cache operations")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    cache = CacheService(args.redis_url, l1_enabled=False)
+    if cache.redis_client is None:
+        sys.exit(f"❌ Redis not reachable at {args.redis_url}")
+
+    keys = [f"smartcloudops:bench:host_status:{i}" for i in range(args.keys)]
+    values = {key: {"host": key, "cpu_usage": 42.0, "status": "ok"} for key in keys}
+
+    def single_set():
+        for key, value in values.items():
+            cache.set(key, value, ttl=60)
+
+    def single_get():
+        for key in keys:
+            cache.get(key)
+
+    def batch_get():
+        with cache.batch() as batch:
+            for key in keys:
+                batch.get(key)
+
+    cases = {
+        "single set": single_set,
+        "set_many": lambda: cache.set_many(values, ttl=60),
+        "single get": single_get,
+        "get_many": lambda: cache.get_many(keys),
+        "batch get": batch_get,
+    }
+    best = {
+        name: min(timed(fn) for _ in range(args.rounds)) for name, fn in cases.items()
+    }
+    cache.delete_many(keys)
+
+    print(f"📊 {args.keys} keys against {args.redis_url} (best of {args.rounds})")
+    print("-" * 50)
+    for name, ms in best.items():
+        print(f"{name:<12} {ms:>10.2f} ms {ms * 1000 / args.keys:>10.1f} us/key")
+    print(f"set speedup  {best['single set'] / best['set_many']:>10.1f}x")
+    print(f"get speedup  {best['single get'] / best['get_many']:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
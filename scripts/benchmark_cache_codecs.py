@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Cache Codec Savings Report
+============================================
+
+Compares the legacy JSON cache encoding with the tagged codec layer
+(msgpack + zstd when installed) on typical cached payloads: stored bytes
+and encode/decode CPU time.
+
+Usage:
+    python scripts/benchmark_cache_codecs.py [--rounds 200]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.utils.serialization import MSGPACK_AVAILABLE  # noqa: E402
+from app.utils.serialization import ZSTD_AVAILABLE, dumps, loads  # noqa: E402
+
+COMPRESS_THRESHOLD = 1024
+
+
+def _metric(rng: random.Random, ts: datetime) -> dict:
+    return {
+        "timestamp": ts.isoformat(),
+        "source": f"host-{rng.randrange(16)}",
+        "cpu_usage": round(rng.uniform(0, 100), 2),
+        "memory_usage": round(rng.uniform(0, 100), 2),
+        "disk_usage": round(rng.uniform(0, 100), 2),
+        "load_1m": round(rng.uniform(0, 8), 2),
+        "network_rx": rng.randrange(10**9),
+        "network_tx": rng.randrange(10**9),
+        "response_time": round(rng.uniform(0, 2), 4),
+        "is_anomaly": rng.random() < 0.02,
+        "anomaly_score": rng.uniform(-0.5, 0.5),
+    }
+
+
+def payloads() -> dict:
+    rng = random.Random(1)
+    now = datetime.now(timezone.utc)
+    return {
+        "system_metrics:current": _metric(rng, now),
+        "remediation_status": {
+            "enabled": True,
+            "total_rules": 24,
+            "enabled_rules": 20,
+            "recent_actions": [
+                {
+                    "id": i,
+                    "action": "scale_up",
+                    "status": "completed",
+                    "at": now.isoformat(),
+                }
+                for i in range(20)
+            ],
+        },
+        "metrics_history (500 rows)": [
+            _metric(rng, now - timedelta(minutes=i)) for i in range(500)
+        ],
+        "anomaly_scores (10k float64)": np.random.default_rng(1).normal(size=10000),
+    }
+
+
+def legacy_dumps(value) -> bytes:
+    """The previous encoding: JSON, anything else stringified."""
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    return json.dumps(value, default=str).encode("utf-8")
+
+
+def timed_us(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache codec savings report")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    codec = "msgpack" if MSGPACK_AVAILABLE else "json"
+    codec += "+zstd" if ZSTD_AVAILABLE else "+zlib"
+    print(
+        f"📊 Cached payloads: legacy JSON vs tagged {codec} (compress > {COMPRESS_THRESHOLD} B)"
+    )
+    print("-" * 96)
+    print(
+        f"{'payload':<30}{'json B':>10}{'codec B':>10}{'saved':>8}"
+        f"{'json enc/dec us':>19}{'codec enc/dec us':>19}"
+    )
+    for name, value in payloads().items():
+        legacy = legacy_dumps(value)
+        encoded = dumps(value, COMPRESS_THRESHOLD)
+        legacy_enc = timed_us(lambda: legacy_dumps(value), args.rounds)
+        legacy_dec = timed_us(lambda: json.loads(legacy), args.rounds)
+        codec_enc = timed_us(lambda: dumps(value, COMPRESS_THRESHOLD), args.rounds)
+        codec_dec = timed_us(lambda: loads(encoded), args.rounds)
+        saved = 1 - len(encoded) / len(legacy)
+        print(
+            f"{name:<30}{len(legacy):>10,}{len(encoded):>10,}{saved:>8.0%}"
+            f"{legacy_enc:>10.1f}/{legacy_dec:<8.1f}{codec_enc:>10.1f}/{codec_dec:<8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
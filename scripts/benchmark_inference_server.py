@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Inference Server Benchmark
+=============================================
+
+Compares round-trip latency of the shared inference server against
+in-process scoring, and estimates the memory saved per host when N web and
+Celery workers share one model copy instead of loading their own.
+
+Usage:
+    python scripts/benchmark_inference_server.py [--requests 2000] [--workers 8]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import psutil
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "app"))
+
+from app.core.ml_engine.inference_server import (  # noqa: E402
+    InferenceServer,
+    RemoteInferenceEngine,
+)
+from app.core.ml_engine.secure_inference import SecureMLInferenceEngine  # noqa: E402
+
+
+def _sample_metrics(rng: np.random.Generator) -> dict:
+    return {
+        "cpu_usage": float(rng.uniform(0, 100)),
+        "memory_usage": float(rng.uniform(0, 100)),
+        "disk_usage": float(rng.uniform(0, 100)),
+        "network_io": float(rng.uniform(0, 100)),
+        "load_1m": float(rng.uniform(0, 4)),
+        "load_5m": float(rng.uniform(0, 4)),
+        "load_15m": float(rng.uniform(0, 4)),
+        "response_time": float(rng.uniform(50, 1000)),
+    }
+
+
+def _summarize(name: str, latencies_ms: list) -> dict:
+    ordered = sorted(latencies_ms)
+    return {
+        "name": name,
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p99_ms": round(ordered[int(len(ordered) * 0.99) - 1], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+
+
+def measure_engine_memory(model_path: str) -> float:
+    """RSS growth in MiB caused by loading one in-process engine."""
+    process = psutil.Process(os.getpid())
+    before = process.memory_info().rss
+    engine = SecureMLInferenceEngine(model_path=model_path)
+    after = process.memory_info().rss
+    del engine
+    return (after - before) / (1024 * 1024)
+
+
+def bench_in_process(engine, samples) -> dict:
+    latencies = []
+    for metrics in samples:
+        start = time.perf_counter()
+        engine.predict(metrics)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return _summarize("in_process", latencies)
+
+
+def bench_remote(remote, samples) -> dict:
+    latencies = []
+    for metrics in samples:
+        start = time.perf_counter()
+        remote.predict(metrics)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return _summarize("remote_sequential", latencies)
+
+
+def bench_remote_concurrent(remote, samples, threads: int) -> dict:
+    latencies = []
+    lock = threading.Lock()
+    chunks = [samples[i::threads] for i in range(threads)]
+
+    def worker(chunk):
+        local = []
+        for metrics in chunk:
+            start = time.perf_counter()
+            remote.predict(metrics)
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(c,)) for c in chunks]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    result = _summarize(f"remote_{threads}_threads", latencies)
+    result["throughput_rps"] = round(len(samples) / elapsed, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the inference server")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8, help="Workers per host")
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    samples = [_sample_metrics(rng) for _ in range(args.requests)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "models")
+        engine_mib = measure_engine_memory(model_path)
+        engine = SecureMLInferenceEngine(model_path=model_path)
+
+        socket_path = os.path.join(tmp, "inference.sock")
+        server = InferenceServer(socket_path=socket_path, engine=engine)
+        server.start()
+        remote = RemoteInferenceEngine(socket_path)
+
+        # Warm up both paths
+        for metrics in samples[:50]:
+            engine.predict(metrics)
+            remote.predict(metrics)
+
+        results = [
+            bench_in_process(engine, samples),
+            bench_remote(remote, samples),
+            bench_remote_concurrent(remote, samples, args.threads),
+        ]
+
+        remote.client.close()
+        server.stop()
+
+    print("📊 Inference latency")
+    print("-" * 60)
+    for result in results:
+        line = f"{result['name']:<22} p50={result['p50_ms']:>8}ms p99={result['p99_ms']:>8}ms"
+        if "throughput_rps" in result:
+            line += f" {result['throughput_rps']} req/s"
+        print(line)
+
+    saved = engine_mib * (args.workers - 1)
+    print("-" * 60)
+    print(f"Engine footprint per process: {engine_mib:.1f} MiB")
+    print(
+        f"Memory saved with {args.workers} workers sharing one daemon: {saved:.1f} MiB"
+    )
+    print(f"Server stats: {server.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
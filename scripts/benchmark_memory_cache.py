@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - In-Memory Cache Benchmark
+===========================================
+
+Measures get/set latency of the shared MemoryCache backend at 10k, 100k and
+1M resident entries, next to the previous dict + scan-and-sort cleanup that
+ran on every cache call (measured with fewer operations, it is O(n log n)).
+
+Usage:
+    python scripts/benchmark_memory_cache.py [--sizes 10000 100000 1000000] [--ops 200000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.memory_cache import MemoryCache  # noqa: E402
+
+
+class LegacyMemoryCache:
+    """The previous fallback: a dict cleaned up by a full scan per call."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.data = {}
+
+    def _cleanup(self):
+        now = time.time()
+        for key in [
+            k for k, (_, expiry) in self.data.items() if expiry and now > expiry
+        ]:
+            del self.data[key]
+        if len(self.data) > self.max_entries:
+            ordered = sorted(self.data.items(), key=lambda x: x[1][1] or 0)
+            for key, _ in ordered[: len(ordered) - self.max_entries]:
+                del self.data[key]
+
+    def get(self, key, default=None):
+        self._cleanup()
+        entry = self.data.get(key)
+        return entry[0] if entry else default
+
+    def set(self, key, value, ttl):
+        self._cleanup()
+        self.data[key] = (value, time.time() + ttl)
+
+
+def run(cache, size: int, ops: int) -> dict:
+    """Fill ``cache`` to ``size`` entries, then time a 90/10 get/set mix."""
+    value = {"cpu_usage": 42.0, "status": "ok"}
+    for i in range(size):
+        cache.set(f"k:{i}", value, 3600)
+
+    rng = random.Random(7)
+    keys = [f"k:{rng.randrange(size * 2)}" for _ in range(ops)]
+    writes = [rng.random() < 0.1 for _ in range(ops)]
+
+    start = time.perf_counter()
+    for key, write in zip(keys, writes):
+        if write:
+            cache.set(key, value, 3600)
+        else:
+            cache.get(key)
+    elapsed = time.perf_counter() - start
+    return {"ops_per_sec": ops / elapsed, "us_per_op": elapsed / ops * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the in-memory cache backend"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--ops", type=int, default=200000)
+    parser.add_argument("--legacy-ops", type=int, default=200)
+    parser.add_argument("--skip-legacy-above", type=int, default=100000)
+    args = parser.parse_args()
+
+    print("📊 In-memory cache get/set (90% get, 10% set, at capacity)")
+    print("-" * 64)
+    print(f"{'entries':>10} {'backend':<10} {'ops/s':>14} {'us/op':>10}")
+    for size in args.sizes:
+        lru = run(MemoryCache(max_entries=size, max_bytes=0), size, args.ops)
+        print(
+            f"{size:>10,} {'lru+ttl':<10} {lru['ops_per_sec']:>14,.0f} {lru['us_per_op']:>10.2f}"
+        )
+        if size <= args.skip_legacy_above:
+            legacy = run(LegacyMemoryCache(size), size, args.legacy_ops)
+            print(
+                f"{size:>10,} {'legacy':<10} {legacy['ops_per_sec']:>14,.0f} "
+                f"{legacy['us_per_op']:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
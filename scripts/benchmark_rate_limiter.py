@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Rate Limiter Benchmark
+========================================
+
+Cost of one rate limit check with the list-based limiter the API used to
+ship versus the GCRA limiter, as the per-client history and the number of
+clients grow. The old limiter rebuilds each client's list of request
+times on every check, so its cost grows with the hourly request volume,
+and it never forgets a client; GCRA keeps one timestamp per window, stays
+flat, and drops idle clients.
+
+Usage:
+    python scripts/benchmark_rate_limiter.py [--checks 20000] [--visitors 100000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.gcra_limiter import GCRALimiter  # noqa: E402
+
+
+class LegacySimpleRateLimiter:
+    """Copy of the previous ``SimpleRateLimiter``, with an injectable clock."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.requests = {}
+
+    def is_allowed(self, ip_address, limit_per_minute=10, limit_per_hour=100):
+        current_time = self.clock()
+        minute_cutoff = current_time - 60
+        hour_cutoff = current_time - 3600
+        self.requests[ip_address] = [
+            t for t in self.requests.get(ip_address, []) if t > hour_cutoff
+        ]
+        minute_requests = len(
+            [t for t in self.requests[ip_address] if t > minute_cutoff]
+        )
+        if (
+            minute_requests >= limit_per_minute
+            or len(self.requests[ip_address]) >= limit_per_hour
+        ):
+            return False
+        self.requests[ip_address].append(current_time)
+        return True
+
+
+def _client_ip(client: int) -> str:
+    return f"10.0.{client // 256}.{client % 256}"
+
+
+def run(make_limiter, history: int, clients: int, checks: int) -> float:
+    """Microseconds per check at a steady ``history`` requests per client per hour."""
+    now = [0.0]
+    limiter = make_limiter(lambda: now[0])
+    # Limits high enough that every request is admitted and recorded
+    per_minute = per_hour = history * 2
+    step = 3600.0 / (history * clients)
+    # An hour of traffic first, so every client carries a full history
+    for i in range(history * clients):
+        now[0] += step
+        limiter.is_allowed(_client_ip(i % clients), per_minute, per_hour)
+
+    start = time.perf_counter()
+    for i in range(checks):
+        now[0] += step
+        limiter.is_allowed(_client_ip(i % clients), per_minute, per_hour)
+    return (time.perf_counter() - start) / checks * 1e6
+
+
+def churn(make_limiter, clients: int) -> int:
+    """Clients still stored after ``clients`` one-off visitors over a day."""
+    now = [0.0]
+    limiter = make_limiter(lambda: now[0])
+    for i in range(clients):
+        now[0] += 86400.0 / clients
+        limiter.is_allowed(f"client-{i}", 10, 100)
+    return len(limiter.requests) if hasattr(limiter, "requests") else len(limiter)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rate limit checks")
+    parser.add_argument("--checks", type=int, default=20000)
+    parser.add_argument("--visitors", type=int, default=100000)
+    args = parser.parse_args()
+
+    limiters = {
+        "legacy": lambda clock: LegacySimpleRateLimiter(clock),
+        "gcra": lambda clock: GCRALimiter(clock=clock),
+    }
+
+    print("📊 Rate limit check cost (us/check)")
+    print("-" * 56)
+    print(
+        f"{'history/client':>15} {'clients':>8} {'legacy':>10} {'gcra':>10} {'speedup':>9}"
+    )
+    for history, clients in (
+        (10, 1),
+        (100, 1),
+        (1000, 1),
+        (5000, 1),
+        (100, 1000),
+        (1000, 100),
+    ):
+        legacy = run(limiters["legacy"], history, clients, args.checks)
+        gcra = run(limiters["gcra"], history, clients, args.checks)
+        print(
+            f"{history:>15,} {clients:>8,} {legacy:>10.2f} {gcra:>10.2f} {legacy / gcra:>8.1f}x"
+        )
+
+    print()
+    print(f"📦 Clients stored after {args.visitors:,} one-off visitors over a day")
+    print("-" * 56)
+    for name, make_limiter in limiters.items():
+        print(f"{name:<8} {churn(make_limiter, args.visitors):>12,}")
+
+
+if __name__ == "__main__":
+    main()
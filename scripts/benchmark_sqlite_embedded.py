@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Embedded SQLite Benchmark
+===========================================
+
+Measures concurrent read and write throughput of DatabaseService on SQLite
+with the default configuration (rollback journal, per-request writes)
+versus embedded mode (WAL, tuned pragmas, single batching writer,
+read-only reader pool).
+
+Usage:
+    python scripts/benchmark_sqlite_embedded.py [--seconds 10] [--writers 4] [--readers 8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.database_integration import DatabaseService  # noqa: E402
+
+METRICS_DDL = """
+CREATE TABLE IF NOT EXISTS metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT, source TEXT, cpu_usage REAL, memory_usage REAL,
+    disk_usage REAL, load_1m REAL, load_5m REAL, load_15m REAL,
+    disk_io_read INTEGER, disk_io_write INTEGER, network_rx INTEGER,
+    network_tx INTEGER, response_time REAL, error_rate REAL,
+    is_anomaly INTEGER, anomaly_score REAL, created_by INTEGER
+)
+"""
+
+
+def _prepare(database_url: str, seed_rows: int):
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        conn.execute(text(METRICS_DDL))
+        conn.execute(
+            text("CREATE INDEX IF NOT EXISTS idx_metrics_ts ON metrics (timestamp, id)")
+        )
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT)"))
+        conn.execute(text("INSERT INTO users (id, username) VALUES (1, 'system')"))
+        conn.execute(
+            text(
+                "INSERT INTO metrics (timestamp, source, cpu_usage) VALUES (:t, 'seed', :c)"
+            ),
+            [
+                {"t": f"2026-01-01T00:00:{i % 60:02d}", "c": float(i % 100)}
+                for i in range(seed_rows)
+            ],
+        )
+    engine.dispose()
+
+
+def run(
+    database_url: str, embedded: bool, seconds: float, writers: int, readers: int
+) -> dict:
+    os.environ["SQLITE_EMBEDDED"] = "true" if embedded else "false"
+    service = DatabaseService(database_url=database_url)
+
+    stop = threading.Event()
+    counts = {"writes": 0, "write_errors": 0, "reads": 0, "read_errors": 0}
+    read_latencies = []
+    lock = threading.Lock()
+
+    def writer(worker: int):
+        i = 0
+        while not stop.is_set():
+            ok = service.store_metrics(
+                {"source": f"host-{worker}", "cpu_usage": float(i % 100)}
+            )
+            with lock:
+                counts["writes" if ok else "write_errors"] += 1
+            i += 1
+
+    def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                service.get_latest_metrics(50)
+                with lock:
+                    counts["reads"] += 1
+                    read_latencies.append(time.perf_counter() - start)
+            except Exception:
+                with lock:
+                    counts["read_errors"] += 1
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    # Writes only count once they are committed
+    service.flush_writes()
+    for writer_obj in (service.metrics_writer, service.predictions_writer):
+        if writer_obj:
+            writer_obj.close()
+    service.engine.dispose()
+    if service.read_engine:
+        service.read_engine.dispose()
+
+    read_latencies.sort()
+    p99 = (
+        read_latencies[int(0.99 * (len(read_latencies) - 1))] if read_latencies else 0.0
+    )
+    return {
+        "writes_per_s": counts["writes"] / seconds,
+        "reads_per_s": counts["reads"] / seconds,
+        "read_p99_ms": p99 * 1000,
+        "errors": counts["write_errors"] + counts["read_errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedded SQLite mode")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seed-rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("DB_SPILL_DIR", os.path.join(tmp, "spill"))
+        for embedded in (False, True):
+            url = f"sqlite:///{tmp}/bench_{'embedded' if embedded else 'default'}.db"
+            _prepare(url, args.seed_rows)
+            results[embedded] = run(
+                url, embedded, args.seconds, args.writers, args.readers
+            )
+
+    print(
+        f"📊 SQLite concurrent throughput ({args.writers} writers, {args.readers} readers)"
+    )
+    print("-" * 66)
+    print(
+        f"{'mode':<10}{'writes/s':>14}{'reads/s':>14}{'read p99 ms':>14}{'errors':>10}"
+    )
+    for embedded, label in ((False, "default"), (True, "embedded")):
+        r = results[embedded]
+        print(
+            f"{label:<10}{r['writes_per_s']:>14,.0f}{r['reads_per_s']:>14,.0f}"
+            f"{r['read_p99_ms']:>14.2f}{r['errors']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
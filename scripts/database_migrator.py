@@ -5,14 +5,100 @@ SmartCloudOps AI - Database Migration Tool
 
 Migrates from SQLite to PostgreSQL for production scalability.
 Handles concurrent users and provides backup/restore capabilities.
+
+Data is streamed in chunks and loaded with COPY, independent tables in
+parallel. Progress is checkpointed per table and chunk in PostgreSQL, so
+an interrupted migration resumes where it stopped. Row counts and column
+checksums are compared at the end.
 """
 
 
+import io
 import logging
+import math
 import os
 import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import psycopg2
+from psycopg2 import sql
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.query_indexes import apply_indexes  # noqa: E402
+
+CHECKPOINT_TABLE = "migration_checkpoints"
+
+# Column types included in verification checksums (timestamps and JSON are
+# formatted differently by the two databases and only counted)
+NUMERIC_TYPES = {"smallint", "integer", "bigint", "real", "double precision", "numeric"}
+TEXT_TYPES = {"text", "character varying", "character"}
+
+
+def quote_ident(name):
+    """Quote an SQL identifier"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def copy_value(value):
+    """Encode one value for COPY ... FROM STDIN (text format)"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bytes):
+        return "\\\\x" + value.hex()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def load_levels(tables, references):
+    """
+    Order tables into levels that can be copied in parallel.
+
+    Args:
+        tables: Table names to copy
+        references: (referencing_table, referenced_table) foreign key pairs
+
+    Returns:
+        List of levels; every table only references tables of earlier levels
+    """
+    pending = set(tables)
+    depends = {t: set() for t in tables}
+    for source, target in references:
+        if source in depends and target in pending and source != target:
+            depends[source].add(target)
+
+    levels = []
+    while pending:
+        level = sorted(t for t in pending if not depends[t] & pending)
+        if not level:
+            # Reference cycle: no valid order exists, copy the rest together
+            level = sorted(pending)
+        levels.append(level)
+        pending -= set(level)
+    return levels
+
+
+def checksums_match(source, target):
+    """Compare checksum dicts; floating point sums may differ in the last digits"""
+    if source.keys() != target.keys():
+        return False
+    for key, value in source.items():
+        other = target[key]
+        if value is None or other is None:
+            if value != other:
+                return False
+        elif not math.isclose(float(value), float(other), rel_tol=1e-9, abs_tol=1e-6):
+            return False
+    return True
 
 
 class DatabaseMigrator:
@@ -27,6 +113,8 @@ class DatabaseMigrator:
             "user": os.getenv("DB_USER", "smartcloudops"),
             "password": os.getenv("DB_PASSWORD", ""),
         }
+        self.chunk_size = int(os.getenv("MIGRATION_CHUNK_SIZE", "50000"))
+        self.workers = int(os.getenv("MIGRATION_WORKERS", "4"))
         self.setup_logging()
 
     def setup_logging(self):
@@ -42,7 +130,7 @@ class DatabaseMigrator:
         self.logger = logging.getLogger(__name__)
 
     def create_postgresql_database(self):
-        """Create PostgreSQL database and user"""
+        """Create PostgreSQL database and user, skipping those that exist"""
         self.logger.info("Creating PostgreSQL database...")
 
         # Connect as superuser to create database
@@ -54,102 +142,250 @@ class DatabaseMigrator:
             password=os.getenv("POSTGRES_PASSWORD", ""),
         )
         admin_conn.autocommit = True
+        user = sql.Identifier(self.pg_config["user"])
+        database = sql.Identifier(self.pg_config["database"])
 
-        with admin_conn.cursor() as cursor:
-            # Create user
-            cursor.execute(
-                f"""
-                CREATE USER {self.pg_config['user']}
-                WITH PASSWORD '{self.pg_config['password']}';
-            """
-            )
-
-            # Create database
-            cursor.execute(
-                f"""
-                CREATE DATABASE {self.pg_config['database']}
-                OWNER {self.pg_config['user']};
-            """
-            )
-
-            # Grant privileges
-            cursor.execute(
-                f"""
-                GRANT ALL PRIVILEGES ON DATABASE {self.pg_config['database']}
-                TO {self.pg_config['user']};
-            """
-            )
-
-        admin_conn.close()
-        self.logger.info("✅ PostgreSQL database created successfully")
+        try:
+            with admin_conn.cursor() as cursor:
+                # Create user
+                cursor.execute(
+                    "SELECT 1 FROM pg_roles WHERE rolname = %s", (self.pg_config["user"],)
+                )
+                if cursor.fetchone():
+                    self.logger.info(f"User {self.pg_config['user']} exists, skipping")
+                else:
+                    cursor.execute(
+                        sql.SQL("CREATE USER {} WITH PASSWORD %s").format(user),
+                        (self.pg_config["password"],),
+                    )
+
+                # Create database
+                cursor.execute(
+                    "SELECT 1 FROM pg_database WHERE datname = %s",
+                    (self.pg_config["database"],),
+                )
+                if cursor.fetchone():
+                    self.logger.info(
+                        f"Database {self.pg_config['database']} exists, skipping"
+                    )
+                else:
+                    cursor.execute(
+                        sql.SQL("CREATE DATABASE {} OWNER {}").format(database, user)
+                    )
+
+                # Grant privileges
+                cursor.execute(
+                    sql.SQL("GRANT ALL PRIVILEGES ON DATABASE {} TO {}").format(
+                        database, user
+                    )
+                )
+        finally:
+            admin_conn.close()
+        self.logger.info("✅ PostgreSQL database ready")
 
     def migrate_schema(self):
-        """Migrate database schema to PostgreSQL"""
+        """Migrate database schema to PostgreSQL, unless it was applied already"""
         self.logger.info("Migrating database schema...")
 
-        # Read schema from file
-        with open("../database/schema.sql", "r") as f:
-            schema_sql = f.read()
-
         # Connect to PostgreSQL
         pg_conn = psycopg2.connect(**self.pg_config)
+        try:
+            with pg_conn.cursor() as cursor:
+                # schema.sql runs in one transaction, so any of its tables
+                # means it was applied in full by an earlier run
+                cursor.execute(
+                    "SELECT COUNT(*) FROM information_schema.tables "
+                    "WHERE table_schema = 'public' AND table_name <> %s",
+                    (CHECKPOINT_TABLE,),
+                )
+                if cursor.fetchone()[0]:
+                    self.logger.info("Schema already present, skipping")
+                    return
+
+                # Read schema from file
+                with open("../database/schema.sql", "r") as f:
+                    cursor.execute(f.read())
 
-        with pg_conn.cursor() as cursor:
-            cursor.execute(schema_sql)
-
-        pg_conn.commit()
-        pg_conn.close()
+            pg_conn.commit()
+        finally:
+            pg_conn.close()
         self.logger.info("✅ Schema migration completed")
 
     def migrate_data(self):
-        """Migrate data from SQLite to PostgreSQL"""
+        """
+        Stream all SQLite tables into PostgreSQL with COPY.
+
+        Tables are read in rowid order, chunk_size rows at a time, and each
+        chunk is loaded with COPY FROM STDIN. The chunk and its checkpoint
+        commit in the same transaction, so an interrupted run resumes after
+        the last committed chunk without duplicating rows. Tables that do
+        not reference each other are copied in parallel.
+        """
         self.logger.info("Starting data migration...")
 
-        # Connect to both databases
-        sqlite_conn = sqlite3.connect(self.sqlite_path)
-        sqlite_conn.row_factory = sqlite3.Row
-
         pg_conn = psycopg2.connect(**self.pg_config)
+        try:
+            with pg_conn.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                        table_name TEXT PRIMARY KEY,
+                        last_rowid BIGINT NOT NULL DEFAULT 0,
+                        rows_copied BIGINT NOT NULL DEFAULT 0,
+                        completed BOOLEAN NOT NULL DEFAULT FALSE
+                    )
+                """
+                )
+            pg_conn.commit()
+            levels = self._load_order(pg_conn, self._sqlite_tables())
+        finally:
+            pg_conn.close()
 
-        # Get all tables
-        sqlite_cursor = sqlite_conn.cursor()
-        sqlite_cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = [row[0] for row in sqlite_cursor.fetchall()]
+        total = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for level in levels:
+                # Referenced tables finish before the tables referencing them
+                total += sum(pool.map(self._copy_table, level))
 
-        for table in tables:
-            if table == "sqlite_sequence":
-                continue
+        self.logger.info(f"✅ Data migration completed ({total} rows copied)")
 
-            self.logger.info(f"Migrating table: {table}")
+    def _sqlite_tables(self):
+        """User tables of the SQLite database"""
+        conn = sqlite3.connect(self.sqlite_path)
+        try:
+            rows = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' "
+                "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            ).fetchall()
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
+
+    def _load_order(self, pg_conn, tables):
+        """Group tables into levels so foreign keys always point to earlier levels"""
+        with pg_conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT tc.table_name, ccu.table_name
+                FROM information_schema.table_constraints tc
+                JOIN information_schema.constraint_column_usage ccu
+                  ON tc.constraint_name = ccu.constraint_name
+                 AND tc.table_schema = ccu.table_schema
+                WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_schema = 'public'
+            """
+            )
+            references = cursor.fetchall()
+        return load_levels(tables, references)
 
-            # Get data from SQLite
-            sqlite_cursor.execute(f"SELECT * FROM {table}")
-            rows = sqlite_cursor.fetchall()
+    def _copy_table(self, table):
+        """Copy one table chunk by chunk from its checkpoint; returns rows copied"""
+        sqlite_conn = sqlite3.connect(self.sqlite_path)
+        pg_conn = psycopg2.connect(**self.pg_config)
+        try:
+            with pg_conn.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {CHECKPOINT_TABLE} (table_name) VALUES (%s) "
+                    "ON CONFLICT (table_name) DO NOTHING",
+                    (table,),
+                )
+                cursor.execute(
+                    f"SELECT last_rowid, rows_copied, completed FROM {CHECKPOINT_TABLE} "
+                    "WHERE table_name = %s",
+                    (table,),
+                )
+                last_rowid, rows_copied, completed = cursor.fetchone()
+            pg_conn.commit()
 
-            if not rows:
-                continue
+            if completed:
+                self.logger.info(f"⏭️  {table}: already migrated ({rows_copied} rows)")
+                return 0
 
-            # Get column names
-            columns = [description[0] for description in sqlite_cursor.description]
+            if last_rowid:
+                self.logger.info(f"▶️  {table}: resuming after rowid {last_rowid}")
 
-            # Insert into PostgreSQL
-            with pg_conn.cursor() as pg_cursor:
-                placeholders = ",".join(["%s"] * len(columns))
-                insert_sql = f"INSERT INTO {table} ({','.join(columns)}) VALUES ({placeholders})"
+            select = sqlite_conn.execute(f"SELECT * FROM {quote_ident(table)} LIMIT 0")
+            columns = [d[0] for d in select.description]
+            copy_sql = (
+                f"COPY {quote_ident(table)} ({', '.join(quote_ident(c) for c in columns)}) "
+                "FROM STDIN"
+            )
 
+            copied = 0
+            while True:
+                rows = sqlite_conn.execute(
+                    f"SELECT rowid, * FROM {quote_ident(table)} "
+                    "WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, self.chunk_size),
+                ).fetchall()
+                if not rows:
+                    break
+
+                buffer = io.StringIO()
                 for row in rows:
-                    try:
-                        pg_cursor.execute(insert_sql, tuple(row))
-                    except Exception as e:
-                        self.logger.error(f"Error inserting row: {e}")
-                        continue
-
+                    buffer.write("\t".join(copy_value(v) for v in row[1:]))
+                    buffer.write("\n")
+                buffer.seek(0)
+
+                last_rowid = rows[-1][0]
+                with pg_conn.cursor() as cursor:
+                    cursor.copy_expert(copy_sql, buffer)
+                    cursor.execute(
+                        f"UPDATE {CHECKPOINT_TABLE} SET last_rowid = %s, "
+                        "rows_copied = rows_copied + %s WHERE table_name = %s",
+                        (last_rowid, len(rows), table),
+                    )
+                pg_conn.commit()
+                copied += len(rows)
+                self.logger.info(f"📦 {table}: {rows_copied + copied} rows copied")
+
+            with pg_conn.cursor() as cursor:
+                if "id" in columns:
+                    # Explicit ids were copied; move the serial sequence past them
+                    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+                    sequence = cursor.fetchone()[0]
+                    if sequence:
+                        cursor.execute(
+                            "SELECT setval(%s, COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) "
+                            f"FROM {quote_ident(table)}",
+                            (sequence,),
+                        )
+                cursor.execute(
+                    f"UPDATE {CHECKPOINT_TABLE} SET completed = TRUE WHERE table_name = %s",
+                    (table,),
+                )
             pg_conn.commit()
-            self.logger.info(f"✅ Migrated {len(rows)} rows from {table}")
+            self.logger.info(f"✅ Migrated {rows_copied + copied} rows from {table}")
+            return copied
 
-        sqlite_conn.close()
-        pg_conn.close()
-        self.logger.info("✅ Data migration completed")
+        except Exception as e:
+            pg_conn.rollback()
+            self.logger.error(f"❌ Migration of {table} failed: {e}")
+            raise
+        finally:
+            sqlite_conn.close()
+            pg_conn.close()
+
+    def create_indexes(self):
+        """Create the hot-query covering and partial indexes"""
+        self.logger.info("Creating hot query indexes...")
+
+        cfg = self.pg_config
+        # URL.create escapes credentials containing @, : or /
+        engine = create_engine(
+            URL.create(
+                "postgresql",
+                username=cfg["user"],
+                password=cfg["password"],
+                host=cfg["host"],
+                port=int(cfg["port"]),
+                database=cfg["database"],
+            )
+        )
+        try:
+            created = apply_indexes(engine)
+        finally:
+            engine.dispose()
+        self.logger.info(f"✅ Created {len(created)} hot query indexes")
 
     def create_backup_script(self):
         """Create automated backup script"""
@@ -185,45 +421,90 @@ echo "✅ Backup completed: $BACKUP_FILE.gz"
         self.logger.info("✅ Backup script created")
 
     def verify_migration(self):
-        """Verify migration was successful"""
+        """
+        Compare row counts and column checksums of every migrated table.
+
+        Checksums are SUM() of numeric and boolean columns and of the length
+        of text columns, computed on both sides.
+
+        Returns:
+            Names of the tables that do not match
+        """
         self.logger.info("Verifying migration...")
 
         sqlite_conn = sqlite3.connect(self.sqlite_path)
         pg_conn = psycopg2.connect(**self.pg_config)
-
-        # Compare row counts
-        with sqlite_conn.cursor() as sqlite_cursor, pg_conn.cursor() as pg_cursor:
-            sqlite_cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = [row[0] for row in sqlite_cursor.fetchall()]
-
-            for table in tables:
-                if table == "sqlite_sequence":
-                    continue
-
-                sqlite_cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                sqlite_count = sqlite_cursor.fetchone()[0]
-
-                pg_cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                pg_count = pg_cursor.fetchone()[0]
-
-                if sqlite_count == pg_count:
-                    self.logger.info(f"✅ {table}: {pg_count} rows migrated successfully")
+        mismatched = []
+        try:
+            for table in self._sqlite_tables():
+                sqlite_columns = {
+                    row[1] for row in sqlite_conn.execute(f"PRAGMA table_info({quote_ident(table)})")
+                }
+                with pg_conn.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT column_name, data_type FROM information_schema.columns "
+                        "WHERE table_schema = 'public' AND table_name = %s",
+                        (table,),
+                    )
+                    pg_types = {
+                        name: data_type
+                        for name, data_type in cursor.fetchall()
+                        if name in sqlite_columns
+                    }
+
+                source = self._checksum(sqlite_conn.cursor(), table, pg_types, postgres=False)
+                with pg_conn.cursor() as cursor:
+                    target = self._checksum(cursor, table, pg_types, postgres=True)
+
+                if checksums_match(source, target):
+                    self.logger.info(f"✅ {table}: {target['rows']} rows, checksums match")
                 else:
-                    self.logger.error(f"❌ {table}: SQLite({sqlite_count}) != PostgreSQL({pg_count})")
-
-        sqlite_conn.close()
-        pg_conn.close()
+                    mismatched.append(table)
+                    self.logger.error(f"❌ {table}: SQLite {source} != PostgreSQL {target}")
+        finally:
+            sqlite_conn.close()
+            pg_conn.close()
+
+        return mismatched
+
+    def _checksum(self, cursor, table, column_types, postgres):
+        """Row count plus per-column aggregate checksums of one table"""
+        expressions = {"rows": "COUNT(*)"}
+        for column, data_type in sorted(column_types.items()):
+            quoted = quote_ident(column)
+            if data_type in NUMERIC_TYPES:
+                expressions[f"sum:{column}"] = f"SUM({quoted})"
+            elif data_type == "boolean":
+                # SQLite stores booleans as 0/1
+                expressions[f"sum:{column}"] = (
+                    f"SUM({quoted}::int)" if postgres else f"SUM({quoted})"
+                )
+            elif data_type in TEXT_TYPES:
+                expressions[f"len:{column}"] = f"SUM(LENGTH({quoted}))"
+
+        cursor.execute(f"SELECT {', '.join(expressions.values())} FROM {quote_ident(table)}")
+        return dict(zip(expressions, cursor.fetchone()))
 
     def run_migration(self):
-        """Run complete migration process"""
+        """
+        Run complete migration process.
+
+        Every step skips work an earlier run already did, so an interrupted
+        migration is resumed by running it again.
+        """
         try:
             self.logger.info("🚀 Starting PostgreSQL migration...")
 
             self.create_postgresql_database()
             self.migrate_schema()
             self.migrate_data()
+            # Indexes are built after the bulk load, which is much faster
+            self.create_indexes()
             self.create_backup_script()
-            self.verify_migration()
+
+            mismatched = self.verify_migration()
+            if mismatched:
+                raise RuntimeError(f"Verification failed for: {', '.join(mismatched)}")
 
             self.logger.info("🎉 Migration completed successfully!")
 
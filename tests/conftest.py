@@ -1,5 +1,8 @@
+import atexit
 import os
+import shutil
 import sys
+import tempfile
 from pathlib import Path
 
 import pytest
@@ -8,6 +11,13 @@ import pytest
 os.environ["OMP_NUM_THREADS"] = "1"
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 os.environ["PYTORCH_CUDA_ALLOC_CONF"] = "max_split_size_mb:128"
+# No background cache warm-up while tests patch the loaders
+os.environ.setdefault("CACHE_WARM_ENABLED", "false")
+# Models trained by the tests go to a scratch directory, not the repo's ml_models/
+TEST_MODEL_DIR = tempfile.mkdtemp(prefix="smartcloudops-test-models-")
+atexit.register(shutil.rmtree, TEST_MODEL_DIR, ignore_errors=True)
+os.environ.setdefault("ML_MODELS_DIR", TEST_MODEL_DIR)
+os.environ.setdefault("ML_MODEL_PATH", TEST_MODEL_DIR)
 
 # Ensure project root is on sys.path for `import app`
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -0,0 +1,196 @@
+"""
+Tests for the historical anomaly score backfill.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.backfill_scoring import CHECKPOINT_TABLE, BackfillScorer, model_key
+from app.database_integration import DatabaseService
+from app.metrics_rollups import rollup_table
+
+METRICS_DDL = """
+CREATE TABLE metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT, source TEXT, cpu_usage REAL, memory_usage REAL,
+    disk_usage REAL, load_1m REAL, load_5m REAL, load_15m REAL,
+    disk_io_read INTEGER, disk_io_write INTEGER, network_rx INTEGER,
+    network_tx INTEGER, response_time REAL, error_rate REAL,
+    is_anomaly INTEGER, anomaly_score REAL, created_by INTEGER
+)
+"""
+
+
+class ThresholdModel:
+    """Promoted model: anomalous above 90% CPU."""
+
+    def __init__(self, training_date="2026-01-02T00:00:00"):
+        self.model_metadata = {"model_version": "2.0.0", "training_date": training_date}
+
+    def score_frame(self, frame):
+        cpu = frame["cpu_usage"].to_numpy(dtype=float)
+        return cpu > 90, -cpu / 100
+
+
+@pytest.fixture
+def service(tmp_path):
+    url = f"sqlite:///{tmp_path / 'backfill.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(METRICS_DDL))
+
+    service = DatabaseService(database_url=url)
+    # Scored by the old model: everything above 50% CPU was an anomaly
+    service.store_metrics_batch(
+        [
+            {
+                "timestamp": f"2026-01-01T00:{i:02d}:00",
+                "cpu_usage": float(i * 2),
+                "is_anomaly": i * 2 > 50,
+                "anomaly_score": 0.0,
+            }
+            for i in range(50)
+        ]
+    )
+    return service
+
+
+def test_rescores_resumably_and_adjusts_rollups(service):
+    # History whose raw rows retention already dropped
+    with service.engine.begin() as conn:
+        conn.execute(
+            text(
+                f"INSERT INTO {rollup_table('1h')} (bucket_start, source, "
+                "sample_count, anomaly_count) VALUES ('2025-12-01 00:00:00', 'api', 60, 7)"
+            )
+        )
+
+    def scorer(model=None):
+        return BackfillScorer(
+            service.engine,
+            model or ThresholdModel(),
+            chunk_size=20,
+            max_rows_per_second=0,
+            duty_cycle=1.0,
+        )
+
+    partial = scorer().run(max_chunks=2)
+    assert (partial["rows_scored"], partial["completed"]) == (40, False)
+
+    # A new process resumes from the checkpoint
+    state = scorer().run()
+    assert (state["rows_scored"], state["anomalies"], state["completed"]) == (
+        50,
+        4,
+        True,
+    )
+
+    with service.engine.connect() as conn:
+        assert conn.execute(text("SELECT SUM(is_anomaly) FROM metrics")).scalar() == 4
+        assert conn.execute(
+            text("SELECT anomaly_score FROM metrics WHERE cpu_usage = 98")
+        ).scalar() == pytest.approx(-0.98)
+        assert (
+            conn.execute(
+                text(f"SELECT SUM(anomaly_count) FROM {rollup_table('1h')}")
+            ).scalar()
+            == 4 + 7
+        )
+        assert (
+            conn.execute(
+                text(f"SELECT SUM(anomaly_count) FROM {rollup_table('1m')}")
+            ).scalar()
+            == 4
+        )
+
+    assert scorer().run()["rows_scored"] == 50  # already completed
+
+    # A retrained model keeps the version string but is a new job
+    retrained = scorer(ThresholdModel(training_date="2026-02-01T00:00:00"))
+    assert retrained.run(max_chunks=1)["rows_scored"] == 20
+    with service.engine.connect() as conn:
+        assert (
+            conn.execute(text(f"SELECT COUNT(*) FROM {CHECKPOINT_TABLE}")).scalar() == 2
+        )
+
+
+def test_rescores_the_shards_after_the_main_table(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PARTITIONING", "true")
+    monkeypatch.setenv("DB_SHARD_DIR", str(tmp_path / "shards"))
+    service = DatabaseService(database_url=f"sqlite:///{tmp_path / 'main.db'}")
+    service.store_metrics_batch(
+        [
+            {
+                "timestamp": f"2026-01-0{day}T00:{i:02d}:00",
+                "cpu_usage": float(i * 10),
+                "is_anomaly": i * 10 > 50,
+            }
+            for day in (1, 2)
+            for i in range(10)
+        ]
+    )
+    scorer = BackfillScorer(
+        service.engine,
+        ThresholdModel(),
+        chunk_size=4,
+        max_rows_per_second=0,
+        duty_cycle=1.0,
+        shards=service.shards,
+    )
+
+    partial = scorer.run(max_chunks=3)
+    assert (partial["shard"], partial["completed"]) == ("20260101", False)
+
+    state = scorer.run()
+    assert (state["shard"], state["rows_scored"], state["anomalies"]) == (
+        "20260102",
+        20,
+        0,
+    )
+    assert state["completed"]
+    assert service.get_anomalies() == []
+    with service.engine.connect() as conn:
+        assert (
+            conn.execute(
+                text(f"SELECT SUM(anomaly_count) FROM {rollup_table('1h')}")
+            ).scalar()
+            == 0
+        )
+
+
+def test_job_key_follows_the_model_file(tmp_path):
+    model = ThresholdModel()
+    model.model_path = str(tmp_path)
+    assert model_key(model) == "2.0.0:2026-01-02T00:00:00"
+
+    (tmp_path / "anomaly_detection_model.pkl").write_bytes(b"first")
+    first = model_key(model)
+    (tmp_path / "anomaly_detection_model.pkl").write_bytes(b"second")
+    assert first.startswith("2.0.0:") and model_key(model) != first
+
+
+def test_score_frame_matches_per_row_predictions(tmp_path):
+    from app.core.ml_engine.secure_inference import SecureMLInferenceEngine
+
+    engine = SecureMLInferenceEngine(str(tmp_path / "model"))
+    rows = [
+        {
+            "cpu_usage": 20.0,
+            "memory_usage": 30.0,
+            "disk_usage": 40.0,
+            "network_io": 10.0,
+        },
+        {
+            "cpu_usage": 150.0,
+            "memory_usage": None,
+            "disk_usage": 99.0,
+            "network_io": 5000.0,
+        },
+    ]
+
+    flags, scores = engine.score_frame(pd.DataFrame(rows))
+    expected = engine.predict_batch(rows)
+    assert list(flags) == [r["is_anomaly"] for r in expected]
+    assert np.allclose(scores, [r["anomaly_score"] for r in expected])
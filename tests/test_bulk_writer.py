@@ -0,0 +1,190 @@
+"""
+Tests for the buffered bulk writer and DatabaseService bulk ingest.
+"""
+
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.bulk_writer import BulkWriter
+from app.database_integration import DatabaseService
+
+METRICS_DDL = """
+CREATE TABLE metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT, source TEXT, cpu_usage REAL, memory_usage REAL,
+    disk_usage REAL, load_1m REAL, load_5m REAL, load_15m REAL,
+    disk_io_read INTEGER, disk_io_write INTEGER, network_rx INTEGER,
+    network_tx INTEGER, response_time REAL, error_rate REAL,
+    is_anomaly INTEGER, anomaly_score REAL, created_by INTEGER
+)
+"""
+
+
+def _count(engine, table="metrics"):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'bulk.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(METRICS_DDL))
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT)"))
+        conn.execute(text("INSERT INTO users (id, username) VALUES (7, 'system')"))
+    engine.dispose()
+    return url
+
+
+def test_rows_are_written_in_batches(db_url, tmp_path):
+    engine = create_engine(db_url)
+    writer = BulkWriter(
+        engine,
+        "metrics",
+        ("timestamp", "source", "cpu_usage"),
+        batch_size=100,
+        flush_interval_ms=50,
+        spill_path=str(tmp_path / "metrics.spill.jsonl"),
+    )
+
+    writer.submit_many(
+        {"timestamp": f"2026-01-01T00:00:{i % 60:02d}", "source": "t", "cpu_usage": i}
+        for i in range(1000)
+    )
+    writer.close()
+
+    stats = writer.get_stats()
+    assert _count(engine) == 1000
+    assert stats["rows_written"] == 1000
+    assert stats["batches_written"] <= 20
+
+
+def test_failed_batches_spill_and_replay(db_url, tmp_path):
+    engine = create_engine(db_url)
+    spill = tmp_path / "metrics.spill.jsonl"
+    writer = BulkWriter(
+        engine,
+        "metrics",
+        ("timestamp", "source", "cpu_usage"),
+        batch_size=10,
+        flush_interval_ms=20,
+        spill_path=str(spill),
+    )
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE metrics RENAME TO metrics_offline"))
+    writer.submit_many(
+        {"timestamp": "t", "source": "s", "cpu_usage": i} for i in range(25)
+    )
+    writer.flush()
+    assert spill.exists()
+    assert writer.get_stats()["rows_spilled"] == 25
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE metrics_offline RENAME TO metrics"))
+    writer.submit({"timestamp": "t", "source": "s", "cpu_usage": 99})
+    writer.close()
+
+    assert _count(engine) == 26
+    assert not spill.exists()
+    assert writer.get_stats()["rows_replayed"] == 25
+
+
+def test_truncated_spill_lines_are_rejected_and_flusher_survives(db_url, tmp_path):
+    engine = create_engine(db_url)
+    spill = tmp_path / "metrics.spill.jsonl"
+    # A crash left a replay half done, with its last line cut short
+    spill.with_suffix(".replaying").write_text(
+        '{"timestamp": "t", "source": "s", "cpu_usage": 1}\n'
+        '{"timestamp": "t", "source": "s", "cpu_usage": 2}\n'
+        '{"timestamp": "t", "sou'
+    )
+    writer = BulkWriter(
+        engine,
+        "metrics",
+        ("timestamp", "source", "cpu_usage"),
+        batch_size=10,
+        flush_interval_ms=20,
+        spill_path=str(spill),
+    )
+
+    writer.submit({"timestamp": "t", "source": "s", "cpu_usage": 3})
+    assert writer.flush()
+    assert _count(engine) == 3
+    assert not spill.with_suffix(".replaying").exists()
+    assert spill.with_suffix(".rejected").read_text() == '{"timestamp": "t", "sou\n'
+    assert writer.get_stats()["rows_rejected"] == 1
+
+    # The flusher thread is still running
+    assert writer._thread.is_alive()
+    writer.submit({"timestamp": "t", "source": "s", "cpu_usage": 4})
+    writer.close()
+    assert _count(engine) == 4
+
+
+def test_flush_waits_for_the_flush_callback(db_url, tmp_path):
+    engine = create_engine(db_url)
+    seen = []
+
+    def on_flush(batch):
+        time.sleep(0.1)
+        seen.extend(row["cpu_usage"] for row in batch)
+
+    writer = BulkWriter(
+        engine,
+        "metrics",
+        ("timestamp", "source", "cpu_usage"),
+        batch_size=10,
+        flush_interval_ms=20,
+        spill_path=str(tmp_path / "metrics.spill.jsonl"),
+        on_flush=on_flush,
+    )
+    writer.submit_many(
+        {"timestamp": "t", "source": "s", "cpu_usage": i} for i in range(5)
+    )
+    assert writer.flush()
+    assert sorted(seen) == list(range(5))
+    writer.close()
+
+
+def test_full_buffer_spills_instead_of_dropping(db_url, tmp_path):
+    engine = create_engine(db_url)
+    writer = BulkWriter(
+        engine,
+        "metrics",
+        ("timestamp", "source", "cpu_usage"),
+        batch_size=1000,
+        flush_interval_ms=10000,
+        max_queue_size=5,
+        enqueue_timeout=0.01,
+        spill_path=str(tmp_path / "metrics.spill.jsonl"),
+    )
+
+    accepted = writer.submit_many(
+        {"timestamp": "t", "source": "s", "cpu_usage": i} for i in range(20)
+    )
+    writer.close()
+
+    assert accepted == 20
+    assert writer.get_stats()["backpressure_waits"] > 0
+    assert _count(engine) == 20
+
+
+def test_database_service_bulk_mode_caches_system_user(db_url, monkeypatch, tmp_path):
+    monkeypatch.setenv("DB_SPILL_DIR", str(tmp_path / "spill"))
+    service = DatabaseService(database_url=db_url)
+    service.enable_bulk_writes(batch_size=50, flush_interval_ms=20)
+
+    for i in range(120):
+        assert service.store_metrics({"cpu_usage": i, "source": "bulk"})
+    assert service.store_metrics_batch([{"cpu_usage": 1}, {"cpu_usage": 2}]) == 2
+    service.flush_writes()
+
+    with service.engine.connect() as conn:
+        rows = conn.execute(text("SELECT DISTINCT created_by FROM metrics")).fetchall()
+    assert _count(service.engine) == 122
+    assert [r[0] for r in rows] == [7]
+    assert service._system_user_loaded is True
@@ -0,0 +1,100 @@
+"""
+Tests for per-prefix cache instrumentation and hot/big key tracking.
+"""
+
+import random
+
+import pytest
+
+from app.cache_analytics import CacheAnalytics, SpaceSaving, key_prefix
+from app.cache_service import CacheService
+
+
+def test_key_prefix():
+    assert key_prefix("smartcloudops:remediation:ab12") == "remediation"
+    assert key_prefix("smartcloudops:host:1") == "host"
+    assert key_prefix("session:42") == "session"
+    assert key_prefix("health_check_test") == "other"
+
+
+def test_space_saving_finds_heavy_hitters_in_bounded_memory():
+    rng = random.Random(7)
+    sketch = SpaceSaving(capacity=20)
+    stream = (
+        ["hot-a"] * 3000
+        + ["hot-b"] * 2000
+        + [f"cold-{rng.randrange(5000)}" for _ in range(5000)]
+    )
+    rng.shuffle(stream)
+    for key in stream:
+        sketch.offer(key)
+
+    assert len(sketch) == 20
+    top = sketch.top(2)
+    assert [key for key, _, _ in top] == ["hot-a", "hot-b"]
+    for key, count, error in top:
+        true_count = stream.count(key)
+        # Never underestimated, overestimated by at most ``error``
+        assert true_count <= count <= true_count + error
+
+
+def test_cache_service_records_prefixes_and_top_keys():
+    cache = CacheService()
+    cache.analytics = CacheAnalytics(sample_rate=1.0, capacity=8)
+
+    cache.set("smartcloudops:status:current", {"cpu": 1}, ttl=60)
+    cache.set("smartcloudops:history:day", list(range(2000)), ttl=60)
+    for _ in range(5):
+        cache.get("smartcloudops:status:current")
+    cache.get("smartcloudops:status:missing")
+    cache.get_many(["smartcloudops:history:day", "smartcloudops:history:week"])
+
+    prefixes = cache.get_stats()["prefixes"]
+    assert prefixes["status"]["hits"] == 5
+    assert prefixes["status"]["misses"] == 1
+    assert prefixes["status"]["hit_rate_percent"] == pytest.approx(83.33)
+    assert prefixes["history"]["hits"] == 1
+    assert prefixes["history"]["misses"] == 1
+    assert prefixes["history"]["bytes_written"] > prefixes["status"]["bytes_written"]
+    assert cache.hit_ratio() == pytest.approx(6 / 8)
+
+    report = cache.get_key_analytics(limit=1)
+    assert report["top_keys"]["hot"][0]["key"] == "smartcloudops:status:current"
+    assert report["top_keys"]["hot"][0]["accesses"] == 6
+    assert report["top_keys"]["big"][0]["key"] == "smartcloudops:history:day"
+
+
+def test_prefix_labels_are_bounded():
+    analytics = CacheAnalytics(sample_rate=0, max_prefixes=2)
+    for prefix in ("a", "b", "c", "d"):
+        analytics.record("get", f"smartcloudops:{prefix}:1", 0.0001, hit=True)
+    assert set(analytics.prefix_stats()) == {"a", "b", "other"}
+    assert analytics.top_keys() == {"hot": [], "big": []}
+
+
+def test_prometheus_histograms_are_exported():
+    prometheus_client = pytest.importorskip("prometheus_client")
+    cache = CacheService()
+    cache.set("smartcloudops:promtest:1", "x" * 100, ttl=60)
+    cache.get("smartcloudops:promtest:1")
+
+    registry = prometheus_client.REGISTRY
+    assert (
+        registry.get_sample_value(
+            "cache_prefix_lookups_total", {"prefix": "promtest", "result": "hit"}
+        )
+        >= 1
+    )
+    assert (
+        registry.get_sample_value(
+            "cache_operation_duration_seconds_count",
+            {"prefix": "promtest", "operation": "get"},
+        )
+        >= 1
+    )
+    assert (
+        registry.get_sample_value(
+            "cache_payload_bytes_count", {"prefix": "promtest", "operation": "set"}
+        )
+        >= 1
+    )
@@ -0,0 +1,58 @@
+"""
+Tests for bulk and batched operations of both cache services.
+"""
+
+import os
+
+import pytest
+
+from app.cache_service import CacheService
+from app.services.cache_service import CacheService as ConfigCacheService
+
+REDIS_URL = os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+def _config_service() -> ConfigCacheService:
+    service = ConfigCacheService({"use_redis": False, "default_ttl": 60})
+    assert service.initialize()
+    return service
+
+
+@pytest.mark.parametrize("factory", [CacheService, _config_service])
+def test_bulk_operations_on_memory_fallback(factory):
+    cache = factory()
+    values = {f"smartcloudops:host:{i}": {"cpu": i} for i in range(5)}
+
+    assert cache.set_many(values, ttl=60)
+    assert cache.get_many(["smartcloudops:host:1", "smartcloudops:host:9"]) == {
+        "smartcloudops:host:1": {"cpu": 1}
+    }
+    assert cache.delete_many(["smartcloudops:host:0", "smartcloudops:host:9"]) == 1
+
+    with cache.batch(transaction=True) as batch:
+        batch.set("smartcloudops:host:9", {"cpu": 9}).get("smartcloudops:host:9")
+        batch.delete("smartcloudops:host:1").get("smartcloudops:host:1")
+    assert batch.results == [True, {"cpu": 9}, True, None]
+
+
+def test_batch_is_discarded_when_block_raises():
+    cache = CacheService()
+    with pytest.raises(RuntimeError):
+        with cache.batch() as batch:
+            batch.set("smartcloudops:discarded", 1)
+            raise RuntimeError("abort")
+    assert cache.get("smartcloudops:discarded") is None
+
+
+def test_bulk_operations_on_redis():
+    cache = CacheService(REDIS_URL, l1_enabled=False)
+    if cache.redis_client is None:
+        pytest.skip(f"Redis not reachable at {REDIS_URL}")
+
+    values = {f"smartcloudops:bulk:{i}": [i] for i in range(50)}
+    assert cache.set_many(values, ttl=60, tags=["bulk"])
+    assert cache.get_many(list(values) + ["smartcloudops:bulk:missing"]) == values
+    with cache.batch(transaction=True) as batch:
+        batch.get("smartcloudops:bulk:1").delete("smartcloudops:bulk:1")
+    assert batch.results == [[1], True]
+    assert cache.invalidate_tags("bulk") == 49
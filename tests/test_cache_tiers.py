@@ -0,0 +1,96 @@
+"""
+Tests for the two-tier (in-process L1 + Redis L2) cache mode.
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from app.cache_service import CacheService
+from app.memory_cache import MemoryCache
+
+REDIS_URL = os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+def _with_l1() -> CacheService:
+    service = CacheService()
+    service.l1 = MemoryCache(max_entries=100, max_bytes=0)
+    service._l1_live.set()
+    return service
+
+
+def test_invalidations_and_racing_fills_keep_l1_coherent():
+    service = _with_l1()
+    service._l1_fill("smartcloudops:a:1", {"v": 1}, 60000, service._l1_epoch)
+    service._l1_fill("smartcloudops:b:1", {"v": 2}, 60000, service._l1_epoch)
+    assert service.l1.get("smartcloudops:a:1") == {"v": 1}
+
+    # Our own messages are ignored, other processes' drop keys or prefixes
+    service._apply_invalidation(
+        json.dumps({"o": service._origin, "k": ["smartcloudops:a:1"]})
+    )
+    assert "smartcloudops:a:1" in service.l1
+    service._apply_invalidation(json.dumps({"o": "peer", "p": "smartcloudops:a:"}))
+    assert "smartcloudops:a:1" not in service.l1
+    assert "smartcloudops:b:1" in service.l1
+
+    # A value read from L2 before an invalidation arrived is not cached
+    epoch = service._l1_epoch
+    service._apply_invalidation(json.dumps({"o": "peer", "k": ["smartcloudops:c:1"]}))
+    service._l1_fill("smartcloudops:c:1", "stale", 60000, epoch)
+    assert "smartcloudops:c:1" not in service.l1
+
+
+def test_l1_ttl_is_capped_by_l2():
+    service = _with_l1()
+    service.l1_ttl = 5
+    service._l1_fill("long", 1, 60000, service._l1_epoch)
+    service._l1_fill("short", 2, 1500, service._l1_epoch)
+    service._l1_fill("expired", 3, 0, service._l1_epoch)
+    assert service.l1.ttl("long") == pytest.approx(5, abs=0.1)
+    assert service.l1.ttl("short") == pytest.approx(1.5, abs=0.1)
+    assert "expired" not in service.l1
+
+
+@pytest.fixture
+def redis_pair():
+    redis = pytest.importorskip("redis")
+    try:
+        redis.from_url(REDIS_URL, socket_connect_timeout=0.5).ping()
+    except Exception:
+        pytest.skip(f"Redis not reachable at {REDIS_URL}")
+    services = [CacheService(REDIS_URL, l1_enabled=True) for _ in range(2)]
+    for service in services:
+        assert service._l1_live.wait(5)
+    yield services
+    services[0].clear("smartcloudops:tier:*")
+    for service in services:
+        service.close()
+
+
+def test_writes_invalidate_other_processes(redis_pair):
+    a, b = redis_pair
+    key = "smartcloudops:tier:status"
+    a.set(key, {"v": 1}, ttl=60)
+    assert b.get(key) == {"v": 1}  # L2 hit, now cached in b's L1
+    assert b.get(key) == {"v": 1}
+    assert b.get_stats()["tiers"]["l1"]["hits"] == 1
+
+    a.set(key, {"v": 2}, ttl=60)
+    deadline = time.time() + 2
+    while b.get(key) != {"v": 2} and time.time() < deadline:
+        time.sleep(0.01)
+    assert b.get(key) == {"v": 2}
+
+    a.delete(key)
+    time.sleep(0.2)
+    assert b.get(key) is None
+
+    a.set("smartcloudops:tier:1", 1, ttl=60, tags=["tier"])
+    a.set("smartcloudops:tier:2", 2, ttl=60, tags=["tier"])
+    assert b.get("smartcloudops:tier:1") == 1
+    assert a.invalidate_tags("tier") == 2
+    time.sleep(0.2)
+    assert b.get("smartcloudops:tier:1") is None
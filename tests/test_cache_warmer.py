@@ -0,0 +1,84 @@
+"""
+Tests for the startup cache warmer.
+"""
+
+import threading
+import time
+
+from flask import Flask, jsonify, request
+
+from app.cache_service import cache_service, cached
+from app.cache_warmer import CacheWarmer, WarmupJob, register_warmup
+
+
+def test_warmer_populates_entries_and_reports_ready():
+    calls = []
+
+    @cached("test_warm_fn", ttl=60)
+    def summary(hours):
+        calls.append(hours)
+        return {"hours": hours}
+
+    job = register_warmup(summary, args=(24,))
+    warmer = CacheWarmer(workers=2, budget=5).start(jobs=[job])
+    assert warmer.wait_ready(5)
+
+    status = warmer.status()
+    assert status["ready"] and not status["budget_exceeded"]
+    assert status["jobs"][0]["warm"] and status["jobs"][0]["last_result"] == "refreshed"
+    # Requests now hit the warm entry
+    assert summary(24) == {"hours": 24}
+    assert calls == [24]
+    # Entries that stay fresh long enough are not recomputed
+    assert summary.refresh((24,), None, min_fresh=30) == "fresh"
+    warmer.stop()
+    cache_service.invalidate_tags("test_warm_fn")
+
+
+def test_slow_loaders_do_not_hold_readiness_past_the_budget():
+    release = threading.Event()
+
+    @cached("test_warm_slow", ttl=60)
+    def slow():
+        release.wait(5)
+        return "done"
+
+    warmer = CacheWarmer(budget=0.2)
+    assert not warmer.status()["started"] and warmer.is_ready()
+    warmer.start(jobs=[WarmupJob(name="slow", func=slow)])
+    assert not warmer.is_ready()
+    assert warmer.wait_ready(2)
+    assert warmer.status()["budget_exceeded"]
+    release.set()
+    warmer.stop()
+    cache_service.invalidate_tags("test_warm_slow")
+
+
+def test_routes_are_warmed_in_a_request_context_and_refreshed_before_expiry():
+    app = Flask(__name__)
+    calls = []
+
+    @app.get("/warm-route")
+    @cached("test_warm_route", ttl=1, stale_ttl=0, early_refresh_beta=0, warm=True)
+    def view():
+        calls.append(request.path)
+        return {"path": request.path}
+
+    @app.get("/cold-route")
+    def cold():
+        return jsonify({})
+
+    warmer = CacheWarmer(budget=5, refresh_ahead=0.5).start(app, jobs=[])
+    assert warmer.wait_ready(5)
+    assert [job.path for job in warmer.jobs] == ["/warm-route"]
+    assert calls == ["/warm-route"]
+
+    # Refreshed half a TTL before expiry, so requests never miss
+    deadline = time.time() + 3
+    while len(calls) < 2 and time.time() < deadline:
+        time.sleep(0.05)
+    warmer.stop()
+    assert len(calls) >= 2
+    with app.test_request_context("/warm-route"):
+        assert view() == {"path": "/warm-route"}
+    cache_service.invalidate_tags("test_warm_route")
@@ -0,0 +1,113 @@
+"""
+Tests for stampede protection and stale-while-revalidate in ``@cached``.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.cache_service import cache_invalidate, cached, get_recompute_stats
+
+
+def test_concurrent_misses_recompute_once():
+    calls = []
+    gate = threading.Event()
+
+    @cached("test_single_flight", ttl=60)
+    def load():
+        calls.append(1)
+        gate.wait(2)
+        return {"rows": len(calls)}
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        futures = [pool.submit(load) for _ in range(20)]
+        time.sleep(0.2)
+        gate.set()
+        results = [f.result() for f in futures]
+
+    assert len(calls) == 1
+    assert results == [{"rows": 1}] * 20
+    stats = get_recompute_stats()["test_single_flight"]
+    assert (stats["recomputes"], stats["coalesced"]) == (1, 19)
+
+
+def test_stale_value_served_while_one_refresh_runs():
+    calls = []
+
+    @cached("test_swr", ttl=1, stale_ttl=60, early_refresh_beta=0)
+    def load():
+        calls.append(1)
+        time.sleep(0.2)
+        return len(calls)
+
+    assert load() == 1
+    time.sleep(1.05)
+
+    # Stale: every caller gets the old value at once, one refresh runs
+    started = time.monotonic()
+    assert [load() for _ in range(10)] == [1] * 10
+    assert time.monotonic() - started < 0.1
+
+    time.sleep(0.4)
+    assert load() == 2
+    stats = get_recompute_stats()["test_swr"]
+    assert (stats["recomputes"], stats["stale_served"], stats["coalesced"]) == (
+        2,
+        10,
+        9,
+    )
+
+
+def test_expired_values_are_not_served_by_default():
+    calls = []
+
+    @cached("test_no_swr", ttl=1, early_refresh_beta=0)
+    def load():
+        calls.append(1)
+        return len(calls)
+
+    assert load() == 1
+    time.sleep(1.05)
+
+    assert load() == 2
+    assert get_recompute_stats()["test_no_swr"].get("stale_served", 0) == 0
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    calls = []
+
+    @cached("test_errors", ttl=60)
+    def load():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database down")
+        return "ok"
+
+    try:
+        load()
+    except RuntimeError:
+        pass
+    assert load() == "ok"
+    assert len(calls) == 2
+
+
+def test_cache_invalidate_drops_only_the_prefix_tag():
+    calls = {"a": 0, "b": 0}
+
+    @cached("test_tag_a", ttl=60)
+    def load_a():
+        calls["a"] += 1
+        return calls["a"]
+
+    @cached("test_tag_b", ttl=60)
+    def load_b():
+        calls["b"] += 1
+        return calls["b"]
+
+    @cache_invalidate("test_tag_a")
+    def update_a():
+        return "updated"
+
+    assert (load_a(), load_b()) == (1, 1)
+    assert update_a() == "updated"
+    assert (load_a(), load_b()) == (2, 1)
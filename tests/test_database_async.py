@@ -0,0 +1,90 @@
+"""
+Tests for the asyncio data access layer.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database_async import AsyncDatabaseService, to_positional
+
+METRICS_DDL = """
+CREATE TABLE metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT, source TEXT, cpu_usage REAL, memory_usage REAL,
+    disk_usage REAL, load_1m REAL, load_5m REAL, load_15m REAL,
+    disk_io_read INTEGER, disk_io_write INTEGER, network_rx INTEGER,
+    network_tx INTEGER, response_time REAL, error_rate REAL,
+    is_anomaly INTEGER, anomaly_score REAL, created_by INTEGER
+)
+"""
+
+
+def test_named_parameters_become_positional():
+    sql, names = to_positional(
+        "SELECT * FROM metrics WHERE ts >= :start::timestamp AND ts < :end AND a = :start"
+    )
+    assert (
+        sql == "SELECT * FROM metrics WHERE ts >= $1::timestamp AND ts < $2 AND a = $1"
+    )
+    assert names == ("start", "end")
+
+
+def test_rejects_unsupported_urls():
+    with pytest.raises(ValueError):
+        AsyncDatabaseService("mysql://localhost/db")
+
+
+def test_sqlite_store_page_and_summarize(tmp_path):
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy import create_engine, text
+
+    from app.metrics_rollups import MetricsRollupManager
+
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(METRICS_DDL))
+    MetricsRollupManager(engine).ensure_tables()
+    engine.dispose()
+
+    async def scenario():
+        service = AsyncDatabaseService(url, max_size=4)
+        await service.connect()
+        try:
+            now = datetime.utcnow()
+            stored = await service.store_metrics_batch(
+                [
+                    {
+                        "timestamp": (now - timedelta(minutes=i)).isoformat(),
+                        "cpu_usage": float(i),
+                        "is_anomaly": i % 4 == 0,
+                    }
+                    for i in range(12)
+                ]
+            )
+            assert stored == 12
+            assert (
+                await service.store_prediction(
+                    {"cpu_usage": 1.0}, {"is_anomaly": False, "anomaly_score": 0.1}
+                )
+                is False
+            )  # no anomaly_predictions table in this schema
+
+            first = await service.get_metrics_page(limit=5)
+            second = await service.get_metrics_page(
+                limit=5, cursor=first["next_cursor"]
+            )
+            assert [r["cpu_usage"] for r in first["items"]] == [0.0, 1.0, 2.0, 3.0, 4.0]
+            assert second["items"][0]["cpu_usage"] == 5.0
+            assert len(await service.get_anomalies(limit=10)) == 3
+            assert await service.get_metrics_count() == 12
+
+            summary = await service.get_performance_summary()
+            assert summary["metrics_count"] == 12
+            assert summary["max_cpu_usage"] == 11.0
+        finally:
+            await service.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,127 @@
+"""
+Tests for the SQLite to PostgreSQL migrator helpers.
+"""
+
+import sqlite3
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+import scripts.database_migrator as migrator_module  # noqa: E402
+from scripts.database_migrator import DatabaseMigrator  # noqa: E402
+from scripts.database_migrator import checksums_match  # noqa: E402
+from scripts.database_migrator import copy_value, load_levels  # noqa: E402
+
+
+def test_copy_value_escapes_text_format():
+    assert copy_value(None) == "\\N"
+    assert copy_value("a\tb\\c\nd") == "a\\tb\\\\c\\nd"
+    assert copy_value(b"\x01\xff") == "\\\\x01ff"
+    assert copy_value(1.5) == "1.5"
+
+
+def test_load_levels_copies_referenced_tables_first():
+    levels = load_levels(
+        ["users", "metrics", "api_keys", "audit_logs"],
+        [("api_keys", "users"), ("metrics", "users"), ("audit_logs", "audit_logs")],
+    )
+    assert levels == [["audit_logs", "users"], ["api_keys", "metrics"]]
+    assert load_levels(["a", "b"], [("a", "b"), ("b", "a")]) == [["a", "b"]]
+
+
+def test_sqlite_checksum_and_comparison():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (id INTEGER, name TEXT, ok INTEGER, ts TEXT)")
+    conn.executemany(
+        "INSERT INTO t VALUES (?, ?, ?, ?)", [(1, "ab", 1, "x"), (2, None, 0, "y")]
+    )
+    migrator = DatabaseMigrator.__new__(DatabaseMigrator)
+    types = {"id": "integer", "name": "text", "ok": "boolean", "ts": "timestamp"}
+
+    checksum = migrator._checksum(conn.cursor(), "t", types, postgres=False)
+    assert checksum == {"rows": 2, "sum:id": 3, "len:name": 2, "sum:ok": 1}
+    assert checksums_match({"rows": 2, "sum:x": 0.1 + 0.2}, {"rows": 2, "sum:x": 0.3})
+    assert not checksums_match(checksum, {**checksum, "rows": 3})
+
+
+def test_index_engine_url_keeps_special_characters(monkeypatch):
+    urls = []
+
+    class FakeEngine:
+        def dispose(self):
+            pass
+
+    monkeypatch.setattr(
+        migrator_module, "create_engine", lambda url: urls.append(url) or FakeEngine()
+    )
+    monkeypatch.setattr(migrator_module, "apply_indexes", lambda engine: [])
+    migrator = DatabaseMigrator.__new__(DatabaseMigrator)
+    migrator.logger = migrator_module.logging.getLogger("test")
+    migrator.pg_config = {
+        "host": "db",
+        "port": "5432",
+        "database": "smartcloudops",
+        "user": "ops@team",
+        "password": "p@ss:w/rd",
+    }
+
+    migrator.create_indexes()
+
+    assert urls[0].username == "ops@team"
+    assert urls[0].password == "p@ss:w/rd"
+    assert urls[0].host == "db" and urls[0].database == "smartcloudops"
+
+
+class _ExistingObjectsCursor:
+    """Cursor of a server where the user, database and schema already exist."""
+
+    def __init__(self, executed):
+        self.executed = executed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        self.executed.append(str(statement))
+
+    def fetchone(self):
+        return (1,)
+
+
+def test_rerun_skips_existing_user_database_and_schema(monkeypatch):
+    executed = []
+
+    class FakeConnection:
+        def cursor(self):
+            return _ExistingObjectsCursor(executed)
+
+        def commit(self):
+            pass
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(
+        migrator_module.psycopg2, "connect", lambda **kw: FakeConnection()
+    )
+    migrator = DatabaseMigrator.__new__(DatabaseMigrator)
+    migrator.logger = migrator_module.logging.getLogger("test")
+    migrator.pg_config = {
+        "host": "db",
+        "port": "5432",
+        "database": "smartcloudops",
+        "user": "ops",
+        "password": "secret",
+    }
+
+    migrator.create_postgresql_database()
+    migrator.migrate_schema()
+
+    assert not any("CREATE USER" in s or "CREATE DATABASE" in s for s in executed)
+    assert any("GRANT ALL PRIVILEGES" in s for s in executed)
+    # schema.sql is never read or executed again
+    assert len([s for s in executed if "information_schema.tables" in s]) == 1
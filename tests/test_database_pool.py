@@ -0,0 +1,92 @@
+"""
+Tests for connection pool lifetime management, bounded waits and stats.
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.database_pool import DatabasePool, PoolTimeoutError
+
+
+@pytest.fixture
+def make_pool(tmp_path):
+    pools = []
+
+    def factory(**kwargs):
+        db_pool = DatabasePool("sqlite", database=str(tmp_path / "pool.db"), **kwargs)
+        pools.append(db_pool)
+        return db_pool
+
+    yield factory
+    for db_pool in pools:
+        db_pool.close()
+
+
+def test_reuse_counts_created_once(make_pool):
+    db_pool = make_pool(max_connections=2)
+    for _ in range(5):
+        assert db_pool.execute_query("SELECT 1 AS one") == [{"one": 1}]
+
+    stats = db_pool.get_stats()
+    assert stats["connections_created"] == 1
+    assert stats["connections_used"] == 5
+    assert stats["connections_returned"] == 5
+    assert stats["in_use"] == 0
+    assert stats["checkout_wait"]["p99_ms"] >= 0
+    assert stats["sizing"]["recommended_size"] >= 1
+
+
+def test_connections_recycled_after_max_lifetime(make_pool):
+    db_pool = make_pool(max_connections=1, max_lifetime=0.05)
+    db_pool.execute_query("SELECT 1")
+    time.sleep(0.1)
+    with db_pool.get_connection() as second:
+        assert second.execute("SELECT 1").fetchone()[0] == 1
+
+    stats = db_pool.get_stats()
+    assert stats["connections_recycled"] == 1
+    assert stats["connections_created"] == 2
+
+
+def test_validation_only_after_idle(make_pool, monkeypatch):
+    db_pool = make_pool(max_connections=1, validate_after_idle=0.05)
+    calls = []
+    original = db_pool._validate
+    monkeypatch.setattr(db_pool, "_validate", lambda c: calls.append(c) or original(c))
+
+    for _ in range(3):
+        db_pool.execute_query("SELECT 1")
+    assert calls == []
+
+    time.sleep(0.1)
+    db_pool.execute_query("SELECT 1")
+    assert len(calls) == 1
+
+
+def test_checkout_waits_then_times_out(make_pool):
+    db_pool = make_pool(max_connections=1, checkout_timeout=0.1)
+    release = threading.Event()
+
+    def holder():
+        with db_pool.get_connection():
+            release.wait(2)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    time.sleep(0.05)
+
+    with pytest.raises(PoolTimeoutError):
+        with db_pool.get_connection():
+            pass
+
+    release.set()
+    thread.join()
+    with db_pool.get_connection() as connection:
+        assert connection is not None
+
+    stats = db_pool.get_stats()
+    assert stats["wait_timeouts"] == 1
+    assert stats["peak_in_use"] == 1
+    assert stats["sizing"]["recommended_size"] >= 2
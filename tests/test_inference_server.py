@@ -0,0 +1,153 @@
+"""
+Tests for the shared local inference server and its client backend.
+"""
+
+import socket
+import threading
+
+import pytest
+
+from app.core.ml_engine.inference_server import (
+    InferenceClient,
+    InferenceServer,
+    InferenceServerError,
+    InferenceServerUnavailable,
+    RemoteInferenceEngine,
+)
+
+
+class FakeEngine:
+    """Deterministic engine that records the batch sizes it was called with."""
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.lock = threading.Lock()
+
+    def predict_batch(self, metrics_list):
+        with self.lock:
+            self.batch_sizes.append(len(metrics_list))
+        results = []
+        for metrics in metrics_list:
+            if metrics.get("cpu_usage") == "boom":
+                raise ValueError("bad sample")
+            results.append(
+                {
+                    "is_anomaly": metrics.get("cpu_usage", 0) > 90,
+                    "confidence": 0.5,
+                    "echo": metrics.get("cpu_usage"),
+                }
+            )
+        return results
+
+    def predict(self, metrics):
+        return self.predict_batch([metrics])[0]
+
+    def get_model_info(self):
+        if getattr(self, "broken_info", False):
+            raise RuntimeError("model info unavailable")
+        return {"model_type": "fake"}
+
+    def health_check(self):
+        return {"status": "healthy"}
+
+
+@pytest.fixture
+def server(tmp_path):
+    engine = FakeEngine()
+    srv = InferenceServer(
+        socket_path=str(tmp_path / "inference.sock"),
+        engine=engine,
+        max_batch_size=32,
+        max_batch_delay_ms=20,
+    )
+    srv.start()
+    yield srv
+    srv.stop()
+
+
+def test_remote_engine_predict_roundtrip(server):
+    engine = RemoteInferenceEngine(server.socket_path)
+
+    result = engine.predict({"cpu_usage": 95})
+
+    assert result["is_anomaly"] is True
+    assert result["echo"] == 95
+    assert engine.predict_anomaly({"cpu_usage": 10})["anomaly"] is False
+    assert engine.get_model_info() == {"model_type": "fake"}
+    assert engine.health_check()["server"]["requests"] >= 1
+    engine.client.close()
+
+
+def test_pipelined_requests_are_batched_and_matched(server):
+    client = InferenceClient(server.socket_path)
+
+    futures = [client.submit("predict", {"cpu_usage": i}) for i in range(20)]
+    results = [f.result(timeout=5) for f in futures]
+
+    assert [r["echo"] for r in results] == list(range(20))
+    assert max(server.engine.batch_sizes) > 1
+    client.close()
+
+
+def test_predict_batch_and_bad_sample_isolated(server):
+    client = InferenceClient(server.socket_path)
+
+    batch = client.call("predict_batch", [{"cpu_usage": 1}, {"cpu_usage": 99}])
+    assert [r["is_anomaly"] for r in batch] == [False, True]
+
+    good = client.submit("predict", {"cpu_usage": 5})
+    bad = client.submit("predict", {"cpu_usage": "boom"})
+    assert good.result(timeout=5)["echo"] == 5
+    with pytest.raises(InferenceServerError):
+        bad.result(timeout=5)
+    client.close()
+
+
+def test_client_reports_unavailable_server(tmp_path):
+    engine = RemoteInferenceEngine(
+        str(tmp_path / "missing.sock"), fallback_factory=None
+    )
+
+    with pytest.raises(InferenceServerError):
+        engine.predict({"cpu_usage": 1})
+    assert engine.health_check()["status"] == "unhealthy"
+
+
+def test_failing_request_gets_error_reply_and_connection_survives(server):
+    client = InferenceClient(server.socket_path)
+    server.engine.broken_info = True
+
+    with pytest.raises(InferenceServerError, match="model info unavailable"):
+        client.call("info")
+    assert client.call("health")["status"] == "healthy"
+    assert server.get_stats()["errors"] >= 1
+    client.close()
+
+
+def test_timed_out_requests_are_forgotten(tmp_path):
+    path = str(tmp_path / "silent.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    client = InferenceClient(path, timeout=0.1)
+
+    with pytest.raises(InferenceServerUnavailable):
+        client.call("health")
+    assert client._pending == {}
+    client.close()
+    listener.close()
+
+
+def test_remote_engine_falls_back_to_in_process_scoring(server):
+    local = FakeEngine()
+    engine = RemoteInferenceEngine(server.socket_path, fallback_factory=lambda: local)
+    assert engine.predict({"cpu_usage": 95})["echo"] == 95
+    assert local.batch_sizes == []
+
+    # The daemon dies after startup
+    server.stop()
+    assert engine.predict({"cpu_usage": 96})["echo"] == 96
+    assert engine.predict_batch([{"cpu_usage": 1}])[0]["is_anomaly"] is False
+    assert engine.get_model_info() == {"model_type": "fake"}
+    assert local.batch_sizes == [1, 1]
+    assert engine.health_check()["backend"] == "in_process"
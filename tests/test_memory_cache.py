@@ -0,0 +1,76 @@
+"""
+Tests for the shared in-memory LRU + TTL cache backend.
+"""
+
+import time
+
+from app.cache_service import CacheService
+from app.memory_cache import MemoryCache
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = MemoryCache(max_entries=3, max_bytes=0)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert cache.get("a") == "a"  # "b" is now least recently used
+    cache.set("d", "d")
+    assert cache.keys() == ["c", "a", "d"]
+    assert cache.get_stats()["evictions"] == 1
+
+    sized = MemoryCache(max_entries=0, max_bytes=100, sizeof=lambda k, v: len(v))
+    sized.set("x", "x" * 60)
+    sized.set("y", "y" * 30)
+    sized.set("z", "z" * 30)
+    assert "x" not in sized and sized.size_bytes == 60
+
+
+def test_ttl_expiry_is_lazy_and_bulk(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.memory_cache.time.monotonic", lambda: now[0])
+
+    cache = MemoryCache(max_entries=0, max_bytes=0)
+    cache.set("short", 1, ttl=5)
+    cache.set("long", 2, ttl=60)
+    cache.set("forever", 3, ttl=0)
+    cache.set("short", 4, ttl=30)  # overwrite leaves a stale deadline behind
+    assert cache.ttl("short") == 30
+
+    now[0] += 10
+    assert cache.purge_expired() == 0
+    assert cache.get("short") == 4
+
+    now[0] += 50
+    assert cache.get("long") is None
+    assert cache.purge_expired() == 1  # "short"
+    assert cache.keys() == ["forever"]
+    assert cache.expire("forever", 1) and cache.ttl("forever") == 1
+
+
+def test_cache_service_memory_fallback_is_bounded(monkeypatch):
+    monkeypatch.setenv("CACHE_MEMORY_MAX_ENTRIES", "100")
+    service = CacheService()
+    for i in range(250):
+        service.set(f"smartcloudops:metrics:{i}", {"i": i}, ttl=60)
+
+    assert len(service.memory_cache) == 100
+    assert service.get("smartcloudops:metrics:249") == {"i": 249}
+    assert service.get("smartcloudops:metrics:0") is None
+    assert service.clear("smartcloudops:metrics:*") == 100
+
+    service.set("k", "v", ttl=1)
+    time.sleep(1.05)
+    assert not service.exists("k")
+
+
+def test_prefix_and_tag_invalidation_use_indexes():
+    cache = MemoryCache(max_entries=0, max_bytes=0)
+    for i in range(3):
+        cache.set(f"smartcloudops:status:{i}", i, tags=["remediation"])
+        cache.set(f"smartcloudops:stats:{i}", i)
+    cache.set("plain", 0, tags=["remediation"])
+
+    assert sorted(cache.delete_prefix("smartcloudops:stat")) == [
+        f"smartcloudops:{ns}:{i}" for ns in ("stats", "status") for i in range(3)
+    ]
+    assert cache.delete_tags(["remediation"]) == ["plain"]
+    assert len(cache) == 0 and not cache._namespaces and not cache._tags
@@ -0,0 +1,135 @@
+"""
+Tests for the Parquet metrics archive.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.database_integration import DatabaseService
+from app.metrics_archive import MetricsArchiver, load_archive, load_training_frame
+
+METRICS_DDL = """
+CREATE TABLE metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT, source TEXT, cpu_usage REAL, memory_usage REAL,
+    disk_usage REAL, load_1m REAL, load_5m REAL, load_15m REAL,
+    disk_io_read INTEGER, disk_io_write INTEGER, network_rx INTEGER,
+    network_tx INTEGER, response_time REAL, error_rate REAL,
+    is_anomaly INTEGER, anomaly_score REAL, created_by INTEGER
+)
+"""
+
+
+@pytest.fixture
+def populated(tmp_path):
+    url = f"sqlite:///{tmp_path / 'archive.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(METRICS_DDL))
+
+    service = DatabaseService(database_url=url)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    service.store_metrics_batch(
+        [
+            {
+                "timestamp": (
+                    today - timedelta(days=3) + timedelta(hours=h)
+                ).isoformat(),
+                "source": "edge/1" if h % 2 else "api",
+                "cpu_usage": float(h),
+                "network_rx": 10,
+                "network_tx": 5,
+            }
+            for h in range(72 + 5)  # three closed days plus five hours of today
+        ]
+    )
+    return engine, today
+
+
+def test_load_without_archive_is_empty(tmp_path):
+    frame = load_archive("metrics", columns=["cpu_usage"], archive_dir=str(tmp_path))
+    assert frame.empty
+    assert load_training_frame(["cpu_usage"], archive_dir=str(tmp_path)) is None
+
+
+def test_exports_closed_days_once_and_loads_ranges(populated, tmp_path):
+    pytest.importorskip("pyarrow")
+    engine, today = populated
+    archive_dir = str(tmp_path / "archive")
+    archiver = MetricsArchiver(engine, archive_dir=archive_dir)
+
+    result = archiver.export_closed("metrics")
+    assert result == {"status": "ok", "days": 3, "rows": 72}
+    assert archiver.export_closed("metrics")["days"] == 0
+    assert (
+        tmp_path
+        / "archive"
+        / "metrics"
+        / f"day={(today - timedelta(days=1)).date()}"
+        / "source=edge%2F1"
+    ).is_dir()
+
+    day = today - timedelta(days=2)
+    frame = load_archive(
+        "metrics",
+        columns=["timestamp", "cpu_usage"],
+        start=day,
+        end=day + timedelta(hours=6),
+        sources=["api"],
+        archive_dir=archive_dir,
+    )
+    assert sorted(frame["cpu_usage"]) == [24.0, 26.0, 28.0]
+    assert "memory_usage" not in frame.columns
+
+    training = load_training_frame(
+        ["cpu_usage", "network_io"], min_rows=10, archive_dir=archive_dir
+    )
+    assert len(training) == 72
+    assert (training["network_io"] == 15).all()
+
+
+def test_exports_sharded_days(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setenv("DB_PARTITIONING", "true")
+    monkeypatch.setenv("DB_SHARD_DIR", str(tmp_path / "shards"))
+    service = DatabaseService(database_url=f"sqlite:///{tmp_path / 'main.db'}")
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    service.store_metrics_batch(
+        [
+            {
+                "timestamp": (
+                    today - timedelta(days=2) + timedelta(hours=h)
+                ).isoformat(),
+                "source": "api",
+                "cpu_usage": float(h),
+            }
+            for h in range(48)
+        ]
+    )
+
+    archive_dir = str(tmp_path / "archive")
+    archiver = MetricsArchiver(
+        service.engine, archive_dir=archive_dir, shards=service.shards
+    )
+    assert archiver.export_closed("metrics") == {"status": "ok", "days": 2, "rows": 48}
+    assert (
+        len(load_archive("metrics", columns=["cpu_usage"], archive_dir=archive_dir))
+        == 48
+    )
+
+
+def test_days_missing_rows_are_retried(populated, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    engine, today = populated
+    archiver = MetricsArchiver(engine, archive_dir=str(tmp_path / "archive"))
+    read_day = archiver._read_day
+    monkeypatch.setattr(
+        archiver, "_read_day", lambda table, day: read_day(table, day)[:0]
+    )
+
+    assert archiver.export_closed("metrics") == {"status": "ok", "days": 0, "rows": 0}
+
+    monkeypatch.setattr(archiver, "_read_day", read_day)
+    assert archiver.export_closed("metrics") == {"status": "ok", "days": 3, "rows": 72}
@@ -0,0 +1,142 @@
+"""
+Tests for time-partitioned metrics storage and partition-drop retention.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from app.database_integration import METRICS_COLUMNS, SHARD_SCHEMA, DatabaseService
+from app.metrics_partitioning import (
+    PostgresPartitionManager,
+    SQLiteShardManager,
+    period_start,
+)
+
+
+def _metric(ts, cpu=1.0, anomaly=False):
+    return {
+        "timestamp": ts.isoformat(),
+        "source": "test",
+        "cpu_usage": cpu,
+        "is_anomaly": anomaly,
+    }
+
+
+def test_shards_route_prune_and_drop(tmp_path):
+    shards = SQLiteShardManager(str(tmp_path / "shards"), SHARD_SCHEMA)
+    base = datetime(2026, 3, 1, 12)
+    rows = [
+        _metric(base + timedelta(days=d, minutes=m), cpu=d)
+        for d in range(5)
+        for m in range(3)
+    ]
+
+    assert shards.insert("metrics", METRICS_COLUMNS, rows) == 15
+    assert len(shards.shards()) == 5
+    assert shards.shards(base + timedelta(days=1), base + timedelta(days=2)) == [
+        datetime(2026, 3, 2),
+        datetime(2026, 3, 3),
+    ]
+
+    latest = list(
+        shards.query(
+            "SELECT cpu_usage FROM metrics ORDER BY timestamp DESC LIMIT :limit",
+            limit=4,
+        )
+    )
+    assert [r["cpu_usage"] for r in latest] == [4.0, 4.0, 4.0, 3.0]
+
+    assert shards.drop_before(datetime(2026, 3, 3)) == 2
+    assert shards.count("metrics") == 9
+    assert not (tmp_path / "shards" / "shard_20260301.db").exists()
+
+
+def test_weekly_periods_start_on_monday():
+    assert period_start(datetime(2026, 3, 5, 8), "week") == datetime(2026, 3, 2)
+    assert period_start(datetime(2026, 3, 5, 8), "day") == datetime(2026, 3, 5)
+
+
+def test_database_service_sharded_mode(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PARTITIONING", "true")
+    monkeypatch.setenv("DB_SHARD_DIR", str(tmp_path / "shards"))
+    service = DatabaseService(database_url=f"sqlite:///{tmp_path / 'main.db'}")
+    now = datetime.utcnow()
+
+    assert service.shards is not None
+    assert service.store_metrics(_metric(now - timedelta(days=40), cpu=5.0))
+    assert (
+        service.store_metrics_batch(
+            [
+                _metric(now - timedelta(minutes=i), cpu=float(i), anomaly=i == 2)
+                for i in range(3)
+            ]
+        )
+        == 3
+    )
+
+    assert service.get_metrics_count() == 4
+    assert [r["cpu_usage"] for r in service.get_latest_metrics(2)] == [0.0, 1.0]
+    assert len(service.get_anomalies()) == 1
+
+    result = service.apply_retention(30)
+    assert result == {"mode": "shards", "dropped": 1}
+    assert service.get_metrics_count() == 3
+
+
+def test_sharded_summaries_read_the_shards(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PARTITIONING", "true")
+    monkeypatch.setenv("DB_SHARD_DIR", str(tmp_path / "shards"))
+    monkeypatch.setenv("METRICS_ROLLUPS", "false")
+    service = DatabaseService(database_url=f"sqlite:///{tmp_path / 'main.db'}")
+    now = datetime.utcnow()
+
+    service.store_metrics_batch(
+        [
+            _metric(now - timedelta(minutes=i), cpu=float(i), anomaly=i == 2)
+            for i in range(4)
+        ]
+    )
+    for confidence, anomaly in ((0.5, True), (0.9, False), (0.7, False)):
+        metrics = {"source": "test"}
+        service.store_prediction(
+            metrics, {"anomaly": anomaly, "confidence": confidence}
+        )
+
+    summary = service.get_performance_summary()
+    assert summary["metrics_count"] == 4
+    assert summary["avg_cpu_usage"] == 1.5 and summary["max_cpu_usage"] == 3.0
+    assert summary["anomalies_24h"] == 1
+
+    stats = service.get_prediction_stats()
+    assert stats["prediction_count"] == 3 and stats["anomaly_count"] == 1
+    assert round(stats["avg_confidence"], 6) == 0.7
+
+
+def test_postgres_partitions_created_ahead_and_dropped(monkeypatch):
+    engine = MagicMock()
+    executed = []
+    conn = engine.begin.return_value.__enter__.return_value
+    conn.execute.side_effect = lambda stmt, *a: executed.append(str(stmt))
+
+    manager = PostgresPartitionManager(
+        engine, tables=("metrics",), interval="day", premake=2
+    )
+    now = datetime(2026, 3, 10, 15)
+    monkeypatch.setattr(
+        manager,
+        "list_partitions",
+        lambda table: [
+            ("metrics_legacy", None, datetime(2026, 3, 1)),
+            ("metrics_p20260301", datetime(2026, 3, 1), datetime(2026, 3, 2)),
+            ("metrics_p20260310", datetime(2026, 3, 10), datetime(2026, 3, 11)),
+        ],
+    )
+
+    assert manager.ensure_partitions("metrics", now) == 2
+    assert any("metrics_p20260311 PARTITION OF metrics" in sql for sql in executed)
+    assert not any("metrics_p20260310 PARTITION OF" in sql for sql in executed)
+
+    executed.clear()
+    assert manager.drop_partitions_before("metrics", now - timedelta(days=7)) == 2
+    assert "ALTER TABLE metrics DETACH PARTITION metrics_legacy" in executed
+    assert "DROP TABLE metrics_p20260301" in executed
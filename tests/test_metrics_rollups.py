@@ -0,0 +1,145 @@
+"""
+Tests for incremental metric rollups and the summary query router.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.database_integration import DatabaseService
+from app.metrics_rollups import MetricsRollupManager
+
+METRICS_DDL = """
+CREATE TABLE metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT, source TEXT, cpu_usage REAL, memory_usage REAL,
+    disk_usage REAL, load_1m REAL, load_5m REAL, load_15m REAL,
+    disk_io_read INTEGER, disk_io_write INTEGER, network_rx INTEGER,
+    network_tx INTEGER, response_time REAL, error_rate REAL,
+    is_anomaly INTEGER, anomaly_score REAL, created_by INTEGER
+)
+"""
+
+
+@pytest.fixture
+def manager(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rollups.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(METRICS_DDL))
+    rollups = MetricsRollupManager(engine)
+    rollups.ensure_tables()
+    return rollups
+
+
+def _rows(start, count, step_seconds=37):
+    return [
+        {
+            "timestamp": (start + timedelta(seconds=i * step_seconds)).isoformat(),
+            "source": "web" if i % 2 else "db",
+            "cpu_usage": float(i % 100),
+            "memory_usage": float((i * 3) % 100),
+            "response_time": float(i),
+            "is_anomaly": i % 10 == 0,
+        }
+        for i in range(count)
+    ]
+
+
+def test_plan_uses_coarsest_buckets_for_the_middle(manager):
+    start = datetime(2026, 1, 1, 0, 3, 20)
+    end = datetime(2026, 1, 1, 5, 7, 0)
+
+    plan = manager.plan(start, end)
+
+    assert plan[0] == ("1m", datetime(2026, 1, 1, 0, 3), datetime(2026, 1, 1, 0, 5))
+    assert ("1h", datetime(2026, 1, 1, 1), datetime(2026, 1, 1, 5)) in plan
+    assert plan[-1] == ("1m", datetime(2026, 1, 1, 5, 5), datetime(2026, 1, 1, 5, 7))
+    # Segments tile the range without gaps
+    for (_, _, seg_end), (_, next_start, _) in zip(plan, plan[1:]):
+        assert seg_end == next_start
+
+
+def test_summary_matches_raw_aggregates(manager):
+    start = datetime(2026, 1, 1, 0, 0, 0)
+    rows = _rows(start, 600)
+    # Ingest in uneven chunks so buckets are merged across upserts
+    manager.ingest(rows[:250])
+    manager.ingest(rows[250:])
+
+    window_start, window_end = start, start + timedelta(hours=7)
+    summary = manager.summarize(window_start, window_end)
+
+    assert summary["metrics_count"] == 600
+    assert summary["anomaly_count"] == 60
+    assert summary["avg_cpu_usage"] == pytest.approx(
+        sum(r["cpu_usage"] for r in rows) / 600
+    )
+    assert summary["max_response_time"] == 599.0
+    assert summary["min_cpu_usage"] == 0.0
+
+    web = manager.summarize(window_start, window_end, source="web")
+    assert web["metrics_count"] == 300
+
+
+def test_database_service_summary_uses_rollups(tmp_path):
+    url = f"sqlite:///{tmp_path / 'svc.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(METRICS_DDL))
+    engine.dispose()
+
+    service = DatabaseService(database_url=url)
+    now = datetime.utcnow()
+    service.store_metrics_batch(_rows(now - timedelta(hours=2), 100, step_seconds=60))
+    service.store_metrics(
+        {"timestamp": now.isoformat(), "cpu_usage": 99.0, "is_anomaly": True}
+    )
+
+    summary = service.get_performance_summary()
+
+    assert summary["source"] == "rollups"
+    assert summary["metrics_count"] == 101
+    assert summary["max_cpu_usage"] == 99.0
+    assert summary["anomalies_24h"] == 11
+
+    assert service.rollups.rebuild() == 101
+    assert service.get_performance_summary()["metrics_count"] == 101
+
+
+def test_rollups_are_backfilled_from_existing_history(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'history.db'}"
+    engine = create_engine(url)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(text(METRICS_DDL))
+        # Raw history written before rollups existed, one row past retention
+        conn.execute(
+            text(
+                "INSERT INTO metrics (timestamp, source, cpu_usage, is_anomaly) "
+                "VALUES (:timestamp, :source, :cpu_usage, :is_anomaly)"
+            ),
+            _rows(now - timedelta(hours=3), 50, step_seconds=60)
+            + [
+                {
+                    "timestamp": (now - timedelta(days=5)).isoformat(),
+                    "source": "db",
+                    "cpu_usage": 1.0,
+                    "is_anomaly": False,
+                }
+            ],
+        )
+    engine.dispose()
+    monkeypatch.setenv("METRICS_RETENTION_DAYS", "2")
+
+    service = DatabaseService(database_url=url)
+    summary = service.get_performance_summary()
+    assert summary["source"] == "rollups"
+    assert summary["metrics_count"] == 50
+    assert summary["anomalies_24h"] == 5
+
+    # Tables that already exist are not rebuilt again
+    assert not service.rollups.ensure_tables()
+    assert (
+        service.rollups.summarize(now - timedelta(days=6), now)["metrics_count"] == 50
+    )
@@ -0,0 +1,137 @@
+"""
+Tests for binary serialization and the version-invalidated query cache.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from app.database_integration import DatabaseService
+from app.query_cache import QueryCache
+from app.utils.serialization import dumps, loads, loads_compat, register_codec
+
+METRICS_DDL = """
+CREATE TABLE metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT, source TEXT, cpu_usage REAL, memory_usage REAL,
+    disk_usage REAL, load_1m REAL, load_5m REAL, load_15m REAL,
+    disk_io_read INTEGER, disk_io_write INTEGER, network_rx INTEGER,
+    network_tx INTEGER, response_time REAL, error_rate REAL,
+    is_anomaly INTEGER, anomaly_score REAL, created_by INTEGER
+)
+"""
+
+
+def test_serialization_roundtrips_rich_types_and_compresses():
+    value = {
+        "ts": datetime(2026, 5, 1, 12, 30, 15, 123456),
+        "day": date(2026, 5, 1),
+        "amount": Decimal("12.50"),
+        "rows": [{"cpu": 1.5, "ok": True, "tag": None}] * 3,
+    }
+    assert loads(dumps(value)) == value
+
+    big = [{"cpu_usage": float(i), "source": "api"} for i in range(2000)]
+    payload = dumps(big)
+    assert payload[:1] in (b"Z", b"X")
+    assert len(payload) < len(repr(big)) / 4
+    assert loads(payload) == big
+
+    with pytest.raises(ValueError):
+        loads(b"Qgarbage")
+
+
+@dataclass
+class _Point:
+    host: str
+    cpu: float
+
+
+def test_numpy_dataclasses_and_legacy_entries():
+    scores = np.linspace(0, 1, 6, dtype=np.float32).reshape(2, 3)
+    for codec in (None, b"J"):
+        value = loads(
+            dumps(
+                {"scores": scores, "n": np.int64(3), "p": _Point("a", 1.5)}, codec=codec
+            )
+        )
+        assert value["scores"].dtype == np.float32
+        assert np.array_equal(value["scores"], scores)
+        assert value["n"] == 3 and value["p"] == {"host": "a", "cpu": 1.5}
+
+    # Untagged values written before the codec layer
+    assert loads_compat('{"status": "ok"}') == {"status": "ok"}
+    assert loads_compat(b"Mon Jan 1") == "Mon Jan 1"
+    assert loads_compat(dumps([1, 2])) == [1, 2]
+
+    with pytest.raises(ValueError):
+        register_codec(b"M", None, loads)
+
+
+def test_versions_invalidate_only_touched_tables():
+    cache = QueryCache()
+    calls = []
+
+    def load(name):
+        calls.append(name)
+        return [name, len(calls)]
+
+    assert cache.get_or_load("a", {"x": 1}, ("metrics",), lambda: load("a")) == ["a", 1]
+    assert cache.get_or_load("a", {"x": 1}, ("metrics",), lambda: load("a")) == ["a", 1]
+    cache.get_or_load("b", {}, ("anomaly_predictions",), lambda: load("b"))
+
+    cache.bump("metrics")
+    assert cache.get_or_load("a", {"x": 1}, ("metrics",), lambda: load("a")) == ["a", 3]
+    cache.get_or_load("b", {}, ("anomaly_predictions",), lambda: load("b"))
+    assert calls == ["a", "b", "a"]
+    assert cache.get_stats()["hits"] == 2
+
+
+def test_failed_loads_are_not_cached():
+    cache = QueryCache()
+
+    def boom():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("q", {}, ("metrics",), boom)
+    assert cache.get_or_load("q", {}, ("metrics",), lambda: 42) == 42
+
+
+def test_database_service_reads_served_from_cache_until_write(tmp_path, monkeypatch):
+    monkeypatch.setenv("METRICS_ROLLUPS", "false")
+    url = f"sqlite:///{tmp_path / 'qc.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(METRICS_DDL))
+    engine.dispose()
+
+    service = DatabaseService(database_url=url)
+    # A per-process cache is only allowed when explicitly single-process
+    monkeypatch.delenv("QUERY_CACHE_SINGLE_PROCESS", raising=False)
+    assert not service.enable_query_cache(redis_url="")
+    assert service.query_cache is None
+    assert service.enable_query_cache(redis_url="", single_process=True)
+    service.store_metrics_batch([{"cpu_usage": float(i)} for i in range(5)])
+
+    statements = []
+    event.listen(
+        service.engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+
+    first = service.get_latest_metrics(3)
+    assert service.get_latest_metrics(3) == first
+    assert service.get_metrics_count() == 5
+    assert service.get_metrics_count() == 5
+    reads = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(reads) == 2
+
+    service.store_metrics({"cpu_usage": 99.0})
+    assert service.get_metrics_count() == 6
+    assert service.get_latest_metrics(1)[0]["cpu_usage"] == 99.0
@@ -0,0 +1,207 @@
+"""
+Query-plan regression suite for the hot read queries.
+
+Seeds a large synthetic dataset, applies the hot-query indexes and fails
+if any hot query is planned as a full table scan. Set QUERY_PLAN_ROWS to
+change the dataset size; run with ``-s`` to see plans and timings.
+"""
+
+import os
+import random
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, text
+
+import app.query_indexes as query_indexes
+from app.database_integration import (
+    MODEL_INFO_SQL,
+    PERFORMANCE_SUMMARY_SQL,
+    SHARD_SCHEMA,
+    DatabaseService,
+)
+from app.query_indexes import (
+    HOT_QUERY_INDEXES,
+    apply_indexes,
+    explain,
+    full_scans,
+    index_ddl,
+    profile_queries,
+)
+from app.utils.pagination import encode_cursor
+
+ROWS = int(os.getenv("QUERY_PLAN_ROWS", "200000"))
+
+MODEL_DDL = (
+    """
+    CREATE TABLE ml_models (
+        id INTEGER PRIMARY KEY, model_name TEXT, model_type TEXT,
+        description TEXT, is_active INTEGER
+    )
+    """,
+    """
+    CREATE TABLE ml_model_versions (
+        id INTEGER PRIMARY KEY, model_id INTEGER, version TEXT,
+        accuracy REAL, precision_score REAL, recall_score REAL, f1_score REAL,
+        training_timestamp TEXT, is_deployed INTEGER, created_at TEXT
+    )
+    """,
+)
+
+
+@pytest.fixture(scope="module")
+def seeded(tmp_path_factory):
+    path = tmp_path_factory.mktemp("plans") / "hot.db"
+    engine = create_engine(f"sqlite:///{path}")
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(text(SHARD_SCHEMA["metrics"]))
+        for ddl in MODEL_DDL:
+            conn.execute(text(ddl))
+        conn.execute(
+            text(
+                "INSERT INTO metrics (timestamp, source, cpu_usage, memory_usage, "
+                "disk_usage, response_time, is_anomaly, anomaly_score) VALUES "
+                "(:timestamp, :source, :cpu, :mem, :disk, :rt, :anomaly, :score)"
+            ),
+            [
+                {
+                    "timestamp": (now - timedelta(seconds=30 * (ROWS - i))).isoformat(),
+                    "source": f"host-{i % 50}",
+                    "cpu": rng.uniform(0, 100),
+                    "mem": rng.uniform(0, 100),
+                    "disk": rng.uniform(0, 100),
+                    "rt": rng.uniform(0, 2),
+                    "anomaly": 1 if rng.random() < 0.01 else 0,
+                    "score": rng.random(),
+                }
+                for i in range(ROWS)
+            ],
+        )
+        conn.execute(
+            text(
+                "INSERT INTO ml_models VALUES (:id, :name, 'isolation_forest', '', :active)"
+            ),
+            [
+                {"id": i, "name": f"model-{i}", "active": int(i % 10 == 0)}
+                for i in range(1, 501)
+            ],
+        )
+        conn.execute(
+            text(
+                "INSERT INTO ml_model_versions (model_id, version, accuracy, is_deployed, created_at) "
+                "VALUES (:model_id, :version, 0.9, :deployed, :created_at)"
+            ),
+            [
+                {
+                    "model_id": i % 500 + 1,
+                    "version": f"1.{i}",
+                    "deployed": int(i % 25 == 0),
+                    "created_at": (now - timedelta(hours=i)).isoformat(),
+                }
+                for i in range(20000)
+            ],
+        )
+
+    assert len(apply_indexes(engine)) == len(HOT_QUERY_INDEXES)
+    yield engine
+    engine.dispose()
+
+
+def hot_queries(now: datetime):
+    service = DatabaseService()
+    cursor = encode_cursor((now - timedelta(days=3)).isoformat(), ROWS // 2)
+    queries = {}
+    for name, cur, anomalies in (
+        ("latest_metrics", None, False),
+        ("latest_metrics_next_page", cursor, False),
+        ("anomalies", None, True),
+        ("anomalies_next_page", cursor, True),
+    ):
+        sql, params = service._history_query(cur, anomalies, limited=True)
+        queries[name] = (sql, {**params, "limit": 51})
+    queries["summary_24h"] = (PERFORMANCE_SUMMARY_SQL, {})
+    queries["model_info"] = (MODEL_INFO_SQL, {})
+    return queries
+
+
+def test_hot_queries_use_indexes(seeded):
+    report = profile_queries(seeded, hot_queries(datetime.utcnow()))
+
+    for name, result in report.items():
+        print(
+            f"{name:<26}{result['median_ms']:>10.3f} ms  {' | '.join(result['plan'])}"
+        )
+
+    scans = {name: r["full_scans"] for name, r in report.items() if r["full_scans"]}
+    assert not scans, f"Hot queries fell back to full table scans: {scans}"
+
+
+def test_detects_full_scan_without_indexes():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(SHARD_SCHEMA["metrics"]))
+    sql, params = DatabaseService()._history_query(None, True, limited=True)
+    assert full_scans(explain(engine, sql, {**params, "limit": 10})) == ["SCAN metrics"]
+
+
+def test_index_ddl_per_dialect():
+    anomalies = HOT_QUERY_INDEXES[1]
+    assert index_ddl(anomalies, "postgresql") == (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_metrics_anomalies_timestamp_id "
+        "ON metrics (timestamp, id) "
+        "INCLUDE (source, cpu_usage, memory_usage, anomaly_score, response_time) "
+        "WHERE is_anomaly = true"
+    )
+    assert index_ddl(anomalies, "sqlite").endswith(
+        "response_time) WHERE is_anomaly = 1"
+    )
+
+
+def test_partitioned_parents_are_indexed_without_concurrently(monkeypatch):
+    anomalies = HOT_QUERY_INDEXES[1]
+    assert index_ddl(anomalies, "postgresql", partitioned=True) == (
+        "CREATE INDEX IF NOT EXISTS idx_metrics_anomalies_timestamp_id "
+        "ON metrics (timestamp, id) "
+        "INCLUDE (source, cpu_usage, memory_usage, anomaly_score, response_time) "
+        "WHERE is_anomaly = true"
+    )
+
+    inspector = MagicMock()
+    inspector.get_table_names.return_value = ["metrics", "ml_models"]
+    inspector.get_indexes.return_value = []
+    monkeypatch.setattr(query_indexes, "inspect", lambda engine: inspector)
+
+    engine = MagicMock()
+    engine.dialect.name = "postgresql"
+    conn = engine.connect.return_value.execution_options.return_value
+    conn = conn.__enter__.return_value
+    executed = []
+
+    def execute(stmt, params=None):
+        sql = str(stmt)
+        executed.append(sql)
+        result = MagicMock()
+        if "pg_partitioned_table" in sql:
+            result.__iter__.return_value = iter([("metrics",)])
+        # Built on the heap table before it became the legacy partition
+        owned = params == {"name": "idx_metrics_timestamp_id"}
+        result.scalar.return_value = "metrics_legacy" if owned else None
+        return result
+
+    conn.execute.side_effect = execute
+    applied = apply_indexes(engine, analyze=False)
+
+    assert applied == [spec.name for spec in HOT_QUERY_INDEXES[:3]]
+    ddl = [sql for sql in executed if sql.startswith(("CREATE INDEX", "ALTER INDEX"))]
+    assert ddl == [
+        "ALTER INDEX idx_metrics_timestamp_id "
+        "RENAME TO idx_metrics_timestamp_id_metrics_legacy",
+        index_ddl(HOT_QUERY_INDEXES[0], "postgresql", partitioned=True),
+        index_ddl(HOT_QUERY_INDEXES[1], "postgresql", partitioned=True),
+        index_ddl(HOT_QUERY_INDEXES[2], "postgresql"),
+    ]
+    assert "CONCURRENTLY" not in ddl[1] and "CONCURRENTLY" in ddl[3]
@@ -0,0 +1,121 @@
+"""
+Tests for the GCRA rate limiter and the endpoint decorators built on it.
+"""
+
+import pytest
+from flask import Flask
+
+from app.gcra_limiter import GCRALimiter, per_minute_and_hour
+from app.rate_limiting import RateLimiter, rate_limit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_steady_rate():
+    clock = FakeClock()
+    limiter = GCRALimiter(clock=clock)
+    limits = ((3, 60.0),)
+
+    results = [limiter.check("a", limits) for _ in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results[:3]] == [2, 1, 0]
+    # One token comes back every 20 seconds
+    assert results[3].retry_after == pytest.approx(20)
+
+    clock.now += 19.9
+    assert not limiter.check("a", limits).allowed
+    clock.now += 0.1
+    assert limiter.check("a", limits).allowed
+    # Other clients are unaffected
+    assert limiter.check("b", limits).remaining == 2
+
+
+def test_every_window_must_admit():
+    clock = FakeClock()
+    limiter = GCRALimiter(clock=clock)
+    limits = per_minute_and_hour(per_minute=5, per_hour=6)
+
+    assert all(limiter.is_allowed("a", 5, 6) for _ in range(5))
+    assert not limiter.is_allowed("a", 5, 6)
+    # The minute window has refilled, the hour window has one token
+    clock.now += 60
+    result = limiter.check("a", limits)
+    assert result.allowed and result.limit == 6 and result.remaining == 0
+    denied = limiter.check("a", limits)
+    assert not denied.allowed and denied.period == 3600.0
+    # The first hour token comes back 600s after the first request
+    assert denied.retry_after == pytest.approx(540)
+
+
+def test_denied_requests_take_no_tokens_and_peek_is_free():
+    clock = FakeClock()
+    limiter = GCRALimiter(clock=clock)
+    limits = ((2, 10.0),)
+
+    limiter.check("a", limits)
+    limiter.check("a", limits)
+    for _ in range(10):
+        assert not limiter.check("a", limits).allowed
+    assert limiter.peek("a", limits).remaining == 0
+    clock.now += 5
+    assert limiter.peek("a", limits).remaining == 1
+    assert limiter.check("a", limits).allowed
+
+
+def test_idle_clients_are_evicted_and_table_is_bounded():
+    clock = FakeClock()
+    limiter = GCRALimiter(max_clients=100, clock=clock)
+    limits = ((10, 1.0),)
+
+    for i in range(1000):
+        clock.now += 0.01
+        limiter.check(f"client-{i}", limits)
+        assert len(limiter) <= 100
+    # Each client idles after 0.1s, so only the last few are kept
+    assert len(limiter) <= 12
+    clock.now += 1
+    assert limiter.purge_idle() > 0
+    assert len(limiter) == 0
+    assert limiter.get_stats()["evicted_full"] == 0
+
+    for i in range(150):
+        limiter.check(f"busy-{i}", ((1, 3600.0),))
+    assert len(limiter) == 100
+    assert limiter.get_stats()["evicted_full"] == 50
+
+
+def test_rate_limit_decorator_sets_headers_without_double_counting():
+    app = Flask(__name__)
+    limiter = RateLimiter()
+    limiter.limits["default"] = {"requests": 3, "window": 60}
+
+    import app.rate_limiting as rate_limiting
+
+    original = rate_limiting.rate_limiter
+    rate_limiting.rate_limiter = limiter
+    try:
+
+        @app.get("/items")
+        @rate_limit()
+        def items():
+            return {"ok": True}
+
+        rate_limiting.configure_rate_limiting(app)
+        client = app.test_client()
+        responses = [client.get("/items") for _ in range(4)]
+    finally:
+        rate_limiting.rate_limiter = original
+
+    assert [r.status_code for r in responses] == [200, 200, 200, 429]
+    assert [r.headers["X-RateLimit-Remaining"] for r in responses[:3]] == [
+        "2",
+        "1",
+        "0",
+    ]
+    assert int(responses[3].headers["Retry-After"]) == 20
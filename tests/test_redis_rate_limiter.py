@@ -0,0 +1,117 @@
+"""
+Tests for the Redis-backed distributed rate limiter.
+"""
+
+import os
+
+import pytest
+
+redis = pytest.importorskip("redis")
+
+from app.gcra_limiter import GCRALimiter, create_rate_limiter  # noqa: E402
+from app.redis_rate_limiter import RedisGCRALimiter  # noqa: E402
+
+REDIS_URL = os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+@pytest.fixture
+def redis_client():
+    client = redis.from_url(REDIS_URL, socket_connect_timeout=0.5)
+    try:
+        client.ping()
+    except Exception:
+        pytest.skip(f"Redis not reachable at {REDIS_URL}")
+    yield client
+    RedisGCRALimiter(redis_client=client, namespace="test").reset()
+
+
+# Nothing listens on port 1
+UNREACHABLE_URL = "redis://127.0.0.1:1/0"
+
+
+def test_workers_share_one_limit(redis_client):
+    workers = [
+        RedisGCRALimiter(redis_client=redis_client, namespace="test", local_batch=1)
+        for _ in range(3)
+    ]
+    limits = ((5, 60.0), (8, 3600.0))
+
+    results = [workers[i % 3].check("client", limits) for i in range(6)]
+    assert [r.allowed for r in results] == [True] * 5 + [False]
+    assert [r.remaining for r in results[:5]] == [4, 3, 2, 1, 0]
+    assert results[5].retry_after == pytest.approx(12, abs=0.5)
+    # The state lives in Redis and expires once the client is idle
+    assert (
+        0 < redis_client.pttl("smartcloudops:ratelimit:test:client") <= 5 * 450 * 1000
+    )
+    assert workers[0].peek("other", limits).remaining == 5
+
+
+def test_local_leases_save_round_trips(redis_client):
+    limiter = RedisGCRALimiter(
+        redis_client=redis_client, namespace="test", local_batch=10
+    )
+    limits = ((1000, 60.0),)
+
+    results = [limiter.check("burst", limits) for _ in range(25)]
+    assert all(r.allowed for r in results)
+    assert [r.remaining for r in results[:2]] == [999, 998]
+    stats = limiter.get_stats()
+    assert stats["round_trips"] == 3 and stats["local_hits"] == 22
+
+    # Small limits are never leased, so they stay exact across workers
+    assert limiter._lease_size(((10, 60.0),)) == 1
+    other = RedisGCRALimiter(
+        redis_client=redis_client, namespace="test", local_batch=10
+    )
+    assert [other.check("small", ((2, 60.0),)).allowed for _ in range(3)] == [
+        True,
+        True,
+        False,
+    ]
+    # Denials are answered locally until the retry time
+    assert not limiter.check("small", ((2, 60.0),)).allowed
+    assert not limiter.check("small", ((2, 60.0),)).allowed
+    assert limiter.get_stats()["round_trips"] == 4
+
+
+def test_requests_costing_several_tokens_are_all_or_nothing(redis_client):
+    limiter = RedisGCRALimiter(redis_client=redis_client, namespace="test")
+    limits = ((4, 60.0),)
+    assert limiter.check("bulk", limits, cost=3).remaining == 1
+    assert not limiter.check("bulk", limits, cost=2).allowed
+    assert limiter.peek("bulk", limits).remaining == 1
+
+
+@pytest.mark.parametrize(
+    "fail_mode, expected",
+    [
+        ("open", [True, True, True, True]),
+        ("closed", [False, False, False, False]),
+        ("local", [True, True, True, False]),
+    ],
+)
+def test_unreachable_redis_fails_as_configured(fail_mode, expected):
+    limiter = RedisGCRALimiter(redis_url=UNREACHABLE_URL, fail_mode=fail_mode)
+    results = [limiter.check("client", ((3, 60.0),)) for _ in range(4)]
+
+    assert [r.allowed for r in results] == expected
+    assert all(r.retry_after > 0 for r in results if not r.allowed)
+    stats = limiter.get_stats()
+    # One failed round trip, then Redis is left alone until the retry interval
+    assert stats["redis_errors"] == 1 and stats["fail_mode_decisions"] == 4
+    assert not stats["redis_up"]
+
+
+def test_backend_is_selected_from_environment(monkeypatch):
+    monkeypatch.delenv("RATE_LIMIT_BACKEND", raising=False)
+    assert isinstance(create_rate_limiter(), GCRALimiter)
+
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "redis")
+    monkeypatch.setenv("RATE_LIMIT_REDIS_URL", UNREACHABLE_URL)
+    limiter = create_rate_limiter("api")
+    assert isinstance(limiter, RedisGCRALimiter)
+    assert limiter.prefix == "smartcloudops:ratelimit:api:"
+
+    with pytest.raises(ValueError):
+        RedisGCRALimiter(redis_url=UNREACHABLE_URL, fail_mode="sometimes")
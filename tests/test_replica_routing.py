@@ -0,0 +1,113 @@
+"""
+Tests for read/write splitting and replica routing.
+"""
+
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.database_integration import DatabaseService
+from app.database_pool import DatabasePool
+
+
+def _make_node(path, name):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE node (name TEXT)")
+    conn.execute("INSERT INTO node VALUES (?)", (name,))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def pool(tmp_path):
+    paths = {n: str(tmp_path / f"{n}.db") for n in ("primary", "r1", "r2")}
+    for name, path in paths.items():
+        _make_node(path, name)
+    db_pool = DatabasePool(
+        "sqlite",
+        database=paths["primary"],
+        replicas=[
+            {"name": "r1", "database": paths["r1"]},
+            {"name": "r2", "database": paths["r2"]},
+        ],
+        read_your_writes_window=60,
+    )
+    yield db_pool
+    db_pool.close()
+
+
+def _who(db_pool, **kwargs):
+    return db_pool.execute_query("SELECT name FROM node", **kwargs)[0]["name"]
+
+
+def test_reads_go_to_least_outstanding_replica(pool):
+    assert _who(pool) in ("r1", "r2")
+    assert _who(pool, use_primary=True) == "primary"
+
+    busy = pool.router.acquire()
+    other = {"r1": "r2", "r2": "r1"}[busy.name]
+    assert {_who(pool) for _ in range(3)} == {other}
+    pool.router.release(busy)
+
+    stats = pool.get_stats()["routing"]
+    assert sum(r["requests"] for r in stats["replicas"]) == 5
+    assert all(r["outstanding"] == 0 for r in stats["replicas"])
+
+
+def test_read_your_writes_window_pins_reads_to_primary(pool):
+    pool.begin_request()
+    pool.execute_query("INSERT INTO node VALUES ('written')")
+
+    rows = pool.execute_query("SELECT name FROM node WHERE name = 'written'")
+    assert rows == [{"name": "written"}]
+
+    pool.begin_request()
+    assert _who(pool) in ("r1", "r2")
+
+
+def test_failed_replica_falls_back_and_is_marked_unhealthy(tmp_path):
+    _make_node(str(tmp_path / "primary.db"), "primary")
+    sqlite3.connect(str(tmp_path / "broken.db")).close()
+    db_pool = DatabasePool(
+        "sqlite",
+        database=str(tmp_path / "primary.db"),
+        replicas=[{"name": "broken", "database": str(tmp_path / "broken.db")}],
+    )
+
+    assert _who(db_pool) == "primary"
+    replica = db_pool.get_stats()["routing"]["replicas"][0]
+    assert replica["healthy"] is False
+    assert replica["errors"] == 1
+    assert _who(db_pool) == "primary"
+    db_pool.close()
+
+
+def test_database_service_routes_history_reads_to_replica(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_READ_YOUR_WRITES_SECONDS", "0")
+    ddl = (
+        "CREATE TABLE metrics (id INTEGER PRIMARY KEY, timestamp TEXT, source TEXT, "
+        "cpu_usage REAL, memory_usage REAL, disk_usage REAL, response_time REAL, "
+        "is_anomaly INTEGER, anomaly_score REAL)"
+    )
+    urls = {}
+    for name in ("primary", "replica"):
+        urls[name] = f"sqlite:///{tmp_path / name}.db"
+        engine = create_engine(urls[name])
+        with engine.begin() as conn:
+            conn.execute(text(ddl))
+            conn.execute(
+                text(
+                    "INSERT INTO metrics (timestamp, source) VALUES ('2026-01-01', :s)"
+                ),
+                {"s": name},
+            )
+        engine.dispose()
+
+    service = DatabaseService(
+        database_url=urls["primary"], replica_urls=[urls["replica"]]
+    )
+
+    assert service.get_latest_metrics(5)[0]["source"] == "replica"
+    assert service.get_metrics_count() == 1
+    assert service.health_check()["replication"]["replicas"][0]["requests"] == 2
@@ -0,0 +1,86 @@
+"""
+Tests for embedded (WAL, single-writer) SQLite mode.
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from app.database_integration import DatabaseService
+
+METRICS_DDL = """
+CREATE TABLE metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT, source TEXT, cpu_usage REAL, memory_usage REAL,
+    disk_usage REAL, load_1m REAL, load_5m REAL, load_15m REAL,
+    disk_io_read INTEGER, disk_io_write INTEGER, network_rx INTEGER,
+    network_tx INTEGER, response_time REAL, error_rate REAL,
+    is_anomaly INTEGER, anomaly_score REAL, created_by INTEGER
+)
+"""
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_EMBEDDED", "true")
+    monkeypatch.setenv("DB_SPILL_DIR", str(tmp_path / "spill"))
+    monkeypatch.setenv("PREDICTION_SAMPLE_EVERY", "10")
+    url = f"sqlite:///{tmp_path / 'edge.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(METRICS_DDL))
+    engine.dispose()
+
+    svc = DatabaseService(database_url=url)
+    yield svc
+    svc.metrics_writer.close()
+    svc.predictions_writer.close()
+    svc.sqlite_writer.close()
+
+
+def test_embedded_mode_uses_wal_and_single_writer(service):
+    assert service.embedded
+    assert service.metrics_writer is not None
+    with service.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+
+
+def test_reads_use_read_only_pool(service):
+    assert (
+        service.store_metrics_batch([{"cpu_usage": float(i)} for i in range(20)]) == 20
+    )
+    assert service.flush_writes()
+
+    assert service.get_metrics_count() == 20
+    assert [r["cpu_usage"] for r in service.get_latest_metrics(2)] == [19.0, 18.0]
+
+    with service.read_engine.connect() as conn:
+        with pytest.raises(Exception):
+            conn.execute(text("DELETE FROM metrics"))
+
+
+def test_every_write_runs_on_the_single_writer_thread(service):
+    writers = []
+
+    @event.listens_for(service.engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        if not statement.lstrip().upper().startswith(("SELECT", "PRAGMA")):
+            writers.append(threading.current_thread().name)
+
+    service.store_metrics_batch([{"cpu_usage": float(i)} for i in range(5)])
+    service.store_metrics({"cpu_usage": 50.0})
+    for i in range(3):
+        service.store_prediction(
+            {"source": "edge"}, {"anomaly": i == 0, "confidence": 0.8}
+        )
+    assert service.flush_writes()
+
+    assert service.get_metrics_count() == 6
+    # Metric inserts, rollup upserts, prediction inserts and counter upserts
+    assert len(writers) >= 4
+    assert set(writers) == {"sqlite-writer"}
+    # The bulk writers have no flusher threads of their own
+    assert service.metrics_writer._thread is None
+    assert service.predictions_writer._thread is None